@@ -23,12 +23,18 @@ from database.models import ChatUser, ChatConversation, ChatDocument, ChatFeedba
 from api.auth_endpoints import get_current_user
 from database.repositories import DocumentRepository
 from database.cache import DocumentCache
+from database.write_behind import WriteBehindBuffer
 from database.vector_search import VectorSearchService
-from rag.question_processor import QuestionProcessor, ConversationContext, ProcessedQuestion
+from rag.question_processor import QuestionProcessor, ConversationContext, ProcessedQuestion, QuestionCategory
 from rag.context_builder import ContextBuilder
 from rag.response_generator import ResponseGenerator
+from rag.admission import DEGRADATION_PROFILES, DegradationLevel
+from rag.precomputed_answers import PrecomputedAnswerLookup
+from rag.query_embedding_cache import QueryEmbeddingCache
 from etl.vector_embedder import VectorEmbedder
+from etl.job_events import JobEventBus, RESYNC_EVENT
 from monitoring.metrics import inc as metrics_inc, observe as metrics_observe
+from monitoring.deadline import Deadline, DeadlineExceeded, record_deadline
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +72,8 @@ class ChatResponse(BaseModel):
     created_at: str
     # Analytics/feedback
     ab_variant: Optional[str] = None
+    # Seconds spent per pipeline stage (question, context, generation, persist)
+    stage_timings: Optional[Dict[str, float]] = None
 
 class ConversationHistoryItem(BaseModel):
     """Single conversation history item"""
@@ -110,12 +118,12 @@ async def get_rag_components() -> tuple:
         # Initialize vector embedder (singleton for cache reuse)
         vector_embedder = VectorEmbedder.instance()
         
-        # Initialize question processor
-        question_processor = QuestionProcessor(vector_embedder)
+        # Initialize question processor with the shared query embedding cache
+        question_processor = QuestionProcessor(vector_embedder, QueryEmbeddingCache.instance())
         
         # These components will be initialized with sessions when needed
-        # Initialize response generator (doesn't need DB session)
-        response_generator = ResponseGenerator()
+        # Response generator is process-wide so conversation memory is shared (doesn't need DB session)
+        response_generator = ResponseGenerator.instance()
         
         return (
             question_processor,
@@ -129,6 +137,37 @@ async def get_rag_components() -> tuple:
             detail="RAG service initialization failed"
         )
 
+async def _record_stage(stage_timings: Dict[str, float], stage: str, started: datetime) -> None:
+    """Record the duration of one pipeline stage."""
+    elapsed = (datetime.now() - started).total_seconds()
+    stage_timings[stage] = elapsed
+    await metrics_observe("chat_stage_seconds", elapsed, labels={"stage": stage})
+
+async def _save_direct_answer(
+    user: ChatUser,
+    user_id: str,
+    question: str,
+    answer: str,
+    confidence: float,
+    path: str,
+    response_generator: ResponseGenerator,
+    processing_time: float
+) -> ChatConversation:
+    """Persist a conversation answered without LLM generation ("precomputed" or "lookup")."""
+    conversation = ChatConversation(
+        user_id=user.user_id,
+        question=question,
+        response=answer,
+        retrieved_doc_ids=[],
+        confidence_score=confidence,
+        processing_time=processing_time,
+        prompt_template=path
+    )
+    await WriteBehindBuffer.instance().add(conversation)
+    await response_generator.remember_turn(user_id, question, answer)
+    await metrics_observe("chat_processing_seconds", processing_time, labels={"path": path})
+    return conversation
+
 def check_rate_limit(user_id: str) -> bool:
     """Check if user has exceeded rate limit"""
     current_time = datetime.now().timestamp()
@@ -178,6 +217,40 @@ async def get_user_by_id(user_id: str, db: AsyncSession) -> ChatUser:
             detail=f"Invalid user ID format: {user_id}"
         )
 
+def _stored_category(value: Optional[str]) -> Optional[QuestionCategory]:
+    try:
+        return QuestionCategory(value)
+    except ValueError:
+        return None
+
+def _conversation_context_from_history(user_id: str, recent_conversations: List[ChatConversation]) -> ConversationContext:
+    """
+    Conversation context for the HTTP endpoint from the latest stored turns (newest first).
+
+    Like the WebSocket context, the lists run oldest to newest. The stored
+    question categories let the follow-up check notice a change of topic.
+    """
+    history = list(reversed(recent_conversations))
+    categories = [_stored_category(conv.question_category) for conv in history]
+    return ConversationContext(
+        user_id=user_id,
+        previous_questions=[conv.question for conv in history],
+        previous_categories=[category for category in categories if category is not None],
+        current_topic=categories[-1],
+        conversation_depth=len(history),
+        previous_doc_ids=[str(doc_id) for doc_id in history[-1].retrieved_doc_ids or []]
+    )
+
+async def _conversation_owner(conversation_id: UUID) -> Optional[UUID]:
+    """user_id of a conversation, including one still queued for write-behind."""
+    pending = WriteBehindBuffer.instance().get_pending(ChatConversation.__table__, conversation_id)
+    if pending is not None:
+        return pending["user_id"]
+    async with db_manager.get_async_session() as db:
+        return await db.scalar(
+            select(ChatConversation.user_id).where(ChatConversation.conversation_id == conversation_id)
+        )
+
 @router.post(
     "/feedback",
     summary="Submit feedback for a conversation",
@@ -188,25 +261,39 @@ async def submit_feedback(
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     try:
-        async with db_manager.get_async_session() as db:
-            # Verify authenticated user matches feedback user
-            if current_user["user_id"] != payload.user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Access denied: You can only submit feedback for your own conversations"
-                )
-            
-            feedback = ChatFeedback(
-                conversation_id=UUID(payload.conversation_id),
-                user_id=UUID(payload.user_id),
-                rating=payload.rating,
-                helpful=payload.helpful,
-                comment=payload.comment,
-                tags=payload.tags or []
+        # Verify authenticated user matches feedback user
+        if current_user["user_id"] != payload.user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied: You can only submit feedback for your own conversations"
             )
-            db.add(feedback)
-            await db.commit()
-            return {"status": "ok"}
+        
+        # Feedback is written behind the reply, so check the conversation now rather than fail the FK later
+        conversation_id = UUID(payload.conversation_id)
+        user_id = UUID(payload.user_id)
+        if await _conversation_owner(conversation_id) != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        
+        feedback = ChatFeedback(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            rating=payload.rating,
+            helpful=payload.helpful,
+            comment=payload.comment,
+            tags=payload.tags or []
+        )
+        await WriteBehindBuffer.instance().add(feedback)
+        return {"status": "ok"}
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid conversation_id or user_id"
+        )
     except Exception as e:
         logger.error(f"Failed to submit feedback: {e}")
         raise HTTPException(status_code=500, detail="피드백 저장에 실패했습니다.")
@@ -240,6 +327,8 @@ async def ask_question(
         HTTPException: If processing fails or rate limit exceeded
     """
     start_time = datetime.now()
+    # Budget shared by embedding, vector search and generation
+    deadline = Deadline.for_chat_request()
     
     try:
         # Metrics: request received
@@ -292,8 +381,10 @@ async def ask_question(
             
             # Initialize database-dependent components
             vector_search_service = VectorSearchService(db)
-            context_builder = ContextBuilder(vector_search_service)
             document_repository = DocumentRepository(db, DocumentRepository.get_global_cache())
+            context_builder = ContextBuilder(
+                vector_search_service, document_repository=document_repository, question_processor=question_processor
+            )
         
             # Get conversation context if conversation_id provided
             conversation_context = None
@@ -309,29 +400,92 @@ async def ask_question(
                     recent_conversations = result.scalars().all()
                     
                     if recent_conversations:
-                        conversation_context = ConversationContext(
-                            user_id=request.user_id,
-                            previous_questions=[conv.question for conv in recent_conversations],
-                            previous_categories=[],  # Would need to store this
-                            conversation_depth=len(recent_conversations)
-                        )
+                        conversation_context = _conversation_context_from_history(request.user_id, recent_conversations)
                 except ValueError:
                     logger.warning(f"Invalid conversation_id format: {request.conversation_id}")
             
-            # Process the question
+            stage_timings: Dict[str, float] = {}
             q_start = datetime.now()
+            
+            # Answer pure lookups (a score, a ranked tendency, ...) straight from the stored documents
+            lookup = await question_processor.try_lookup_fast_path(
+                request.question,
+                lambda: document_repository.get_user_document_snapshots(user.user_id)
+            )
+            if lookup is not None:
+                await _record_stage(stage_timings, "question", q_start)
+                processing_time = (datetime.now() - start_time).total_seconds()
+                conversation = await _save_direct_answer(
+                    user, request.user_id, request.question, lookup.text, 1.0,
+                    "lookup", response_generator, processing_time
+                )
+                return ChatResponse(
+                    conversation_id=str(conversation.conversation_id),
+                    user_id=request.user_id,
+                    question=request.question,
+                    response=lookup.text,
+                    retrieved_documents=[],
+                    processing_time=processing_time,
+                    confidence_score=1.0,
+                    created_at=conversation.created_at.isoformat(),
+                    stage_timings=stage_timings
+                )
+            
+            # Small corpora are sent whole, so the question needs no embedding
+            corpus_documents = None
+            if response_generator.admission.degradation_level() == DegradationLevel.NORMAL:
+                corpus_documents = await context_builder.load_small_corpus(user.user_id, doc_count)
+            
+            # Process the question
             processed_question = await question_processor.process_question(
                 request.question,
                 request.user_id,
-                conversation_context
+                conversation_context,
+                embed=corpus_documents is None,
+                deadline=deadline
             )
+            await _record_stage(stage_timings, "question", q_start)
             
-            # Build context from retrieved documents
+            # Serve a precomputed answer when the question closely matches one (not for follow-ups)
+            if not processed_question.context_from_previous:
+                match = await PrecomputedAnswerLookup(db).find(request.user_id, processed_question.embedding_vector)
+                if match is not None:
+                    processing_time = (datetime.now() - start_time).total_seconds()
+                    conversation = await _save_direct_answer(
+                        user, request.user_id, request.question, match.answer, match.similarity,
+                        "precomputed", response_generator, processing_time
+                    )
+                    logger.info(
+                        f"Served precomputed answer for user {request.user_id} "
+                        f"(similarity={match.similarity:.3f}, doc_type={match.doc_type})"
+                    )
+                    return ChatResponse(
+                        conversation_id=str(conversation.conversation_id),
+                        user_id=request.user_id,
+                        question=request.question,
+                        response=match.answer,
+                        retrieved_documents=[],
+                        processing_time=processing_time,
+                        confidence_score=match.similarity,
+                        created_at=conversation.created_at.isoformat(),
+                        stage_timings=stage_timings
+                    )
+            
+            # Build context from retrieved documents, reserving budget for conversation memory
+            stage_start = datetime.now()
+            memory_block = await response_generator.prepare_memory_block(request.user_id)
+            profile = DEGRADATION_PROFILES[response_generator.admission.degradation_level()]
             context = await context_builder.build_context(
                 processed_question,
                 request.user_id,
-                conversation_context.previous_questions[-1] if conversation_context else None
+                conversation_context.previous_questions[-1] if conversation_context else None,
+                memory_block=memory_block,
+                max_documents=profile.max_documents,
+                previous_doc_ids=conversation_context.previous_doc_ids if conversation_context else None,
+                corpus_documents=corpus_documents,
+                deadline=deadline
             )
+            await _record_stage(stage_timings, "context", stage_start)
             
             # Log context building results for debugging
             logger.info(
@@ -342,17 +496,21 @@ async def ask_question(
             )
             
             # Generate response
+            stage_start = datetime.now()
             response = await response_generator.generate_response(
                 context,
                 request.user_id,
-                conversation_context
+                conversation_context,
+                deadline=deadline
             )
+            await _record_stage(stage_timings, "generation", stage_start)
             
             # Calculate processing time
             processing_time = (datetime.now() - start_time).total_seconds()
             await metrics_observe("chat_processing_seconds", processing_time)
             
             # Save conversation to database
+            stage_start = datetime.now()
             conversation = ChatConversation(
                 user_id=user.user_id,
                 question=request.question,
@@ -366,9 +524,9 @@ async def ask_question(
                 ab_variant=request.conversation_id[-1] if request.conversation_id else None
             )
             
-            db.add(conversation)
-            await db.commit()
-            await db.refresh(conversation)
+            # Ids and created_at are assigned client-side; the insert happens behind the reply
+            await WriteBehindBuffer.instance().add(conversation)
+            await _record_stage(stage_timings, "persist", stage_start)
             
             # Format retrieved documents for response
             retrieved_docs = []
@@ -390,7 +548,8 @@ async def ask_question(
                 processing_time=processing_time,
                 confidence_score=response.confidence_score,
                 created_at=conversation.created_at.isoformat(),
-                ab_variant=conversation.ab_variant
+                ab_variant=conversation.ab_variant,
+                stage_timings=stage_timings
             )
             
             logger.info(
@@ -403,6 +562,13 @@ async def ask_question(
         
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        logger.warning(f"Request deadline exceeded for user {request.user_id} during {e.stage}")
+        await record_deadline(deadline)
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="질문 처리 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."
+        )
     except Exception as e:
         logger.error(f"Error processing question: {e}")
         await metrics_inc("chat_request_errors_total")
@@ -534,6 +700,19 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+async def _forward_etl_progress(user_id: str):
+    """Push the user's ETL job progress to their chat WebSocket while it is open"""
+    async with JobEventBus.instance().subscribe(user_id=user_id) as events:
+        while user_id in manager.active_connections:
+            event = await events.get()
+            if event.get("type") == RESYNC_EVENT:
+                continue
+            await manager.send_message(user_id, WebSocketMessage(
+                type="etl_progress",
+                data=event,
+                timestamp=datetime.now().isoformat()
+            ))
+
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
@@ -551,6 +730,7 @@ async def websocket_endpoint(
         db: Database session
     """
     await manager.connect(websocket, user_id)
+    progress_task = asyncio.create_task(_forward_etl_progress(user_id))
     
     try:
         # Get database session
@@ -572,8 +752,13 @@ async def websocket_endpoint(
             
             # Initialize database-dependent components
             vector_search_service = VectorSearchService(db)
-            context_builder = ContextBuilder(vector_search_service)
             document_repository = DocumentRepository(db, DocumentRepository.get_global_cache())
+            context_builder = ContextBuilder(
+                vector_search_service, document_repository=document_repository, question_processor=question_processor
+            )
+            
+            # Per-connection turn history, used to detect follow-ups
+            conversation_context: Optional[ConversationContext] = None
         
             while True:
                 # Receive message from client
@@ -613,21 +798,82 @@ async def websocket_endpoint(
                         await manager.send_message(user_id, status_msg)
                         
                         start_time = datetime.now()
+                        deadline = Deadline.for_chat_request()
                         
                         # Process question using RAG pipeline
-                        processed_question = await question_processor.process_question(
-                            question, user_id
+                        stage_timings: Dict[str, float] = {}
+                        stage_start = datetime.now()
+                        lookup = await question_processor.try_lookup_fast_path(
+                            question,
+                            lambda: document_repository.get_user_document_snapshots(user.user_id)
                         )
+                        match = None
+                        corpus_documents = None
+                        if lookup is None:
+                            if response_generator.admission.degradation_level() == DegradationLevel.NORMAL:
+                                corpus_documents = await context_builder.load_small_corpus(user.user_id)
+                            processed_question = await question_processor.process_question(
+                                question, user_id, conversation_context,
+                                embed=corpus_documents is None,
+                                deadline=deadline
+                            )
+                            await _record_stage(stage_timings, "question", stage_start)
+                            if not processed_question.context_from_previous:
+                                match = await PrecomputedAnswerLookup(db).find(user_id, processed_question.embedding_vector)
+                        else:
+                            await _record_stage(stage_timings, "question", stage_start)
+                        
+                        if lookup is not None or match is not None:
+                            answer_text, confidence, path = (
+                                (lookup.text, 1.0, "lookup") if lookup is not None
+                                else (match.answer, match.similarity, "precomputed")
+                            )
+                            processing_time = (datetime.now() - start_time).total_seconds()
+                            conversation = await _save_direct_answer(
+                                user, user_id, question, answer_text, confidence,
+                                path, response_generator, processing_time
+                            )
+                            response_msg = WebSocketMessage(
+                                type="response",
+                                data={
+                                    "conversation_id": str(conversation.conversation_id),
+                                    "question": question,
+                                    "response": answer_text,
+                                    "processing_time": processing_time,
+                                    "confidence_score": confidence,
+                                    "retrieved_doc_count": 0,
+                                    "stage_timings": stage_timings
+                                },
+                                timestamp=datetime.now().isoformat()
+                            )
+                            await manager.send_message(user_id, response_msg)
+                            if conversation_context is not None:
+                                # Nothing was retrieved for this turn
+                                conversation_context.previous_doc_ids = []
+                            continue
                         
+                        stage_start = datetime.now()
+                        memory_block = await response_generator.prepare_memory_block(user_id)
+                        profile = DEGRADATION_PROFILES[response_generator.admission.degradation_level()]
                         context = await context_builder.build_context(
-                            processed_question, user_id
+                            processed_question, user_id,
+                            conversation_context.previous_questions[-1] if processed_question.context_from_previous else None,
+                            memory_block=memory_block,
+                            max_documents=profile.max_documents,
+                            previous_doc_ids=conversation_context.previous_doc_ids if conversation_context else None,
+                            corpus_documents=corpus_documents,
+                            deadline=deadline
                         )
+                        await _record_stage(stage_timings, "context", stage_start)
                         
+                        stage_start = datetime.now()
                         response = await response_generator.generate_response(
-                            context, user_id
+                            context, user_id, deadline=deadline
                         )
+                        await _record_stage(stage_timings, "generation", stage_start)
                         
                         # Save conversation
+                        stage_start = datetime.now()
                         conversation = ChatConversation(
                             user_id=user.user_id,
                             question=question,
@@ -635,8 +881,15 @@ async def websocket_endpoint(
                             retrieved_doc_ids=[doc.document.doc_id if isinstance(doc.document.doc_id, UUID) else UUID(doc.document.doc_id) for doc in context.retrieved_documents]
                         )
                         
-                        db.add(conversation)
-                        await db.commit()
+                        await WriteBehindBuffer.instance().add(conversation)
+                        await _record_stage(stage_timings, "persist", stage_start)
+                        
+                        # Remember this turn so the next follow-up can reuse its documents
+                        conversation_context = question_processor.update_conversation_context(
+                            conversation_context or ConversationContext(user_id=user_id, previous_questions=[], previous_categories=[]),
+                            processed_question
+                        )
+                        conversation_context.previous_doc_ids = [str(doc.document.doc_id) for doc in context.retrieved_documents]
                         
                         processing_time = (datetime.now() - start_time).total_seconds()
                         
@@ -649,7 +902,8 @@ async def websocket_endpoint(
                                 "response": response.content,
                                 "processing_time": processing_time,
                                 "confidence_score": response.confidence_score,
-                                "retrieved_doc_count": len(context.retrieved_documents)
+                                "retrieved_doc_count": len(context.retrieved_documents),
+                                "stage_timings": stage_timings
                             },
                             timestamp=datetime.now().isoformat()
                         )
@@ -667,8 +921,7 @@ async def websocket_endpoint(
                                 comment=payload.get("comment"),
                                 tags=payload.get("tags") or []
                             )
-                            db.add(feedback)
-                            await db.commit()
+                            await WriteBehindBuffer.instance().add(feedback)
                             ack = WebSocketMessage(
                                 type="status",
                                 data={"message": "Feedback received"},
@@ -699,6 +952,16 @@ async def websocket_endpoint(
                     )
                     await manager.send_message(user_id, error_msg)
                     
+                except DeadlineExceeded as e:
+                    logger.warning(f"Request deadline exceeded for user {user_id} during {e.stage}")
+                    await record_deadline(deadline)
+                    error_msg = WebSocketMessage(
+                        type="error",
+                        data={"error": "질문 처리 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."},
+                        timestamp=datetime.now().isoformat()
+                    )
+                    await manager.send_message(user_id, error_msg)
+                    
                 except Exception as e:
                     logger.error(f"Error processing WebSocket message for user {user_id}: {e}")
                     error_msg = WebSocketMessage(
@@ -713,6 +976,8 @@ async def websocket_endpoint(
     except Exception as e:
         logger.error(f"WebSocket error for user {user_id}: {e}")
         manager.disconnect(user_id)
+    finally:
+        progress_task.cancel()
 
 @router.get(
     "/health",
@@ -768,6 +1033,7 @@ async def health_check() -> Dict[str, Any]:
             "capacity": stats.capacity,
             "evictions": stats.evictions,
         }
+        health_status["components"]["query_embedding_cache"] = await QueryEmbeddingCache.instance().stats()
     except Exception:
         pass
     
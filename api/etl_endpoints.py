@@ -3,6 +3,7 @@ FastAPI Endpoints for ETL Processing
 API endpoints for test completion notifications and job monitoring
 """
 
+import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
@@ -20,6 +21,10 @@ from etl.test_completion_handler import (
     JobTracker,
     JobStatus
 )
+from etl.config import JOB_EVENTS_CONFIG
+from etl.job_events import JobEventBus, RESYNC_EVENT, is_terminal
+from etl.population_stats import PopulationStats
+from etl.bulk_backfill import BulkBackfill
 # Note: Background task management will be handled by BackgroundTaskManager in task 12.2
 
 logger = logging.getLogger(__name__)
@@ -27,6 +32,9 @@ logger = logging.getLogger(__name__)
 # Initialize router
 router = APIRouter(prefix="/api/etl", tags=["ETL Processing"])
 
+# Backfill runs executing in this process (run_id -> task)
+_backfill_tasks: Dict[str, asyncio.Task] = {}
+
 # Pydantic models for API
 class TestCompletionNotification(BaseModel):
     """Test completion notification request model"""
@@ -46,6 +54,13 @@ class TestCompletionNotification(BaseModel):
             raise ValueError('user_id cannot be empty')
         return v.strip()
 
+class BackfillRequest(BaseModel):
+    """Bulk re-indexing request: explicit anp_seq values, or a range of chat users (empty = all)"""
+    anp_seqs: Optional[List[int]] = Field(default=None, description="anp_seq values to re-index")
+    anp_seq_from: Optional[int] = Field(default=None, description="First anp_seq of the range")
+    anp_seq_to: Optional[int] = Field(default=None, description="Last anp_seq of the range")
+    batch_size: Optional[int] = Field(default=None, description="Users per batch", gt=0)
+
 class JobStatusResponse(BaseModel):
     """Job status response model"""
     job_id: str
@@ -212,7 +227,9 @@ async def get_job_progress_stream(
     Get real-time job progress updates via Server-Sent Events
     
     This endpoint provides a streaming connection for real-time job progress updates.
-    Clients can use this to show live progress indicators.
+    Clients can use this to show live progress indicators. The job is read once when
+    the stream opens; after that updates are pushed by the job event bus
+    (etl.job_events) instead of polling the job table.
     
     Args:
         job_id: Job identifier
@@ -222,33 +239,42 @@ async def get_job_progress_stream(
         Server-Sent Events stream with job progress updates
     """
     from fastapi.responses import StreamingResponse
-    import asyncio
     import json
     
     async def event_stream():
         """Generate Server-Sent Events for job progress"""
         try:
-            last_status = None
-            
-            while True:
-                # Get current job status
+            # Subscribe before the initial read so no update falls in between
+            async with JobEventBus.instance().subscribe(job_id=job_id) as events:
                 job_status = await handler.get_job_status(job_id)
                 
                 if not job_status:
                     yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
-                    break
-                
-                # Only send updates if status changed
-                if job_status != last_status:
-                    yield f"data: {json.dumps(job_status)}\n\n"
-                    last_status = job_status
+                    return
                 
-                # Stop streaming if job is completed
-                if job_status.get('status') in ['success', 'failure']:
-                    break
+                yield f"data: {json.dumps(job_status)}\n\n"
                 
-                # Wait before next check
-                await asyncio.sleep(2)
+                while not is_terminal(job_status):
+                    try:
+                        event = await asyncio.wait_for(events.get(), timeout=JOB_EVENTS_CONFIG['keepalive_seconds'])
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                    
+                    resync = event.get("type") == RESYNC_EVENT
+                    if resync or is_terminal(event):
+                        # Updates may have been missed, or the final result is wanted in full
+                        refreshed = await handler.get_job_status(job_id)
+                        if refreshed:
+                            event = refreshed
+                        elif resync:
+                            continue
+                    
+                    # Only send updates if status changed
+                    updated = {**job_status, **event}
+                    if updated != job_status:
+                        job_status = updated
+                        yield f"data: {json.dumps(job_status)}\n\n"
                 
         except Exception as e:
             logger.error(f"Error in job progress stream for {job_id}: {e}")
@@ -428,7 +454,8 @@ async def reprocess_user_data(
             anp_seq=anp_seq,
             test_type="reprocess",
             completed_at=datetime.now(),
-            notification_source="manual_reprocess"
+            notification_source="manual_reprocess",
+            force=force
         )
         
         # Trigger reprocessing
@@ -523,4 +550,113 @@ async def get_etl_stats() -> Dict[str, Any]:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve statistics: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get(
+    "/population-stats",
+    summary="Population Statistics Freshness",
+    description="When the population-wide tendency and thinking-skill statistics were last refreshed"
+)
+async def get_population_stats_freshness() -> Dict[str, Any]:
+    """
+    Get the refresh time of the population statistics views
+    
+    Returns:
+        Per-view refresh time and row count, plus the overall "as of" time
+    """
+    try:
+        return await PopulationStats.instance().freshness()
+    except Exception as e:
+        logger.error(f"Failed to read population statistics freshness: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to read population statistics: {str(e)}"
+        )
+
+@router.post(
+    "/population-stats/refresh",
+    summary="Refresh Population Statistics",
+    description="Recompute the population-wide statistics used by the per-user ETL queries"
+)
+async def refresh_population_stats() -> Dict[str, Any]:
+    """
+    Refresh the population statistics views now
+    
+    Returns:
+        The new freshness, or {"skipped": true} if a refresh is already running
+    """
+    try:
+        return await PopulationStats.instance().refresh()
+    except Exception as e:
+        logger.error(f"Failed to refresh population statistics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to refresh population statistics: {str(e)}"
+        )
+
+def _start_backfill(backfill: BulkBackfill, run_id: str) -> None:
+    if run_id in _backfill_tasks and not _backfill_tasks[run_id].done():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Backfill run {run_id} is already running"
+        )
+    task = asyncio.create_task(backfill.run(run_id))
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())  # errors are recorded on the run
+    _backfill_tasks[run_id] = task
+
+@router.post(
+    "/backfill",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Start Bulk Backfill",
+    description="Re-index the documents of many users in batches (throttled behind chat traffic)"
+)
+async def start_backfill(request: BackfillRequest) -> Dict[str, Any]:
+    """
+    Create a backfill run and start it in the background
+    
+    Returns:
+        The run id and number of users to re-index
+    """
+    backfill = BulkBackfill(batch_size=request.batch_size)
+    try:
+        targets = await backfill.resolve_targets(request.anp_seqs, request.anp_seq_from, request.anp_seq_to)
+        if not targets:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No users to re-index")
+        run_id = await backfill.create_run(targets)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to create backfill run: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create backfill run: {str(e)}"
+        )
+    _start_backfill(backfill, run_id)
+    return {"run_id": run_id, "total_users": len(targets), "status": "running"}
+
+@router.post(
+    "/backfill/{run_id}/resume",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Resume Bulk Backfill",
+    description="Continue an interrupted or failed backfill run from its last completed batch"
+)
+async def resume_backfill(run_id: UUID) -> Dict[str, Any]:
+    backfill = BulkBackfill()
+    run = await backfill.get_run(str(run_id))
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Backfill run {run_id} not found")
+    if run["status"] == "completed":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Backfill run {run_id} already completed")
+    _start_backfill(backfill, str(run_id))
+    return {"run_id": str(run_id), "resumed_at_batch": run["completed_batches"] + 1, "status": "running"}
+
+@router.get(
+    "/backfill/{run_id}",
+    summary="Bulk Backfill Progress",
+    description="Progress, throughput (users per minute) and per-user failures of a backfill run"
+)
+async def get_backfill(run_id: UUID) -> Dict[str, Any]:
+    run = await BulkBackfill().get_run(str(run_id))
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Backfill run {run_id} not found")
+    return run
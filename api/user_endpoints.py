@@ -449,7 +449,8 @@ async def reprocess_user_data(
             anp_seq=user.anp_seq,
             test_type="reprocess",
             completed_at=datetime.now(),
-            notification_source=f"manual_reprocess_{request.reason}"
+            notification_source=f"manual_reprocess_{request.reason}",
+            force=request.force
         )
         
         # Trigger ETL processing
@@ -18,6 +18,7 @@ from .models import (
     ChatJob,
     ChatMajor,
     ChatConversation,
+    ChatPrecomputedAnswer,
     DocumentType
 )
 
@@ -43,6 +44,7 @@ __all__ = [
     'ChatJob',
     'ChatMajor',
     'ChatConversation',
+    'ChatPrecomputedAnswer',
     'DocumentType',
     
     # Migration management
@@ -117,6 +117,30 @@ class DocumentCache:
     async def invalidate_document(self, doc_id: str) -> None:
         await self._cache.delete(self._key_doc(doc_id))
 
+    @staticmethod
+    def _key_user_docs(user_id: str) -> str:
+        return f"user_docs:{user_id}"
+
+    async def get_user_documents(self, user_id: str) -> Optional[Any]:
+        return await self._cache.get(self._key_user_docs(user_id))
+
+    async def set_user_documents(self, user_id: str, documents: Any) -> None:
+        await self._cache.set(self._key_user_docs(user_id), documents)
+
+    @staticmethod
+    def _key_user_corpus(user_id: str) -> str:
+        return f"user_corpus:{user_id}"
+
+    async def get_user_corpus(self, user_id: str) -> Optional[Any]:
+        return await self._cache.get(self._key_user_corpus(user_id))
+
+    async def set_user_corpus(self, user_id: str, documents: Any) -> None:
+        await self._cache.set(self._key_user_corpus(user_id), documents)
+
+    async def invalidate_user_documents(self, user_id: str) -> None:
+        await self._cache.delete(self._key_user_docs(user_id))
+        await self._cache.delete(self._key_user_corpus(user_id))
+
     async def clear_all(self) -> None:
         await self._cache.clear()
 
@@ -151,6 +151,24 @@ class DatabaseManager:
             logger.error(f"pgvector extension check failed: {e}")
             return False
     
+    def pool_status(self) -> dict:
+        """Snapshot of the async connection pool (empty before first use)"""
+        if self._async_engine is None:
+            return {}
+        pool = self._async_engine.pool
+        try:
+            checked_out = pool.checkedout()
+            return {
+                "size": pool.size(),
+                "checked_out": checked_out,
+                "overflow": pool.overflow(),
+                "capacity": self.config.pool_size + self.config.max_overflow,
+                "utilization": checked_out / max(self.config.pool_size + self.config.max_overflow, 1),
+            }
+        except AttributeError:
+            # Pool implementations without QueuePool counters
+            return {"status": pool.status()}
+    
     async def close(self):
         """Close database connections"""
         if self._async_engine:
@@ -0,0 +1,16 @@
+-- Answers generated during ETL for each document's hypothetical questions.
+-- The chat path returns a stored answer when the incoming question embedding
+-- is close enough to one of these question embeddings.
+
+CREATE TABLE IF NOT EXISTS chat_precomputed_answers (
+    answer_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES chat_users(user_id) ON DELETE CASCADE,
+    doc_type VARCHAR(50) NOT NULL,
+    question TEXT NOT NULL,
+    question_embedding vector(768) NOT NULL,
+    answer TEXT NOT NULL,
+    model_name VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_precomputed_answers_user_id ON chat_precomputed_answers(user_id);
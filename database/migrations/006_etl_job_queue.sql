@@ -0,0 +1,19 @@
+-- Turn chat_etl_jobs into a durable work queue.
+-- API processes only insert 'pending' rows; ETL worker processes claim them with
+-- SELECT ... FOR UPDATE SKIP LOCKED, hold a lease that is renewed by heartbeats,
+-- and stale leases left by crashed workers are requeued.
+
+ALTER TABLE chat_etl_jobs
+    ADD COLUMN IF NOT EXISTS payload JSONB,
+    ADD COLUMN IF NOT EXISTS available_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS locked_by VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS cancel_requested BOOLEAN DEFAULT FALSE;
+
+CREATE INDEX IF NOT EXISTS idx_chat_etl_jobs_claimable
+    ON chat_etl_jobs(available_at) WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_chat_etl_jobs_lease
+    ON chat_etl_jobs(lease_expires_at) WHERE locked_by IS NOT NULL;
@@ -0,0 +1,45 @@
+-- Population-wide aggregates over mwd_score1, precomputed once instead of per user.
+-- tendencyStatsQuery and thinkingSkillComparisonQuery join these views, so per-user
+-- ETL no longer scans the whole score table. Refreshed by
+-- `python -m etl.population_stats refresh` (or automatically once stale); the
+-- refresh time is kept in chat_population_stats_refresh so documents can say
+-- which date the population figures are as of.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_tendency_population_stats AS
+SELECT
+    qua_code,
+    COUNT(*) AS tendency_count,
+    SUM(COUNT(*)) OVER () AS total_count
+FROM mwd_score1
+WHERE sc1_step = 'tnd' AND sc1_rank = 1
+GROUP BY qua_code;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_thinking_population_stats AS
+SELECT
+    qua_code,
+    AVG(sc1_rate * 100) AS avg_score,
+    COUNT(*) AS sample_count
+FROM mwd_score1
+WHERE sc1_step = 'thk'
+GROUP BY qua_code;
+
+-- Unique indexes allow REFRESH MATERIALIZED VIEW CONCURRENTLY (reads are never blocked)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_tendency_population_stats_code
+    ON mv_tendency_population_stats(qua_code);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_thinking_population_stats_code
+    ON mv_thinking_population_stats(qua_code);
+
+CREATE TABLE IF NOT EXISTS chat_population_stats_refresh (
+    view_name VARCHAR(100) PRIMARY KEY,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    row_count INTEGER,
+    duration_ms INTEGER
+);
+
+-- The views were populated on creation
+INSERT INTO chat_population_stats_refresh (view_name, refreshed_at)
+VALUES
+    ('mv_tendency_population_stats', CURRENT_TIMESTAMP),
+    ('mv_thinking_population_stats', CURRENT_TIMESTAMP)
+ON CONFLICT (view_name) DO NOTHING;
@@ -0,0 +1,22 @@
+-- Bulk ETL backfill runs (python -m etl.bulk_backfill / POST /api/etl/backfill).
+-- A run re-indexes many anp_seq values batch by batch; completed_batches is the
+-- checkpoint an interrupted run resumes from.
+
+CREATE TABLE IF NOT EXISTS chat_etl_backfill_runs (
+    run_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    status VARCHAR(50) NOT NULL DEFAULT 'pending',
+    targets INTEGER[] NOT NULL,
+    batch_size INTEGER NOT NULL,
+    completed_batches INTEGER DEFAULT 0,
+    users_processed INTEGER DEFAULT 0,
+    users_failed INTEGER DEFAULT 0,
+    documents_written INTEGER DEFAULT 0,
+    users_per_minute DOUBLE PRECISION,
+    failures JSONB,
+    error_message TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_etl_backfill_runs_status ON chat_etl_backfill_runs(status);
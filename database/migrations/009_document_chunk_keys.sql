@@ -0,0 +1,14 @@
+-- Incremental document upsert: each chunk has a stable key per user and a hash
+-- of its stored/embedded content. Reprocessing a user updates only changed
+-- chunks, deletes only removed ones and reuses the embeddings of unchanged ones.
+
+ALTER TABLE chat_documents
+    ADD COLUMN IF NOT EXISTS chunk_key VARCHAR(200),
+    ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+-- Chunked documents store several rows per doc_type; the chunk key is the
+-- per-user identity now, so the one-row-per-doc_type constraint from 004 goes.
+ALTER TABLE chat_documents DROP CONSTRAINT IF EXISTS unique_user_doc_type;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_chat_documents_user_chunk_key
+    ON chat_documents(user_id, chunk_key) WHERE chunk_key IS NOT NULL;
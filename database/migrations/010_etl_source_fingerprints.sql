@@ -0,0 +1,12 @@
+-- Fingerprint of the legacy result rows (mwd_score1, mwd_resval, ...) behind an
+-- anp_seq, recorded after each successful ETL run. A later run whose fingerprint
+-- matches is skipped unless it is forced.
+
+CREATE TABLE IF NOT EXISTS chat_etl_source_fingerprints (
+    anp_seq INTEGER PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES chat_users(user_id) ON DELETE CASCADE,
+    fingerprint VARCHAR(64) NOT NULL,
+    row_counts JSONB,
+    job_id UUID,
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
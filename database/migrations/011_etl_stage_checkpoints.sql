@@ -0,0 +1,20 @@
+-- Persisted ETL stage outputs (validated query data, transformed documents,
+-- embedded documents) as zlib-compressed JSON. A retried or restarted job for
+-- the same user and anp_seq resumes after the last stage stored here; the rows
+-- are removed once a run completes. There is no foreign key to chat_users: the
+-- ETL session may not have committed a newly created user yet.
+
+CREATE TABLE IF NOT EXISTS chat_etl_stage_checkpoints (
+    user_id UUID NOT NULL,
+    anp_seq INTEGER NOT NULL,
+    stage VARCHAR(50) NOT NULL,
+    job_id UUID,
+    source_fingerprint VARCHAR(64),
+    pipeline_version VARCHAR(50) NOT NULL,
+    payload BYTEA NOT NULL,
+    payload_bytes INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, anp_seq, stage)
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_etl_stage_checkpoints_created_at ON chat_etl_stage_checkpoints(created_at);
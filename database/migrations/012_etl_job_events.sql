@@ -0,0 +1,35 @@
+-- Push ETL job progress to listeners (etl.job_events) instead of having every
+-- progress stream poll chat_etl_jobs. Any insert, or any update that changes the
+-- visible progress of a job, sends a NOTIFY on 'etl_job_events' with a compact
+-- JSON summary of the row. The notification is delivered when the writing
+-- transaction commits, whichever process (API, ETL worker) made the change.
+-- Heartbeats and lease updates do not notify.
+
+CREATE OR REPLACE FUNCTION notify_etl_job_event() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('etl_job_events', json_build_object(
+        'job_id', NEW.job_id,
+        'user_id', NEW.user_id,
+        'anp_seq', NEW.anp_seq,
+        'status', NEW.status,
+        'progress_percentage', NEW.progress_percentage,
+        'current_step', NEW.current_step,
+        'completed_steps', NEW.completed_steps,
+        'total_steps', NEW.total_steps,
+        'started_at', NEW.started_at,
+        'updated_at', NEW.updated_at,
+        'completed_at', NEW.completed_at,
+        'error_message', left(NEW.error_message, 500),
+        'retry_count', NEW.retry_count
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_chat_etl_jobs_notify ON chat_etl_jobs;
+CREATE TRIGGER trg_chat_etl_jobs_notify
+    AFTER INSERT OR UPDATE OF status, progress_percentage, current_step, completed_steps, error_message
+    ON chat_etl_jobs
+    FOR EACH ROW
+    WHEN (pg_trigger_depth() = 0)
+    EXECUTE FUNCTION notify_etl_job_event();
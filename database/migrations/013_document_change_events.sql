@@ -0,0 +1,28 @@
+-- Tell every process when a user's documents change (etl.job_events).
+-- Documents are written by ETL worker processes, but the per-user snapshot and
+-- corpus caches they invalidate (database.cache.DocumentCache) live in each API
+-- process. Any insert, update or delete on chat_documents sends a NOTIFY on
+-- 'chat_document_changes' whose payload is the user_id; the API's listener drops
+-- that user's cached entries. Identical notifications in one transaction are
+-- delivered once, so a bulk rewrite sends one notification per user.
+
+CREATE OR REPLACE FUNCTION notify_chat_document_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('chat_document_changes', OLD.user_id::text);
+    ELSE
+        PERFORM pg_notify('chat_document_changes', NEW.user_id::text);
+        IF TG_OP = 'UPDATE' AND OLD.user_id IS DISTINCT FROM NEW.user_id THEN
+            PERFORM pg_notify('chat_document_changes', OLD.user_id::text);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_chat_documents_notify ON chat_documents;
+CREATE TRIGGER trg_chat_documents_notify
+    AFTER INSERT OR UPDATE OR DELETE
+    ON chat_documents
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_chat_document_change();
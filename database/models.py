@@ -6,7 +6,7 @@ Defines database models for chat_users, chat_documents, chat_jobs, chat_majors,
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from enum import Enum
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, ARRAY
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, ARRAY, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
@@ -43,6 +43,15 @@ class ChatETLJob(Base):
     query_results_summary: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
     documents_created: Mapped[Optional[List[str]]] = mapped_column(ARRAY(String(100)), nullable=True)
 
+    # Work queue fields (claimed by ETL workers with FOR UPDATE SKIP LOCKED)
+    payload: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
+    available_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.current_timestamp())
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(default=False)
+
     # Relationship back to user
     user: Mapped["ChatUser"] = relationship("ChatUser")
 
@@ -93,6 +102,9 @@ class ChatDocument(Base):
     summary_text: Mapped[str] = mapped_column(Text, nullable=False)
     embedding_vector: Mapped[List[float]] = mapped_column(Vector(768), nullable=False)
     doc_metadata: Mapped[Dict[str, Any]] = mapped_column(JSONB, default={})
+    # Incremental re-indexing: stable chunk identity per user and a hash of what was stored/embedded
+    chunk_key: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
     
@@ -185,6 +197,77 @@ class ChatFeedback(Base):
     tags: Mapped[Optional[List[str]]] = mapped_column(ARRAY(String(50)), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp())
 
+class ChatPrecomputedAnswer(Base):
+    """Answer generated during ETL for a hypothetical question, matched by question embedding"""
+    __tablename__ = 'chat_precomputed_answers'
+
+    answer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('chat_users.user_id', ondelete='CASCADE'), nullable=False)
+    doc_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    question_embedding: Mapped[List[float]] = mapped_column(Vector(768), nullable=False)
+    answer: Mapped[str] = mapped_column(Text, nullable=False)
+    model_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<ChatPrecomputedAnswer(answer_id={self.answer_id}, user_id={self.user_id}, doc_type='{self.doc_type}')>"
+
+class ChatETLBackfillRun(Base):
+    """Bulk re-indexing run over many anp_seq values (etl.bulk_backfill), resumable by batch"""
+    __tablename__ = 'chat_etl_backfill_runs'
+
+    run_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status: Mapped[str] = mapped_column(String(50), nullable=False, default='pending')
+    # Sorted anp_seq values to process; batch i covers targets[i * batch_size:(i + 1) * batch_size]
+    targets: Mapped[List[int]] = mapped_column(ARRAY(Integer), nullable=False)
+    batch_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    completed_batches: Mapped[int] = mapped_column(Integer, default=0)
+    users_processed: Mapped[int] = mapped_column(Integer, default=0)
+    users_failed: Mapped[int] = mapped_column(Integer, default=0)
+    documents_written: Mapped[int] = mapped_column(Integer, default=0)
+    users_per_minute: Mapped[Optional[float]] = mapped_column(nullable=True)
+    failures: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)  # anp_seq -> reason
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ChatETLBackfillRun(run_id={self.run_id}, status='{self.status}', batches={self.completed_batches})>"
+
+class ChatETLSourceFingerprint(Base):
+    """Fingerprint of an anp_seq's legacy result rows as of its last successful ETL run"""
+    __tablename__ = 'chat_etl_source_fingerprints'
+
+    anp_seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('chat_users.user_id', ondelete='CASCADE'), nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_counts: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)  # source table -> rows
+    job_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<ChatETLSourceFingerprint(anp_seq={self.anp_seq}, fingerprint='{self.fingerprint[:12]}')>"
+
+class ChatETLStageCheckpoint(Base):
+    """Compressed output of one ETL stage, so a retried job resumes after it"""
+    __tablename__ = 'chat_etl_stage_checkpoints'
+
+    # No foreign key: written from its own session before the ETL session commits a new user
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    anp_seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    stage: Mapped[str] = mapped_column(String(50), primary_key=True)
+    job_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    source_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    pipeline_version: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)  # zlib-compressed JSON
+    payload_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<ChatETLStageCheckpoint(user_id={self.user_id}, anp_seq={self.anp_seq}, stage='{self.stage}')>"
+
 # Document type enumeration for validation
 class DocumentType(str, Enum):
     USER_PROFILE = "USER_PROFILE"
@@ -17,15 +17,17 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import selectinload
 from pgvector.sqlalchemy import Vector
 
-from database.models import ChatDocument, ChatUser, DocumentType
+from database.models import ChatDocument, ChatUser, ChatPrecomputedAnswer, DocumentType
 from database.cache import DocumentCache
 from database.schemas import ChatDocumentCreate, ChatDocumentResponse, ProcessingResult, ProcessingStatus
 from database.connection import get_async_session
+from monitoring.metrics import inc as metrics_inc
 
 # TransformedDocument import 추가
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from etl.document_transformer import TransformedDocument
+    from etl.answer_precomputer import PrecomputedAnswer
 
 logger = logging.getLogger(__name__)
 
@@ -123,6 +125,44 @@ class DocumentRepository:
             logger.error(f"Error retrieving document {doc_id}: {e}")
             raise DocumentRepositoryError(f"Error retrieving document: {str(e)}")
     
+    async def get_documents_by_ids(
+        self,
+        doc_ids: List[UUID],
+        user_id: Optional[UUID] = None
+    ) -> List[ChatDocument]:
+        """
+        Retrieve several documents by ID through the cache, in the given order
+        
+        Cache misses are loaded with a single query. When ``user_id`` is given,
+        documents owned by another user are dropped.
+        """
+        try:
+            found: Dict[UUID, ChatDocument] = {}
+            missing: List[UUID] = []
+            for doc_id in doc_ids:
+                cached = await self.cache.get_document(str(doc_id)) if self.cache else None
+                if cached is not None:
+                    found[doc_id] = cached
+                else:
+                    missing.append(doc_id)
+            
+            if missing:
+                result = await self.session.execute(
+                    select(ChatDocument).where(ChatDocument.doc_id.in_(missing))
+                )
+                for doc in result.scalars().all():
+                    found[doc.doc_id] = doc
+                    if self.cache:
+                        await self.cache.set_document(str(doc.doc_id), doc)
+            
+            return [
+                found[doc_id] for doc_id in doc_ids
+                if doc_id in found and (user_id is None or found[doc_id].user_id == user_id)
+            ]
+        except SQLAlchemyError as e:
+            logger.error(f"Error retrieving documents {doc_ids}: {e}")
+            raise DocumentRepositoryError(f"Error retrieving documents: {str(e)}")
+    
     async def get_documents_by_user(
         self, 
         user_id: UUID, 
@@ -153,6 +193,62 @@ class DocumentRepository:
             logger.error(f"Error retrieving documents for user {user_id}: {e}")
             raise DocumentRepositoryError(f"Error retrieving documents: {str(e)}")
     
+    async def get_user_document_snapshots(self, user_id: UUID) -> List[Dict[str, Any]]:
+        """
+        Return the user's documents as plain dicts (doc_type, content, metadata), cached per user.
+        
+        Used by read-only consumers such as the lookup fast path; the
+        snapshots are detached from the session and safe to share.
+        """
+        cached = await self.cache.get_user_documents(str(user_id))
+        if cached is not None:
+            return cached
+        
+        try:
+            result = await self.session.execute(
+                select(ChatDocument.doc_type, ChatDocument.content, ChatDocument.doc_metadata)
+                .where(ChatDocument.user_id == user_id)
+            )
+            snapshots = [
+                {"doc_type": doc_type, "content": content or {}, "metadata": metadata or {}}
+                for doc_type, content, metadata in result.all()
+            ]
+        except SQLAlchemyError as e:
+            logger.error(f"Error retrieving document snapshots for user {user_id}: {e}")
+            raise DocumentRepositoryError(f"Error retrieving documents: {str(e)}")
+        
+        await self.cache.set_user_documents(str(user_id), snapshots)
+        return snapshots
+    
+    async def get_user_corpus(self, user_id: UUID, limit: int) -> List[ChatDocument]:
+        """
+        Return up to ``limit`` of the user's documents, cached per user.
+        
+        Callers pass one more than the corpus size they can use, so a result of
+        length ``limit`` means the corpus is larger than that.
+        """
+        cached = await self.cache.get_user_corpus(str(user_id))
+        if cached is not None:
+            cached_limit, documents = cached
+            # A short result is the whole corpus; a full one only answers smaller limits
+            if len(documents) < cached_limit or limit <= cached_limit:
+                return documents[:limit]
+        
+        try:
+            result = await self.session.execute(
+                select(ChatDocument)
+                .where(ChatDocument.user_id == user_id)
+                .order_by(ChatDocument.created_at)
+                .limit(limit)
+            )
+            documents = list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"Error retrieving corpus for user {user_id}: {e}")
+            raise DocumentRepositoryError(f"Error retrieving documents: {str(e)}")
+        
+        await self.cache.set_user_corpus(str(user_id), (limit, documents))
+        return documents
+    
     async def update_document(
         self, 
         doc_id: UUID, 
@@ -425,12 +521,15 @@ async def save_chunked_documents(session: AsyncSession, user_id: str, documents:
                 content=doc.content,
                 summary_text=doc.summary_text,
                 embedding_vector=embedding_vector,  # 임베딩 단계에서 추가되어야 함
-                doc_metadata=doc.metadata
+                doc_metadata=doc.metadata,
+                chunk_key=doc.chunk_key,
+                content_hash=doc.content_hash
             ))
         
         if new_db_documents:
             session.add_all(new_db_documents)
             await session.commit()
+            await DocumentRepository.get_global_cache().invalidate_user_documents(str(UUID(user_id)))
             logger.info("Successfully saved new documents.")
         else:
             logger.warning("No documents to save.")
@@ -445,6 +544,215 @@ async def save_chunked_documents(session: AsyncSession, user_id: str, documents:
         raise DocumentRepositoryError(f"Unexpected error: {str(e)}")
 
 
+async def get_existing_chunks(session: AsyncSession, user_id: str) -> Dict[str, Dict[str, Any]]:
+    """
+    사용자의 저장된 청크를 chunk_key 기준으로 반환합니다 (doc_id, content_hash, embedding_vector).
+    chunk_key가 없는 예전 문서는 제외됩니다.
+    """
+    result = await session.execute(
+        select(
+            ChatDocument.doc_id, ChatDocument.chunk_key,
+            ChatDocument.content_hash, ChatDocument.embedding_vector
+        ).where(ChatDocument.user_id == UUID(str(user_id)), ChatDocument.chunk_key.isnot(None))
+    )
+    return {
+        row.chunk_key: {
+            "doc_id": row.doc_id,
+            "content_hash": row.content_hash,
+            "embedding_vector": row.embedding_vector,
+        }
+        for row in result.all()
+    }
+
+
+class ChunkedDocumentUpsert:
+    """
+    chunk_key 기준 증분 갱신을 배치 단위로 수행합니다 (스트리밍 ETL용).
+    
+    begin()으로 기존 청크를 읽고, write()로 배치마다 바뀐 청크만 UPDATE / 새 청크만 INSERT 하며,
+    finish()에서 사라진 청크(및 chunk_key가 없는 예전 문서)를 DELETE 한 뒤 한 번에 커밋합니다.
+    모든 배치가 하나의 트랜잭션이므로 도중에 실패하면 기존 문서가 그대로 남습니다.
+    """
+
+    def __init__(self, session: AsyncSession, user_id: str):
+        self.session = session
+        self.user_id = str(user_id)
+        self.uid = UUID(self.user_id)
+        self.counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+        self._existing_by_key: Dict[str, Any] = {}
+        self._stale_ids: List[UUID] = []
+        self._changed_ids: List[UUID] = []
+
+    async def begin(self) -> None:
+        try:
+            existing = await self.session.execute(
+                select(ChatDocument.doc_id, ChatDocument.chunk_key, ChatDocument.content_hash)
+                .where(ChatDocument.user_id == self.uid)
+            )
+        except SQLAlchemyError as e:
+            await self._fail(e)
+        for row in existing.all():
+            if row.chunk_key is None:
+                self._stale_ids.append(row.doc_id)
+            else:
+                self._existing_by_key[row.chunk_key] = row
+
+    async def write(self, documents: List['TransformedDocument']) -> None:
+        inserts, updates = [], []
+        for doc in documents:
+            values = {
+                "doc_type": doc.doc_type,
+                "content": doc.content,
+                "summary_text": doc.summary_text,
+                "embedding_vector": doc.embedding_vector if doc.embedding_vector is not None else [0.0] * 768,
+                "doc_metadata": doc.metadata,
+                "content_hash": doc.content_hash,
+            }
+            current = self._existing_by_key.pop(doc.chunk_key, None)
+            if current is None:
+                inserts.append({"user_id": self.uid, "chunk_key": doc.chunk_key, **values})
+            elif current.content_hash != doc.content_hash:
+                updates.append({"doc_id": current.doc_id, "updated_at": datetime.now(), **values})
+            else:
+                self.counts["unchanged"] += 1
+
+        try:
+            if updates:
+                # ORM bulk UPDATE by primary key
+                await self.session.execute(update(ChatDocument), updates)
+            if inserts:
+                await self.session.execute(insert(ChatDocument), inserts)
+        except SQLAlchemyError as e:
+            await self._fail(e)
+        self.counts["inserted"] += len(inserts)
+        self.counts["updated"] += len(updates)
+        self._changed_ids.extend(row["doc_id"] for row in updates)
+
+    async def finish(self) -> Dict[str, int]:
+        """사라진 청크를 삭제하고 커밋한 뒤 {"inserted", "updated", "unchanged", "deleted"} 건수를 반환합니다."""
+        stale_ids = self._stale_ids + [row.doc_id for row in self._existing_by_key.values()]
+        try:
+            if stale_ids:
+                await self.session.execute(delete(ChatDocument).where(ChatDocument.doc_id.in_(stale_ids)))
+            await self.session.commit()
+        except SQLAlchemyError as e:
+            await self._fail(e)
+        self.counts["deleted"] = len(stale_ids)
+
+        if self.counts["inserted"] or self._changed_ids or stale_ids:
+            cache = DocumentRepository.get_global_cache()
+            await cache.invalidate_user_documents(self.user_id)
+            # Updated chunks keep their doc_id, so per-document entries would go stale
+            for doc_id in self._changed_ids + stale_ids:
+                await cache.invalidate_document(str(doc_id))
+        for outcome, count in self.counts.items():
+            if count:
+                await metrics_inc("etl_documents_total", count, labels={"outcome": outcome})
+        logger.info(f"Upserted documents for user {self.user_id}: {self.counts}")
+        return dict(self.counts)
+
+    async def _fail(self, error: SQLAlchemyError) -> None:
+        await self.session.rollback()
+        logger.error(f"Error upserting chunked documents for user {self.user_id}: {error}")
+        raise DocumentRepositoryError(f"Error upserting chunked documents: {str(error)}")
+
+
+async def upsert_chunked_documents(
+    session: AsyncSession,
+    user_id: str,
+    documents: List['TransformedDocument']
+) -> Dict[str, int]:
+    """
+    사용자의 문서를 chunk_key 기준으로 증분 갱신합니다.
+    내용 해시가 같은 청크는 건드리지 않고, 바뀐 청크만 UPDATE, 새 청크만 INSERT,
+    사라진 청크(및 chunk_key가 없는 예전 문서)만 DELETE 합니다.
+    
+    Returns:
+        {"inserted", "updated", "unchanged", "deleted"} 건수
+    """
+    upsert = ChunkedDocumentUpsert(session, user_id)
+    await upsert.begin()
+    await upsert.write(documents)
+    return await upsert.finish()
+
+
+async def save_chunked_documents_bulk(
+    session: AsyncSession,
+    documents_by_user: Dict[str, List['TransformedDocument']]
+) -> int:
+    """
+    여러 사용자의 문서를 한 번에 교체합니다 (대량 백필용).
+    DELETE 한 번과 다중 행 INSERT로 처리하며, 저장된 문서 수를 반환합니다.
+    이전 문서로 만든 사전 생성 답변도 같은 트랜잭션에서 삭제합니다.
+    """
+    if not documents_by_user:
+        return 0
+    user_ids = [UUID(user_id) for user_id in documents_by_user]
+    rows = [
+        {
+            "user_id": UUID(user_id),
+            "doc_type": doc.doc_type,
+            "content": doc.content,
+            "summary_text": doc.summary_text,
+            "embedding_vector": doc.embedding_vector,
+            "doc_metadata": doc.metadata,
+            "chunk_key": doc.chunk_key,
+            "content_hash": doc.content_hash,
+        }
+        for user_id, documents in documents_by_user.items()
+        for doc in documents
+    ]
+
+    try:
+        await session.execute(delete(ChatDocument).where(ChatDocument.user_id.in_(user_ids)))
+        await session.execute(delete(ChatPrecomputedAnswer).where(ChatPrecomputedAnswer.user_id.in_(user_ids)))
+        if rows:
+            await session.execute(insert(ChatDocument), rows)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error(f"Error bulk saving documents for {len(user_ids)} users: {e}")
+        raise DocumentRepositoryError(f"Error bulk saving documents: {str(e)}")
+
+    cache = DocumentRepository.get_global_cache()
+    for user_id in user_ids:
+        await cache.invalidate_user_documents(str(user_id))
+    logger.info(f"Bulk saved {len(rows)} documents for {len(user_ids)} users")
+    return len(rows)
+
+
+async def save_precomputed_answers(
+    session: AsyncSession,
+    user_id: str,
+    answers: List['PrecomputedAnswer'],
+    model_name: Optional[str] = None
+):
+    """
+    사용자의 기존 사전 생성 답변을 삭제한 후 새 답변들을 삽입합니다.
+    """
+    try:
+        await session.execute(
+            delete(ChatPrecomputedAnswer).where(ChatPrecomputedAnswer.user_id == UUID(user_id))
+        )
+        session.add_all([
+            ChatPrecomputedAnswer(
+                user_id=UUID(user_id),
+                doc_type=answer.doc_type,
+                question=answer.question,
+                question_embedding=answer.question_embedding,
+                answer=answer.answer,
+                model_name=model_name
+            )
+            for answer in answers
+        ])
+        await session.commit()
+        logger.info(f"Saved {len(answers)} precomputed answers for user_id: {user_id}")
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error(f"Error saving precomputed answers for user {user_id}: {e}")
+        raise DocumentRepositoryError(f"Error saving precomputed answers: {str(e)}")
+
+
 async def get_document_repository(session: AsyncSession) -> DocumentRepository:
     """Factory function to create document repository with session"""
     return DocumentRepository(session)
\ No newline at end of file
@@ -22,6 +22,7 @@ from database.models import ChatDocument, ChatUser, DocumentType
 from database.connection import get_async_session
 from database.cache import LRUCache
 from monitoring.metrics import observe as metrics_observe, inc as metrics_inc
+from monitoring.deadline import Deadline, DeadlineExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -81,18 +82,22 @@ class VectorSearchService:
         # Cache for common queries per user (keyed by user + vector hash + filters)
         self._result_cache = LRUCache(capacity=1000, ttl_seconds=300)
     
-    async def similarity_search(self, search_query: SearchQuery) -> List[SearchResult]:
+    async def similarity_search(
+        self, search_query: SearchQuery, deadline: Optional[Deadline] = None
+    ) -> List[SearchResult]:
         """
         Perform similarity search using pgvector
         
         Args:
             search_query: Search configuration and parameters
+            deadline: Request deadline; bounds each query attempt and retry
             
         Returns:
             List of SearchResult objects ranked by similarity
             
         Raises:
             VectorSearchError: If search operation fails
+            DeadlineExceeded: If the request budget runs out
         """
         start_time = time.time()
         
@@ -124,12 +129,24 @@ class VectorSearchService:
             base_delay = 0.3
             for attempt in range(max_attempts):
                 try:
-                    result = await self.session.execute(stmt)
+                    if deadline is None:
+                        result = await self.session.execute(stmt)
+                    else:
+                        deadline.check("vector_search")
+                        result = await asyncio.wait_for(self.session.execute(stmt), deadline.timeout())
                     rows = result.fetchall()
                     break
-                except SQLAlchemyError as e:
+                except (SQLAlchemyError, asyncio.TimeoutError) as e:
+                    if isinstance(e, asyncio.TimeoutError) and deadline is not None:
+                        deadline.mark_exhausted("vector_search")
+                        raise DeadlineExceeded("vector_search")
+                    # Without a deadline a driver timeout is retried like any other DB error
                     if attempt < max_attempts - 1:
                         delay = base_delay * (2 ** attempt) + random.uniform(0, 0.1)
+                        if deadline is not None and not deadline.allows_retry(delay):
+                            logger.warning(f"Vector search DB error with no budget left for a retry: {e}")
+                            deadline.mark_exhausted("vector_search")
+                            raise DeadlineExceeded("vector_search")
                         logger.warning(
                             f"Vector search DB error (attempt {attempt+1}/{max_attempts}): {e}. Retrying in {delay:.2f}s"
                         )
@@ -157,6 +174,9 @@ class VectorSearchService:
             logger.info(f"Vector search completed: {len(search_results)} results in {query_time_ms:.2f}ms")
             return search_results
             
+        except DeadlineExceeded:
+            await metrics_inc("vector_search_errors_total")
+            raise
         except SQLAlchemyError as e:
             logger.error(f"Database error in similarity search: {e}")
             await metrics_inc("vector_search_errors_total")
@@ -0,0 +1,233 @@
+"""
+Write-behind persistence for chat rows.
+
+Conversation and feedback rows are not needed by the request that creates
+them, so instead of a commit per row on the critical path they are queued
+here and written by a background task as multi-row INSERTs, every few
+milliseconds or as soon as a full batch is waiting. Primary keys and
+``created_at`` are assigned when a row is queued, so the caller can reply
+with the conversation id straight away.
+
+Rows stay visible through ``get_pending`` until their INSERT has run, so a
+request can check a row it references (e.g. feedback on a conversation
+answered a moment ago) before it reaches the database.
+
+The queue is bounded: once ``max_pending`` rows are waiting, ``add`` waits
+for the writer to catch up instead of growing without limit. ``stop`` drains
+the queue on shutdown.
+"""
+
+import asyncio
+import copy
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from monitoring.metrics import inc as metrics_inc, observe as metrics_observe
+
+logger = logging.getLogger(__name__)
+
+# Write-behind configuration
+WRITE_BEHIND_CONFIG = {
+    'enabled': os.getenv('CHAT_WRITE_BEHIND_ENABLED', 'true').lower() == 'true',
+    'flush_interval_ms': float(os.getenv('CHAT_WRITE_BEHIND_FLUSH_MS', '20')),
+    'batch_size': int(os.getenv('CHAT_WRITE_BEHIND_BATCH_SIZE', '200')),
+    'max_pending': int(os.getenv('CHAT_WRITE_BEHIND_MAX_PENDING', '5000')),
+}
+
+# Queued row: (table, column values, enqueue time)
+_PendingRow = Tuple[Any, Dict[str, Any], float]
+
+_STOP = object()
+
+
+def prepare_row(obj: Any) -> Dict[str, Any]:
+    """
+    Fill in column defaults on an unsaved ORM object and return its column values.
+
+    Python-side defaults (``uuid4`` keys, ``[]``) are applied as the model
+    would; SQL-side defaults (``current_timestamp``) get the client clock.
+    """
+    table = obj.__table__
+    for column in table.columns:
+        if getattr(obj, column.key) is not None or column.default is None:
+            continue
+        default = column.default
+        if default.is_callable:
+            value = default.arg(None)
+        elif default.is_clause_element:
+            value = datetime.now()
+        else:
+            value = copy.copy(default.arg)
+        setattr(obj, column.key, value)
+    return {column.key: getattr(obj, column.key) for column in table.columns}
+
+
+def _row_key(table: Any, values: Dict[str, Any]) -> Tuple[str, Any]:
+    """(table name, primary key value); the chat tables have single-column keys."""
+    key_column = list(table.primary_key.columns)[0]
+    return table.name, values[key_column.key]
+
+
+class WriteBehindBuffer:
+    """Bounded queue of rows flushed in batches by one background task."""
+
+    _singleton_instance = None
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        flush_interval_ms: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        max_pending: Optional[int] = None
+    ):
+        if session_factory is None:
+            from database.connection import db_manager
+            session_factory = db_manager.get_async_session
+        self.session_factory = session_factory
+        self.flush_interval = (flush_interval_ms or WRITE_BEHIND_CONFIG['flush_interval_ms']) / 1000
+        self.batch_size = batch_size or WRITE_BEHIND_CONFIG['batch_size']
+        self.max_pending = max_pending or WRITE_BEHIND_CONFIG['max_pending']
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # (table name, primary key) -> column values of rows not yet written
+        self._unwritten: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.last_lag_seconds = 0.0
+
+    @classmethod
+    def instance(cls):
+        """Return the process-wide buffer shared by the chat endpoints."""
+        if cls._singleton_instance is None:
+            cls._singleton_instance = cls()
+        return cls._singleton_instance
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background writer (idempotent)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Write-behind buffer started (batch={self.batch_size}, "
+            f"interval={self.flush_interval * 1000:.0f}ms, max_pending={self.max_pending})"
+        )
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the writer."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+        logger.info(f"Write-behind buffer stopped ({self.flushed_rows} rows written, {self.failed_rows} failed)")
+
+    async def add(self, obj: Any) -> Any:
+        """
+        Queue an unsaved ORM object for insertion and return it.
+
+        Its primary key and ``created_at`` are set before this returns. When
+        the writer is not running (scripts, tests) the row is written at once.
+        """
+        values = prepare_row(obj)
+        if not self.running:
+            async with self.session_factory() as session:
+                await session.execute(insert(obj.__table__), [values])
+            return obj
+        row = (obj.__table__, values, time.monotonic())
+        self._unwritten[_row_key(obj.__table__, values)] = values
+        if self._queue.full():
+            await metrics_inc("write_behind_backpressure_total")
+        await self._queue.put(row)
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+        return obj
+
+    def get_pending(self, table: Any, key: Any) -> Optional[Dict[str, Any]]:
+        """Column values of the queued ``table`` row with primary key ``key``, if not written yet."""
+        return self._unwritten.get((table.name, key))
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            batch: List[_PendingRow] = []
+            if first is _STOP:
+                stopping = True
+            else:
+                batch.append(first)
+                # Give the batch a few milliseconds to fill up unless it already has
+                if self._queue.qsize() < self.batch_size - 1:
+                    try:
+                        await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+            self._batch_ready.clear()
+            # On shutdown everything left is drained
+            while (stopping or len(batch) < self.batch_size) and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            if batch:
+                await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[_PendingRow]) -> None:
+        """Insert a batch with one multi-row INSERT per table, in queue order."""
+        by_table: Dict[Any, List[Dict[str, Any]]] = {}
+        for table, values, _ in batch:
+            by_table.setdefault(table, []).append(values)
+        try:
+            async with self.session_factory() as session:
+                # Conversations are queued before their feedback, so first-seen order keeps FKs valid
+                for table, rows in by_table.items():
+                    await session.execute(insert(table), rows)
+        except Exception as e:
+            logger.error(f"Write-behind batch of {len(batch)} rows failed, retrying row by row: {e}")
+            await self._write_rows_individually(batch)
+        else:
+            self.flushed_rows += len(batch)
+            await metrics_inc("write_behind_rows_total", len(batch))
+        finally:
+            for table, values, _ in batch:
+                self._unwritten.pop(_row_key(table, values), None)
+
+        self.last_lag_seconds = time.monotonic() - min(enqueued for _, _, enqueued in batch)
+        await metrics_observe("write_behind_lag_seconds", self.last_lag_seconds)
+        await metrics_observe("write_behind_batch_rows", len(batch))
+
+    async def _write_rows_individually(self, batch: List[_PendingRow]) -> None:
+        """Fallback for a failed batch, so one bad row does not lose the others."""
+        for table, values, _ in batch:
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(insert(table), [values])
+                self.flushed_rows += 1
+                await metrics_inc("write_behind_rows_total")
+            except Exception as e:
+                self.failed_rows += 1
+                logger.error(f"Dropping {table.name} row after write-behind failure: {e}")
+                await metrics_inc("write_behind_errors_total", labels={"table": table.name})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.max_pending,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "last_lag_seconds": round(self.last_lag_seconds, 4),
+        }
@@ -10,6 +10,8 @@ from .legacy_query_executor import (
     QueryValidationError
 )
 
+from .async_query_executor import AsyncLegacyQueryExecutor
+
 from .document_transformer import (
     DocumentTransformer,
     DocumentTransformationError
@@ -24,6 +26,7 @@ from .vector_embedder import (
 __all__ = [
     # Legacy query integration
     'LegacyQueryExecutor',
+    'AsyncLegacyQueryExecutor',
     'QueryResult',
     'QueryExecutionError',
     'QueryValidationError',
@@ -0,0 +1,178 @@
+"""
+Answer Precomputation
+Generates grounded answers for each document's hypothetical questions in
+batched LLM calls, so the chat path can serve the most common questions
+without calling the LLM at request time
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from etl.config import PRECOMPUTED_ANSWER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerPrecomputationError(Exception):
+    """Raised when a batch of answers cannot be generated or parsed"""
+    pass
+
+
+@dataclass
+class PrecomputedAnswer:
+    """Answer for one hypothetical question, with the question's embedding"""
+    doc_type: str
+    question: str
+    answer: str
+    question_embedding: Optional[List[float]] = None
+
+
+class AnswerPrecomputer:
+    """
+    Pre-generates answers for hypothetical questions attached during transformation.
+
+    Several documents are answered per LLM call. Each answer must be grounded
+    in its own document only; the model returns a JSON array keyed by question id.
+    """
+
+    PROMPT_HEADER = """당신은 적성검사 결과 상담 전문가입니다.
+아래 각 검사 결과 문서에 대해, 해당 문서에 딸린 질문들에 답변해주세요.
+- 답변은 반드시 해당 문서의 내용에만 근거해야 합니다.
+- 각 답변은 친근하고 전문적인 한국어로 3~5문장으로 작성하세요.
+- 출력은 JSON 배열만 작성하세요: [{"id": "질문 ID", "answer": "답변"}]
+"""
+
+    _JSON_ARRAY = re.compile(r'\[.*\]', re.DOTALL)
+
+    def __init__(
+        self,
+        llm_client: Any = None,
+        embedder: Any = None,
+        documents_per_call: Optional[int] = None,
+        max_questions_per_document: Optional[int] = None,
+        model_name: Optional[str] = None
+    ):
+        self.model_name = model_name or PRECOMPUTED_ANSWER_CONFIG['model_name']
+        self.documents_per_call = documents_per_call or PRECOMPUTED_ANSWER_CONFIG['documents_per_call']
+        self.max_questions_per_document = (
+            max_questions_per_document or PRECOMPUTED_ANSWER_CONFIG['max_questions_per_document']
+        )
+        self._llm_client = llm_client
+        self._embedder = embedder
+
+    @property
+    def llm_client(self):
+        if self._llm_client is None:
+            from rag.gemini_client import create_generation_client
+            self._llm_client = create_generation_client(self.model_name)
+        return self._llm_client
+
+    def _generation_config(self) -> Dict[str, Any]:
+        return {
+            'temperature': 0.3,
+            'max_output_tokens': PRECOMPUTED_ANSWER_CONFIG['max_output_tokens'],
+        }
+
+    def _collect_items(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Documents with their (deduplicated) hypothetical questions."""
+        items = []
+        seen = set()
+        for doc in documents:
+            metadata = doc.get('metadata') or {}
+            questions = []
+            for question in metadata.get('hypothetical_questions') or []:
+                question = (question or "").strip()
+                # The transformer falls back to the summary itself when no rule matches
+                if not question or question == doc.get('summary_text') or question in seen:
+                    continue
+                seen.add(question)
+                questions.append(question)
+                if len(questions) >= self.max_questions_per_document:
+                    break
+            if questions:
+                items.append({'doc': doc, 'questions': questions})
+        return items
+
+    def _build_prompt(self, batch: List[Dict[str, Any]]) -> str:
+        parts = [self.PROMPT_HEADER]
+        for i, item in enumerate(batch, 1):
+            doc = item['doc']
+            content = json.dumps(doc.get('content', {}), ensure_ascii=False)
+            parts.append(f"\n=== 문서 {i}: {doc['doc_type']} ===\n요약: {doc.get('summary_text', '')}\n내용: {content}\n질문:")
+            for j, question in enumerate(item['questions'], 1):
+                parts.append(f"- [{i}.{j}] {question}")
+        return "\n".join(parts)
+
+    def _parse_answers(self, text: str, batch: List[Dict[str, Any]]) -> List[PrecomputedAnswer]:
+        match = self._JSON_ARRAY.search(text or "")
+        if not match:
+            raise AnswerPrecomputationError("No JSON array in model output")
+        try:
+            entries = json.loads(match.group(0))
+        except json.JSONDecodeError as e:
+            raise AnswerPrecomputationError(f"Invalid JSON in model output: {e}")
+
+        answers = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            answer = (entry.get('answer') or "").strip()
+            try:
+                doc_index, question_index = (int(x) - 1 for x in str(entry.get('id', '')).split('.', 1))
+                item = batch[doc_index]
+                question = item['questions'][question_index]
+            except (ValueError, IndexError):
+                continue
+            if answer:
+                answers.append(PrecomputedAnswer(item['doc']['doc_type'], question, answer))
+        return answers
+
+    async def _answer_batch(self, batch: List[Dict[str, Any]]) -> List[PrecomputedAnswer]:
+        from rag.gemini_client import response_text
+
+        response = await self.llm_client.generate(self._build_prompt(batch), self._generation_config())
+        return self._parse_answers(response_text(response), batch)
+
+    async def _attach_embeddings(self, answers: List[PrecomputedAnswer]) -> List[PrecomputedAnswer]:
+        if self._embedder is None:
+            from etl.vector_embedder import VectorEmbedder
+            self._embedder = VectorEmbedder.instance()
+
+        results = await self._embedder.generate_embeddings_batch([a.question for a in answers])
+        embedded = []
+        for answer, result in zip(answers, results):
+            # Failed embeddings come back as zero vectors, which cannot be matched
+            if result.embedding and any(result.embedding):
+                answer.question_embedding = result.embedding
+                embedded.append(answer)
+        return embedded
+
+    async def precompute(self, documents: List[Dict[str, Any]]) -> List[PrecomputedAnswer]:
+        """
+        Generate and embed answers for the documents' hypothetical questions.
+
+        A failed batch is skipped; the remaining batches still produce answers.
+        """
+        items = self._collect_items(documents)
+        if not items:
+            return []
+
+        answers: List[PrecomputedAnswer] = []
+        for start in range(0, len(items), self.documents_per_call):
+            batch = items[start:start + self.documents_per_call]
+            try:
+                answers.extend(await self._answer_batch(batch))
+            except Exception as e:
+                logger.warning(f"Answer precomputation failed for batch starting at {start}: {e}")
+
+        if not answers:
+            return []
+        embedded = await self._attach_embeddings(answers)
+        logger.info(
+            f"Precomputed {len(embedded)} answers for {sum(len(i['questions']) for i in items)} "
+            f"hypothetical questions across {len(items)} documents"
+        )
+        return embedded
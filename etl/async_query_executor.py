@@ -0,0 +1,56 @@
+"""
+Async-native legacy query engine.
+
+Runs the registered mwd_* queries directly on the asyncpg pool instead of on
+sync sessions in a thread pool. The queries are independent reads, so up to
+``concurrency`` of them are in flight at once, each on its own pooled
+connection, and the query stage takes roughly as long as its slowest query
+instead of the sum of all of them.
+
+Retry, timeout, cleaning, validation and the ``QueryResult`` contract are
+those of ``LegacyQueryExecutor``.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from etl.legacy_query_executor import AptitudeTestQueries, LegacyQueryExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLegacyQueryExecutor(LegacyQueryExecutor):
+    """LegacyQueryExecutor that executes each query on the async connection pool"""
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        retry_delay: float = 1.0,
+        concurrency: int = 8,
+        query_timeout: float = 30.0,
+        session_factory: Optional[Callable[[], Any]] = None
+    ):
+        if session_factory is None:
+            from database.connection import db_manager
+            session_factory = db_manager.get_async_session_factory()
+        self.session_factory = session_factory
+        # max_workers bounds the in-flight queries of one job
+        super().__init__(
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            max_workers=concurrency,
+            query_timeout=query_timeout
+        )
+
+    def _create_thread_pool(self):
+        return None
+
+    async def _fetch(self, session, anp_seq: int, query_name: str) -> List[Dict[str, Any]]:
+        # The job's own session can't run statements concurrently, so each query
+        # checks out its own connection; read-only, so nothing is committed.
+        sql, params = AptitudeTestQueries.statement(query_name, anp_seq)
+        async with self.session_factory() as query_session:
+            result = await query_session.execute(text(sql), params)
+            return [dict(row) for row in result.mappings().all()]
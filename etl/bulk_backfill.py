@@ -0,0 +1,381 @@
+"""
+Bulk ETL backfill.
+
+Re-indexes many users at once, e.g. after a prompt or chunking change,
+without one notification and one orchestrator run per user:
+
+    python -m etl.bulk_backfill --from 1000 --to 5000
+    python -m etl.bulk_backfill --anp-seq 1001 1002 1003
+    python -m etl.bulk_backfill --all
+    python -m etl.bulk_backfill --resume <run_id>
+
+Users are processed in batches of ``batch_size`` anp_seq values:
+
+1. each legacy query runs once per batch (``AptitudeTestQueries.batch_statement``),
+2. query results are turned into documents in a process pool,
+3. all chunks of the batch are embedded with multi-text API requests,
+4. the batch's documents replace the old ones in a single transaction, which
+   also drops the users' precomputed answers (they were generated from the
+   old documents and are rebuilt by the next per-user ETL run).
+
+Progress is checkpointed per batch in ``chat_etl_backfill_runs``, so an
+interrupted run resumes where it stopped. A throttle (users per minute, and a
+pause while the database is busy) keeps the chat API ahead of the backfill.
+Only anp_seq values that already have a ``chat_users`` row are re-indexed.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text, update
+
+from database.models import ChatETLBackfillRun, ChatUser
+from etl.async_query_executor import AsyncLegacyQueryExecutor
+from etl.config import BACKFILL_CONFIG
+from etl.document_transformer import DocumentTransformer, TransformedDocument
+from etl.legacy_query_executor import AptitudeTestQueries, QueryValidationError, QUERY_REGISTRY, UNIMPLEMENTED_QUERIES
+from monitoring.metrics import inc as metrics_inc, observe as metrics_observe
+
+logger = logging.getLogger(__name__)
+
+
+def transform_user_documents(query_data: Dict[str, List[Dict[str, Any]]]) -> List[TransformedDocument]:
+    """Turn one user's query results into documents (runs in a worker process)"""
+    return asyncio.run(DocumentTransformer().transform_all_documents(query_data))
+
+
+class BulkBackfill:
+    """Runs and resumes backfill runs recorded in ``chat_etl_backfill_runs``."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        embedder: Optional[Any] = None,
+        batch_size: Optional[int] = None,
+        transform_processes: Optional[int] = None,
+        max_users_per_minute: Optional[int] = None,
+        max_active_db_queries: Optional[int] = None
+    ):
+        if session_factory is None:
+            from database.connection import db_manager
+            session_factory = db_manager.get_async_session
+        self.session_factory = session_factory
+        self.embedder = embedder
+        self.batch_size = batch_size or BACKFILL_CONFIG['batch_size']
+        self.transform_processes = (
+            BACKFILL_CONFIG['transform_processes'] if transform_processes is None else transform_processes
+        )
+        self.max_users_per_minute = (
+            BACKFILL_CONFIG['max_users_per_minute'] if max_users_per_minute is None else max_users_per_minute
+        )
+        self.max_active_db_queries = (
+            BACKFILL_CONFIG['max_active_db_queries'] if max_active_db_queries is None else max_active_db_queries
+        )
+        self.throttle_pause_seconds = BACKFILL_CONFIG['throttle_pause_seconds']
+        # Reuses the per-user pipeline's cleaning and validation of query rows
+        self.result_checker = AsyncLegacyQueryExecutor(max_retries=0, session_factory=session_factory)
+
+    async def resolve_targets(
+        self,
+        anp_seqs: Optional[List[int]] = None,
+        anp_seq_from: Optional[int] = None,
+        anp_seq_to: Optional[int] = None
+    ) -> List[int]:
+        """anp_seq values to re-index: an explicit list, or every chat user in a range (or all)."""
+        if anp_seqs:
+            return sorted(set(anp_seqs))
+        stmt = select(ChatUser.anp_seq).order_by(ChatUser.anp_seq)
+        if anp_seq_from is not None:
+            stmt = stmt.where(ChatUser.anp_seq >= anp_seq_from)
+        if anp_seq_to is not None:
+            stmt = stmt.where(ChatUser.anp_seq <= anp_seq_to)
+        async with self.session_factory() as session:
+            return list((await session.execute(stmt)).scalars().all())
+
+    async def create_run(self, targets: List[int]) -> str:
+        run = ChatETLBackfillRun(
+            run_id=uuid.uuid4(),
+            status="pending",
+            targets=targets,
+            batch_size=self.batch_size,
+            completed_batches=0,
+            users_processed=0,
+            users_failed=0,
+            documents_written=0,
+            failures={}
+        )
+        async with self.session_factory() as session:
+            session.add(run)
+        logger.info(f"Created backfill run {run.run_id} for {len(targets)} users")
+        return str(run.run_id)
+
+    async def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        async with self.session_factory() as session:
+            run = await session.get(ChatETLBackfillRun, uuid.UUID(run_id))
+            if run is None:
+                return None
+            total_batches = (len(run.targets) + run.batch_size - 1) // run.batch_size
+            return {
+                "run_id": str(run.run_id),
+                "status": run.status,
+                "total_users": len(run.targets),
+                "completed_batches": run.completed_batches,
+                "total_batches": total_batches,
+                "users_processed": run.users_processed,
+                "users_failed": run.users_failed,
+                "documents_written": run.documents_written,
+                "users_per_minute": run.users_per_minute,
+                "failures": run.failures or {},
+                "error_message": run.error_message,
+                "started_at": run.started_at.isoformat() if run.started_at else None,
+                "completed_at": run.completed_at.isoformat() if run.completed_at else None,
+            }
+
+    async def run(self, run_id: str) -> Dict[str, Any]:
+        """Process the run's remaining batches, checkpointing after each one."""
+        async with self.session_factory() as session:
+            run = await session.get(ChatETLBackfillRun, uuid.UUID(run_id))
+            if run is None:
+                raise ValueError(f"Backfill run {run_id} not found")
+            targets, batch_size = list(run.targets), run.batch_size
+            next_batch, failures = run.completed_batches, dict(run.failures or {})
+            await session.execute(
+                update(ChatETLBackfillRun)
+                .where(ChatETLBackfillRun.run_id == run.run_id)
+                .values(status="running", error_message=None)
+            )
+
+        batches = [targets[i:i + batch_size] for i in range(0, len(targets), batch_size)]
+        logger.info(f"Backfill run {run_id}: resuming at batch {next_batch + 1}/{len(batches)}")
+
+        process_pool = None
+        if self.transform_processes > 0:
+            # spawn: forking a process that holds event-loop and pool threads is unsafe
+            process_pool = ProcessPoolExecutor(self.transform_processes, mp_context=multiprocessing.get_context("spawn"))
+        embedder = self.embedder
+        if embedder is None:
+            from etl.vector_embedder import VectorEmbedder
+            embedder = VectorEmbedder(enable_cache=False)
+        started = time.monotonic()
+        users_this_session = 0
+        try:
+            for index in range(next_batch, len(batches)):
+                await self._wait_for_database_headroom()
+                batch_started = time.monotonic()
+                ok, batch_failures, written = await self._process_batch(batches[index], process_pool, embedder)
+                failures.update(batch_failures)
+                users_this_session += len(batches[index])
+                users_per_minute = users_this_session / max(time.monotonic() - started, 1e-6) * 60
+
+                await self._checkpoint(
+                    run_id,
+                    completed_batches=index + 1,
+                    users_processed=ChatETLBackfillRun.users_processed + ok,
+                    users_failed=ChatETLBackfillRun.users_failed + len(batch_failures),
+                    documents_written=ChatETLBackfillRun.documents_written + written,
+                    users_per_minute=round(users_per_minute, 1),
+                    failures=failures
+                )
+                batch_seconds = time.monotonic() - batch_started
+                await metrics_observe("etl_backfill_batch_seconds", batch_seconds)
+                await metrics_inc("etl_backfill_users_total", ok, labels={"outcome": "success"})
+                await metrics_inc("etl_backfill_users_total", len(batch_failures), labels={"outcome": "failure"})
+                logger.info(
+                    f"Backfill run {run_id}: batch {index + 1}/{len(batches)} done in {batch_seconds:.1f}s "
+                    f"({ok} ok, {len(batch_failures)} failed, {written} documents); "
+                    f"{users_per_minute:.0f} users/min"
+                )
+                await self._throttle(len(batches[index]), batch_seconds)
+
+            await self._checkpoint(run_id, status="completed", completed_at=func.localtimestamp())
+        except asyncio.CancelledError:
+            await self._checkpoint(run_id, status="interrupted")
+            raise
+        except Exception as e:
+            logger.error(f"Backfill run {run_id} failed: {e}")
+            await self._checkpoint(run_id, status="failed", error_message=str(e))
+            raise
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown(wait=False, cancel_futures=True)
+            if self.embedder is None:
+                await embedder.close()
+        return await self.get_run(run_id)
+
+    async def _process_batch(
+        self,
+        anp_seqs: List[int],
+        process_pool: Optional[ProcessPoolExecutor],
+        embedder: Any
+    ) -> Tuple[int, Dict[str, str], int]:
+        """Re-index one batch; returns (users re-indexed, anp_seq -> failure reason, documents written)."""
+        from database.repositories import save_chunked_documents_bulk
+
+        failures: Dict[str, str] = {}
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(ChatUser.anp_seq, ChatUser.user_id).where(ChatUser.anp_seq.in_(anp_seqs))
+            )
+            user_ids = {anp_seq: str(user_id) for anp_seq, user_id in rows.all()}
+        for anp_seq in anp_seqs:
+            if anp_seq not in user_ids:
+                failures[str(anp_seq)] = "no chat user"
+        if not user_ids:
+            return 0, failures, 0
+
+        query_data = await self._fetch_legacy_data(list(user_ids))
+
+        # Transform every user's results in the process pool
+        loop = asyncio.get_running_loop()
+        transforms = [
+            loop.run_in_executor(process_pool, transform_user_documents, query_data[anp_seq])
+            if process_pool is not None
+            else DocumentTransformer().transform_all_documents(query_data[anp_seq])
+            for anp_seq in user_ids
+        ]
+        documents: Dict[int, List[TransformedDocument]] = {}
+        for anp_seq, result in zip(user_ids, await asyncio.gather(*transforms, return_exceptions=True)):
+            if isinstance(result, Exception):
+                failures[str(anp_seq)] = f"transform failed: {result}"
+            elif not result:
+                failures[str(anp_seq)] = "no documents"
+            else:
+                documents[anp_seq] = result
+
+        # One embedding pass over all chunks of the batch; a failure fails the batch's users
+        chunks = [doc for docs in documents.values() for doc in docs]
+        texts = [doc.metadata.get('searchable_text', doc.summary_text) for doc in chunks]
+        try:
+            embeddings = await embedder.generate_embeddings_multi(
+                texts, texts_per_request=BACKFILL_CONFIG['texts_per_embed_request']
+            )
+        except Exception as e:
+            logger.error(f"Embedding failed for a backfill batch of {len(documents)} users: {e}")
+            for anp_seq in documents:
+                failures[str(anp_seq)] = f"embedding failed: {e}"
+            return 0, failures, 0
+        for doc, embedding in zip(chunks, embeddings):
+            doc.embedding_vector = embedding.embedding
+
+        async with self.session_factory() as session:
+            written = await save_chunked_documents_bulk(
+                session, {user_ids[anp_seq]: docs for anp_seq, docs in documents.items()}
+            )
+        return len(documents), failures, written
+
+    async def _fetch_legacy_data(self, anp_seqs: List[int]) -> Dict[int, Dict[str, List[Dict[str, Any]]]]:
+        """
+        Run each registered query once for the whole batch.
+
+        Returns, per anp_seq, the same shape ``LegacyQueryExecutor.get_successful_results``
+        gives the per-user pipeline.
+        """
+        semaphore = asyncio.Semaphore(BACKFILL_CONFIG['query_concurrency'])
+
+        async def fetch(query_name: str) -> Dict[int, List[Dict[str, Any]]]:
+            sql, params = AptitudeTestQueries.batch_statement(query_name, anp_seqs)
+            async with semaphore, self.session_factory() as session:
+                result = await session.execute(text(sql), params)
+                grouped: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+                for row in result.mappings().all():
+                    row = dict(row)
+                    grouped[row.pop("batch_anp_seq")].append(row)
+                return grouped
+
+        query_names = list(QUERY_REGISTRY)
+        fetched = await asyncio.gather(*(fetch(name) for name in query_names), return_exceptions=True)
+
+        data: Dict[int, Dict[str, List[Dict[str, Any]]]] = {anp_seq: {} for anp_seq in anp_seqs}
+        for query_name, rows_by_user in zip(query_names, fetched):
+            if isinstance(rows_by_user, Exception):
+                # Like a failed query in the per-user pipeline: the documents are built without it
+                logger.warning(f"Backfill query '{query_name}' failed for the batch: {rows_by_user}")
+                continue
+            for anp_seq in anp_seqs:
+                try:
+                    data[anp_seq][query_name] = self.result_checker.clean_and_validate(
+                        query_name, rows_by_user.get(anp_seq, [])
+                    )
+                except QueryValidationError:
+                    continue
+        for results in data.values():
+            for query_name in UNIMPLEMENTED_QUERIES:
+                results[query_name] = []
+        return data
+
+    async def _wait_for_database_headroom(self) -> None:
+        """Pause while the database runs more active statements than the backfill may add to."""
+        if not self.max_active_db_queries:
+            return
+        while True:
+            async with self.session_factory() as session:
+                active = await session.scalar(text(
+                    "SELECT COUNT(*) FROM pg_stat_activity "
+                    "WHERE state = 'active' AND pid <> pg_backend_pid()"
+                ))
+            if (active or 0) <= self.max_active_db_queries:
+                return
+            logger.info(f"Backfill paused: {active} active database queries")
+            await metrics_inc("etl_backfill_throttled_total", labels={"reason": "database_busy"})
+            await asyncio.sleep(self.throttle_pause_seconds)
+
+    async def _throttle(self, users: int, batch_seconds: float) -> None:
+        """Keep the average rate at or below max_users_per_minute."""
+        if not self.max_users_per_minute:
+            return
+        wait = users / self.max_users_per_minute * 60 - batch_seconds
+        if wait > 0:
+            await metrics_inc("etl_backfill_throttled_total", labels={"reason": "rate"})
+            await asyncio.sleep(wait)
+
+    async def _checkpoint(self, run_id: str, **values) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(ChatETLBackfillRun)
+                .where(ChatETLBackfillRun.run_id == uuid.UUID(run_id))
+                .values(**values)
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-index many users' documents in bulk")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--anp-seq", type=int, nargs="+", help="anp_seq values to re-index")
+    target.add_argument("--from", dest="anp_seq_from", type=int, help="First anp_seq of a range of chat users")
+    target.add_argument("--all", action="store_true", help="Every chat user")
+    target.add_argument("--resume", metavar="RUN_ID", help="Continue an interrupted run")
+    parser.add_argument("--to", dest="anp_seq_to", type=int, help="Last anp_seq of the range (with --from)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from etl.logging_config import setup_logging
+
+    load_dotenv()
+    setup_logging()
+    backfill = BulkBackfill(batch_size=args.batch_size)
+
+    async def _run():
+        run_id = args.resume
+        if run_id is None:
+            targets = await backfill.resolve_targets(args.anp_seq, args.anp_seq_from, args.anp_seq_to)
+            run_id = await backfill.create_run(targets)
+            print(f"Backfill run {run_id}: {len(targets)} users")
+        summary = await backfill.run(run_id)
+        print(
+            f"Backfill run {run_id} {summary['status']}: {summary['users_processed']} users re-indexed, "
+            f"{summary['users_failed']} failed, {summary['users_per_minute']} users/min"
+        )
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
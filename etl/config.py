@@ -25,6 +25,14 @@ BACKGROUND_PROCESSING_CONFIG = {
     'job_cleanup_interval_hours': int(os.getenv('ETL_JOB_CLEANUP_INTERVAL_HOURS', '24')),
     'health_check_interval_minutes': int(os.getenv('ETL_HEALTH_CHECK_INTERVAL_MINUTES', '5')),
     'enable_partial_completion': os.getenv('ETL_ENABLE_PARTIAL_COMPLETION', 'true').lower() == 'true',
+    # Job queue leases: a claimed job is requeued if its worker stops heartbeating
+    'lease_seconds': int(os.getenv('ETL_JOB_LEASE_SECONDS', '120')),
+    'heartbeat_seconds': float(os.getenv('ETL_JOB_HEARTBEAT_SECONDS', '15')),
+    'poll_interval_seconds': float(os.getenv('ETL_WORKER_POLL_INTERVAL_SECONDS', '2')),
+    'stale_check_interval_seconds': float(os.getenv('ETL_STALE_LEASE_CHECK_SECONDS', '30')),
+    'shutdown_grace_seconds': float(os.getenv('ETL_WORKER_SHUTDOWN_GRACE_SECONDS', '30')),
+    # Run a worker inside the API process (development only; production runs `python -m etl.worker`)
+    'embedded_worker': os.getenv('ETL_EMBEDDED_WORKER', 'false').lower() == 'true',
 }
 
 # ETL processing configuration
@@ -38,6 +46,12 @@ ETL_CONFIG = {
     'enable_admin_notifications': os.getenv('ETL_ENABLE_ADMIN_NOTIFICATIONS', 'true').lower() == 'true',
     'notification_channels': os.getenv('ETL_NOTIFICATION_CHANNELS', 'log,email').split(','),
     'enable_partial_completion': os.getenv('ETL_ENABLE_PARTIAL_COMPLETION', 'true').lower() == 'true',
+    # Streaming mode: embed each document group as soon as it is transformed and store it in
+    # small batches, instead of running transformation, embedding and storage one after another
+    'streaming_mode': os.getenv('ETL_STREAMING_MODE', 'false').lower() == 'true',
+    'stream_store_batch_size': int(os.getenv('ETL_STREAM_STORE_BATCH_SIZE', '8')),
+    # Groups/batches waiting between two streaming stages (bounds memory)
+    'stream_queue_depth': int(os.getenv('ETL_STREAM_QUEUE_DEPTH', '2')),
 }
 
 # Vector embedding configuration
@@ -56,6 +70,11 @@ QUERY_CONFIG = {
     'retry_delay': float(os.getenv('QUERY_RETRY_DELAY', '1.0')),
     'max_workers': int(os.getenv('QUERY_MAX_WORKERS', '4')),
     'timeout_seconds': int(os.getenv('QUERY_TIMEOUT_SECONDS', '300')),
+    # "async" runs the legacy queries concurrently on the asyncpg pool, "threads" on sync sessions
+    'engine': os.getenv('QUERY_ENGINE', 'async'),
+    # Queries of one job in flight at once on the async pool (keep below DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    'async_concurrency': int(os.getenv('QUERY_ASYNC_CONCURRENCY', '8')),
+    'statement_timeout_seconds': float(os.getenv('QUERY_STATEMENT_TIMEOUT_SECONDS', '30')),
 }
 
 # Document transformation configuration
@@ -65,6 +84,95 @@ DOCUMENT_CONFIG = {
     'enable_metadata': os.getenv('DOCUMENT_ENABLE_METADATA', 'true').lower() == 'true',
 }
 
+# Precomputed answers for hypothetical questions (optional ETL stage)
+PRECOMPUTED_ANSWER_CONFIG = {
+    'enabled': os.getenv('ETL_PRECOMPUTE_ANSWERS', 'false').lower() == 'true',
+    'model_name': os.getenv('ETL_PRECOMPUTE_MODEL', 'gemini-2.0-flash'),
+    'documents_per_call': int(os.getenv('ETL_PRECOMPUTE_DOCUMENTS_PER_CALL', '4')),
+    'max_questions_per_document': int(os.getenv('ETL_PRECOMPUTE_MAX_QUESTIONS_PER_DOCUMENT', '3')),
+    'max_output_tokens': int(os.getenv('ETL_PRECOMPUTE_MAX_OUTPUT_TOKENS', '4096')),
+    # Minimum cosine similarity for the chat path to serve a stored answer
+    'match_threshold': float(os.getenv('CHAT_PRECOMPUTED_MATCH_THRESHOLD', '0.92')),
+}
+
+# Population-wide statistics (materialized views over mwd_score1)
+POPULATION_STATS_CONFIG = {
+    # Refresh in the background once the views are older than this
+    'max_staleness_seconds': int(os.getenv('POPULATION_STATS_MAX_STALENESS_SECONDS', '86400')),
+    # How long a process trusts its cached refresh time before re-reading it
+    'cache_ttl_seconds': int(os.getenv('POPULATION_STATS_CACHE_TTL_SECONDS', '300')),
+    'auto_refresh': os.getenv('POPULATION_STATS_AUTO_REFRESH', 'true').lower() == 'true',
+}
+
+# Bulk re-indexing of many users at once (python -m etl.bulk_backfill)
+BACKFILL_CONFIG = {
+    'batch_size': int(os.getenv('BACKFILL_BATCH_SIZE', '200')),
+    # Processes transforming query results into documents (0 = in the event loop)
+    'transform_processes': int(os.getenv('BACKFILL_TRANSFORM_PROCESSES', '4')),
+    'texts_per_embed_request': int(os.getenv('BACKFILL_TEXTS_PER_EMBED_REQUEST', '100')),
+    # Legacy batch statements in flight at once
+    'query_concurrency': int(os.getenv('BACKFILL_QUERY_CONCURRENCY', '4')),
+    # Throttle so the chat API keeps priority: users per minute (0 = unlimited) and a pause
+    # while the database is busier than max_active_db_queries active statements
+    'max_users_per_minute': int(os.getenv('BACKFILL_MAX_USERS_PER_MINUTE', '600')),
+    'max_active_db_queries': int(os.getenv('BACKFILL_MAX_ACTIVE_DB_QUERIES', '20')),
+    'throttle_pause_seconds': float(os.getenv('BACKFILL_THROTTLE_PAUSE_SECONDS', '5')),
+}
+
+# Skipping ETL runs whose legacy result rows have not changed (etl.source_fingerprint)
+SOURCE_FINGERPRINT_CONFIG = {
+    'enabled': os.getenv('ETL_SOURCE_FINGERPRINT_ENABLED', 'true').lower() == 'true',
+    # Part of every fingerprint: bump it when the transformation or embedding model changes
+    # so that users whose source rows are unchanged are still rebuilt
+    'pipeline_version': os.getenv('ETL_PIPELINE_VERSION', '1'),
+}
+
+# Persisted stage outputs so retried jobs resume (etl.stage_checkpoints)
+STAGE_CHECKPOINT_CONFIG = {
+    'enabled': os.getenv('ETL_STAGE_CHECKPOINTS_ENABLED', 'true').lower() == 'true',
+    # Older checkpoints are ignored; a retry after this long starts from the queries again
+    'max_age_hours': int(os.getenv('ETL_STAGE_CHECKPOINT_MAX_AGE_HOURS', '24')),
+    'compression_level': int(os.getenv('ETL_STAGE_CHECKPOINT_COMPRESSION_LEVEL', '6')),
+}
+
+# In-process retries of a failed stage (transient errors only): the first retry waits the
+# stage's base delay, doubled per attempt up to max_delay_seconds, with +/- jitter
+STAGE_RETRY_CONFIG = {
+    'base_delay_seconds': {
+        'initialization': 1.0,
+        'query_execution': float(os.getenv('ETL_QUERY_STAGE_RETRY_DELAY_SECONDS', '5')),
+        'embedding_generation': float(os.getenv('ETL_EMBEDDING_STAGE_RETRY_DELAY_SECONDS', '15')),
+        'document_storage': float(os.getenv('ETL_STORAGE_STAGE_RETRY_DELAY_SECONDS', '2')),
+        'answer_precomputation': 10.0,
+        'streaming': float(os.getenv('ETL_EMBEDDING_STAGE_RETRY_DELAY_SECONDS', '15')),
+        'completion': 1.0,
+    },
+    'default_delay_seconds': 5.0,
+    'max_delay_seconds': float(os.getenv('ETL_STAGE_RETRY_MAX_DELAY_SECONDS', '120')),
+    'jitter': 0.2,
+}
+
+# Coalesced job progress writes (etl.test_completion_handler.JobProgressBuffer)
+JOB_PROGRESS_CONFIG = {
+    # Progress of running jobs is written in batches; terminal statuses are always written at once
+    'coalesce_enabled': os.getenv('ETL_JOB_PROGRESS_COALESCE_ENABLED', 'true').lower() == 'true',
+    'flush_interval_ms': float(os.getenv('ETL_JOB_PROGRESS_FLUSH_MS', '500')),
+}
+
+# Push-based job progress events (etl.job_events)
+JOB_EVENTS_CONFIG = {
+    # LISTEN for the NOTIFYs of migration 012 so changes made by other processes are pushed too
+    'listen_enabled': os.getenv('ETL_JOB_EVENTS_LISTEN_ENABLED', 'true').lower() == 'true',
+    # Must match the channel used by the trigger in migration 012
+    'channel': 'etl_job_events',
+    # Must match the channel used by the trigger in migration 013; user_ids whose documents changed
+    'document_channel': 'chat_document_changes',
+    'subscriber_queue_size': int(os.getenv('ETL_JOB_EVENTS_QUEUE_SIZE', '100')),
+    # SSE comment sent after this long without events, so proxies keep the stream open
+    'keepalive_seconds': float(os.getenv('ETL_JOB_EVENTS_KEEPALIVE_SECONDS', '15')),
+    'reconnect_max_delay_seconds': float(os.getenv('ETL_JOB_EVENTS_RECONNECT_MAX_DELAY_SECONDS', '30')),
+}
+
 # Monitoring and alerting configuration
 MONITORING_CONFIG = {
     'enable_metrics': os.getenv('MONITORING_ENABLE_METRICS', 'true').lower() == 'true',
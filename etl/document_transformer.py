@@ -3,8 +3,9 @@ Document Transformation Engine
 Converts query results into thematic documents optimized for RAG system with semantic chunking
 """
 
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import json
@@ -14,6 +15,35 @@ from database.models import DocumentType
 
 logger = logging.getLogger(__name__)
 
+# 요약문 표지(marker) -> 가상 질문 템플릿, 위에서부터 순서대로 검사합니다.
+# {tendency_name}, {skill_name}은 문서 content 값으로 채워집니다.
+HYPOTHETICAL_QUESTION_RULES = [
+    (("기본 정보",), ["내 나이랑 성별 알려줘", "내 기본 정보 요약해줘", "내가 누구인지 알려줘"]),
+    (("학력",), ["내 최종학력은 뭐야?", "내가 졸업한 학교랑 전공 알려줘", "학력 정보 보여줘"]),
+    (("직업 정보",), ["내 직업이 뭐야?", "지금 다니는 회사랑 직무 알려줘", "경력 정보 요약해줘"]),
+    (("주요 성향 분석",), ["내 성격 유형 알려줘", "나의 대표적인 성향은 뭐야?", "성격 검사 결과 요약해줘"]),
+    (("성향에 대한 상세 설명",), ["{tendency_name} 성향은 어떤 특징이 있어?", "{tendency_name}에 대해 자세히 설명해줘", "내 성격 진단 결과 좀 더 알려줘"]),
+    (("주요 강점",), ["내 성격의 강점은 뭐야?", "내가 잘하는 건 뭐야?", "강점 분석 결과 보여줘"]),
+    (("개선 영역",), ["내 성격의 약점은 뭐야?", "내가 보완해야 할 점은?", "약점 분석 결과 알려줘"]),
+    (("사고력: 내 점수",), ["내 {skill_name} 점수는 몇 점이야?", "나는 {skill_name}이 강한 편이야?", "{skill_name} 분석 결과 알려줘"]),
+    (("성향 기반 추천 직업",), ["내 성향에 맞는 직업 추천해줘", "나한테 어울리는 직업이 뭐야?", "진로 추천 결과 알려줘"]),
+    (("역량 기반 추천 직업",), ["내 역량으로 갈 수 있는 직업은?", "내 강점을 살릴 수 있는 직업 추천해줘", "역량 기반 직업 추천 결과 보여줘"]),
+    # 더 구체적인 패턴 매칭 추가
+    (("성향", "성격"), ["내성향알려줘", "내 성격은 어떤 타입이야?", "성향 분석 결과 보여줘"]),
+    (("사고력", "사고"), ["내 사고력은 어때?", "사고 능력 분석 결과 알려줘", "내가 어떤 사고를 잘해?"]),
+    (("직업", "진로"), ["추천 직업 알려줘", "나한테 맞는 직업이 뭐야?", "진로 추천해줘"]),
+    (("학습",), ["내 학습 스타일은?", "어떻게 공부하는 게 좋아?", "학습 방법 추천해줘"]),
+    (("역량", "능력"), ["내 강점은 뭐야?", "내가 잘하는 능력은?", "역량 분석 결과 알려줘"]),
+]
+
+
+def template_questions() -> List[str]:
+    """Hypothetical questions that do not depend on document content (known before any ETL run)."""
+    questions = []
+    for _, templates in HYPOTHETICAL_QUESTION_RULES:
+        questions.extend(t for t in templates if "{" not in t and t not in questions)
+    return questions
+
 class DocumentTransformationError(Exception):
     """Raised when document transformation fails"""
     def __init__(self, doc_type: str, error_message: str):
@@ -21,6 +51,10 @@ class DocumentTransformationError(Exception):
         self.error_message = error_message
         super().__init__(f"Document transformation failed for {doc_type}: {error_message}")
 
+# 매 실행마다 달라지지만 청크 내용과는 무관한 메타데이터 (content_hash에서 제외)
+# stats_as_of는 전체 응답자 통계(MV)가 갱신될 때마다 바뀌므로 해시에 넣지 않음
+_VOLATILE_METADATA_KEYS = ("created_at", "chunk_key", "content_hash", "stats_as_of")
+
 @dataclass
 class TransformedDocument:
     """Container for transformed document data"""
@@ -30,6 +64,41 @@ class TransformedDocument:
     metadata: Dict[str, Any]
     embedding_vector: Optional[List[float]] = None  # 임베딩 단계에서 추가됨
 
+    @property
+    def chunk_key(self) -> Optional[str]:
+        """Stable identity of this chunk within a user's documents (set by assign_chunk_keys)"""
+        return self.metadata.get("chunk_key")
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        return self.metadata.get("content_hash")
+
+    def compute_content_hash(self) -> str:
+        """Hash of everything that is stored or embedded for this chunk"""
+        stable_metadata = {k: v for k, v in self.metadata.items() if k not in _VOLATILE_METADATA_KEYS}
+        payload = json.dumps(
+            [self.doc_type, self.content, self.summary_text, stable_metadata],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def assign_chunk_keys(documents: List[TransformedDocument], seen: Optional[Dict[str, int]] = None) -> None:
+    """
+    Give every document a chunk key (doc_type + sub_type) and a content hash.
+
+    Reprocessing the same user yields the same keys, so the store step can
+    tell unchanged, changed, new and removed chunks apart. Pass the same
+    ``seen`` counter when keying one user's documents group by group.
+    """
+    if seen is None:
+        seen = defaultdict(int)
+    for doc in documents:
+        base = f"{doc.doc_type}:{doc.metadata.get('sub_type', 'main')}"
+        seen[base] += 1
+        doc.metadata["chunk_key"] = base if seen[base] == 1 else f"{base}#{seen[base]}"
+        doc.metadata["content_hash"] = doc.compute_content_hash()
+
 class DocumentTransformer:
     """
     Transforms raw query results into semantic documents optimized for RAG with chunking strategy
@@ -74,40 +143,15 @@ class DocumentTransformer:
         # -----------------------------------------
         
         # 지금은 테스트를 위해 규칙 기반으로 예시 질문을 생성합니다.
-        if "기본 정보" in summary:
-            return ["내 나이랑 성별 알려줘", "내 기본 정보 요약해줘", "내가 누구인지 알려줘"]
-        if "학력" in summary:
-            return ["내 최종학력은 뭐야?", "내가 졸업한 학교랑 전공 알려줘", "학력 정보 보여줘"]
-        if "직업 정보" in summary:
-            return ["내 직업이 뭐야?", "지금 다니는 회사랑 직무 알려줘", "경력 정보 요약해줘"]
-        if "주요 성향 분석" in summary:
-            return ["내 성격 유형 알려줘", "나의 대표적인 성향은 뭐야?", "성격 검사 결과 요약해줘"]
-        if "성향에 대한 상세 설명" in summary:
-            tendency_name = content.get("name", "내 성향")
-            return [f"{tendency_name} 성향은 어떤 특징이 있어?", f"{tendency_name}에 대해 자세히 설명해줘", f"내 성격 진단 결과 좀 더 알려줘"]
-        if "주요 강점" in summary:
-            return ["내 성격의 강점은 뭐야?", "내가 잘하는 건 뭐야?", "강점 분석 결과 보여줘"]
-        if "개선 영역" in summary:
-            return ["내 성격의 약점은 뭐야?", "내가 보완해야 할 점은?", "약점 분석 결과 알려줘"]
-        if "사고력: 내 점수" in summary:
-            skill_name = content.get("skill_name", "내 사고력")
-            return [f"내 {skill_name} 점수는 몇 점이야?", f"나는 {skill_name}이 강한 편이야?", f"{skill_name} 분석 결과 알려줘"]
-        if "성향 기반 추천 직업" in summary:
-            return ["내 성향에 맞는 직업 추천해줘", "나한테 어울리는 직업이 뭐야?", "진로 추천 결과 알려줘"]
-        if "역량 기반 추천 직업" in summary:
-            return ["내 역량으로 갈 수 있는 직업은?", "내 강점을 살릴 수 있는 직업 추천해줘", "역량 기반 직업 추천 결과 보여줘"]
-        
-        # 더 구체적인 패턴 매칭 추가
-        if "성향" in summary or "성격" in summary:
-            return ["내성향알려줘", "내 성격은 어떤 타입이야?", "성향 분석 결과 보여줘"]
-        if "사고력" in summary or "사고" in summary:
-            return ["내 사고력은 어때?", "사고 능력 분석 결과 알려줘", "내가 어떤 사고를 잘해?"]
-        if "직업" in summary or "진로" in summary:
-            return ["추천 직업 알려줘", "나한테 맞는 직업이 뭐야?", "진로 추천해줘"]
-        if "학습" in summary:
-            return ["내 학습 스타일은?", "어떻게 공부하는 게 좋아?", "학습 방법 추천해줘"]
-        if "역량" in summary or "능력" in summary:
-            return ["내 강점은 뭐야?", "내가 잘하는 능력은?", "역량 분석 결과 알려줘"]
+        for markers, templates in HYPOTHETICAL_QUESTION_RULES:
+            if any(marker in summary for marker in markers):
+                return [
+                    template.format(
+                        tendency_name=content.get("name", "내 성향"),
+                        skill_name=content.get("skill_name", "내 사고력")
+                    )
+                    for template in templates
+                ]
         
         return [summary]  # 매칭되는 규칙이 없으면 그냥 원본 요약문을 사용
 
@@ -222,12 +266,19 @@ class DocumentTransformer:
             summary = f"주요 성향 분석: 1순위 {primary}({content['primary_tendency']['percentage']}%), 2순위 {secondary}({content['secondary_tendency']['percentage']}%)"
             if tertiary:
                 summary += f", 3순위 {tertiary}({content['tertiary_tendency']['percentage']}%)"
+            
+            # 비율은 전체 응답자 통계(etl.population_stats) 기준; 갱신 시점은 메타데이터에만 기록
+            metadata = {"data_sources": ["tendencyQuery", "tendencyStatsQuery"], "created_at": datetime.now().isoformat(), "sub_type": "main_tendencies"}
+            stats_as_of = next((s.get('stats_as_of') for s in tendency_stats if s.get('stats_as_of')), None)
+            if stats_as_of:
+                metadata["stats_as_of"] = stats_as_of
+                summary += " (전체 응답자 비율 기준)"
                 
             documents.append(TransformedDocument(
                 doc_type="PERSONALITY_PROFILE",
                 content=content,
                 summary_text=summary,
-                metadata={"data_sources": ["tendencyQuery", "tendencyStatsQuery"], "created_at": datetime.now().isoformat(), "sub_type": "main_tendencies"}
+                metadata=metadata
             ))
 
         # Individual tendency explanations
@@ -314,15 +365,23 @@ class DocumentTransformer:
                 my_score = skill.get('my_score', 0)
                 avg_score = skill.get('average_score', 0)
                 
+                # 평균은 전체 응답자 통계 기준; 갱신 시점은 메타데이터에만 기록
+                stats_as_of = skill.get('stats_as_of')
+                content = {k: v for k, v in skill.items() if k != 'stats_as_of'}
+                metadata = {"data_sources": ["thinkingSkillComparisonQuery"], "created_at": datetime.now().isoformat(), "sub_type": f"skill_{i+1}", "skill_name": skill_name}
+                
                 summary = f"{skill_name} 사고력: 내 점수 {my_score}점, 평균 {avg_score}점"
+                if stats_as_of:
+                    metadata["stats_as_of"] = stats_as_of
+                    summary += " (전체 응답자 평균 기준)"
                 if my_score > avg_score:
                     summary += f" (평균보다 {my_score - avg_score}점 높음)"
                 
                 documents.append(TransformedDocument(
                     doc_type="THINKING_SKILLS",
-                    content=skill,
+                    content=content,
                     summary_text=summary,
-                    metadata={"data_sources": ["thinkingSkillComparisonQuery"], "created_at": datetime.now().isoformat(), "sub_type": f"skill_{i+1}", "skill_name": skill_name}
+                    metadata=metadata
                 ))
 
         # Detailed thinking explanations
@@ -546,19 +605,15 @@ class DocumentTransformer:
 
         return documents
     
-    # ==================== MAIN TRANSFORMATION METHOD ====================
-    async def transform_all_documents(
-        self, 
+    def iter_document_groups(
+        self,
         query_results: Dict[str, List[Dict[str, Any]]]
-    ) -> List[TransformedDocument]:
+    ) -> Iterator[Tuple[str, List[TransformedDocument]]]:
         """
-        Transform query results into semantically chunked documents optimized for RAG
-        
-        This method creates multiple focused documents instead of a few large ones,
-        making it easier for the RAG system to find relevant information.
+        Yield (chunk name, documents) for each chunking function in turn, with
+        hypothetical questions and chunk keys already attached, so a caller can
+        start embedding the first group while the next one is being built.
         """
-        all_documents = []
-        
         # Define chunking functions and their names for logging
         chunking_functions = [
             ("User Profile", self._chunk_user_profile),
@@ -569,6 +624,7 @@ class DocumentTransformer:
             ("Learning Style", self._chunk_learning_style),
             ("Preference Analysis", self._chunk_preference_analysis),
         ]
+        seen_keys: Dict[str, int] = defaultdict(int)
         
         # Execute each chunking function
         for chunk_name, chunk_function in chunking_functions:
@@ -588,11 +644,27 @@ class DocumentTransformer:
                     doc.metadata['searchable_text'] = searchable_text
                 # ▲▲▲ [핵심 추가 끝] ▲▲▲
                 
-                all_documents.extend(documents)
+                assign_chunk_keys(documents, seen_keys)
                 logger.info(f"Created {len(documents)} {chunk_name} documents with hypothetical questions")
             except Exception as e:
                 logger.error(f"Error processing {chunk_name}: {e}", exc_info=True)
                 continue
+            yield chunk_name, documents
+    
+    # ==================== MAIN TRANSFORMATION METHOD ====================
+    async def transform_all_documents(
+        self, 
+        query_results: Dict[str, List[Dict[str, Any]]]
+    ) -> List[TransformedDocument]:
+        """
+        Transform query results into semantically chunked documents optimized for RAG
+        
+        This method creates multiple focused documents instead of a few large ones,
+        making it easier for the RAG system to find relevant information.
+        """
+        all_documents = []
+        for _chunk_name, documents in self.iter_document_groups(query_results):
+            all_documents.extend(documents)
         
         logger.info(f"Document transformation and chunking completed. Created {len(all_documents)} total documents.")
         
@@ -7,6 +7,7 @@ with data validation checkpoints, logging, and rollback mechanisms
 import asyncio
 import logging
 import json
+import random
 import traceback
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
@@ -20,11 +21,21 @@ from sqlalchemy.exc import SQLAlchemyError
 from database.models import ChatUser, ChatDocument
 from database.repositories import UserRepository, DocumentRepository
 from etl.legacy_query_executor import LegacyQueryExecutor, QueryResult
-from etl.simple_query_executor import SimpleQueryExecutor, SimpleQueryResult
+from etl.async_query_executor import AsyncLegacyQueryExecutor
+from etl.population_stats import PopulationStats
+from etl import source_fingerprint
+from etl.source_fingerprint import SourceFingerprint
+from etl.stage_checkpoints import StageCheckpointStore
 from etl.document_transformer import DocumentTransformer, TransformedDocument
 from etl.vector_embedder import VectorEmbedder
 from etl.test_completion_handler import JobTracker, JobStatus
 from etl.error_handling import classify_error, Severity
+from etl.answer_precomputer import AnswerPrecomputer
+from etl.config import (
+    ETL_CONFIG, PRECOMPUTED_ANSWER_CONFIG, QUERY_CONFIG, SOURCE_FINGERPRINT_CONFIG,
+    STAGE_CHECKPOINT_CONFIG, STAGE_RETRY_CONFIG
+)
+from monitoring.metrics import inc as metrics_inc
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +48,17 @@ class ETLStage(Enum):
     EMBEDDING_GENERATION = "embedding_generation"
     DOCUMENT_STORAGE = "document_storage"
     COMPLETION = "completion"
+    # Optional stages (not counted in the job's step total)
+    ANSWER_PRECOMPUTATION = "answer_precomputation"
+    # Streaming mode: transformation, embedding and storage overlapped
+    STREAMING = "streaming"
+
+# Stages whose output is persisted so that a retried job resumes after them (pipeline order)
+PERSISTED_STAGES = (
+    ETLStage.DATA_VALIDATION,
+    ETLStage.DOCUMENT_TRANSFORMATION,
+    ETLStage.EMBEDDING_GENERATION,
+)
 
 class ValidationLevel(Enum):
     """Data validation levels"""
@@ -69,6 +91,8 @@ class ETLContext:
     validation_level: ValidationLevel = ValidationLevel.STANDARD
     enable_rollback: bool = True
     max_retries_per_stage: int = 2
+    # Source fingerprint digest of this run, stored with its persisted stage outputs
+    source_fingerprint: Optional[str] = None
 
 class ETLValidationError(Exception):
     """Raised when ETL validation fails"""
@@ -460,6 +484,9 @@ class ETLOrchestrator:
         max_retries_per_stage: int = 2,
         checkpoint_interval: int = 1,  # Save checkpoint after each stage
         allow_partial_completion: bool = True,
+        precompute_answers: Optional[bool] = None,
+        streaming: Optional[bool] = None,
+        checkpoint_store: Optional[StageCheckpointStore] = None,
     ):
         self.validation_level = validation_level
         self.enable_rollback = enable_rollback
@@ -467,6 +494,13 @@ class ETLOrchestrator:
         self.checkpoint_interval = checkpoint_interval
         self.validator = DataValidator()
         self.allow_partial_completion = allow_partial_completion
+        self.precompute_answers = (
+            PRECOMPUTED_ANSWER_CONFIG['enabled'] if precompute_answers is None else precompute_answers
+        )
+        self.streaming = ETL_CONFIG['streaming_mode'] if streaming is None else streaming
+        if checkpoint_store is None and STAGE_CHECKPOINT_CONFIG['enabled']:
+            checkpoint_store = StageCheckpointStore.instance()
+        self.checkpoint_store = checkpoint_store
     
     async def process_test_completion(
         self,
@@ -474,7 +508,8 @@ class ETLOrchestrator:
         anp_seq: int,
         job_id: str,
         session: AsyncSession,
-        job_tracker: JobTracker
+        job_tracker: JobTracker,
+        force: bool = False
     ) -> Dict[str, Any]:
         """
         Process test completion with full ETL pipeline
@@ -485,6 +520,7 @@ class ETLOrchestrator:
             job_id: Job tracking identifier
             session: Database session
             job_tracker: Job progress tracker
+            force: Run the pipeline even if the legacy rows are unchanged since the last run
             
         Returns:
             Processing results dictionary
@@ -508,6 +544,12 @@ class ETLOrchestrator:
         try:
             logger.info(f"Starting ETL processing for job {job_id}")
             
+            # Skip the pipeline when the legacy rows are unchanged since the last successful run
+            fingerprint, unchanged = await self._check_source_fingerprint(context, force)
+            if unchanged:
+                return await self._skip_unchanged(context)
+            context.source_fingerprint = fingerprint.digest if fingerprint is not None else None
+            
             # Stage 1: Initialization
             await self._execute_stage(
                 context,
@@ -516,45 +558,78 @@ class ETLOrchestrator:
                 "Initializing ETL processing"
             )
             
-            # Stage 2: Query Execution
-            query_results = await self._execute_stage(
-                context,
-                ETLStage.QUERY_EXECUTION,
-                self._execute_queries,
-                "Executing legacy queries"
-            )
-            
-            # Stage 3: Data Validation
-            validated_data = await self._execute_stage(
-                context,
-                ETLStage.DATA_VALIDATION,
-                lambda ctx: self._validate_query_data(ctx, query_results),
-                "Validating query results"
-            )
+            # Resume after the last stage an earlier attempt of this job persisted
+            validated_data = transformed_documents = embedded_documents = None
+            resumed = await self._load_resume_point(context)
+            if resumed is not None:
+                resumed_stage, resumed_output = resumed
+                if resumed_stage == ETLStage.EMBEDDING_GENERATION:
+                    embedded_documents = resumed_output
+                elif resumed_stage == ETLStage.DOCUMENT_TRANSFORMATION:
+                    transformed_documents = resumed_output
+                else:
+                    validated_data = resumed_output
             
-            # Stage 4: Document Transformation
-            transformed_documents = await self._execute_stage(
-                context,
-                ETLStage.DOCUMENT_TRANSFORMATION,
-                lambda ctx: self._transform_documents(ctx, validated_data),
-                "Transforming documents"
-            )
+            if resumed is None:
+                # Stage 2: Query Execution
+                query_results = await self._execute_stage(
+                    context,
+                    ETLStage.QUERY_EXECUTION,
+                    self._execute_queries,
+                    "Executing legacy queries"
+                )
+                
+                # Stage 3: Data Validation
+                validated_data = await self._execute_persisted_stage(
+                    context,
+                    ETLStage.DATA_VALIDATION,
+                    lambda ctx: self._validate_query_data(ctx, query_results),
+                    "Validating query results"
+                )
             
-            # Stage 5: Embedding Generation
-            embedded_documents = await self._execute_stage(
-                context,
-                ETLStage.EMBEDDING_GENERATION,
-                lambda ctx: self._generate_embeddings(ctx, transformed_documents),
-                "Generating embeddings"
-            )
+            if self.streaming and validated_data is not None:
+                # Stages 4-6 overlapped: each document group is embedded and stored as it is produced
+                embedded_documents, stored_documents = await self._execute_stage(
+                    context,
+                    ETLStage.STREAMING,
+                    lambda ctx: self._stream_documents(ctx, validated_data),
+                    "Transforming, embedding and storing documents"
+                )
+            else:
+                if embedded_documents is None:
+                    if transformed_documents is None:
+                        # Stage 4: Document Transformation
+                        transformed_documents = await self._execute_persisted_stage(
+                            context,
+                            ETLStage.DOCUMENT_TRANSFORMATION,
+                            lambda ctx: self._transform_documents(ctx, validated_data),
+                            "Transforming documents"
+                        )
+                    
+                    # Stage 5: Embedding Generation
+                    embedded_documents = await self._execute_persisted_stage(
+                        context,
+                        ETLStage.EMBEDDING_GENERATION,
+                        lambda ctx: self._generate_embeddings(ctx, transformed_documents),
+                        "Generating embeddings"
+                    )
+                
+                # Stage 6: Document Storage
+                stored_documents = await self._execute_stage(
+                    context,
+                    ETLStage.DOCUMENT_STORAGE,
+                    lambda ctx: self._store_documents(ctx, embedded_documents),
+                    "Storing documents"
+                )
             
-            # Stage 6: Document Storage
-            stored_documents = await self._execute_stage(
-                context,
-                ETLStage.DOCUMENT_STORAGE,
-                lambda ctx: self._store_documents(ctx, embedded_documents),
-                "Storing documents"
-            )
+            # Optional stage: pre-generate answers for hypothetical questions
+            if self.precompute_answers:
+                await self._execute_stage(
+                    context,
+                    ETLStage.ANSWER_PRECOMPUTATION,
+                    lambda ctx: self._precompute_answers(ctx, embedded_documents),
+                    "Precomputing answers for common questions"
+                )
             
             # Stage 7: Completion
             final_result = await self._execute_stage(
@@ -564,6 +639,10 @@ class ETLOrchestrator:
                 "Completing ETL processing"
             )
             
+            if fingerprint is not None:
+                await self._record_source_fingerprint(context, fingerprint)
+            await self._clear_stage_checkpoints(context)
+            
             # Log success
             processing_time = (datetime.now() - context.started_at).total_seconds()
             logger.info(
@@ -579,6 +658,76 @@ class ETLOrchestrator:
             await self._handle_processing_failure(context, e)
             raise
     
+    async def _check_source_fingerprint(
+        self,
+        context: ETLContext,
+        force: bool
+    ) -> Tuple[Optional[SourceFingerprint], bool]:
+        """
+        Fingerprint the legacy rows of this anp_seq. The second value is True
+        when they match the last successful run and the run can be skipped.
+        """
+        if not SOURCE_FINGERPRINT_CONFIG['enabled']:
+            return None, False
+        
+        try:
+            fingerprint = await source_fingerprint.compute_fingerprint(context.session, context.anp_seq)
+            unchanged = not force and await source_fingerprint.is_unchanged(
+                context.session, context.user_id, context.anp_seq, fingerprint
+            )
+        except Exception as e:
+            # Never block a run on the check itself
+            logger.warning(f"Source fingerprint check failed for anp_seq {context.anp_seq}, running full ETL: {e}")
+            await context.session.rollback()
+            await metrics_inc("etl_source_fingerprint_total", labels={"outcome": "error"})
+            return None, False
+        
+        outcome = "skipped" if unchanged else ("forced" if force else "changed")
+        await metrics_inc("etl_source_fingerprint_total", labels={"outcome": outcome})
+        return fingerprint, unchanged
+    
+    async def _skip_unchanged(self, context: ETLContext) -> Dict[str, Any]:
+        """Finish the job without running any stage; the stored documents are current"""
+        
+        logger.info(
+            f"Legacy data for anp_seq {context.anp_seq} unchanged since the last run; "
+            f"skipping ETL job {context.job_id}"
+        )
+        await context.job_tracker.update_job(
+            context.job_id,
+            status=JobStatus.SUCCESS.value,
+            progress_percentage=100.0,
+            current_step="Source data unchanged since the last run; skipped",
+            completed_steps=7,
+            completed_at=datetime.now()
+        )
+        return {
+            "job_id": context.job_id,
+            "user_id": context.user_id,
+            "anp_seq": context.anp_seq,
+            "status": "success",
+            "skipped": True,
+            "skip_reason": "source_unchanged",
+            "processing_time_seconds": (datetime.now() - context.started_at).total_seconds(),
+            "documents_created": 0,
+            "document_types": [],
+            "checkpoints_created": 0,
+            "validation_level": context.validation_level.value,
+            "completed_at": datetime.now().isoformat()
+        }
+    
+    async def _record_source_fingerprint(self, context: ETLContext, fingerprint: SourceFingerprint) -> None:
+        """Remember what this successful run was built from"""
+        
+        try:
+            await source_fingerprint.record_fingerprint(
+                context.session, context.user_id, context.anp_seq, fingerprint, context.job_id
+            )
+        except Exception as e:
+            # The next run simply won't be skipped
+            logger.warning(f"Failed to record source fingerprint for anp_seq {context.anp_seq}: {e}")
+            await context.session.rollback()
+    
     async def _execute_stage(
         self,
         context: ETLContext,
@@ -646,14 +795,95 @@ class ETLOrchestrator:
                     )
                     raise
                 
-                # Wait before retry (exponential backoff)
-                retry_delay = min(60 * (2 ** (retry_count - 1)), 300)  # Max 5 minutes
-                logger.info(f"Retrying stage {stage.value} in {retry_delay} seconds")
+                # Only transient errors are retried in place; the rest fail the job right away
+                # (a job-level retry resumes from the persisted stage outputs)
+                _error_type, _severity, retryable = classify_error(e)
+                if not retryable:
+                    logger.error(f"Stage {stage.value} failed with a non-transient error, not retrying")
+                    raise
+                
+                retry_delay = self._stage_retry_delay(stage, retry_count)
+                logger.info(f"Retrying stage {stage.value} in {retry_delay:.1f} seconds")
                 await asyncio.sleep(retry_delay)
         
         # This should never be reached
         raise RuntimeError(f"Stage {stage.value} failed after all retries")
     
+    @staticmethod
+    def _stage_retry_delay(stage: ETLStage, retry_count: int) -> float:
+        """Exponential backoff from the stage's own base delay, capped and jittered"""
+        base = STAGE_RETRY_CONFIG['base_delay_seconds'].get(
+            stage.value, STAGE_RETRY_CONFIG['default_delay_seconds']
+        )
+        delay = min(base * (2 ** (retry_count - 1)), STAGE_RETRY_CONFIG['max_delay_seconds'])
+        jitter = STAGE_RETRY_CONFIG['jitter']
+        return delay * random.uniform(1 - jitter, 1 + jitter)
+    
+    async def _execute_persisted_stage(
+        self,
+        context: ETLContext,
+        stage: ETLStage,
+        stage_func,
+        progress_message: str
+    ) -> Any:
+        """Execute a stage and persist its output so a retried job can resume after it"""
+        
+        result = await self._execute_stage(context, stage, stage_func, progress_message)
+        if self.checkpoint_store is None:
+            return result
+        
+        output = [asdict(doc) for doc in result] if stage == ETLStage.DOCUMENT_TRANSFORMATION else result
+        later_stages = [s.value for s in PERSISTED_STAGES[PERSISTED_STAGES.index(stage) + 1:]]
+        try:
+            size = await self.checkpoint_store.save(
+                context.user_id, context.anp_seq, stage.value, output,
+                job_id=context.job_id,
+                source_fingerprint=context.source_fingerprint,
+                invalidates=later_stages
+            )
+            logger.debug(f"Persisted {stage.value} output for job {context.job_id} ({size} bytes)")
+        except Exception as e:
+            # A missing checkpoint only means a retry starts earlier
+            logger.warning(f"Could not persist {stage.value} output for job {context.job_id}: {e}")
+        return result
+    
+    async def _load_resume_point(self, context: ETLContext) -> Optional[Tuple[ETLStage, Any]]:
+        """The last stage persisted by an earlier attempt for this user and anp_seq, with its output"""
+        
+        if self.checkpoint_store is None:
+            return None
+        try:
+            found = await self.checkpoint_store.load_latest(
+                context.user_id, context.anp_seq,
+                [s.value for s in PERSISTED_STAGES],
+                source_fingerprint=context.source_fingerprint
+            )
+        except Exception as e:
+            logger.warning(f"Could not load persisted stage outputs for job {context.job_id}: {e}")
+            return None
+        if found is None:
+            return None
+        
+        stage_value, output, from_job_id = found
+        stage = ETLStage(stage_value)
+        if stage == ETLStage.DOCUMENT_TRANSFORMATION:
+            output = [TransformedDocument(**doc) for doc in output]
+        
+        checkpoint = await self._create_checkpoint(context, stage, output, datetime.now(), success=True)
+        checkpoint.data_snapshot["resumed_from_job"] = from_job_id
+        context.checkpoints.append(checkpoint)
+        await metrics_inc("etl_stage_resumed_total", labels={"stage": stage.value})
+        logger.info(f"Job {context.job_id} resumes after {stage.value} persisted by job {from_job_id}")
+        return stage, output
+    
+    async def _clear_stage_checkpoints(self, context: ETLContext) -> None:
+        if self.checkpoint_store is None:
+            return
+        try:
+            await self.checkpoint_store.clear(context.user_id, context.anp_seq)
+        except Exception as e:
+            logger.warning(f"Could not clear persisted stage outputs for job {context.job_id}: {e}")
+    
     async def _initialize_processing(self, context: ETLContext) -> Dict[str, Any]:
         """Initialize ETL processing"""
         
@@ -682,58 +912,55 @@ class ETLOrchestrator:
         }
     
     async def _execute_queries(self, context: ETLContext) -> Dict[str, QueryResult]:
-        """Execute legacy queries using simple sequential executor"""
+        """Execute each registered legacy query once (bounded parallelism, per-query retry)"""
+        # Independent reads: on the async pool the stage takes about as long as its slowest query
+        
+        # The population comparisons read precomputed views; kick off a refresh if they are stale
+        await PopulationStats.instance().ensure_fresh()
+        
+        if QUERY_CONFIG['engine'] == 'async':
+            executor = AsyncLegacyQueryExecutor(
+                max_retries=QUERY_CONFIG['max_retries'],
+                retry_delay=QUERY_CONFIG['retry_delay'],
+                concurrency=QUERY_CONFIG['async_concurrency'],
+                query_timeout=QUERY_CONFIG['statement_timeout_seconds']
+            )
+        else:
+            executor = LegacyQueryExecutor(
+                max_retries=QUERY_CONFIG['max_retries'],
+                retry_delay=QUERY_CONFIG['retry_delay'],
+                max_workers=QUERY_CONFIG['max_workers'],
+                query_timeout=QUERY_CONFIG['statement_timeout_seconds']
+            )
         
-        # 간단한 순차 실행기 사용
-        simple_executor = SimpleQueryExecutor()
+        try:
+            query_results = await executor.execute_all_queries_async(context.session, context.anp_seq)
+        finally:
+            await executor.close()
         
+        # Per-query timing and the stage's critical path on the job record
         try:
-            # 동기 실행을 비동기로 래핑
-            loop = asyncio.get_event_loop()
-            simple_results = await loop.run_in_executor(
-                None, simple_executor.execute_core_queries, context.anp_seq
+            await context.job_tracker.update_job(
+                context.job_id,
+                query_results_summary={
+                    "queries": {
+                        name: {
+                            "success": result.success,
+                            "rows": result.row_count or 0,
+                            "seconds": round(result.execution_time or 0.0, 3),
+                        }
+                        for name, result in query_results.items()
+                    },
+                    "stage": executor.last_run_stats,
+                }
             )
-            
-            # SimpleQueryResult를 QueryResult로 변환
-            query_results = {}
-            for name, simple_result in simple_results.items():
-                query_results[name] = QueryResult(
-                    query_name=simple_result.query_name,
-                    success=simple_result.success,
-                    data=simple_result.data,
-                    error=simple_result.error,
-                    execution_time=simple_result.execution_time,
-                    row_count=simple_result.row_count
-                )
-            
-            # 나머지 쿼리들은 빈 결과로 채움 (문서 변환기 호환성을 위해)
-            missing_queries = [
-                "bottomTendencyQuery", "learningStyleChartQuery", "competencySubjectsQuery",
-                "competencyJobsQuery", "competencyJobMajorsQuery", "dutiesQuery",
-                "imagePreferenceStatsQuery", "preferenceJobsQuery", "tendencyStatsQuery",
-                "thinkingSkillComparisonQuery", "subjectRanksQuery", "instituteSettingsQuery",
-                "tendency1ExplainQuery", "tendency2ExplainQuery", "topTendencyExplainQuery",
-                "bottomTendencyExplainQuery", "thinkingMainQuery", "thinkingDetailQuery",
-                "suitableJobMajorsQuery", "pdKindQuery", "talentListQuery"
-            ]
-            
-            for query_name in missing_queries:
-                query_results[query_name] = QueryResult(
-                    query_name=query_name,
-                    success=True,
-                    data=[],
-                    error=None,
-                    execution_time=0.0,
-                    row_count=0
-                )
-            
-            # Store rollback data
-            context.rollback_data["query_execution_completed"] = True
-            
-            return query_results
-            
-        finally:
-            simple_executor.cleanup()
+        except Exception as e:
+            logger.warning(f"Could not record query timings for job {context.job_id}: {e}")
+        
+        # Store rollback data
+        context.rollback_data["query_execution_completed"] = True
+        
+        return query_results
     
     async def _validate_query_data(
         self, 
@@ -810,38 +1037,32 @@ class ETLOrchestrator:
         """Generate embeddings for documents"""
         
         # Convert to format expected by VectorEmbedder
-        documents_for_embedding = []
-        for doc in transformed_documents:
-            # ▼▼▼ [핵심 수정] summary_text 대신 metadata의 searchable_text를 사용 ▼▼▼
-            searchable_text = doc.metadata.get('searchable_text', doc.summary_text)
-            documents_for_embedding.append({
-                'doc_type': doc.doc_type,
-                'content': doc.content,
-                'summary_text': doc.summary_text,  # 원본 요약문은 그대로 저장
-                'metadata': doc.metadata,
-                'text_to_embed': searchable_text  # 임베딩할 텍스트를 명시적으로 전달
-            })
-            # ▲▲▲ [핵심 수정 끝] ▲▲▲
+        documents_for_embedding = [self._embedding_input(doc) for doc in transformed_documents]
+        
+        # Chunks whose content hash matches the stored row keep their embedding
+        reused, to_embed = await self._reuse_stored_embeddings(context, documents_for_embedding)
         
         # Generate embeddings
-        try:
-            async with VectorEmbedder(
-                batch_size=3,  # Smaller batches for reliability
-                enable_cache=True,
-                max_retries=3
-            ) as embedder:
-                embedded_documents = await embedder.generate_document_embeddings(
-                    documents_for_embedding
-                )
-        except Exception as embed_err:
-            # Fallback: generate dummy embeddings to allow pipeline to proceed in dev
-            logger.error(f"Embedding service unavailable, using dummy embeddings: {embed_err}")
-            dummy = [0.0] * 768
-            embedded_documents = []
-            for doc in documents_for_embedding:
-                tmp = doc.copy()
-                tmp['embedding_vector'] = dummy
-                embedded_documents.append(tmp)
+        embedded_documents = []
+        if to_embed:
+            try:
+                async with VectorEmbedder(
+                    batch_size=3,  # Smaller batches for reliability
+                    enable_cache=True,
+                    max_retries=3
+                ) as embedder:
+                    embedded_documents = await embedder.generate_document_embeddings(
+                        to_embed
+                    )
+            except Exception as embed_err:
+                # Fallback: generate dummy embeddings to allow pipeline to proceed in dev
+                logger.error(f"Embedding service unavailable, using dummy embeddings: {embed_err}")
+                embedded_documents = self._dummy_embeddings(to_embed)
+        embedded_documents = reused + embedded_documents
+        logger.info(
+            f"Embeddings for job {context.job_id}: {len(reused)} reused from unchanged chunks, "
+            f"{len(to_embed)} generated"
+        )
         
         # Validate embeddings
         validation_results = self.validator.validate_embeddings(
@@ -862,6 +1083,73 @@ class ETLOrchestrator:
         
         return embedded_documents
     
+    @staticmethod
+    def _embedding_input(doc: TransformedDocument) -> Dict[str, Any]:
+        """A transformed document in the format expected by VectorEmbedder"""
+        # ▼▼▼ [핵심 수정] summary_text 대신 metadata의 searchable_text를 사용 ▼▼▼
+        searchable_text = doc.metadata.get('searchable_text', doc.summary_text)
+        return {
+            'doc_type': doc.doc_type,
+            'content': doc.content,
+            'summary_text': doc.summary_text,  # 원본 요약문은 그대로 저장
+            'metadata': doc.metadata,
+            'text_to_embed': searchable_text  # 임베딩할 텍스트를 명시적으로 전달
+        }
+        # ▲▲▲ [핵심 수정 끝] ▲▲▲
+    
+    @staticmethod
+    def _dummy_embeddings(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        dummy = [0.0] * 768
+        embedded_documents = []
+        for doc in documents:
+            tmp = doc.copy()
+            tmp['embedding_vector'] = dummy
+            embedded_documents.append(tmp)
+        return embedded_documents
+    
+    async def _reuse_stored_embeddings(
+        self,
+        context: ETLContext,
+        documents: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split documents into (unchanged, with the stored embedding attached) and (to embed)"""
+        
+        existing = await self._load_stored_chunks(context)
+        return self._split_reusable(existing, documents)
+    
+    async def _load_stored_chunks(self, context: ETLContext) -> Dict[str, Dict[str, Any]]:
+        """The user's stored chunks by chunk key; empty (embed everything) if they can't be read"""
+        
+        from database.repositories import get_existing_chunks
+        
+        try:
+            return await get_existing_chunks(context.session, context.user_id)
+        except Exception as e:
+            logger.warning(f"Could not load stored chunks for job {context.job_id}, embedding all: {e}")
+            return {}
+    
+    @staticmethod
+    def _split_reusable(
+        existing: Dict[str, Dict[str, Any]],
+        documents: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        reused, to_embed = [], []
+        for doc in documents:
+            stored = existing.get(doc['metadata'].get('chunk_key'))
+            vector = stored["embedding_vector"] if stored else None
+            if (
+                stored is not None
+                and stored["content_hash"] == doc['metadata'].get('content_hash')
+                and vector is not None
+                and any(float(x) != 0.0 for x in vector)  # re-embed stored dummy vectors
+            ):
+                tmp = doc.copy()
+                tmp['embedding_vector'] = [float(x) for x in vector]
+                reused.append(tmp)
+            else:
+                to_embed.append(doc)
+        return reused, to_embed
+    
     async def _store_documents(
         self, 
         context: ETLContext, 
@@ -870,7 +1158,7 @@ class ETLOrchestrator:
         """Store documents in database using chunked document strategy"""
         
         # Import here to avoid circular imports
-        from database.repositories import save_chunked_documents
+        from database.repositories import upsert_chunked_documents
         from etl.document_transformer import TransformedDocument
         
         stored_documents = []
@@ -896,10 +1184,11 @@ class ETLOrchestrator:
                     'user_id': context.user_id
                 })
             
-            # Use save_chunked_documents function (delete + insert strategy)
-            await save_chunked_documents(context.session, context.user_id, transformed_docs)
+            # Incremental: only changed chunks are written, only removed ones deleted
+            counts = await upsert_chunked_documents(context.session, context.user_id, transformed_docs)
+            context.rollback_data["document_changes"] = counts
             
-            logger.info(f"Successfully stored {len(stored_documents)} documents using chunked strategy")
+            logger.info(f"Successfully stored {len(stored_documents)} documents incrementally: {counts}")
             return stored_documents
             
         except Exception as e:
@@ -908,6 +1197,176 @@ class ETLOrchestrator:
             logger.error(f"Document storage failed, transaction rolled back: {e}")
             raise
     
+    async def _stream_documents(
+        self,
+        context: ETLContext,
+        query_data: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Streaming mode for stages 4-6: each chunking function's documents are
+        embedded as soon as they are produced and written in small batches, so
+        the stages overlap and only a few groups are held at a time.
+        
+        All batches share the session's transaction, which is committed only
+        after every stage has validated its output; a failure leaves the
+        previous documents in place. A checkpoint is recorded as each stage
+        finishes.
+        
+        Returns:
+            (documents for answer precomputation, without vectors), stored documents
+        """
+        
+        from database.repositories import ChunkedDocumentUpsert
+        
+        started = datetime.now()
+        batch_size = ETL_CONFIG['stream_store_batch_size']
+        to_embed_queue: asyncio.Queue = asyncio.Queue(maxsize=ETL_CONFIG['stream_queue_depth'])
+        to_store_queue: asyncio.Queue = asyncio.Queue(maxsize=ETL_CONFIG['stream_queue_depth'])
+        precompute_inputs: List[Dict[str, Any]] = []
+        stored_documents: List[Dict[str, Any]] = []
+        
+        existing = await self._load_stored_chunks(context)
+        upsert = ChunkedDocumentUpsert(context.session, context.user_id)
+        await upsert.begin()
+        
+        async def transform() -> None:
+            transformed_documents = []
+            for _chunk_name, documents in DocumentTransformer().iter_document_groups(query_data):
+                transformed_documents.extend(documents)
+                if documents:
+                    await to_embed_queue.put(documents)
+                # Let the embedding requests for earlier groups go out
+                await asyncio.sleep(0)
+            
+            validation_results = self.validator.validate_transformed_documents(
+                transformed_documents, context.validation_level
+            )
+            if not validation_results["passed"]:
+                raise ETLValidationError(
+                    ETLStage.DOCUMENT_TRANSFORMATION,
+                    "Document transformation validation failed",
+                    validation_results
+                )
+            context.checkpoints.append(await self._create_checkpoint(
+                context, ETLStage.DOCUMENT_TRANSFORMATION, transformed_documents, started, success=True
+            ))
+            await to_embed_queue.put(None)
+        
+        async def embed() -> None:
+            try:
+                embedder = VectorEmbedder(batch_size=3, enable_cache=True, max_retries=3)
+            except Exception as embed_err:
+                logger.error(f"Embedding service unavailable, using dummy embeddings: {embed_err}")
+                embedder = None
+            valid_embeddings = generated = reused_total = 0
+            try:
+                while (documents := await to_embed_queue.get()) is not None:
+                    inputs = [self._embedding_input(doc) for doc in documents]
+                    if self.precompute_answers:
+                        precompute_inputs.extend(inputs)
+                    
+                    # Chunks whose content hash matches the stored row keep their embedding
+                    reused, to_embed = self._split_reusable(existing, inputs)
+                    embedded = []
+                    if to_embed and embedder is not None:
+                        try:
+                            embedded = await embedder.generate_document_embeddings(to_embed)
+                        except Exception as embed_err:
+                            logger.error(f"Embedding service unavailable, using dummy embeddings: {embed_err}")
+                            embedded = self._dummy_embeddings(to_embed)
+                    elif to_embed:
+                        embedded = self._dummy_embeddings(to_embed)
+                    embedded = reused + embedded
+                    reused_total += len(reused)
+                    generated += len(to_embed)
+                    
+                    validation_results = self.validator.validate_embeddings(embedded, context.validation_level)
+                    valid_embeddings += validation_results["valid_embeddings"]
+                    if context.validation_level == ValidationLevel.STRICT and not validation_results["passed"]:
+                        raise ETLValidationError(
+                            ETLStage.EMBEDDING_GENERATION, "Embedding validation failed", validation_results
+                        )
+                    for start in range(0, len(embedded), batch_size):
+                        await to_store_queue.put(embedded[start:start + batch_size])
+            finally:
+                if embedder is not None:
+                    await embedder.close()
+            
+            logger.info(
+                f"Embeddings for job {context.job_id}: {reused_total} reused from unchanged chunks, "
+                f"{generated} generated"
+            )
+            if valid_embeddings == 0:
+                raise ETLValidationError(
+                    ETLStage.EMBEDDING_GENERATION,
+                    "Embedding validation failed",
+                    {"valid_embeddings": 0, "total_documents": reused_total + generated}
+                )
+            context.checkpoints.append(await self._create_checkpoint(
+                context, ETLStage.EMBEDDING_GENERATION, {"reused": reused_total, "generated": generated},
+                started, success=True
+            ))
+            await to_store_queue.put(None)
+        
+        async def store() -> None:
+            while (batch := await to_store_queue.get()) is not None:
+                await upsert.write([
+                    TransformedDocument(
+                        doc_type=doc_data['doc_type'],
+                        content=doc_data['content'],
+                        summary_text=doc_data['summary_text'],
+                        metadata=doc_data.get('metadata', {}),
+                        embedding_vector=doc_data['embedding_vector']
+                    )
+                    for doc_data in batch
+                ])
+                stored_documents.extend(
+                    {'doc_type': doc_data['doc_type'], 'user_id': context.user_id} for doc_data in batch
+                )
+            context.rollback_data["document_changes"] = await upsert.finish()
+            context.checkpoints.append(await self._create_checkpoint(
+                context, ETLStage.DOCUMENT_STORAGE, stored_documents, started, success=True
+            ))
+        
+        tasks = [asyncio.create_task(step()) for step in (transform, embed, store)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await context.session.rollback()
+            logger.error(f"Streaming ETL failed for job {context.job_id}, transaction rolled back: {e}")
+            raise
+        
+        logger.info(
+            f"Streamed {len(stored_documents)} documents for job {context.job_id} in "
+            f"{(datetime.now() - started).total_seconds():.2f}s: {context.rollback_data['document_changes']}"
+        )
+        return precompute_inputs, stored_documents
+    
+    async def _precompute_answers(
+        self, 
+        context: ETLContext, 
+        embedded_documents: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Generate and store answers for hypothetical questions (best effort)"""
+        
+        from database.repositories import save_precomputed_answers
+        
+        precomputer = AnswerPrecomputer()
+        try:
+            answers = await precomputer.precompute(embedded_documents)
+            await save_precomputed_answers(
+                context.session, context.user_id, answers, model_name=precomputer.model_name
+            )
+        except Exception as e:
+            # Precomputed answers are an optimization; never fail the job over them
+            logger.warning(f"Answer precomputation skipped for job {context.job_id}: {e}")
+            return []
+        
+        return [{'doc_type': a.doc_type, 'question': a.question} for a in answers]
+    
     async def _complete_processing(
         self, 
         context: ETLContext, 
@@ -1012,11 +1471,18 @@ class ETLOrchestrator:
             ETLStage.DOCUMENT_TRANSFORMATION: 50.0,
             ETLStage.EMBEDDING_GENERATION: 70.0,
             ETLStage.DOCUMENT_STORAGE: 90.0,
+            ETLStage.ANSWER_PRECOMPUTATION: 95.0,
+            ETLStage.STREAMING: 50.0,
             ETLStage.COMPLETION: 100.0
         }
         
         progress = stage_progress.get(stage, 0.0)
-        completed_steps = list(ETLStage).index(stage) + 1
+        if stage == ETLStage.ANSWER_PRECOMPUTATION:
+            completed_steps = list(ETLStage).index(ETLStage.DOCUMENT_STORAGE) + 1
+        elif stage == ETLStage.STREAMING:
+            completed_steps = list(ETLStage).index(ETLStage.DOCUMENT_TRANSFORMATION) + 1
+        else:
+            completed_steps = list(ETLStage).index(stage) + 1
         
         await context.job_tracker.update_job(
             context.job_id,
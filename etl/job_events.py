@@ -0,0 +1,245 @@
+"""
+Push-based ETL job progress events.
+
+Progress streams used to poll ``chat_etl_jobs`` every two seconds per client.
+Instead, every visible change of a job is published on a ``JobEventBus``:
+
+- ``JobTracker`` publishes the job's status straight after committing it, so
+  subscribers in the same process see it without a query.
+- Migration 012 adds a trigger that sends the same summary with
+  ``pg_notify('etl_job_events', ...)`` on every insert and progress update,
+  including the status changes made by ``ETLJobQueue`` and by ETL workers in
+  other processes. ``start`` keeps one dedicated connection per process
+  LISTENing on that channel and republishes what arrives.
+
+The same connection LISTENs on the channel of migration 013, which names the
+user whose ``chat_documents`` rows changed. Documents are written by ETL
+workers, but the per-user snapshot and corpus caches live in every API
+process, so each notification drops that user's entries from the process's
+``DocumentCache``.
+
+The same change usually arrives twice (local publish and NOTIFY); events
+that repeat the last status, progress and step of a job are dropped.
+Subscribers get a bounded queue; a slow subscriber loses its oldest events
+rather than holding up the publisher. After the listener reconnects,
+subscribers receive a ``resync`` event and should re-read the job once, and
+the document cache is cleared.
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from etl.config import JOB_EVENTS_CONFIG
+from etl.job_queue import TERMINAL_STATUSES
+from monitoring.metrics import inc as metrics_inc
+
+logger = logging.getLogger(__name__)
+
+RESYNC_EVENT = "resync"
+
+
+def is_terminal(event: Dict[str, Any]) -> bool:
+    return event.get("status") in TERMINAL_STATUSES
+
+
+def _event_key(event: Dict[str, Any]) -> Tuple:
+    progress = event.get("progress_percentage")
+    return (
+        event.get("status"),
+        float(progress) if progress is not None else None,
+        event.get("current_step") or "",
+        event.get("completed_steps"),
+    )
+
+
+class _Subscription:
+    def __init__(self, job_id: Optional[str], user_id: Optional[str], maxsize: int):
+        self.job_id = job_id
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if event.get("type") == RESYNC_EVENT:
+            return True
+        if self.job_id is not None and str(event.get("job_id")) != self.job_id:
+            return False
+        if self.user_id is not None and str(event.get("user_id")) != self.user_id:
+            return False
+        return True
+
+    def put(self, event: Dict[str, Any]) -> bool:
+        """Queue ``event``, dropping the oldest one when full; False if one was dropped."""
+        dropped = False
+        if self.queue.full():
+            self.queue.get_nowait()
+            dropped = True
+        self.queue.put_nowait(event)
+        return not dropped
+
+
+class JobEventBus:
+    """In-process fan-out of job progress events, fed locally and by LISTEN/NOTIFY."""
+
+    _instance: Optional["JobEventBus"] = None
+
+    def __init__(
+        self,
+        channel: Optional[str] = None,
+        subscriber_queue_size: Optional[int] = None,
+        connect: Optional[Any] = None,
+        document_cache: Optional[Any] = None
+    ):
+        self.channel = channel or JOB_EVENTS_CONFIG['channel']
+        self.document_channel = JOB_EVENTS_CONFIG['document_channel']
+        self._document_cache = document_cache
+        self._invalidations: Set[asyncio.Task] = set()
+        self.subscriber_queue_size = subscriber_queue_size or JOB_EVENTS_CONFIG['subscriber_queue_size']
+        self._connect = connect
+        self._subscriptions: Set[_Subscription] = set()
+        self._last_seen: Dict[str, Tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.published = 0
+        self.duplicates = 0
+
+    @classmethod
+    def instance(cls) -> "JobEventBus":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @asynccontextmanager
+    async def subscribe(
+        self,
+        job_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving the events of ``job_id`` and/or ``user_id`` while the block runs."""
+        subscription = _Subscription(
+            str(job_id) if job_id is not None else None,
+            str(user_id) if user_id is not None else None,
+            self.subscriber_queue_size
+        )
+        self._subscriptions.add(subscription)
+        try:
+            yield subscription.queue
+        finally:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver ``event`` to the matching subscribers unless it repeats the job's last event."""
+        job_id = str(event.get("job_id"))
+        key = _event_key(event)
+        if self._last_seen.get(job_id) == key:
+            self.duplicates += 1
+            return
+        if is_terminal(event):
+            self._last_seen.pop(job_id, None)
+        else:
+            self._last_seen[job_id] = key
+        self.published += 1
+        self._dispatch(event)
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        for subscription in list(self._subscriptions):
+            if subscription.matches(event) and not subscription.put(event):
+                logger.debug(f"Dropped an ETL progress event for a slow subscriber of job {subscription.job_id}")
+
+    def start(self) -> None:
+        """Start LISTENing for notifications from other processes (idempotent)."""
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _open_connection(self):
+        if self._connect is not None:
+            return await self._connect()
+        import asyncpg
+        from database.connection import db_manager
+        config = db_manager.config
+        return await asyncpg.connect(
+            host=config.host, port=config.port, user=config.username,
+            password=config.password, database=config.database
+        )
+
+    def _get_document_cache(self):
+        if self._document_cache is None:
+            from database.repositories import DocumentRepository
+            self._document_cache = DocumentRepository.get_global_cache()
+        return self._document_cache
+
+    def _invalidate(self, invalidation) -> None:
+        task = asyncio.create_task(invalidation)
+        self._invalidations.add(task)
+        task.add_done_callback(self._invalidations.discard)
+
+    def _on_document_change(self, connection, pid, channel, payload: str) -> None:
+        self._invalidate(self._get_document_cache().invalidate_user_documents(payload))
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed {channel} notification: {payload[:200]}")
+            return
+        self.publish(event)
+
+    async def _listen_forever(self) -> None:
+        delay = 1.0
+        connected_before = False
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = await self._open_connection()
+                await connection.add_listener(self.channel, self._on_notification)
+                await connection.add_listener(self.document_channel, self._on_document_change)
+                logger.info(f"Listening for ETL job events on '{self.channel}'")
+                if connected_before:
+                    # Notifications sent while disconnected are lost
+                    self._last_seen.clear()
+                    self._dispatch({"type": RESYNC_EVENT})
+                    self._invalidate(self._get_document_cache().clear_all())
+                    await metrics_inc("etl_job_events_reconnects_total")
+                connected_before = True
+                delay = 1.0
+                while not self._stopping.is_set() and not connection.is_closed():
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=5)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"ETL job event listener disconnected: {e}; retrying in {delay:.0f}s")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    try:
+                        await connection.close()
+                    except Exception:
+                        pass
+            if self._stopping.is_set():
+                break
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, JOB_EVENTS_CONFIG['reconnect_max_delay_seconds'])
@@ -0,0 +1,337 @@
+"""
+Database-backed ETL job queue.
+
+``chat_etl_jobs`` doubles as the work queue: the API inserts ``pending`` rows
+and ETL worker processes (``python -m etl.worker``) claim them with
+``SELECT ... FOR UPDATE SKIP LOCKED``. A claimed job carries a lease that its
+worker renews with heartbeats; jobs whose lease runs out (the worker crashed
+or hung) are requeued, or failed once they have used up their attempts.
+Cancellation is a flag on the row that the owning worker picks up on its next
+heartbeat.
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, select, update
+
+from database.models import ChatETLJob
+from etl.config import BACKGROUND_PROCESSING_CONFIG
+from monitoring.metrics import inc as metrics_inc
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a job is never picked up again
+TERMINAL_STATUSES = ("success", "failure", "partial")
+
+# Advisory lock serializing claims so the cluster-wide concurrency cap is exact
+_CLAIM_LOCK_KEY = 0x45544C51  # "ETLQ"
+
+
+@dataclass
+class ClaimedJob:
+    """A job leased to one worker"""
+    job_id: str
+    user_id: str
+    anp_seq: int
+    attempts: int
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+class ETLJobQueue:
+    """
+    Claim, lease and settle jobs stored in ``chat_etl_jobs``.
+
+    All timestamps use the database clock, so workers on different hosts agree
+    on lease expiry.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        lease_seconds: Optional[int] = None,
+        max_concurrent_jobs: Optional[int] = None,
+        max_attempts: Optional[int] = None
+    ):
+        if session_factory is None:
+            from database.connection import db_manager
+            session_factory = db_manager.get_async_session
+        self.session_factory = session_factory
+        self.lease = timedelta(seconds=lease_seconds or BACKGROUND_PROCESSING_CONFIG['lease_seconds'])
+        self.max_concurrent_jobs = max_concurrent_jobs or BACKGROUND_PROCESSING_CONFIG['max_concurrent_jobs']
+        self.max_attempts = max_attempts or BACKGROUND_PROCESSING_CONFIG['max_retries']
+
+    async def claim(self, worker_id: str, limit: int) -> List[ClaimedJob]:
+        """
+        Lease up to ``limit`` pending jobs to ``worker_id``, oldest first.
+
+        Never lets more than ``max_concurrent_jobs`` jobs be leased across all
+        workers at once.
+        """
+        if limit <= 0:
+            return []
+        now = func.localtimestamp()
+        async with self.session_factory() as session:
+            await session.execute(select(func.pg_advisory_xact_lock(_CLAIM_LOCK_KEY)))
+            leased = await session.scalar(
+                select(func.count()).select_from(ChatETLJob).where(ChatETLJob.locked_by.isnot(None))
+            )
+            limit = min(limit, self.max_concurrent_jobs - (leased or 0))
+            if limit <= 0:
+                return []
+
+            claimable = (
+                select(ChatETLJob.job_id)
+                .where(
+                    ChatETLJob.status == "pending",
+                    ChatETLJob.available_at <= now,
+                    ChatETLJob.cancel_requested.isnot(True)
+                )
+                .order_by(ChatETLJob.available_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            result = await session.execute(
+                update(ChatETLJob)
+                .where(ChatETLJob.job_id.in_(claimable.scalar_subquery()))
+                .values(
+                    status="started",
+                    current_step="Claimed by ETL worker",
+                    locked_by=worker_id,
+                    lease_expires_at=now + self.lease,
+                    heartbeat_at=now,
+                    attempts=func.coalesce(ChatETLJob.attempts, 0) + 1,
+                    updated_at=now
+                )
+                .returning(
+                    ChatETLJob.job_id, ChatETLJob.user_id, ChatETLJob.anp_seq,
+                    ChatETLJob.attempts, ChatETLJob.payload
+                )
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+
+        if rows:
+            await metrics_inc("etl_jobs_claimed_total", len(rows))
+        return [
+            ClaimedJob(
+                job_id=str(row.job_id),
+                user_id=str(row.user_id),
+                anp_seq=row.anp_seq,
+                attempts=row.attempts,
+                payload=row.payload or {}
+            )
+            for row in rows
+        ]
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> Optional[bool]:
+        """
+        Renew a lease.
+
+        Returns whether cancellation was requested, or None if ``worker_id``
+        no longer holds the lease (it expired and the job was requeued).
+        """
+        now = func.localtimestamp()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(ChatETLJob)
+                .where(ChatETLJob.job_id == uuid.UUID(job_id), ChatETLJob.locked_by == worker_id)
+                .values(lease_expires_at=now + self.lease, heartbeat_at=now)
+                .returning(ChatETLJob.cancel_requested)
+                .execution_options(synchronize_session=False)
+            )
+            row = result.first()
+        return None if row is None else bool(row.cancel_requested)
+
+    async def release(self, job_id: str, worker_id: str, error: Optional[str] = None) -> None:
+        """
+        Drop the lease of a job whose run has ended.
+
+        A run normally records a final status itself. A job left without one
+        (the run crashed, or its failure could not be written) would never be
+        claimed or recovered again, so it is requeued while it has attempts
+        left and failed otherwise.
+        """
+        now = func.localtimestamp()
+        held = and_(ChatETLJob.job_id == uuid.UUID(job_id), ChatETLJob.locked_by == worker_id)
+        async with self.session_factory() as session:
+            await session.execute(
+                update(ChatETLJob)
+                .where(held, ChatETLJob.status.in_(TERMINAL_STATUSES))
+                .values(locked_by=None, lease_expires_at=None, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            requeued = await session.execute(
+                update(ChatETLJob)
+                .where(
+                    held,
+                    ChatETLJob.status.notin_(TERMINAL_STATUSES),
+                    ChatETLJob.attempts < self.max_attempts,
+                    ChatETLJob.cancel_requested.isnot(True)
+                )
+                .values(
+                    status="pending",
+                    current_step="Requeued after the ETL run ended without a result",
+                    available_at=now,
+                    locked_by=None,
+                    lease_expires_at=None,
+                    updated_at=now
+                )
+                .returning(ChatETLJob.job_id)
+                .execution_options(synchronize_session=False)
+            )
+            requeued_ids = requeued.scalars().all()
+            failed = await session.execute(
+                update(ChatETLJob)
+                .where(held, ChatETLJob.status.notin_(TERMINAL_STATUSES))
+                .values(
+                    status="failure",
+                    error_message=error or "ETL run ended without a result",
+                    error_type="worker_error",
+                    completed_at=now,
+                    locked_by=None,
+                    lease_expires_at=None,
+                    updated_at=now
+                )
+                .returning(ChatETLJob.job_id)
+                .execution_options(synchronize_session=False)
+            )
+            failed_ids = failed.scalars().all()
+
+        if requeued_ids or failed_ids:
+            logger.warning(
+                f"ETL job {job_id} ended without a final status: "
+                f"{'requeued' if requeued_ids else 'failed'}"
+            )
+        if requeued_ids:
+            await metrics_inc("etl_jobs_requeued_total", labels={"reason": "worker_error"})
+
+    async def requeue(self, job_id: str, worker_id: str) -> None:
+        """Put a job back in the queue, e.g. when its worker shuts down mid-run."""
+        await self._settle(
+            job_id, worker_id,
+            status="pending",
+            current_step="Requeued by ETL worker",
+            available_at=func.localtimestamp(),
+            locked_by=None,
+            lease_expires_at=None
+        )
+        await metrics_inc("etl_jobs_requeued_total", labels={"reason": "shutdown"})
+
+    async def mark_cancelled(self, job_id: str, worker_id: Optional[str] = None) -> None:
+        """Record a cancelled job as failed with ``error_type='cancelled'``."""
+        await self._settle(
+            job_id, worker_id,
+            status="failure",
+            error_message="Job cancelled by user",
+            error_type="cancelled",
+            current_step="Cancelled",
+            completed_at=func.localtimestamp(),
+            locked_by=None,
+            lease_expires_at=None
+        )
+        await metrics_inc("etl_jobs_cancelled_total")
+
+    async def request_cancel(self, job_id: str) -> bool:
+        """
+        Ask for a job to be cancelled.
+
+        A job still waiting in the queue is cancelled right away; a running
+        job is stopped by its worker on the next heartbeat. Returns False if
+        the job does not exist or has already finished.
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(ChatETLJob)
+                .where(
+                    ChatETLJob.job_id == uuid.UUID(job_id),
+                    ChatETLJob.status.notin_(TERMINAL_STATUSES)
+                )
+                .values(cancel_requested=True, updated_at=func.localtimestamp())
+                .returning(ChatETLJob.locked_by)
+                .execution_options(synchronize_session=False)
+            )
+            row = result.first()
+        if row is None:
+            return False
+        if row.locked_by is None:
+            await self.mark_cancelled(job_id)
+        return True
+
+    async def recover_stale_leases(self) -> int:
+        """
+        Requeue jobs whose worker stopped heartbeating.
+
+        Jobs that have used up ``max_attempts`` (or were being cancelled) are
+        failed instead. Returns the number of leases recovered.
+        """
+        now = func.localtimestamp()
+        expired = and_(ChatETLJob.locked_by.isnot(None), ChatETLJob.lease_expires_at < now)
+        async with self.session_factory() as session:
+            # Finished jobs whose worker died before releasing them only need the lease dropped
+            await session.execute(
+                update(ChatETLJob)
+                .where(expired, ChatETLJob.status.in_(TERMINAL_STATUSES))
+                .values(locked_by=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            requeued = await session.execute(
+                update(ChatETLJob)
+                .where(
+                    expired,
+                    ChatETLJob.status.notin_(TERMINAL_STATUSES),
+                    ChatETLJob.attempts < self.max_attempts,
+                    ChatETLJob.cancel_requested.isnot(True)
+                )
+                .values(
+                    status="pending",
+                    current_step="Requeued after ETL worker lease expired",
+                    available_at=now,
+                    locked_by=None,
+                    lease_expires_at=None,
+                    updated_at=now
+                )
+                .returning(ChatETLJob.job_id)
+                .execution_options(synchronize_session=False)
+            )
+            requeued_ids = requeued.scalars().all()
+            failed = await session.execute(
+                update(ChatETLJob)
+                .where(expired, ChatETLJob.status.notin_(TERMINAL_STATUSES))
+                .values(
+                    status="failure",
+                    error_message="ETL worker lease expired",
+                    error_type="lease_expired",
+                    completed_at=now,
+                    locked_by=None,
+                    lease_expires_at=None,
+                    updated_at=now
+                )
+                .returning(ChatETLJob.job_id)
+                .execution_options(synchronize_session=False)
+            )
+            failed_ids = failed.scalars().all()
+
+        if requeued_ids or failed_ids:
+            logger.warning(
+                f"Recovered stale ETL leases: {len(requeued_ids)} requeued, {len(failed_ids)} failed"
+            )
+            await metrics_inc("etl_jobs_requeued_total", len(requeued_ids), labels={"reason": "lease_expired"})
+        return len(requeued_ids) + len(failed_ids)
+
+    async def _settle(self, job_id: str, worker_id: Optional[str], **values) -> None:
+        """Update a job, only while ``worker_id`` still holds it (if given)."""
+        conditions = [ChatETLJob.job_id == uuid.UUID(job_id)]
+        if worker_id is not None:
+            conditions.append(ChatETLJob.locked_by == worker_id)
+        values.setdefault("updated_at", func.localtimestamp())
+        async with self.session_factory() as session:
+            await session.execute(
+                update(ChatETLJob)
+                .where(*conditions)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
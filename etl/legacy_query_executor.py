@@ -1,11 +1,16 @@
 """
 Legacy Query Integration Wrapper
 Wraps existing AptitudeTestQueries class with async interface and error handling
+
+Each query name maps to exactly one SQL method in ``QUERY_REGISTRY``, and
+``LegacyQueryExecutor`` runs every query once, with its own retry, timeout
+and validation, on its own short-lived sync session.
 """
 
 import asyncio
 import logging
-from typing import Dict, Any, List, Optional, Union
+import re
+from typing import Dict, Any, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
 import traceback
@@ -14,8 +19,61 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
+from monitoring.metrics import observe as metrics_observe, inc as metrics_inc
+
 logger = logging.getLogger(__name__)
 
+# Query name -> the AptitudeTestQueries method that produces it (in pipeline order)
+QUERY_REGISTRY: Dict[str, str] = {
+    "tendencyQuery": "_query_tendency",
+    "topTendencyQuery": "_query_top_tendency",
+    "thinkingSkillsQuery": "_query_thinking_skills",
+    "careerRecommendationQuery": "_query_career_recommendation",
+    "bottomTendencyQuery": "_query_bottom_tendency",
+    "personalityDetailQuery": "_query_personality_detail",
+    "strengthsWeaknessesQuery": "_query_strengths_weaknesses",
+    "learningStyleQuery": "_query_learning_style",
+    "learningStyleChartQuery": "_query_learning_style_chart",
+    "competencyAnalysisQuery": "_query_competency_analysis",
+    "competencySubjectsQuery": "_query_competency_subjects",
+    "competencyJobsQuery": "_query_competency_jobs",
+    "competencyJobMajorsQuery": "_query_competency_job_majors",
+    "dutiesQuery": "_query_duties",
+    "imagePreferenceStatsQuery": "_query_image_preference_stats",
+    "preferenceDataQuery": "_query_preference_data",
+    "preferenceJobsQuery": "_query_preference_jobs",
+    "tendencyStatsQuery": "_query_tendency_stats",
+    "thinkingSkillComparisonQuery": "_query_thinking_skill_comparison",
+    "personalInfoQuery": "_query_personal_info",
+    "subjectRanksQuery": "_query_subject_ranks",
+    "instituteSettingsQuery": "_query_institute_settings",
+    "tendency1ExplainQuery": "_query_tendency1_explain",
+    "tendency2ExplainQuery": "_query_tendency2_explain",
+    "topTendencyExplainQuery": "_query_top_tendency_explain",
+    "bottomTendencyExplainQuery": "_query_bottom_tendency_explain",
+    "thinkingMainQuery": "_query_thinking_main",
+    "thinkingDetailQuery": "_query_thinking_detail",
+    "suitableJobMajorsQuery": "_query_suitable_job_majors",
+    "pdKindQuery": "_query_pd_kind",
+    "talentListQuery": "_query_talent_list",
+}
+
+# The bind parameter every registered query filters on (not the ``::`` cast operator)
+_ANP_SEQ_PARAM = re.compile(r"(?<!:):anp_seq\b")
+
+# Query names DocumentTransformer accepts but that have no SQL yet (always empty)
+UNIMPLEMENTED_QUERIES = (
+    "jobMatchingQuery", "majorRecommendationQuery", "studyMethodQuery",
+    "socialSkillsQuery", "leadershipQuery", "communicationQuery",
+    "problemSolvingQuery", "creativityQuery", "analyticalThinkingQuery",
+    "practicalThinkingQuery", "abstractThinkingQuery", "memoryQuery",
+    "attentionQuery", "processingSpeedQuery", "spatialAbilityQuery",
+    "verbalAbilityQuery", "numericalAbilityQuery", "reasoningQuery",
+    "perceptionQuery", "motivationQuery", "interestQuery", "valueQuery",
+    "workStyleQuery", "environmentPreferenceQuery", "teamworkQuery",
+    "independenceQuery", "stabilityQuery", "challengeQuery",
+)
+
 @dataclass
 class QueryResult:
     """Result container for query execution"""
@@ -46,10 +104,12 @@ class AptitudeTestQueries:
     PDF_RESULT.MD에 정의된 쿼리를 기반으로, 파이프라인에서 사용하는 키 이름에 맞춰 최소 핵심 결과를 제공합니다.
     """
 
-    def __init__(self, _unused_session: Session):
+    def __init__(self, _unused_session: Session, sync_session: Optional[Session] = None):
         # 파이프라인에서 AsyncSession 이 넘어오므로, 레거시 조회는 동기 세션을 별도로 연다
-        from database.connection import db_manager
-        self._sync_sess = db_manager.get_sync_session()
+        if sync_session is None:
+            from database.connection import db_manager
+            sync_session = db_manager.get_sync_session()
+        self._sync_sess = sync_session
 
     def _run(self, sql: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         rows = self._sync_sess.execute(text(sql), params).mappings().all()
@@ -404,48 +464,26 @@ class AptitudeTestQueries:
 
     # ▼▼▼ [5단계: 추가된 메소드 1] ▼▼▼
     def _query_tendency_stats(self, anp_seq: int) -> List[Dict[str, Any]]:
-        # [수정] mwd_score1 테이블을 기반으로 1순위 성향자 비율을 계산하는 쿼리로 변경
+        # 1순위 성향자 비율: 전체 mwd_score1 집계 대신 mv_tendency_population_stats(etl.population_stats)를 조회
         sql = """
-        WITH
-        TendencyCounts AS (
-            SELECT
-            qua_code,
-            COUNT(*) AS tendency_count
-            FROM
-            mwd_score1
-            WHERE
-            sc1_step = 'tnd' AND sc1_rank = 1
-            GROUP BY
-            qua_code
-        ),
-        TotalCount AS (
-            SELECT
-            COUNT(*) AS total_count
-            FROM
-            mwd_score1
-            WHERE
-            sc1_step = 'tnd' AND sc1_rank = 1
-        )
         SELECT
             qa.qua_name AS tendency_name,
-            -- sc1.sc1_rank AS rank, -- DocumentTransformer에서 사용하지 않으므로 주석 처리 가능
-            -- sc1.qua_code AS code, -- DocumentTransformer에서 사용하지 않으므로 주석 처리 가능
             CASE
-                WHEN tt.total_count > 0 THEN
-                ROUND(
-                    (COALESCE(tc.tendency_count, 0) * 100.0) / tt.total_count,
-                    1
-                )::float
+                WHEN ps.total_count > 0 THEN
+                ROUND((ps.tendency_count * 100.0) / ps.total_count, 1)::float
                 ELSE 0
-            END AS percentage -- DocumentTransformer와의 호환성을 위해 컬럼명을 'percentage'로 유지
+            END AS percentage, -- DocumentTransformer와의 호환성을 위해 컬럼명을 'percentage'로 유지
+            (
+                SELECT to_char(refreshed_at, 'YYYY-MM-DD')
+                FROM chat_population_stats_refresh
+                WHERE view_name = 'mv_tendency_population_stats'
+            ) AS stats_as_of
         FROM
             mwd_score1 sc1
         JOIN
             mwd_question_attr qa ON sc1.qua_code = qa.qua_code
         LEFT JOIN
-            TendencyCounts tc ON sc1.qua_code = tc.qua_code
-        CROSS JOIN
-            TotalCount tt
+            mv_tendency_population_stats ps ON sc1.qua_code = ps.qua_code
         WHERE
             sc1.anp_seq = :anp_seq
             AND sc1.sc1_step = 'tnd'
@@ -465,18 +503,19 @@ class AptitudeTestQueries:
             FROM mwd_score1
             WHERE anp_seq = :anp_seq AND sc1_step = 'thk'
         ),
-        average_scores AS (
-            SELECT qua_code, AVG(sc1_rate * 100) as avg_score
-            FROM mwd_score1
-            WHERE sc1_step = 'thk'
-            GROUP BY qua_code
+        stats_as_of AS (
+            SELECT to_char(refreshed_at, 'YYYY-MM-DD') AS as_of
+            FROM chat_population_stats_refresh
+            WHERE view_name = 'mv_thinking_population_stats'
         )
         SELECT
             qa.qua_name as skill_name,
             us.score::int as my_score,
-            avgs.avg_score::int as average_score
+            avgs.avg_score::int as average_score,
+            (SELECT as_of FROM stats_as_of) as stats_as_of
         FROM user_scores us
-        JOIN average_scores avgs ON us.qua_code = avgs.qua_code
+        -- 전체 평균은 mv_thinking_population_stats(etl.population_stats)에서 조회
+        JOIN mv_thinking_population_stats avgs ON us.qua_code = avgs.qua_code
         JOIN mwd_question_attr qa ON us.qua_code = qa.qua_code
         ORDER BY qa.qua_code
         """
@@ -699,102 +738,57 @@ class AptitudeTestQueries:
         """
         return self._run(sql, {"anp_seq": anp_seq})
 
+    def run_query(self, query_name: str, anp_seq: int) -> List[Dict[str, Any]]:
+        """Run the single SQL method registered for ``query_name``."""
+        return getattr(self, QUERY_REGISTRY[query_name])(anp_seq)
+
+    @staticmethod
+    def statement(query_name: str, anp_seq: int) -> Tuple[str, Dict[str, Any]]:
+        """Return the ``(sql, params)`` registered for ``query_name`` without running it."""
+        return getattr(_StatementRecorder(), QUERY_REGISTRY[query_name])(anp_seq)
+
+    @staticmethod
+    def batch_statement(query_name: str, anp_seqs: List[int]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Return ``(sql, params)`` running ``query_name`` for many users in one statement.
+
+        The per-user query is evaluated LATERAL for each anp_seq; every row is
+        tagged with the anp_seq it belongs to in ``batch_anp_seq``.
+        """
+        sql, _ = AptitudeTestQueries.statement(query_name, 0)
+        per_user = _ANP_SEQ_PARAM.sub("batch_target.anp_seq", sql)
+        batch_sql = (
+            "SELECT batch_target.anp_seq AS batch_anp_seq, per_user.* "
+            "FROM unnest(CAST(:anp_seqs AS INTEGER[])) AS batch_target(anp_seq) "
+            f"CROSS JOIN LATERAL ({per_user}) AS per_user"
+        )
+        return batch_sql, {"anp_seqs": list(anp_seqs)}
+
+    def close(self) -> None:
+        self._sync_sess.close()
+
     def execute_all_queries(self, anp_seq: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Run every registered query once; a failing query yields an empty result."""
         results: Dict[str, List[Dict[str, Any]]] = {}
+        for query_name in QUERY_REGISTRY:
+            try:
+                results[query_name] = self.run_query(query_name, anp_seq)
+            except Exception:
+                # Keep the session usable for the remaining queries
+                self._sync_sess.rollback()
+                results[query_name] = []
+        for query_name in UNIMPLEMENTED_QUERIES:
+            results.setdefault(query_name, [])
+        return results
 
-        # --- 1단계까지 구현된 쿼리 호출 ---
-        try: results["tendencyQuery"] = self._query_tendency(anp_seq)
-        except Exception: results["tendencyQuery"] = []
-        try: results["topTendencyQuery"] = self._query_top_tendency(anp_seq)
-        except Exception: results["topTendencyQuery"] = []
-        try: results["thinkingSkillsQuery"] = self._query_thinking_skills(anp_seq)
-        except Exception: results["thinkingSkillsQuery"] = []
-        try: results["careerRecommendationQuery"] = self._query_career_recommendation(anp_seq)
-        except Exception: results["careerRecommendationQuery"] = []
-        try: results["bottomTendencyQuery"] = self._query_bottom_tendency(anp_seq)
-        except Exception: results["bottomTendencyQuery"] = []
-        try: results["personalityDetailQuery"] = self._query_personality_detail(anp_seq)
-        except Exception: results["personalityDetailQuery"] = []
-        try: results["strengthsWeaknessesQuery"] = self._query_strengths_weaknesses(anp_seq)
-        except Exception: results["strengthsWeaknessesQuery"] = []
-
-        # --- 2단계 추가 쿼리 호출 ---
-        try:
-            results["learningStyleQuery"] = self._query_learning_style(anp_seq)
-        except Exception: 
-            results["learningStyleQuery"] = []
-        try:
-            results["learningStyleChartQuery"] = self._query_learning_style_chart(anp_seq)
-        except Exception: 
-            results["learningStyleChartQuery"] = []
-
-        # ▼▼▼ [3단계: 추가된 쿼리 호출] ▼▼▼
-        try: results["competencyAnalysisQuery"] = self._query_competency_analysis(anp_seq)
-        except: results["competencyAnalysisQuery"] = []
-        try: results["competencySubjectsQuery"] = self._query_competency_subjects(anp_seq)
-        except: results["competencySubjectsQuery"] = []
-        try: results["competencyJobsQuery"] = self._query_competency_jobs(anp_seq)
-        except: results["competencyJobsQuery"] = []
-        try: results["competencyJobMajorsQuery"] = self._query_competency_job_majors(anp_seq)
-        except: results["competencyJobMajorsQuery"] = []
-        try: results["dutiesQuery"] = self._query_duties(anp_seq)
-        except: results["dutiesQuery"] = []
-
-        # ▼▼▼ [4단계: 추가된 쿼리 호출] ▼▼▼
-        try: results["imagePreferenceStatsQuery"] = self._query_image_preference_stats(anp_seq)
-        except: results["imagePreferenceStatsQuery"] = []
-        try: results["preferenceDataQuery"] = self._query_preference_data(anp_seq)
-        except: results["preferenceDataQuery"] = []
-        try: results["preferenceJobsQuery"] = self._query_preference_jobs(anp_seq)
-        except: results["preferenceJobsQuery"] = []
-
-        # ▼▼▼ [5단계: 추가된 쿼리 호출] ▼▼▼
-        try: results["tendencyStatsQuery"] = self._query_tendency_stats(anp_seq)
-        except: results["tendencyStatsQuery"] = []
-        try: results["thinkingSkillComparisonQuery"] = self._query_thinking_skill_comparison(anp_seq)
-        except: results["thinkingSkillComparisonQuery"] = []
-
-        # ▼▼▼ [6단계: 추가된 쿼리 호출] ▼▼▼
-        try: results["personalInfoQuery"] = self._query_personal_info(anp_seq)
-        except: results["personalInfoQuery"] = []
-        try: results["subjectRanksQuery"] = self._query_subject_ranks(anp_seq)
-        except: results["subjectRanksQuery"] = []
-
-        # ▼▼▼ [신규: 누락되었던 쿼리들 호출 추가] ▼▼▼
-        try: results["instituteSettingsQuery"] = self._query_institute_settings(anp_seq)
-        except: results["instituteSettingsQuery"] = []
-        try: results["tendency1ExplainQuery"] = self._query_tendency1_explain(anp_seq)
-        except: results["tendency1ExplainQuery"] = []
-        try: results["tendency2ExplainQuery"] = self._query_tendency2_explain(anp_seq)
-        except: results["tendency2ExplainQuery"] = []
-        try: results["topTendencyExplainQuery"] = self._query_top_tendency_explain(anp_seq)
-        except: results["topTendencyExplainQuery"] = []
-        try: results["bottomTendencyExplainQuery"] = self._query_bottom_tendency_explain(anp_seq)
-        except: results["bottomTendencyExplainQuery"] = []
-        try: results["thinkingMainQuery"] = self._query_thinking_main(anp_seq)
-        except: results["thinkingMainQuery"] = []
-        try: results["thinkingDetailQuery"] = self._query_thinking_detail(anp_seq)
-        except: results["thinkingDetailQuery"] = []
-        try: results["suitableJobMajorsQuery"] = self._query_suitable_job_majors(anp_seq)
-        except: results["suitableJobMajorsQuery"] = []
-        try: results["pdKindQuery"] = self._query_pd_kind(anp_seq)
-        except: results["pdKindQuery"] = []
-        try: results["talentListQuery"] = self._query_talent_list(anp_seq)
-        except: results["talentListQuery"] = []
-
-       # [수정] remaining_keys 목록 업데이트
-        remaining_keys = [
-            "jobMatchingQuery","majorRecommendationQuery",
-            "studyMethodQuery","socialSkillsQuery","leadershipQuery","communicationQuery","problemSolvingQuery",
-            "creativityQuery","analyticalThinkingQuery","practicalThinkingQuery","abstractThinkingQuery","memoryQuery",
-            "attentionQuery","processingSpeedQuery","spatialAbilityQuery","verbalAbilityQuery","numericalAbilityQuery",
-            "reasoningQuery","perceptionQuery","motivationQuery","interestQuery","valueQuery","workStyleQuery",
-            "environmentPreferenceQuery","teamworkQuery","independenceQuery","stabilityQuery","challengeQuery"
-        ]
-        for key in remaining_keys:
-            results.setdefault(key, [])
+class _StatementRecorder(AptitudeTestQueries):
+    """AptitudeTestQueries whose ``_run`` hands back the statement instead of executing it"""
 
-        return results
+    def __init__(self):
+        self._sync_sess = None
+
+    def _run(self, sql: str, params: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        return sql, params
 
 class LegacyQueryExecutor:
     """
@@ -805,26 +799,19 @@ class LegacyQueryExecutor:
     def __init__(self, max_retries: int = 2, retry_delay: float = 1.0, max_workers: int = 3, query_timeout: float = 30.0):
         self.max_retries = max_retries
         self.retry_delay = retry_delay
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_workers = max_workers
+        self.executor = self._create_thread_pool()
         self.query_validators = self._setup_validators()
         self.query_timeout = query_timeout
+        # Timing of the last execute_all_queries_async run (see _summarize_run)
+        self.last_run_stats: Dict[str, Any] = {}
         
-        # ▼▼▼ [6단계 수정] 실제로 구현된 쿼리 목록을 클래스 변수로 관리합니다. ▼▼▼
-        self.IMPLEMENTED_QUERIES = [
-            "tendencyQuery", "topTendencyQuery", "thinkingSkillsQuery",
-            "careerRecommendationQuery", "bottomTendencyQuery",
-            "personalityDetailQuery", "strengthsWeaknessesQuery",
-            "learningStyleQuery", "learningStyleChartQuery",
-            "competencyAnalysisQuery", "competencySubjectsQuery",
-            "competencyJobsQuery", "competencyJobMajorsQuery", "dutiesQuery",
-            "imagePreferenceStatsQuery", "preferenceDataQuery", "preferenceJobsQuery",
-            "tendencyStatsQuery", "thinkingSkillComparisonQuery",
-            "personalInfoQuery", "subjectRanksQuery",
-            # [신규] 추가된 쿼리 이름들
-            "instituteSettingsQuery", "tendency1ExplainQuery", "tendency2ExplainQuery",
-            "topTendencyExplainQuery", "bottomTendencyExplainQuery", "thinkingMainQuery", 
-            "thinkingDetailQuery", "suitableJobMajorsQuery", "pdKindQuery", "talentListQuery",
-        ]
+        # 실제로 구현된 쿼리 목록 (QUERY_REGISTRY 순서)
+        self.IMPLEMENTED_QUERIES = list(QUERY_REGISTRY)
+
+    def _create_thread_pool(self) -> Optional[ThreadPoolExecutor]:
+        """Threads that run the sync legacy queries"""
+        return ThreadPoolExecutor(max_workers=self.max_workers)
 
     def _setup_validators(self) -> Dict[str, callable]:
         """Setup validation functions for different query types"""
@@ -1303,28 +1290,43 @@ class LegacyQueryExecutor:
                 
         return cleaned_data
     
+    def clean_and_validate(self, query_name: str, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Clean rows fetched for ``query_name``; raises QueryValidationError if they are invalid"""
+        cleaned_data = self._clean_query_data(query_name, data)
+        if not self._validate_query_result(query_name, cleaned_data):
+            raise QueryValidationError(
+                query_name, 
+                f"Query result validation failed for {query_name}"
+            )
+        return cleaned_data
+    
+    async def _fetch(self, session: Session, anp_seq: int, query_name: str) -> List[Dict[str, Any]]:
+        """Run one attempt of ``query_name`` on the thread pool"""
+        
+        def execute_query():
+            # Sessions are not thread-safe, so each attempt uses its own
+            from database.connection import db_manager
+            with db_manager.get_sync_session() as sync_session:
+                return AptitudeTestQueries(session, sync_session=sync_session).run_query(query_name, anp_seq)
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, execute_query)
+    
     async def _execute_single_query_with_retry(
         self, 
         session: Session, 
         anp_seq: int, 
         query_name: str
     ) -> QueryResult:
-        """Execute a single query with retry logic"""
+        """Execute a single query with retry logic (only this query's SQL runs)"""
         
         for attempt in range(self.max_retries + 1):
             start_time = datetime.now()
             logger.info(f"Query '{query_name}' attempting to execute (attempt {attempt + 1})")
             try:
-                loop = asyncio.get_event_loop()
-
-                def execute_query():
-                    aptitude_queries = AptitudeTestQueries(session)
-                    all_results = aptitude_queries.execute_all_queries(anp_seq)
-                    return all_results.get(query_name, [])
-
                 try:
                     data = await asyncio.wait_for(
-                        loop.run_in_executor(self.executor, execute_query),
+                        self._fetch(session, anp_seq, query_name),
                         timeout=self.query_timeout,
                     )
                 except asyncio.TimeoutError:
@@ -1336,6 +1338,7 @@ class LegacyQueryExecutor:
                         await asyncio.sleep(wait_time)
                         continue
                     else:
+                        await self._record_query_metrics(query_name, execution_time, success=False)
                         return QueryResult(
                             query_name=query_name,
                             success=False,
@@ -1344,18 +1347,13 @@ class LegacyQueryExecutor:
                         )
                 execution_time = (datetime.now() - start_time).total_seconds()
                 
-                cleaned_data = self._clean_query_data(query_name, data)
-                
-                if not self._validate_query_result(query_name, cleaned_data):
-                    raise QueryValidationError(
-                        query_name, 
-                        f"Query result validation failed for {query_name}"
-                    )
+                cleaned_data = self.clean_and_validate(query_name, data)
                 
                 logger.info(
                     f"Query '{query_name}' executed successfully in {execution_time:.2f}s, "
                     f"returned {len(cleaned_data)} rows"
                 )
+                await self._record_query_metrics(query_name, execution_time, success=True)
                 
                 return QueryResult(
                     query_name=query_name,
@@ -1380,6 +1378,7 @@ class LegacyQueryExecutor:
                         f"Query '{query_name}' failed after {self.max_retries + 1} attempts: {e}\n"
                         f"Traceback: {traceback.format_exc()}"
                     )
+                    await self._record_query_metrics(query_name, execution_time, success=False)
                     
                     return QueryResult(
                         query_name=query_name,
@@ -1394,6 +1393,12 @@ class LegacyQueryExecutor:
             error="Unknown error occurred"
         )
     
+    async def _record_query_metrics(self, query_name: str, execution_time: float, success: bool) -> None:
+        """Export per-query timing (last attempt) and failures"""
+        await metrics_observe("etl_query_seconds", execution_time, labels={"query": query_name})
+        if not success:
+            await metrics_inc("etl_query_failures_total", labels={"query": query_name})
+    
     async def execute_all_queries_async(
         self, 
         session: Session, 
@@ -1403,71 +1408,13 @@ class LegacyQueryExecutor:
         Execute all queries asynchronously with error handling and retry logic
         """
         
-        # 실제로 구현된 쿼리만 실행 (성능 최적화)
-        implemented_queries = [
-            # --- 기본 구현된 쿼리 ---
-            "tendencyQuery",
-            "topTendencyQuery", 
-            "thinkingSkillsQuery",
-            "careerRecommendationQuery",
-            "bottomTendencyQuery",
-            "personalityDetailQuery",
-            "strengthsWeaknessesQuery",
-            "learningStyleQuery",
-            "learningStyleChartQuery",
-
-            # --- 3단계 신규 쿼리 ---
-            "competencyAnalysisQuery",
-            "competencySubjectsQuery",
-            "competencyJobsQuery",
-            "competencyJobMajorsQuery",
-            "dutiesQuery",
-
-            # --- 4단계 신규 쿼리 ---
-            "imagePreferenceStatsQuery",
-            "preferenceDataQuery",
-            "preferenceJobsQuery",
-
-            # --- 5단계 신규 쿼리 ---
-            "tendencyStatsQuery",
-            "thinkingSkillComparisonQuery",
-
-            # --- 6단계 신규 쿼리 ---
-            "personalInfoQuery",
-            "subjectRanksQuery",
-
-            # --- 신규 추가된 쿼리 ---
-            "instituteSettingsQuery",
-            "tendency1ExplainQuery",
-            "tendency2ExplainQuery",
-            "topTendencyExplainQuery",
-            "bottomTendencyExplainQuery",
-            "thinkingMainQuery",
-            "thinkingDetailQuery",
-            "suitableJobMajorsQuery",
-            "pdKindQuery",
-            "talentListQuery",
-        ]
-        
-        # 구현되지 않은 쿼리들은 빈 배열로 즉시 설정
-        unimplemented_queries = [
-            "jobMatchingQuery", "majorRecommendationQuery", "studyMethodQuery",
-            "socialSkillsQuery", "leadershipQuery", "communicationQuery", 
-            "problemSolvingQuery", "creativityQuery", "analyticalThinkingQuery",
-            "practicalThinkingQuery", "abstractThinkingQuery", "memoryQuery",
-            "attentionQuery", "processingSpeedQuery", "spatialAbilityQuery",
-            "verbalAbilityQuery", "numericalAbilityQuery", "reasoningQuery",
-            "perceptionQuery", "motivationQuery", "interestQuery", "valueQuery",
-            "workStyleQuery", "environmentPreferenceQuery", "teamworkQuery",
-            "independenceQuery", "stabilityQuery", "challengeQuery"
-        ]
-        
-        query_names = implemented_queries
+        # 실제로 구현된 쿼리만 실행 (구현되지 않은 쿼리는 get_successful_results에서 빈 배열로 채움)
+        query_names = self.IMPLEMENTED_QUERIES
         
         logger.info(f"Starting execution of {len(query_names)} queries for anp_seq: {anp_seq}")
         
-        # 병렬 실행 수를 제한하여 데이터베이스 과부하 방지
-        semaphore = asyncio.Semaphore(5)  # 최대 5개 쿼리만 동시 실행
+        # 병렬 실행 수를 스레드 수에 맞춰 제한 (스레드 대기 시간이 쿼리 타임아웃에 포함되지 않도록)
+        semaphore = asyncio.Semaphore(self.max_workers)
         
         async def execute_with_semaphore(query_name):
             async with semaphore:
@@ -1477,6 +1424,7 @@ class LegacyQueryExecutor:
             execute_with_semaphore(query_name)
             for query_name in query_names
         ]
+        stage_start = datetime.now()
         
         # 전체 쿼리 실행에 타임아웃 설정 (5분)
         try:
@@ -1515,13 +1463,37 @@ class LegacyQueryExecutor:
                 else:
                     failed_queries += 1
         
+        self.last_run_stats = self._summarize_run(query_results, (datetime.now() - stage_start).total_seconds())
+        await metrics_observe("etl_query_stage_seconds", self.last_run_stats["wall_seconds"])
+        
         logger.info(
             f"Query execution completed for anp_seq: {anp_seq}. "
-            f"Successful: {successful_queries}, Failed: {failed_queries}"
+            f"Successful: {successful_queries}, Failed: {failed_queries}. "
+            f"Wall {self.last_run_stats['wall_seconds']:.2f}s vs "
+            f"{self.last_run_stats['sum_seconds']:.2f}s summed; "
+            f"critical path '{self.last_run_stats['critical_path_query']}' "
+            f"({self.last_run_stats['critical_path_seconds']:.2f}s)"
         )
         
         return query_results
     
+    @staticmethod
+    def _summarize_run(query_results: Dict[str, QueryResult], wall_seconds: float) -> Dict[str, Any]:
+        """
+        Wall-clock time of a run next to the summed query time.
+        
+        With enough concurrency the wall time approaches the critical path,
+        i.e. the slowest single query.
+        """
+        timed = {name: result.execution_time or 0.0 for name, result in query_results.items()}
+        slowest = max(timed, key=timed.get) if timed else None
+        return {
+            "wall_seconds": round(wall_seconds, 3),
+            "sum_seconds": round(sum(timed.values()), 3),
+            "critical_path_query": slowest,
+            "critical_path_seconds": round(timed[slowest], 3) if slowest else 0.0,
+        }
+    
     async def get_successful_results(
         self, 
         query_results: Dict[str, QueryResult]
@@ -1539,19 +1511,7 @@ class LegacyQueryExecutor:
                 logger.warning(f"Excluding failed query '{query_name}' from results")
         
         # 구현되지 않은 쿼리들을 빈 배열로 추가 (DocumentTransformer 호환성)
-        unimplemented_queries = [
-            "jobMatchingQuery", "majorRecommendationQuery", "studyMethodQuery",
-            "socialSkillsQuery", "leadershipQuery", "communicationQuery", 
-            "problemSolvingQuery", "creativityQuery", "analyticalThinkingQuery",
-            "practicalThinkingQuery", "abstractThinkingQuery", "memoryQuery",
-            "attentionQuery", "processingSpeedQuery", "spatialAbilityQuery",
-            "verbalAbilityQuery", "numericalAbilityQuery", "reasoningQuery",
-            "perceptionQuery", "motivationQuery", "interestQuery", "valueQuery",
-            "workStyleQuery", "environmentPreferenceQuery", "teamworkQuery",
-            "independenceQuery", "stabilityQuery", "challengeQuery"
-        ]
-        
-        for query_name in unimplemented_queries:
+        for query_name in UNIMPLEMENTED_QUERIES:
             successful_results[query_name] = []
         
         return successful_results
@@ -1559,7 +1519,8 @@ class LegacyQueryExecutor:
     async def close(self):
         """Clean up resources"""
         if self.executor:
-            self.executor.shutdown(wait=True)
+            # Threads still running a timed-out query finish on their own; don't block the event loop
+            self.executor.shutdown(wait=False, cancel_futures=True)
             logger.info("LegacyQueryExecutor resources cleaned up")
 
 if __name__ == '__main__':
@@ -0,0 +1,195 @@
+"""
+Population-wide statistics for the legacy result queries.
+
+``tendencyStatsQuery`` (share of people per primary tendency) and
+``thinkingSkillComparisonQuery`` (average score per thinking skill) compare a
+user with everyone who took the test. Instead of aggregating all of
+``mwd_score1`` for every user, they read two materialized views (migration
+007) that are refreshed here:
+
+    python -m etl.population_stats refresh
+    python -m etl.population_stats status
+
+The refresh time of each view is stored in ``chat_population_stats_refresh``
+and cached in-process for ``cache_ttl_seconds``. When the views are older
+than ``max_staleness_seconds``, the ETL pipeline starts a background refresh.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from etl.config import POPULATION_STATS_CONFIG
+from monitoring.metrics import inc as metrics_inc, observe as metrics_observe
+
+logger = logging.getLogger(__name__)
+
+POPULATION_VIEWS = ("mv_tendency_population_stats", "mv_thinking_population_stats")
+
+# Advisory lock so only one process refreshes at a time
+_REFRESH_LOCK_KEY = 0x504F5053  # "POPS"
+
+
+class PopulationStats:
+    """Refreshes the population views and tracks how fresh they are."""
+
+    _instance: Optional["PopulationStats"] = None
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        max_staleness_seconds: Optional[int] = None,
+        cache_ttl_seconds: Optional[int] = None
+    ):
+        if session_factory is None:
+            from database.connection import db_manager
+            session_factory = db_manager.get_async_session
+        self.session_factory = session_factory
+        self.max_staleness_seconds = max_staleness_seconds or POPULATION_STATS_CONFIG['max_staleness_seconds']
+        self.cache_ttl_seconds = cache_ttl_seconds if cache_ttl_seconds is not None else POPULATION_STATS_CONFIG['cache_ttl_seconds']
+        # view -> {"refreshed_at", "row_count", "duration_ms", "age_seconds"} as last read from the database
+        self._cached: Optional[Dict[str, Dict[str, Any]]] = None
+        self._cached_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def instance(cls) -> "PopulationStats":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    async def freshness(self) -> Dict[str, Any]:
+        """
+        Refresh time and age of each view, plus ``as_of`` (the oldest refresh).
+
+        Served from the in-process cache unless it is older than ``cache_ttl_seconds``.
+        """
+        if self._cached is None or time.monotonic() - self._cached_at > self.cache_ttl_seconds:
+            async with self.session_factory() as session:
+                result = await session.execute(text(
+                    "SELECT view_name, refreshed_at, row_count, duration_ms, "
+                    "EXTRACT(EPOCH FROM localtimestamp - refreshed_at) AS age_seconds "
+                    "FROM chat_population_stats_refresh"
+                ))
+                rows = result.mappings().all()
+            self._cached = {
+                row["view_name"]: {
+                    "refreshed_at": row["refreshed_at"],
+                    "row_count": row["row_count"],
+                    "duration_ms": row["duration_ms"],
+                    "age_seconds": float(row["age_seconds"]),
+                }
+                for row in rows
+            }
+            self._cached_at = time.monotonic()
+
+        elapsed = time.monotonic() - self._cached_at
+        views = {
+            name: {
+                "refreshed_at": info["refreshed_at"].isoformat() if info["refreshed_at"] else None,
+                "row_count": info["row_count"],
+                "duration_ms": info["duration_ms"],
+                "age_seconds": round(info["age_seconds"] + elapsed, 1),
+            }
+            for name, info in self._cached.items()
+        }
+        # The figures are only as fresh as the oldest view; a view never refreshed counts as stale
+        oldest = None
+        if all(name in views for name in POPULATION_VIEWS):
+            oldest = views[max(POPULATION_VIEWS, key=lambda name: views[name]["age_seconds"])]
+        return {
+            "views": views,
+            "as_of": oldest["refreshed_at"] if oldest else None,
+            "age_seconds": oldest["age_seconds"] if oldest else None,
+            "stale": oldest is None or oldest["age_seconds"] > self.max_staleness_seconds,
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+        }
+
+    async def refresh(self) -> Dict[str, Any]:
+        """
+        Recompute both views without blocking readers.
+
+        Returns the new freshness, or ``{"skipped": True}`` if another process
+        is already refreshing.
+        """
+        started = time.monotonic()
+        async with self.session_factory() as session:
+            locked = await session.scalar(text(f"SELECT pg_try_advisory_xact_lock({_REFRESH_LOCK_KEY})"))
+            if not locked:
+                logger.info("Population statistics refresh already running elsewhere; skipped")
+                return {"skipped": True}
+            for view in POPULATION_VIEWS:
+                view_started = time.monotonic()
+                await session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+                row_count = await session.scalar(text(f"SELECT COUNT(*) FROM {view}"))
+                await session.execute(
+                    text(
+                        "INSERT INTO chat_population_stats_refresh (view_name, refreshed_at, row_count, duration_ms) "
+                        "VALUES (:view, localtimestamp, :row_count, :duration_ms) "
+                        "ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at, "
+                        "row_count = EXCLUDED.row_count, duration_ms = EXCLUDED.duration_ms"
+                    ),
+                    {
+                        "view": view,
+                        "row_count": row_count,
+                        "duration_ms": int((time.monotonic() - view_started) * 1000),
+                    }
+                )
+
+        duration = time.monotonic() - started
+        await metrics_observe("population_stats_refresh_seconds", duration)
+        logger.info(f"Population statistics refreshed in {duration:.2f}s")
+        self._cached = None
+        return await self.freshness()
+
+    async def ensure_fresh(self) -> Optional[Dict[str, Any]]:
+        """
+        Start a background refresh if the views are older than the staleness bound.
+
+        Never blocks on the refresh itself: the current job reads the existing
+        (slightly stale) aggregates. Returns the freshness, or None if it could
+        not be read.
+        """
+        try:
+            freshness = await self.freshness()
+        except Exception as e:
+            logger.warning(f"Could not read population statistics freshness: {e}")
+            return None
+        if freshness["stale"] and POPULATION_STATS_CONFIG['auto_refresh'] and not freshness["refreshing"]:
+            logger.info(f"Population statistics are stale (as of {freshness['as_of']}); refreshing in background")
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+        return freshness
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Population statistics refresh failed: {e}")
+            await metrics_inc("population_stats_refresh_failures_total")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the population statistics materialized views")
+    parser.add_argument("command", choices=["refresh", "status"])
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from etl.logging_config import setup_logging
+
+    load_dotenv()
+    setup_logging()
+    stats = PopulationStats()
+
+    async def _run():
+        return await (stats.refresh() if args.command == "refresh" else stats.freshness())
+
+    print(json.dumps(asyncio.run(_run()), ensure_ascii=False, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Fingerprints of the legacy result rows behind an anp_seq.
+
+The ETL pipeline rebuilds a user's documents from the per-test rows in
+``mwd_score1``, ``mwd_resval``, ``mwd_resjob`` and friends, plus the test
+taker's ``mwd_account`` and ``mwd_person`` rows (name, education and job are
+read by the personal info, learning style and explain queries). One statement
+returns the row count and an md5 of the rows of each of those tables for an
+anp_seq; together with ``pipeline_version`` they form the fingerprint.
+``ETLOrchestrator.process_test_completion`` compares it with the fingerprint
+recorded after the last successful run (migration 010) and skips the run
+when they match.
+
+Shared reference tables (``mwd_job``, ``mwd_major``, ...) are not part of
+the fingerprint; bump ``ETL_PIPELINE_VERSION`` after changing them, the
+transformer or the embedding model.
+"""
+
+import hashlib
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from database.models import ChatDocument, ChatETLSourceFingerprint
+from etl.config import SOURCE_FINGERPRINT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Source table -> condition selecting the rows of one anp_seq
+SOURCE_TABLES = {
+    "mwd_answer_progress": "t.anp_seq = :anp_seq",
+    "mwd_answer": "t.anp_seq = :anp_seq",
+    "mwd_score1": "t.anp_seq = :anp_seq",
+    "mwd_resval": "t.anp_seq = :anp_seq",
+    "mwd_resjob": "t.anp_seq = :anp_seq",
+    "mwd_resduty": "t.anp_seq = :anp_seq",
+    "mwd_choice_result": "t.cr_seq IN (SELECT cr_seq FROM mwd_answer_progress WHERE anp_seq = :anp_seq)",
+    "mwd_account": "t.ac_gid IN (SELECT ac_gid FROM mwd_answer_progress WHERE anp_seq = :anp_seq)",
+    "mwd_person": (
+        "t.pe_seq IN (SELECT ac.pe_seq FROM mwd_account ac "
+        "JOIN mwd_answer_progress ap ON ap.ac_gid = ac.ac_gid WHERE ap.anp_seq = :anp_seq)"
+    ),
+}
+
+
+def fingerprint_statement() -> str:
+    """One row per source table: its name, row count and an md5 over its rows in a fixed order."""
+    return "\nUNION ALL\n".join(
+        f"SELECT '{table}' AS source, count(*) AS row_count, "
+        f"md5(coalesce(string_agg(t::text, '|' ORDER BY t::text), '')) AS rows_md5 "
+        f"FROM {table} t WHERE {condition}"
+        for table, condition in SOURCE_TABLES.items()
+    )
+
+
+@dataclass
+class SourceFingerprint:
+    digest: str
+    row_counts: Dict[str, int]
+
+    @property
+    def has_results(self) -> bool:
+        """False while the test has no scored rows yet; such a run is never skipped."""
+        return self.row_counts.get("mwd_score1", 0) > 0
+
+
+def combine(rows, pipeline_version: Optional[str] = None) -> SourceFingerprint:
+    """Fold the per-table rows of ``fingerprint_statement`` into one digest."""
+    version = pipeline_version or SOURCE_FINGERPRINT_CONFIG['pipeline_version']
+    by_source = {row["source"]: row for row in rows}
+    digest = hashlib.sha256(f"v{version}".encode())
+    row_counts = {}
+    for table in SOURCE_TABLES:
+        row = by_source.get(table) or {"row_count": 0, "rows_md5": ""}
+        row_counts[table] = int(row["row_count"])
+        digest.update(f"|{table}:{row['row_count']}:{row['rows_md5']}".encode())
+    return SourceFingerprint(digest=digest.hexdigest(), row_counts=row_counts)
+
+
+async def compute_fingerprint(session, anp_seq: int) -> SourceFingerprint:
+    result = await session.execute(text(fingerprint_statement()), {"anp_seq": anp_seq})
+    return combine(result.mappings().all())
+
+
+async def is_unchanged(session, user_id: str, anp_seq: int, fingerprint: SourceFingerprint) -> bool:
+    """
+    True when the last successful run for this anp_seq and user saw the same
+    fingerprint and the user still has documents from it.
+    """
+    if not fingerprint.has_results:
+        return False
+    stored = await session.get(ChatETLSourceFingerprint, anp_seq)
+    if stored is None or str(stored.user_id) != str(user_id) or stored.fingerprint != fingerprint.digest:
+        return False
+    documents = await session.scalar(
+        select(func.count()).select_from(ChatDocument).where(ChatDocument.user_id == uuid.UUID(str(user_id)))
+    )
+    return bool(documents)
+
+
+async def record_fingerprint(
+    session,
+    user_id: str,
+    anp_seq: int,
+    fingerprint: SourceFingerprint,
+    job_id: Optional[str] = None
+) -> None:
+    try:
+        job_uuid = uuid.UUID(str(job_id))
+    except (TypeError, ValueError):
+        job_uuid = None
+    values: Dict[str, Any] = {
+        "anp_seq": anp_seq,
+        "user_id": uuid.UUID(str(user_id)),
+        "fingerprint": fingerprint.digest,
+        "row_counts": fingerprint.row_counts,
+        "job_id": job_uuid,
+    }
+    stmt = insert(ChatETLSourceFingerprint).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChatETLSourceFingerprint.anp_seq],
+        set_={**{k: v for k, v in values.items() if k != "anp_seq"}, "recorded_at": func.current_timestamp()}
+    )
+    await session.execute(stmt)
+    await session.commit()
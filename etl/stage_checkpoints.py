@@ -0,0 +1,197 @@
+"""
+Persisted ETL stage outputs.
+
+The orchestrator stores the output of its expensive stages (validated query
+data, transformed documents, embedded documents) in
+``chat_etl_stage_checkpoints`` (migration 011) as zlib-compressed JSON. A job
+that is retried through ``retry_failed_job`` or requeued after a worker crash
+loads the latest usable checkpoint for the same user and anp_seq and resumes
+after that stage instead of rerunning the legacy queries and embeddings.
+
+A checkpoint is usable while it is younger than ``max_age_hours`` and was
+written by the same ``pipeline_version`` from the same source fingerprint
+(see ``etl.source_fingerprint``). Saving a stage drops the checkpoints of the
+stages after it, and a completed run removes all of them.
+"""
+
+import base64
+import json
+import logging
+import uuid
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from database.models import ChatETLStageCheckpoint
+from etl.config import SOURCE_FINGERPRINT_CONFIG, STAGE_CHECKPOINT_CONFIG
+from monitoring.metrics import observe as metrics_observe
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_value(value: Any) -> Any:
+    # Legacy rows carry Decimal and date values; keep their types across a round trip
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot checkpoint value of type {type(value).__name__}")
+
+
+def _decode_value(obj: dict) -> Any:
+    if len(obj) == 1:
+        (key, value), = obj.items()
+        if key == "__decimal__":
+            return Decimal(value)
+        if key == "__datetime__":
+            return datetime.fromisoformat(value)
+        if key == "__date__":
+            return date.fromisoformat(value)
+        if key == "__bytes__":
+            return base64.b64decode(value)
+    return obj
+
+
+def encode_output(output: Any, level: Optional[int] = None) -> bytes:
+    payload = json.dumps(output, ensure_ascii=False, separators=(",", ":"), default=_encode_value)
+    return zlib.compress(payload.encode("utf-8"), level or STAGE_CHECKPOINT_CONFIG['compression_level'])
+
+
+def decode_output(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload).decode("utf-8"), object_hook=_decode_value)
+
+
+def _as_uuid(value: Any) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class StageCheckpointStore:
+    """Saves, finds and clears persisted stage outputs, each in its own short transaction."""
+
+    _instance: Optional["StageCheckpointStore"] = None
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        max_age_hours: Optional[int] = None,
+        pipeline_version: Optional[str] = None
+    ):
+        if session_factory is None:
+            from database.connection import db_manager
+            session_factory = db_manager.get_async_session
+        self.session_factory = session_factory
+        self.max_age_hours = max_age_hours or STAGE_CHECKPOINT_CONFIG['max_age_hours']
+        self.pipeline_version = pipeline_version or SOURCE_FINGERPRINT_CONFIG['pipeline_version']
+
+    @classmethod
+    def instance(cls) -> "StageCheckpointStore":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    async def save(
+        self,
+        user_id: str,
+        anp_seq: int,
+        stage: str,
+        output: Any,
+        job_id: Optional[str] = None,
+        source_fingerprint: Optional[str] = None,
+        invalidates: Sequence[str] = ()
+    ) -> int:
+        """
+        Store ``output`` as the checkpoint of ``stage`` and drop the
+        ``invalidates`` stages, which were built from an older input.
+        Returns the compressed size in bytes.
+        """
+        payload = encode_output(output)
+        values = {
+            "user_id": uuid.UUID(str(user_id)),
+            "anp_seq": anp_seq,
+            "stage": stage,
+            "job_id": _as_uuid(job_id),
+            "source_fingerprint": source_fingerprint,
+            "pipeline_version": self.pipeline_version,
+            "payload": payload,
+            "payload_bytes": len(payload),
+            "created_at": datetime.now(),
+        }
+        stmt = insert(ChatETLStageCheckpoint).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChatETLStageCheckpoint.user_id, ChatETLStageCheckpoint.anp_seq, ChatETLStageCheckpoint.stage],
+            set_={k: v for k, v in values.items() if k not in ("user_id", "anp_seq", "stage")}
+        )
+        async with self.session_factory() as session:
+            if invalidates:
+                await session.execute(self._where(delete(ChatETLStageCheckpoint), user_id, anp_seq).where(
+                    ChatETLStageCheckpoint.stage.in_(list(invalidates))
+                ))
+            await session.execute(stmt)
+        await metrics_observe("etl_stage_checkpoint_bytes", len(payload), labels={"stage": stage})
+        return len(payload)
+
+    async def load_latest(
+        self,
+        user_id: str,
+        anp_seq: int,
+        stages: Sequence[str],
+        source_fingerprint: Optional[str] = None
+    ) -> Optional[Tuple[str, Any, Optional[str]]]:
+        """
+        The usable checkpoint latest in ``stages`` (given in pipeline order) as
+        (stage, output, job_id), or None. Without a source fingerprint there is
+        no way to tell whether a checkpoint was built from the current rows, so
+        none is used.
+        """
+        if source_fingerprint is None:
+            return None
+        cutoff = datetime.now() - timedelta(hours=self.max_age_hours)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                self._where(select(
+                    ChatETLStageCheckpoint.stage, ChatETLStageCheckpoint.payload,
+                    ChatETLStageCheckpoint.job_id, ChatETLStageCheckpoint.source_fingerprint
+                ), user_id, anp_seq).where(
+                    ChatETLStageCheckpoint.stage.in_(list(stages)),
+                    ChatETLStageCheckpoint.pipeline_version == self.pipeline_version,
+                    ChatETLStageCheckpoint.created_at >= cutoff
+                )
+            )
+            rows = {row.stage: row for row in result.all()}
+
+        for stage in reversed(list(stages)):
+            row = rows.get(stage)
+            if row is None or row.source_fingerprint != source_fingerprint:
+                continue
+            try:
+                return stage, decode_output(row.payload), str(row.job_id) if row.job_id else None
+            except (zlib.error, ValueError) as e:
+                logger.warning(f"Ignoring unreadable {stage} checkpoint for anp_seq {anp_seq}: {e}")
+        return None
+
+    async def clear(self, user_id: str, anp_seq: int) -> None:
+        """Remove this run's checkpoints, and expired ones of runs that never completed."""
+        cutoff = datetime.now() - timedelta(hours=self.max_age_hours)
+        async with self.session_factory() as session:
+            await session.execute(self._where(delete(ChatETLStageCheckpoint), user_id, anp_seq))
+            await session.execute(delete(ChatETLStageCheckpoint).where(ChatETLStageCheckpoint.created_at < cutoff))
+
+    @staticmethod
+    def _where(stmt, user_id: str, anp_seq: int):
+        return stmt.where(
+            ChatETLStageCheckpoint.user_id == uuid.UUID(str(user_id)),
+            ChatETLStageCheckpoint.anp_seq == anp_seq
+        )
@@ -40,7 +40,8 @@ async def process_test_completion(
     job_id: str,
     test_type: str = "standard",
     completed_at: str = None,
-    notification_source: str = "test_system"
+    notification_source: str = "test_system",
+    force: bool = False
 ) -> Dict[str, Any]:
     """
     Main ETL processing task for test completion
@@ -52,9 +53,10 @@ async def process_test_completion(
         test_type: Type of test completed
         completed_at: ISO timestamp of test completion
         notification_source: Source of the notification
+        force: Run the pipeline even if the legacy data is unchanged since the last run
     """
     return await _process_test_completion_async(
-        user_id, anp_seq, job_id, test_type, completed_at, notification_source
+        user_id, anp_seq, job_id, test_type, completed_at, notification_source, force
     )
 
 async def _process_test_completion_async(
@@ -63,7 +65,8 @@ async def _process_test_completion_async(
     job_id: str,
     test_type: str,
     completed_at: str,
-    notification_source: str
+    notification_source: str,
+    force: bool = False
 ) -> Dict[str, Any]:
     """
     Async implementation of ETL processing using the orchestrator
@@ -97,22 +100,12 @@ async def _process_test_completion_async(
                 anp_seq=anp_seq,
                 job_id=job_id,
                 session=session,
-                job_tracker=JobTracker()
+                job_tracker=JobTracker(),
+                force=force
             )
             
+            # The orchestrator has already recorded the final status
             logger.info(f"ETL processing completed successfully for job {job_id}")
-            # Ensure job is marked as success if orchestrator didn't already
-            try:
-                await JobTracker().update_job(
-                    job_id,
-                    status="success",
-                    progress_percentage=100.0,
-                    current_step="ETL processing completed",
-                    completed_steps=7,
-                    completed_at=datetime.now(),
-                )
-            except Exception:
-                pass
             return result
         
     except Exception as e:
@@ -7,13 +7,14 @@ import asyncio
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, Callable, Optional, List
+from dataclasses import dataclass, asdict, replace
 from enum import Enum
 import json
 
 # Note: Celery and Redis dependencies removed - using database-based job tracking
 from fastapi import HTTPException
+from sqlalchemy import bindparam, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import ChatUser, ChatETLJob
@@ -22,6 +23,10 @@ from database.repositories import UserRepository
 from etl.legacy_query_executor import LegacyQueryExecutor
 from etl.document_transformer import DocumentTransformer
 from etl.vector_embedder import VectorEmbedder
+from etl.config import JOB_PROGRESS_CONFIG
+from etl.job_queue import ETLJobQueue, TERMINAL_STATUSES
+from etl.job_events import JobEventBus
+from monitoring.metrics import inc as metrics_inc, observe as metrics_observe
 
 logger = logging.getLogger(__name__)
 
@@ -67,17 +72,179 @@ class TestCompletionRequest:
     test_type: str
     completed_at: datetime
     notification_source: str = "test_system"
+    # Run the pipeline even if the legacy data is unchanged since the last run
+    force: bool = False
+
+def job_status_dict(job_progress: JobProgress) -> Dict[str, Any]:
+    """Status payload of a job, as returned by the status endpoints and pushed to progress streams"""
+    return {
+        "job_id": job_progress.job_id,
+        "user_id": job_progress.user_id,
+        "anp_seq": job_progress.anp_seq,
+        "status": job_progress.status.value,
+        "progress_percentage": job_progress.progress_percentage,
+        "current_step": job_progress.current_step,
+        "completed_steps": job_progress.completed_steps,
+        "total_steps": job_progress.total_steps,
+        "started_at": job_progress.started_at.isoformat(),
+        "updated_at": job_progress.updated_at.isoformat(),
+        "completed_at": job_progress.completed_at.isoformat() if job_progress.completed_at else None,
+        "error_message": job_progress.error_message,
+        "retry_count": job_progress.retry_count,
+        "query_results_summary": job_progress.query_results_summary,
+        "documents_created": job_progress.documents_created,
+    }
+
+# chat_etl_jobs columns that JobTracker.update_job may change
+TRACKED_JOB_FIELDS = (
+    'status', 'progress_percentage', 'current_step', 'completed_steps', 'total_steps', 'completed_at',
+    'error_message', 'error_type', 'failed_stage', 'retry_count', 'query_results_summary', 'documents_created',
+)
+
+class JobProgressBuffer:
+    """
+    In-memory progress of the jobs being processed in this process
+
+    Progress updates of a running job are kept here and written to
+    chat_etl_jobs every ``flush_interval_ms`` as one multi-row UPDATE per
+    batch, the latest values of each job winning. Terminal statuses are
+    written straight away together with anything still pending for the job.
+    """
+
+    _instance: Optional["JobProgressBuffer"] = None
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        flush_interval_ms: Optional[float] = None
+    ):
+        self.session_factory = session_factory or db_manager.get_async_session
+        self.flush_interval = (flush_interval_ms or JOB_PROGRESS_CONFIG['flush_interval_ms']) / 1000
+        # job_id -> current progress, authoritative while the job runs here
+        self.jobs: Dict[str, JobProgress] = {}
+        # job_id -> column values not written yet
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+        self.flushed_rows = 0
+        self.coalesced_updates = 0
+
+    @classmethod
+    def instance(cls) -> "JobProgressBuffer":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _write_lock(self) -> asyncio.Lock:
+        # Writes of one job must not overtake each other; the lock belongs to the running loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock, self._task = loop, asyncio.Lock(), None
+        return self._lock
+
+    def add(self, job_id: str, values: Dict[str, Any]) -> None:
+        """Queue column values for the next batch, replacing older values of the same job."""
+        self._write_lock()
+        if job_id in self.pending:
+            self.coalesced_updates += 1
+        self.pending.setdefault(job_id, {}).update(values)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self.pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every pending update."""
+        async with self._write_lock():
+            batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            try:
+                await self._write(batch)
+            except Exception as e:
+                logger.warning(f"Failed to write progress of {len(batch)} ETL jobs, retrying: {e}")
+                for job_id, values in batch.items():
+                    self.pending[job_id] = {**values, **self.pending.get(job_id, {})}
+                await metrics_inc("etl_job_progress_flush_failures_total")
+                return
+        self.flushed_rows += len(batch)
+        await metrics_observe("etl_job_progress_flush_rows", len(batch))
+
+    async def write_now(self, job_id: str, values: Dict[str, Any]) -> None:
+        """Write ``values`` and the job's pending update at once and stop tracking the job."""
+        async with self._write_lock():
+            merged = {**self.pending.pop(job_id, {}), **values}
+            self.jobs.pop(job_id, None)
+            await self._write({job_id: merged})
+        self.flushed_rows += 1
+
+    async def discard(self, job_id: str) -> None:
+        """Forget a job without writing its pending progress, e.g. before it is requeued."""
+        async with self._write_lock():
+            self.pending.pop(job_id, None)
+            self.jobs.pop(job_id, None)
+
+    async def _write(self, batch: Dict[str, Dict[str, Any]]) -> None:
+        # Jobs updating the same columns share one executemany UPDATE
+        table = ChatETLJob.__table__
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for job_id, values in batch.items():
+            params = {f"b_{column}": value for column, value in values.items()}
+            params["b_job_id"] = uuid.UUID(job_id)
+            groups.setdefault(tuple(sorted(values)), []).append(params)
+        async with self.session_factory() as session:
+            for columns, params in groups.items():
+                stmt = (
+                    update(table)
+                    .where(table.c.job_id == bindparam("b_job_id"))
+                    .values({table.c[column]: bindparam(f"b_{column}") for column in columns})
+                )
+                await session.execute(stmt, params)
+
+def _progress_from_row(job: ChatETLJob) -> JobProgress:
+    return JobProgress(
+        job_id=str(job.job_id),
+        user_id=str(job.user_id),
+        anp_seq=job.anp_seq,
+        status=JobStatus(job.status),
+        progress_percentage=float(job.progress_percentage),
+        current_step=job.current_step or "",
+        total_steps=job.total_steps,
+        completed_steps=job.completed_steps,
+        started_at=job.started_at,
+        updated_at=job.updated_at,
+        completed_at=job.completed_at,
+        error_message=job.error_message,
+        error_type=job.error_type,
+        failed_stage=job.failed_stage,
+        retry_count=job.retry_count,
+        query_results_summary=job.query_results_summary,
+        documents_created=job.documents_created,
+    )
 
 class JobTracker:
     """
     Database-based job status tracking
+
+    Progress of running jobs goes through the process-wide JobProgressBuffer:
+    status reads and progress events are served from memory, and the rows
+    are written in coalesced batches (terminal statuses immediately).
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, buffer: Optional[JobProgressBuffer] = None):
+        self.buffer = buffer or JobProgressBuffer.instance()
+
+    async def create_job(self, job_progress: JobProgress, payload: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Create new job tracking entry in database
 
-    async def create_job(self, job_progress: JobProgress) -> None:
-        """Create new job tracking entry in database"""
+        A ``pending`` job is picked up by an ETL worker; ``payload`` holds the
+        extra arguments the worker passes to the ETL task.
+        """
         async with db_manager.get_async_session() as session:
             # Ensure user exists to satisfy FK constraint on chat_etl_jobs
             try:
@@ -119,84 +286,60 @@ class JobTracker:
                 retry_count=job_progress.retry_count,
                 query_results_summary=job_progress.query_results_summary,
                 documents_created=job_progress.documents_created,
+                payload=payload,
+                available_at=job_progress.started_at,
             )
             session.add(job)
             await session.flush()
         logger.info(f"Created job tracking for job_id: {job_progress.job_id}")
+        JobEventBus.instance().publish(job_status_dict(job_progress))
 
     async def update_job(self, job_id: str, **updates) -> Optional[JobProgress]:
-        """Update job progress in database and return updated JobProgress if available"""
-        async with db_manager.get_async_session() as session:
-            job = await session.get(ChatETLJob, uuid.UUID(job_id))
-            if not job:
+        """Update job progress and return updated JobProgress if available"""
+        job_progress = self.buffer.jobs.get(job_id)
+        if job_progress is None:
+            job_progress = await self._load_job(job_id)
+            if job_progress is None:
                 return None
 
-            # Map incoming updates to model fields
-            field_map = {
-                'status': 'status',
-                'progress_percentage': 'progress_percentage',
-                'current_step': 'current_step',
-                'completed_steps': 'completed_steps',
-                'total_steps': 'total_steps',
-                'completed_at': 'completed_at',
-                'error_message': 'error_message',
-                'error_type': 'error_type',
-                'failed_stage': 'failed_stage',
-                'retry_count': 'retry_count',
-                'query_results_summary': 'query_results_summary',
-                'documents_created': 'documents_created',
-            }
+        values: Dict[str, Any] = {}
+        for key, value in updates.items():
+            if key not in TRACKED_JOB_FIELDS:
+                continue
+            if key == 'completed_at' and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            if key == 'status':
+                job_progress.status = JobStatus(value)
+                value = job_progress.status.value
+            elif key == 'progress_percentage':
+                job_progress.progress_percentage = float(value)
+                value = int(value)
+            else:
+                setattr(job_progress, key, value)
+            values[key] = value
+        job_progress.updated_at = values['updated_at'] = datetime.now()
 
-            for key, value in updates.items():
-                if key in field_map:
-                    setattr(job, field_map[key], value)
-            job.updated_at = datetime.now()
+        if job_progress.status.value in TERMINAL_STATUSES or not JOB_PROGRESS_CONFIG['coalesce_enabled']:
+            await self.buffer.write_now(job_id, values)
+        else:
+            self.buffer.jobs[job_id] = job_progress
+            self.buffer.add(job_id, values)
 
-            await session.flush()
+        # Pushed straight away; progress streams no longer poll the table
+        JobEventBus.instance().publish(job_status_dict(job_progress))
+        return replace(job_progress)
 
-            return JobProgress(
-                job_id=str(job.job_id),
-                user_id=str(job.user_id),
-                anp_seq=job.anp_seq,
-                status=JobStatus(job.status),
-                progress_percentage=float(job.progress_percentage),
-                current_step=job.current_step or "",
-                total_steps=job.total_steps,
-                completed_steps=job.completed_steps,
-                started_at=job.started_at,
-                updated_at=job.updated_at,
-                completed_at=job.completed_at,
-                error_message=job.error_message,
-                error_type=job.error_type,
-                failed_stage=job.failed_stage,
-                retry_count=job.retry_count,
-                query_results_summary=job.query_results_summary,
-                documents_created=job.documents_created,
-            )
-
-    async def get_job(self, job_id: str) -> Optional[JobProgress]:
-        """Get job progress from database"""
+    async def _load_job(self, job_id: str) -> Optional[JobProgress]:
         async with db_manager.get_async_session() as session:
             job = await session.get(ChatETLJob, uuid.UUID(job_id))
-            if not job:
-                return None
-            return JobProgress(
-                job_id=str(job.job_id),
-                user_id=str(job.user_id),
-                anp_seq=job.anp_seq,
-                status=JobStatus(job.status),
-                progress_percentage=float(job.progress_percentage),
-                current_step=job.current_step or "",
-                total_steps=job.total_steps,
-                completed_steps=job.completed_steps,
-                started_at=job.started_at,
-                updated_at=job.updated_at,
-                completed_at=job.completed_at,
-                error_message=job.error_message,
-                retry_count=job.retry_count,
-                query_results_summary=job.query_results_summary,
-                documents_created=job.documents_created,
-            )
+            return _progress_from_row(job) if job else None
+
+    async def get_job(self, job_id: str) -> Optional[JobProgress]:
+        """Get job progress, from memory while the job runs in this process"""
+        job_progress = self.buffer.jobs.get(job_id)
+        if job_progress is not None:
+            return replace(job_progress)
+        return await self._load_job(job_id)
 
     async def get_user_jobs(self, user_id: str, limit: int = 10) -> List[JobProgress]:
         """Get user's recent jobs from database"""
@@ -205,30 +348,11 @@ class JobTracker:
             result = await session.execute(
                 select(ChatETLJob).where(ChatETLJob.user_id == uuid.UUID(user_id)).order_by(ChatETLJob.started_at.desc()).limit(limit)
             )
-            rows = result.scalars().all()
-            jobs: List[JobProgress] = []
-            for job in rows:
-                jobs.append(JobProgress(
-                    job_id=str(job.job_id),
-                    user_id=str(job.user_id),
-                    anp_seq=job.anp_seq,
-                    status=JobStatus(job.status),
-                    progress_percentage=float(job.progress_percentage),
-                    current_step=job.current_step or "",
-                    total_steps=job.total_steps,
-                    completed_steps=job.completed_steps,
-                    started_at=job.started_at,
-                    updated_at=job.updated_at,
-                    completed_at=job.completed_at,
-                    error_message=job.error_message,
-                    retry_count=job.retry_count,
-                    query_results_summary=job.query_results_summary,
-                    documents_created=job.documents_created,
-                ))
-            return jobs
+            return [_progress_from_row(job) for job in result.scalars().all()]
 
     async def delete_job(self, job_id: str) -> bool:
         """Delete job tracking data from database"""
+        await self.buffer.discard(job_id)
         async with db_manager.get_async_session() as session:
             job = await session.get(ChatETLJob, uuid.UUID(job_id))
             if not job:
@@ -247,10 +371,11 @@ class TestCompletionHandler:
         max_retries: int = 3,
         retry_delay: int = 60
     ):
-        # Database-based job tracking
+        # Database-based job tracking; jobs are run by ETL worker processes
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.job_tracker = JobTracker()
+        self.job_queue = ETLJobQueue()
     
     async def handle_test_completion(
         self,
@@ -276,53 +401,32 @@ class TestCompletionHandler:
                 anp_seq=request.anp_seq,
                 status=JobStatus.PENDING,
                 progress_percentage=0.0,
-                current_step="Initializing ETL processing",
+                current_step="Queued for processing",
                 total_steps=5,  # queries, transform, embed, store, complete
                 completed_steps=0,
                 started_at=datetime.now(),
                 updated_at=datetime.now()
             )
             
-            # Store job tracking (creates user if needed)
-            await self.job_tracker.create_job(job_progress)
-            
-            # Mark job as started
-            await self.job_tracker.update_job(
-                job_id,
-                status=JobStatus.STARTED.value,
-                current_step="Queued for processing",
-                progress_percentage=1,
-                completed_steps=0
-            )
-            
-            # Trigger async ETL processing (fire-and-forget)
-            # For now, schedule with asyncio.create_task
-            try:
-                from etl.tasks import process_test_completion as _process
-                asyncio.create_task(_process(
-                    user_id=request.user_id,
-                    anp_seq=request.anp_seq,
-                    job_id=job_id,
-                    test_type=request.test_type,
-                    completed_at=request.completed_at.isoformat() if isinstance(request.completed_at, datetime) else None,
-                    notification_source=request.notification_source,
-                ))
-                task_id = f"task_{job_id}"
-            except Exception as schedule_err:
-                logger.error(f"Failed to schedule ETL task: {schedule_err}")
-                task_id = f"task_{job_id}_failed_to_schedule"
+            # Enqueue the job (creates user if needed); an ETL worker claims it from chat_etl_jobs
+            await self.job_tracker.create_job(job_progress, payload={
+                "test_type": request.test_type,
+                "completed_at": request.completed_at.isoformat() if isinstance(request.completed_at, datetime) else None,
+                "notification_source": request.notification_source,
+                "force": request.force,
+            })
+            task_id = f"task_{job_id}"
             
             logger.info(
-                f"Triggered ETL processing for user {request.user_id}, "
-                f"anp_seq {request.anp_seq}, job_id {job_id}, "
-                f"task_id {task_id}"
+                f"Queued ETL processing for user {request.user_id}, "
+                f"anp_seq {request.anp_seq}, job_id {job_id}"
             )
             
             return {
                 "job_id": job_id,
                 "task_id": task_id,
-                "status": JobStatus.STARTED.value,
-                "message": "ETL job queued and started",
+                "status": JobStatus.PENDING.value,
+                "message": "ETL job queued",
                 "estimated_completion_time": "5-10 minutes",
                 "progress_url": f"/api/etl/jobs/{job_id}/status"
             }
@@ -358,24 +462,7 @@ class TestCompletionHandler:
         except Exception as e:
             logger.warning(f"Could not get Celery status for job {job_id}: {e}")
         
-        return {
-            "job_id": job_progress.job_id,
-            "user_id": job_progress.user_id,
-            "anp_seq": job_progress.anp_seq,
-            "status": job_progress.status.value,
-            "progress_percentage": job_progress.progress_percentage,
-            "current_step": job_progress.current_step,
-            "completed_steps": job_progress.completed_steps,
-            "total_steps": job_progress.total_steps,
-            "started_at": job_progress.started_at.isoformat(),
-            "updated_at": job_progress.updated_at.isoformat(),
-            "completed_at": job_progress.completed_at.isoformat() if job_progress.completed_at else None,
-            "error_message": job_progress.error_message,
-            "retry_count": job_progress.retry_count,
-            "query_results_summary": job_progress.query_results_summary,
-            "documents_created": job_progress.documents_created,
-            "task_status": "placeholder"
-        }
+        return {**job_status_dict(job_progress), "task_status": "placeholder"}
     
     async def get_user_job_history(
         self,
@@ -418,28 +505,12 @@ class TestCompletionHandler:
         Returns:
             True if job was cancelled, False otherwise
         """
-        job_progress = await self.job_tracker.get_job(job_id)
-        
-        if not job_progress:
-            return False
-        
-        if job_progress.status in [JobStatus.SUCCESS, JobStatus.FAILURE]:
-            return False  # Already completed
-        
         try:
-            # Update job status to cancelled (we'll use FAILURE with specific message)
-            await self.job_tracker.update_job(
-                job_id,
-                status=JobStatus.FAILURE.value,
-                error_message="Job cancelled by user",
-                completed_at=datetime.now().isoformat(),
-                progress_percentage=0.0
-            )
-            
-            # TODO: Cancel the actual Celery task if possible
-            # This would require storing the Celery task ID
+            # Queued jobs are cancelled at once; running ones by their worker on the next heartbeat
+            if not await self.job_queue.request_cancel(job_id):
+                return False  # Not found or already completed
             
-            logger.info(f"Cancelled job {job_id}")
+            logger.info(f"Cancellation requested for job {job_id}")
             return True
             
         except Exception as e:
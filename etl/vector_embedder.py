@@ -15,8 +15,14 @@ import aiohttp
 import time
 from concurrent.futures import ThreadPoolExecutor
 
+from monitoring.deadline import Deadline, DeadlineExceeded
+
 logger = logging.getLogger(__name__)
 
+# Smallest per-request timeout used when a deadline is almost spent
+MIN_REQUEST_TIMEOUT_SECONDS = 0.05
+
+
 class EmbeddingError(Exception):
     """Raised when embedding generation fails"""
     def __init__(self, text: str, error_message: str):
@@ -152,7 +158,7 @@ class VectorEmbedder:
         self.executor = ThreadPoolExecutor(max_workers=4)
         
         # API endpoint
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self.base_url = os.getenv('GEMINI_API_BASE_URL', "https://generativelanguage.googleapis.com/v1beta").rstrip('/')
     
     @classmethod
     def instance(cls):
@@ -218,8 +224,8 @@ class VectorEmbedder:
         
         return text
     
-    async def _generate_single_embedding(self, text: str) -> EmbeddingResult:
-        """Generate embedding for a single text"""
+    async def _generate_single_embedding(self, text: str, deadline: Optional[Deadline] = None) -> EmbeddingResult:
+        """Generate embedding for a single text, within the request deadline if given"""
         start_time = time.time()
         
         # Preprocess text
@@ -244,6 +250,8 @@ class VectorEmbedder:
         
         # Generate embedding via API
         for attempt in range(self.max_retries + 1):
+            if deadline is not None:
+                deadline.check("embedding")
             try:
                 await self._ensure_session()
                 await self._wait_for_rate_limit()
@@ -256,8 +264,14 @@ class VectorEmbedder:
                     }
                 }
                 
-                # Make API request
-                async with self.session.post(url, json=payload) as response:
+                # Make API request (the session timeout is capped by the remaining budget)
+                request_kwargs = {}
+                if deadline is not None:
+                    deadline.check("embedding")
+                    # aiohttp reads a zero or negative total as "no timeout"
+                    total = max(deadline.timeout(30), MIN_REQUEST_TIMEOUT_SECONDS)
+                    request_kwargs['timeout'] = aiohttp.ClientTimeout(total=total, connect=10)
+                async with self.session.post(url, json=payload, **request_kwargs) as response:
                     if response.status == 200:
                         data = await response.json()
                         
@@ -288,9 +302,10 @@ class VectorEmbedder:
                             raise EmbeddingError(text, "No embedding data in API response")
                     
                     elif response.status == 429:  # Rate limit
+                        wait_time = self.retry_delay * (2 ** attempt)
                         if attempt < self.max_retries:
-                            wait_time = self.retry_delay * (2 ** attempt)
                             logger.warning(f"Rate limited, waiting {wait_time}s before retry {attempt + 1}")
+                            self._check_retry_budget(deadline, wait_time)
                             await asyncio.sleep(wait_time)
                             continue
                         else:
@@ -302,28 +317,46 @@ class VectorEmbedder:
                         raise EmbeddingError(text, f"API error: {error_msg}")
                     
                     else:
+                        wait_time = self.retry_delay * (2 ** attempt)
                         if attempt < self.max_retries:
-                            wait_time = self.retry_delay * (2 ** attempt)
                             logger.warning(f"API error {response.status}, retrying in {wait_time}s")
+                            self._check_retry_budget(deadline, wait_time)
                             await asyncio.sleep(wait_time)
                             continue
                         else:
                             error_text = await response.text()
                             raise EmbeddingError(text, f"API error {response.status}: {error_text}")
             
+            except DeadlineExceeded:
+                raise
+            
+            except asyncio.TimeoutError as e:
+                if deadline is not None:
+                    deadline.check("embedding")
+                wait_time = self.retry_delay * (2 ** attempt)
+                if attempt < self.max_retries:
+                    logger.warning(f"Embedding request timed out, retrying in {wait_time}s")
+                    self._check_retry_budget(deadline, wait_time)
+                    await asyncio.sleep(wait_time)
+                    continue
+                else:
+                    raise EmbeddingError(text, f"Timed out after all retries: {e}")
+            
             except aiohttp.ClientError as e:
+                wait_time = self.retry_delay * (2 ** attempt)
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * (2 ** attempt)
                     logger.warning(f"Network error: {e}, retrying in {wait_time}s")
+                    self._check_retry_budget(deadline, wait_time)
                     await asyncio.sleep(wait_time)
                     continue
                 else:
                     raise EmbeddingError(text, f"Network error after all retries: {e}")
             
             except Exception as e:
+                wait_time = self.retry_delay * (2 ** attempt)
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * (2 ** attempt)
                     logger.warning(f"Unexpected error: {e}, retrying in {wait_time}s")
+                    self._check_retry_budget(deadline, wait_time)
                     await asyncio.sleep(wait_time)
                     continue
                 else:
@@ -332,17 +365,24 @@ class VectorEmbedder:
         # This should never be reached
         raise EmbeddingError(text, "Failed to generate embedding after all attempts")
     
-    async def generate_embedding(self, text: str) -> EmbeddingResult:
+    def _check_retry_budget(self, deadline: Optional[Deadline], wait_time: float) -> None:
+        """Raise DeadlineExceeded if a retry after ``wait_time`` no longer fits the request budget."""
+        if deadline is not None and not deadline.allows_retry(wait_time):
+            deadline.mark_exhausted("embedding")
+            raise DeadlineExceeded("embedding")
+    
+    async def generate_embedding(self, text: str, deadline: Optional[Deadline] = None) -> EmbeddingResult:
         """
         Generate embedding for a single text
         
         Args:
             text: Text to generate embedding for
+            deadline: Request deadline bounding timeouts and retries
             
         Returns:
             EmbeddingResult object
         """
-        return await self._generate_single_embedding(text)
+        return await self._generate_single_embedding(text, deadline)
     
     async def generate_embeddings_batch(self, texts: List[str]) -> List[EmbeddingResult]:
         """
@@ -405,6 +445,87 @@ class VectorEmbedder:
         
         return results
     
+    async def generate_embeddings_multi(
+        self,
+        texts: List[str],
+        texts_per_request: int = 100
+    ) -> List[EmbeddingResult]:
+        """
+        Generate embeddings with ``batchEmbedContents``, many texts per API request
+
+        Used by bulk backfills, where one request per text would make the API
+        rate limit the bottleneck. Cached texts are not sent. Unlike
+        ``generate_embeddings_batch`` a failed request raises instead of
+        returning dummy vectors.
+        """
+        results: List[Optional[EmbeddingResult]] = [None] * len(texts)
+        processed = [self._preprocess_text(text) for text in texts]
+        pending: List[int] = []
+        for i, text in enumerate(processed):
+            if not text:
+                raise EmbeddingError(texts[i], "Empty or invalid text after preprocessing")
+            cached = self.cache.get(text, self.model) if self.cache else None
+            if cached is not None:
+                results[i] = EmbeddingResult(
+                    text=text, embedding=cached, model=self.model,
+                    dimensions=len(cached), processing_time=0.0, cached=True
+                )
+            else:
+                pending.append(i)
+
+        url = f"{self.base_url}/{self.model}:batchEmbedContents"
+        for start in range(0, len(pending), texts_per_request):
+            chunk = pending[start:start + texts_per_request]
+            payload = {
+                "requests": [
+                    {"model": self.model, "content": {"parts": [{"text": processed[i]}]}}
+                    for i in chunk
+                ]
+            }
+            request_start = time.time()
+            for attempt in range(self.max_retries + 1):
+                await self._ensure_session()
+                await self._wait_for_rate_limit()
+                try:
+                    async with self.session.post(url, json=payload) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            break
+                        error_text = await response.text()
+                        if response.status == 400 or attempt == self.max_retries:
+                            raise EmbeddingError(
+                                processed[chunk[0]], f"Batch API error {response.status}: {error_text}"
+                            )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == self.max_retries:
+                        raise EmbeddingError(processed[chunk[0]], f"Batch request failed after all retries: {e}")
+                wait_time = self.retry_delay * (2 ** attempt)
+                logger.warning(f"Batch embedding request failed, retrying in {wait_time}s")
+                await asyncio.sleep(wait_time)
+
+            embeddings = data.get('embeddings') or []
+            if len(embeddings) != len(chunk):
+                raise EmbeddingError(
+                    processed[chunk[0]], f"Expected {len(chunk)} embeddings, got {len(embeddings)}"
+                )
+            processing_time = time.time() - request_start
+            for i, item in zip(chunk, embeddings):
+                values = item.get('values')
+                if not isinstance(values, list) or not values:
+                    raise EmbeddingError(processed[i], "Invalid embedding format received")
+                if self.cache:
+                    self.cache.set(processed[i], self.model, values)
+                results[i] = EmbeddingResult(
+                    text=processed[i], embedding=values, model=self.model,
+                    dimensions=len(values), processing_time=processing_time, cached=False
+                )
+
+        logger.info(
+            f"Multi-text embedding completed: {len(texts)} texts, {len(pending)} sent in "
+            f"{(len(pending) + texts_per_request - 1) // texts_per_request} requests"
+        )
+        return results
+
     async def generate_document_embeddings(
         self, 
         documents: List[Dict[str, Any]]
@@ -0,0 +1,189 @@
+"""
+ETL worker process.
+
+Runs ETL jobs claimed from the ``chat_etl_jobs`` queue, outside the API
+process, with a fixed number of jobs in flight:
+
+    python -m etl.worker --concurrency 4
+
+Each running job heartbeats its lease. A job is cancelled (its asyncio task
+is actually cancelled) when cancellation is requested or its lease is lost.
+On SIGTERM/SIGINT the worker stops claiming, lets running jobs finish for a
+grace period, then cancels and requeues the rest.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from etl.config import BACKGROUND_PROCESSING_CONFIG
+from etl.job_queue import ClaimedJob, ETLJobQueue
+
+logger = logging.getLogger(__name__)
+
+
+class ETLWorker:
+    """Claims jobs from the queue and runs up to ``parallelism`` of them at once."""
+
+    def __init__(
+        self,
+        queue: Optional[ETLJobQueue] = None,
+        parallelism: Optional[int] = None,
+        worker_id: Optional[str] = None,
+        process: Optional[Callable[..., Any]] = None,
+        heartbeat_seconds: Optional[float] = None,
+        poll_interval_seconds: Optional[float] = None,
+        progress: Optional[Any] = None
+    ):
+        self.queue = queue or ETLJobQueue()
+        self.parallelism = parallelism or BACKGROUND_PROCESSING_CONFIG['worker_pool_size']
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        if process is None:
+            from etl.tasks import process_test_completion
+            process = process_test_completion
+        self.process = process
+        if progress is None:
+            from etl.test_completion_handler import JobProgressBuffer
+            progress = JobProgressBuffer.instance()
+        # Coalesced progress of the jobs running here (see JobTracker)
+        self.progress = progress
+        self.heartbeat_seconds = heartbeat_seconds or BACKGROUND_PROCESSING_CONFIG['heartbeat_seconds']
+        self.poll_interval = poll_interval_seconds or BACKGROUND_PROCESSING_CONFIG['poll_interval_seconds']
+        self.stale_check_interval = BACKGROUND_PROCESSING_CONFIG['stale_check_interval_seconds']
+        self.shutdown_grace = BACKGROUND_PROCESSING_CONFIG['shutdown_grace_seconds']
+        # job_id -> task running the ETL pipeline
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._runners: Dict[str, asyncio.Task] = {}
+        # job_id -> why its task was cancelled ("cancelled", "lease_lost", "shutdown")
+        self._stop_reasons: Dict[str, str] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._runners)
+
+    def stop(self) -> None:
+        """Stop claiming new jobs; ``run`` returns once running jobs are settled."""
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run(self) -> None:
+        self._wake = asyncio.Event()
+        logger.info(f"ETL worker {self.worker_id} started (parallelism={self.parallelism})")
+        last_stale_check = 0.0
+        while not self._stopping:
+            try:
+                if time.monotonic() - last_stale_check >= self.stale_check_interval:
+                    last_stale_check = time.monotonic()
+                    await self.queue.recover_stale_leases()
+                for job in await self.queue.claim(self.worker_id, self.parallelism - self.active_jobs):
+                    self._runners[job.job_id] = asyncio.create_task(self._run_job(job))
+            except Exception as e:
+                logger.error(f"ETL worker {self.worker_id} queue error: {e}")
+
+            # Sleep until the next poll, a job finishing, or stop()
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+        await self._drain()
+        logger.info(f"ETL worker {self.worker_id} stopped")
+
+    async def _drain(self) -> None:
+        """Give running jobs the grace period, then cancel and requeue what is left."""
+        if self._runners:
+            logger.info(f"Waiting up to {self.shutdown_grace}s for {len(self._runners)} running ETL jobs")
+            await asyncio.wait(list(self._runners.values()), timeout=self.shutdown_grace)
+        for job_id, task in list(self._jobs.items()):
+            self._stop_reasons.setdefault(job_id, "shutdown")
+            task.cancel()
+        if self._runners:
+            await asyncio.gather(*self._runners.values(), return_exceptions=True)
+
+    async def _run_job(self, job: ClaimedJob) -> None:
+        task = asyncio.create_task(self.process(
+            user_id=job.user_id,
+            anp_seq=job.anp_seq,
+            job_id=job.job_id,
+            **job.payload
+        ))
+        self._jobs[job.job_id] = task
+        heartbeat = asyncio.create_task(self._heartbeat(job.job_id, task))
+        try:
+            await task
+            # Progress still buffered for the job must not land after the queue settles it
+            await self.progress.discard(job.job_id)
+            await self.queue.release(job.job_id, self.worker_id)
+        except asyncio.CancelledError:
+            reason = self._stop_reasons.get(job.job_id, "shutdown")
+            logger.info(f"ETL job {job.job_id} stopped on worker {self.worker_id}: {reason}")
+            # Progress still buffered for the job must not land after the queue settles it
+            await self.progress.discard(job.job_id)
+            if reason == "cancelled":
+                await self.queue.mark_cancelled(job.job_id, self.worker_id)
+            elif reason == "shutdown":
+                await self.queue.requeue(job.job_id, self.worker_id)
+            # A lost lease already belongs to the queue again
+        except Exception as e:
+            logger.error(f"ETL job {job.job_id} crashed on worker {self.worker_id}: {e}")
+            await self.progress.discard(job.job_id)
+            await self.queue.release(job.job_id, self.worker_id, error=str(e))
+        finally:
+            heartbeat.cancel()
+            self._jobs.pop(job.job_id, None)
+            self._runners.pop(job.job_id, None)
+            self._stop_reasons.pop(job.job_id, None)
+            self._wake.set()
+
+    async def _heartbeat(self, job_id: str, task: asyncio.Task) -> None:
+        """Renew the lease while the job runs; cancel it on request or when the lease is lost."""
+        while not task.done():
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                cancel_requested = await self.queue.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat for ETL job {job_id} failed: {e}")
+                continue
+            if cancel_requested is None or cancel_requested:
+                self._stop_reasons[job_id] = "lease_lost" if cancel_requested is None else "cancelled"
+                task.cancel()
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an ETL worker against the chat_etl_jobs queue")
+    parser.add_argument(
+        "--concurrency", type=int, default=BACKGROUND_PROCESSING_CONFIG['worker_pool_size'],
+        help="Jobs run at once by this worker"
+    )
+    parser.add_argument("--worker-id", default=None, help="Lease owner name (default: host:pid:random)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from etl.logging_config import setup_logging
+
+    load_dotenv()
+    setup_logging()
+    worker = ETLWorker(parallelism=args.concurrency, worker_id=args.worker_id)
+
+    async def _serve():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, worker.stop)
+        await worker.run()
+        await worker.progress.flush()
+
+    asyncio.run(_serve())
+
+
+if __name__ == "__main__":
+    main()
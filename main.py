@@ -2,6 +2,7 @@
 Main FastAPI application for Aptitude Chatbot RAG System
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
@@ -18,13 +19,23 @@ from api.chat_endpoints import router as chat_router
 from api.user_endpoints import router as user_router
 from api.auth_endpoints import router as auth_router
 from monitoring.metrics import get_metrics
-from database.connection import init_database
+from database.connection import init_database, db_manager
+from database.write_behind import WRITE_BEHIND_CONFIG, WriteBehindBuffer
 from etl.logging_config import setup_logging
+from rag.query_embedding_cache import QUERY_EMBEDDING_CACHE_CONFIG, prewarm_query_embeddings
+from rag.response_generator import ResponseGenerator
+from etl.config import BACKGROUND_PROCESSING_CONFIG, JOB_EVENTS_CONFIG
+from etl.job_events import JobEventBus
+from etl.test_completion_handler import JobProgressBuffer
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+def _log_prewarm_result(task: "asyncio.Task") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Query embedding cache prewarm failed: {task.exception()}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
@@ -39,10 +50,37 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize database: {e}")
         raise
     
+    # Prewarm the query embedding cache with the fixed question templates (best effort, in background)
+    if QUERY_EMBEDDING_CACHE_CONFIG['prewarm']:
+        prewarm_task = asyncio.create_task(prewarm_query_embeddings())
+        prewarm_task.add_done_callback(_log_prewarm_result)
+    
+    # Conversation and feedback rows are written behind the reply
+    if WRITE_BEHIND_CONFIG['enabled']:
+        WriteBehindBuffer.instance().start()
+    
+    # ETL progress and document changes made by worker processes arrive through LISTEN/NOTIFY
+    if JOB_EVENTS_CONFIG['listen_enabled']:
+        JobEventBus.instance().start()
+    
+    # ETL jobs normally run in separate `python -m etl.worker` processes
+    etl_worker = etl_worker_task = None
+    if BACKGROUND_PROCESSING_CONFIG['embedded_worker']:
+        from etl.worker import ETLWorker
+        etl_worker = ETLWorker()
+        etl_worker_task = asyncio.create_task(etl_worker.run())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Aptitude Chatbot RAG System...")
+    if etl_worker is not None:
+        etl_worker.stop()
+        await etl_worker_task
+    await WriteBehindBuffer.instance().stop()
+    await JobProgressBuffer.instance().flush()
+    await JobEventBus.instance().stop()
+    await ResponseGenerator.close_instance()
 
 # Create FastAPI application
 app = FastAPI(
@@ -106,7 +144,10 @@ async def health_check():
 # Metrics endpoint (lightweight JSON for dashboards)
 @app.get("/metrics")
 async def metrics():
-    return await get_metrics()
+    snapshot = await get_metrics()
+    snapshot["db_pool"] = db_manager.pool_status()
+    snapshot["write_behind"] = WriteBehindBuffer.instance().stats()
+    return snapshot
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,88 @@
+"""
+Per-request deadlines.
+
+A ``Deadline`` is created when a chat request arrives and passed down through
+embedding, vector search and generation. Each stage caps its timeouts to the
+remaining budget, skips retries whose backoff no longer fits, and stops with
+``DeadlineExceeded`` once the budget is gone. The first stage that ran out of
+budget is remembered on the deadline and counted in
+``chat_deadline_exceeded_total``.
+"""
+
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from monitoring.metrics import inc as metrics_inc
+
+# Request deadline configuration
+DEADLINE_CONFIG = {
+    'chat_request_seconds': float(os.getenv('CHAT_REQUEST_DEADLINE_SECONDS', '25')),
+    # A retry is only attempted if at least this much budget remains after its backoff
+    'min_attempt_seconds': float(os.getenv('CHAT_DEADLINE_MIN_ATTEMPT_SECONDS', '1.0')),
+}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage finds the request budget used up"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__(f"Request deadline exceeded during {stage}")
+
+
+class Deadline:
+    """
+    Absolute ``time.monotonic()`` deadline with per-stage bookkeeping.
+
+    ``expires_at`` uses the same clock as the admission scheduler, so it can
+    be passed to ``AdmissionScheduler.acquire`` directly.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.budget_seconds = seconds
+        self.expires_at = clock() + seconds
+        self.exhausted_by: Optional[str] = None
+
+    @classmethod
+    def for_chat_request(cls) -> "Deadline":
+        return cls(DEADLINE_CONFIG['chat_request_seconds'])
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self) -> bool:
+        return self._clock() >= self.expires_at
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout for one attempt: the stage's own cap, bounded by the remaining budget."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def allows_retry(self, delay: float) -> bool:
+        """Whether a retry after ``delay`` seconds still leaves time for a useful attempt."""
+        return self.remaining() > delay + DEADLINE_CONFIG['min_attempt_seconds']
+
+    def mark_exhausted(self, stage: str) -> None:
+        if self.exhausted_by is None:
+            self.exhausted_by = stage
+
+    def check(self, stage: str) -> None:
+        """Raise ``DeadlineExceeded`` (and remember the stage) if the budget is used up."""
+        if self.expired():
+            self.mark_exhausted(stage)
+            raise DeadlineExceeded(stage)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "budget_seconds": self.budget_seconds,
+            "remaining_seconds": round(self.remaining(), 3),
+            "exhausted_by": self.exhausted_by,
+        }
+
+
+async def record_deadline(deadline: Optional[Deadline]) -> None:
+    """Count the stage that used up the budget, if any."""
+    if deadline is not None and deadline.exhausted_by is not None:
+        await metrics_inc("chat_deadline_exceeded_total", labels={"stage": deadline.exhausted_by})
@@ -0,0 +1,256 @@
+"""
+Admission control for LLM generation.
+
+A bounded, per-user fair queue in front of response generation. Requests
+beyond the active-slot limit wait in per-user FIFO queues served round-robin,
+so one user cannot monopolize slots. Waiters are shed when their deadline
+passes or the queue is full, and the queue depth at arrival selects a
+degradation level (fewer documents, shorter answers) for the request.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Dict, Optional
+
+from monitoring.metrics import observe as metrics_observe, inc as metrics_inc
+
+logger = logging.getLogger(__name__)
+
+# Admission configuration
+ADMISSION_CONFIG = {
+    'max_active': int(os.getenv('CHAT_ADMISSION_MAX_ACTIVE', os.getenv('GEMINI_MAX_CONCURRENCY', '8'))),
+    'max_queue': int(os.getenv('CHAT_ADMISSION_MAX_QUEUE', '64')),
+    'per_user_active': int(os.getenv('CHAT_ADMISSION_PER_USER_ACTIVE', '1')),
+    'per_user_queued': int(os.getenv('CHAT_ADMISSION_PER_USER_QUEUED', '2')),
+    'deadline_seconds': float(os.getenv('CHAT_ADMISSION_DEADLINE_SECONDS', '20')),
+    'reduced_queue_ratio': float(os.getenv('CHAT_ADMISSION_REDUCED_RATIO', '0.5')),
+    'minimal_queue_ratio': float(os.getenv('CHAT_ADMISSION_MINIMAL_RATIO', '0.8')),
+}
+
+
+class DegradationLevel(str, Enum):
+    """Service level chosen from queue pressure at admission"""
+    NORMAL = "normal"
+    REDUCED = "reduced"
+    MINIMAL = "minimal"
+
+
+@dataclass(frozen=True)
+class DegradationProfile:
+    """Per-level limits applied to retrieval and generation"""
+    max_documents: int
+    max_output_tokens: int
+
+
+DEGRADATION_PROFILES = {
+    DegradationLevel.NORMAL: DegradationProfile(max_documents=5, max_output_tokens=2048),
+    DegradationLevel.REDUCED: DegradationProfile(max_documents=3, max_output_tokens=1024),
+    DegradationLevel.MINIMAL: DegradationProfile(max_documents=2, max_output_tokens=512),
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(f"Request shed: {reason}")
+
+
+@dataclass
+class AdmissionTicket:
+    """Granted generation slot"""
+    user_id: str
+    level: DegradationLevel
+    wait_seconds: float = 0.0
+
+    @property
+    def profile(self) -> DegradationProfile:
+        return DEGRADATION_PROFILES[self.level]
+
+
+class _Waiter:
+    __slots__ = ("user_id", "future", "level", "enqueued_at")
+
+    def __init__(self, user_id: str, future: asyncio.Future, level: DegradationLevel):
+        self.user_id = user_id
+        self.future = future
+        self.level = level
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionScheduler:
+    """
+    Bounded fair-share admission queue.
+
+    - At most ``max_active`` generations run at once, and at most
+      ``per_user_active`` per user
+    - Waiting users are served round-robin; each user may queue at most
+      ``per_user_queued`` requests
+    - A waiter still queued at its deadline is shed
+    """
+
+    def __init__(
+        self,
+        max_active: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        per_user_active: Optional[int] = None,
+        per_user_queued: Optional[int] = None,
+        deadline_seconds: Optional[float] = None
+    ):
+        self.max_active = max_active or ADMISSION_CONFIG['max_active']
+        self.max_queue = max_queue or ADMISSION_CONFIG['max_queue']
+        self.per_user_active = per_user_active or ADMISSION_CONFIG['per_user_active']
+        self.per_user_queued = per_user_queued or ADMISSION_CONFIG['per_user_queued']
+        self.deadline_seconds = deadline_seconds or ADMISSION_CONFIG['deadline_seconds']
+        self._active_total = 0
+        self._active_by_user: Dict[str, int] = {}
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        self.shed_counts: Dict[str, int] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        return self._active_total
+
+    def degradation_level(self) -> DegradationLevel:
+        """Current service level given queue pressure."""
+        ratio = self._queued / self.max_queue if self.max_queue else 0.0
+        if ratio >= ADMISSION_CONFIG['minimal_queue_ratio']:
+            return DegradationLevel.MINIMAL
+        if ratio >= ADMISSION_CONFIG['reduced_queue_ratio']:
+            return DegradationLevel.REDUCED
+        return DegradationLevel.NORMAL
+
+    def _has_capacity(self, user_id: str) -> bool:
+        return (
+            self._active_total < self.max_active
+            and self._active_by_user.get(user_id, 0) < self.per_user_active
+        )
+
+    def _grant(self, user_id: str, level: DegradationLevel, wait_seconds: float = 0.0) -> AdmissionTicket:
+        self._active_total += 1
+        self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+        return AdmissionTicket(user_id=user_id, level=level, wait_seconds=wait_seconds)
+
+    async def _shed(self, reason: str) -> None:
+        self.shed_counts[reason] = self.shed_counts.get(reason, 0) + 1
+        await metrics_inc("llm_admission_shed_total", labels={"reason": reason})
+        raise AdmissionRejected(reason)
+
+    async def acquire(self, user_id: str, deadline: Optional[float] = None) -> AdmissionTicket:
+        """
+        Wait for a generation slot.
+
+        Args:
+            user_id: Requesting user
+            deadline: Absolute ``time.monotonic()`` deadline; defaults to now + deadline_seconds
+
+        Raises:
+            AdmissionRejected: If the queue is full, the user already has too many
+                queued requests, or the deadline passes while waiting
+        """
+        level = self.degradation_level()
+        await metrics_observe("llm_admission_queue_depth", self._queued)
+        if level != DegradationLevel.NORMAL:
+            await metrics_inc("llm_admission_degraded_total", labels={"level": level.value})
+
+        if not self._queued and self._has_capacity(user_id):
+            await metrics_observe("llm_admission_wait_seconds", 0.0)
+            return self._grant(user_id, level)
+
+        if self._queued >= self.max_queue:
+            await self._shed("queue_full")
+        user_queue = self._queues.get(user_id)
+        if user_queue is not None and len(user_queue) >= self.per_user_queued:
+            await self._shed("user_queue_full")
+
+        deadline = deadline if deadline is not None else time.monotonic() + self.deadline_seconds
+        waiter = _Waiter(user_id, asyncio.get_running_loop().create_future(), level)
+        self._queues.setdefault(user_id, deque()).append(waiter)
+        self._queued += 1
+        self._dispatch()
+
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining > 0 and not waiter.future.done():
+                await asyncio.wait({waiter.future}, timeout=remaining)
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter.future.result())
+            else:
+                self._remove_waiter(waiter)
+            raise
+
+        if waiter.future.done() and not waiter.future.cancelled():
+            ticket = waiter.future.result()
+            await metrics_observe("llm_admission_wait_seconds", ticket.wait_seconds)
+            return ticket
+
+        self._remove_waiter(waiter)
+        await metrics_observe("llm_admission_wait_seconds", time.monotonic() - waiter.enqueued_at)
+        await self._shed("deadline")
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Return a slot and admit the next waiter(s)."""
+        self._active_total = max(self._active_total - 1, 0)
+        remaining = self._active_by_user.get(ticket.user_id, 1) - 1
+        if remaining > 0:
+            self._active_by_user[ticket.user_id] = remaining
+        else:
+            self._active_by_user.pop(ticket.user_id, None)
+        self._dispatch()
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.user_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[waiter.user_id]
+        if not waiter.future.done():
+            waiter.future.cancel()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting users in round-robin order."""
+        while self._active_total < self.max_active and self._queued:
+            granted = False
+            for user_id in list(self._queues.keys()):
+                if not self._has_capacity(user_id):
+                    continue
+                queue = self._queues[user_id]
+                waiter = queue.popleft()
+                self._queued -= 1
+                if queue:
+                    # Rotate this user to the back of the round-robin order
+                    self._queues.move_to_end(user_id)
+                else:
+                    del self._queues[user_id]
+                if waiter.future.done():
+                    granted = True
+                    break
+                wait_seconds = time.monotonic() - waiter.enqueued_at
+                waiter.future.set_result(self._grant(user_id, waiter.level, wait_seconds))
+                granted = True
+                break
+            if not granted:
+                return
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active_total,
+            "max_active": self.max_active,
+            "queue_depth": self._queued,
+            "max_queue": self.max_queue,
+            "waiting_users": len(self._queues),
+            "level": self.degradation_level().value,
+            "shed": dict(self.shed_counts),
+        }
@@ -6,6 +6,7 @@ context window management for LLM input limits, and document relevance scoring.
 """
 
 import logging
+import os
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
@@ -15,6 +16,22 @@ from database.vector_search import VectorSearchService, SearchQuery, SearchResul
 from database.models import ChatDocument
 from rag.question_processor import ProcessedQuestion, QuestionCategory, QuestionIntent
 from database.vector_search import VectorSearchError
+from rag.context_packer import ContextPacker, Tokenizer, build_section_fields
+from monitoring.metrics import inc as metrics_inc
+from monitoring.deadline import Deadline
+
+# Follow-up turns reuse the previous turn's documents instead of searching again
+FOLLOW_UP_REUSE_CONFIG = {
+    'enabled': os.getenv('CHAT_FOLLOW_UP_REUSE_ENABLED', 'true').lower() == 'true',
+    'min_confidence': float(os.getenv('CHAT_FOLLOW_UP_REUSE_MIN_CONFIDENCE', '0.6')),
+}
+
+# Users whose whole corpus fits the prompt get every document, without embedding or vector search
+SMALL_CORPUS_CONFIG = {
+    'enabled': os.getenv('CHAT_SMALL_CORPUS_ENABLED', 'true').lower() == 'true',
+    'max_documents': int(os.getenv('CHAT_SMALL_CORPUS_MAX_DOCUMENTS', '8')),
+    'max_tokens': int(os.getenv('CHAT_SMALL_CORPUS_MAX_TOKENS', '2500')),
+}
 
 
 class PromptTemplate(Enum):
@@ -53,6 +70,7 @@ class ConstructedContext:
     context_metadata: Dict[str, Any]
     token_count_estimate: int
     truncated: bool = False
+    memory_block: Optional[str] = None
 
 
 class ContextBuilder:
@@ -63,16 +81,31 @@ class ContextBuilder:
     and context window management for optimal LLM performance.
     """
     
-    def __init__(self, vector_search_service: VectorSearchService, max_context_tokens: int = 4000):
+    def __init__(
+        self,
+        vector_search_service: VectorSearchService,
+        max_context_tokens: int = 4000,
+        tokenizer: Optional[Tokenizer] = None,
+        document_repository: Optional[Any] = None,
+        question_processor: Optional[Any] = None
+    ):
         """
         Initialize the context builder.
         
         Args:
             vector_search_service: Service for vector similarity search
             max_context_tokens: Maximum tokens allowed in context window
+            tokenizer: Tokenizer used for budgeting (defaults to the process-wide tokenizer)
+            document_repository: Repository used to reload the previous turn's
+                documents by ID for follow-up questions (reuse is off without it)
+            question_processor: Embeds questions processed without an embedding
+                (deferred follow-ups) when they fall back to a vector search
         """
         self.vector_search = vector_search_service
+        self.document_repository = document_repository
+        self.question_processor = question_processor
         self.max_context_tokens = max_context_tokens
+        self.packer = ContextPacker(tokenizer)
         self.logger = logging.getLogger(__name__)
         
         # Prompt templates for different question types
@@ -215,7 +248,12 @@ class ContextBuilder:
         self, 
         processed_question: ProcessedQuestion, 
         user_id: str,
-        previous_context: Optional[str] = None
+        previous_context: Optional[str] = None,
+        memory_block: Optional[str] = None,
+        max_documents: int = 5,
+        previous_doc_ids: Optional[List[str]] = None,
+        corpus_documents: Optional[List[ChatDocument]] = None,
+        deadline: Optional[Deadline] = None
     ) -> ConstructedContext:
         """
         Build complete context for LLM input.
@@ -224,39 +262,39 @@ class ContextBuilder:
             processed_question: Processed user question
             user_id: User identifier
             previous_context: Previous conversation context if follow-up
+            memory_block: Conversation memory block that will precede the prompt;
+                its tokens are reserved from the context budget
+            max_documents: Maximum number of documents to retrieve (lowered
+                under load by the admission controller)
+            previous_doc_ids: Documents retrieved for the previous turn, reused
+                for confident follow-up questions instead of a new search
+            corpus_documents: The user's whole corpus from ``load_small_corpus``;
+                when given, every document is used and no search is run
+            deadline: Request deadline bounding the vector search
             
         Returns:
             ConstructedContext with all necessary information
         """
         try:
-            # Retrieve relevant documents
-            retrieved_docs = await self._retrieve_and_rank_documents(
-                processed_question, user_id
-            )
+            # Retrieve relevant documents (small corpora are sent whole)
+            if corpus_documents is not None:
+                retrieved_docs = self._rank_corpus_documents(processed_question, corpus_documents)
+            else:
+                retrieved_docs = await self._retrieve_and_rank_documents(
+                    processed_question, user_id, max_documents, previous_doc_ids, deadline
+                )
             
             # Select appropriate prompt template
             template = self._select_prompt_template(processed_question)
             
-            # Format context documents for prompt
-            formatted_docs = self._format_documents_for_prompt(retrieved_docs)
-            
-            # Construct the prompt
-            formatted_prompt = self._construct_prompt(
-                template, processed_question.original_text, 
-                formatted_docs, previous_context
+            # Pack documents into the remaining token budget and construct the prompt
+            memory_tokens = self._estimate_token_count(memory_block) if memory_block else 0
+            formatted_prompt, retrieved_docs, truncated = self._pack_context(
+                retrieved_docs, template,
+                processed_question.original_text, previous_context,
+                reserved_tokens=memory_tokens
             )
-            
-            # Estimate token count and truncate if necessary
-            token_estimate = self._estimate_token_count(formatted_prompt)
-            truncated = False
-            
-            if token_estimate > self.max_context_tokens:
-                formatted_prompt, retrieved_docs = self._truncate_context(
-                    formatted_prompt, retrieved_docs, template, 
-                    processed_question.original_text, previous_context
-                )
-                token_estimate = self._estimate_token_count(formatted_prompt)
-                truncated = True
+            token_estimate = self._estimate_token_count(formatted_prompt) + memory_tokens
             
             context = ConstructedContext(
                 user_question=processed_question.original_text,
@@ -266,12 +304,16 @@ class ContextBuilder:
                 context_metadata={
                     "question_category": processed_question.category.value,
                     "question_intent": processed_question.intent.value,
+                    "question_topic": getattr(processed_question, "topic", None),
                     "confidence_score": processed_question.confidence_score,
                     "num_documents": len(retrieved_docs),
-                    "has_previous_context": previous_context is not None
+                    "has_previous_context": previous_context is not None,
+                    "small_corpus": corpus_documents is not None,
+                    "memory_tokens": memory_tokens
                 },
                 token_count_estimate=token_estimate,
-                truncated=truncated
+                truncated=truncated,
+                memory_block=memory_block
             )
             
             self.logger.info(
@@ -286,10 +328,83 @@ class ContextBuilder:
             self.logger.error(f"Error building context: {e}")
             raise
     
+    async def load_small_corpus(
+        self, 
+        user_id: Any, 
+        document_count: Optional[int] = None
+    ) -> Optional[List[ChatDocument]]:
+        """
+        Load the user's whole corpus if it is small enough to send without retrieval.
+        
+        Args:
+            user_id: User UUID
+            document_count: Known number of user documents, to skip loading large corpora
+            
+        Returns:
+            All of the user's documents, or None when vector retrieval is needed
+        """
+        max_documents = SMALL_CORPUS_CONFIG['max_documents']
+        if not SMALL_CORPUS_CONFIG['enabled'] or self.document_repository is None:
+            return None
+        if document_count is not None and not 0 < document_count <= max_documents:
+            return None
+        
+        try:
+            documents = await self.document_repository.get_user_corpus(user_id, max_documents + 1)
+        except Exception as e:
+            self.logger.warning(f"Could not load corpus for user {user_id}: {e}")
+            return None
+        if not documents or len(documents) > max_documents:
+            return None
+        
+        corpus_tokens = sum(
+            self._estimate_token_count(doc.summary_text or "")
+            + self._estimate_token_count(
+                doc.content if isinstance(doc.content, str) else json.dumps(doc.content or {}, ensure_ascii=False)
+            )
+            for doc in documents
+        )
+        if corpus_tokens > min(SMALL_CORPUS_CONFIG['max_tokens'], self.max_context_tokens):
+            return None
+        
+        self.logger.info(f"Small corpus for user {user_id}: {len(documents)} documents, ~{corpus_tokens} tokens")
+        return documents
+    
+    def _rank_corpus_documents(
+        self, 
+        processed_question: ProcessedQuestion, 
+        documents: List[ChatDocument]
+    ) -> List[RetrievedDocument]:
+        """
+        Order a small corpus by keyword and document-type relevance (no similarity scores).
+        
+        Args:
+            processed_question: Processed user question
+            documents: The user's whole corpus
+            
+        Returns:
+            All documents as retrieved documents, most relevant first
+        """
+        retrieved_docs = [
+            RetrievedDocument(
+                document=doc,
+                similarity_score=0.0,
+                relevance_score=self._calculate_relevance_score(doc, processed_question, 0.0),
+                content_summary=self._create_content_summary(doc),
+                key_points=self._extract_key_points(doc, processed_question)
+            )
+            for doc in documents
+        ]
+        retrieved_docs.sort(key=lambda x: x.relevance_score, reverse=True)
+        return retrieved_docs
+    
     async def _retrieve_and_rank_documents(
         self, 
         processed_question: ProcessedQuestion, 
-        user_id: str
+        user_id: str,
+        max_documents: int = 5,
+        previous_doc_ids: Optional[List[str]] = None,
+        deadline: Optional[Deadline] = None
     ) -> List[RetrievedDocument]:
         """
         Retrieve and rank documents based on the processed question.
@@ -297,6 +412,9 @@ class ContextBuilder:
         Args:
             processed_question: Processed user question
             user_id: User identifier
+            max_documents: Number of top-ranked documents to return
+            previous_doc_ids: Documents retrieved for the previous turn
+            deadline: Request deadline passed to each similarity search
             
         Returns:
             List of ranked retrieved documents
@@ -320,6 +438,18 @@ class ContextBuilder:
             # Fallback for invalid UUID strings (like "user1" in tests)
             user_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, user_id)
         
+        # Confident follow-ups stay on the previous turn's documents
+        if previous_doc_ids and processed_question.context_from_previous:
+            reused = await self._reuse_previous_documents(
+                processed_question, user_uuid, previous_doc_ids, max_documents
+            )
+            if reused:
+                return reused
+        
+        # Follow-ups are processed without an embedding in case the previous documents serve them
+        if processed_question.embedding_vector is None and self.question_processor is not None:
+            await self.question_processor.embed_question(processed_question, deadline)
+        
         search_query = SearchQuery(
             user_id=user_uuid,
             query_vector=processed_question.embedding_vector,
@@ -328,22 +458,25 @@ class ContextBuilder:
             similarity_threshold=0.5  # Lower threshold to get more candidates
         )
         
+        # Only pass the deadline when there is one
+        search_kwargs = {'deadline': deadline} if deadline is not None else {}
+        
         # Perform vector similarity search with graceful degradation
         try:
-            search_results = await self.vector_search.similarity_search(search_query)
+            search_results = await self.vector_search.similarity_search(search_query, **search_kwargs)
             
             # If no results found, try with lower threshold
             if not search_results:
                 self.logger.warning(f"No results found with threshold 0.5, retrying with 0.3")
                 search_query.similarity_threshold = 0.3
-                search_results = await self.vector_search.similarity_search(search_query)
+                search_results = await self.vector_search.similarity_search(search_query, **search_kwargs)
                 
             # If still no results, try without doc type filter
             if not search_results and processed_question.requires_specific_docs:
                 self.logger.warning(f"No results found with doc type filter, retrying without filter")
                 search_query.doc_type_filter = None
                 search_query.similarity_threshold = 0.3
-                search_results = await self.vector_search.similarity_search(search_query)
+                search_results = await self.vector_search.similarity_search(search_query, **search_kwargs)
                 
         except VectorSearchError as e:
             self.logger.error(f"Vector search failed: {e}. Falling back to empty context.")
@@ -378,8 +511,72 @@ class ContextBuilder:
         # Sort by relevance score (highest first)
         retrieved_docs.sort(key=lambda x: x.relevance_score, reverse=True)
         
-        # Return top 5 most relevant documents
-        return retrieved_docs[:5]
+        # Return the most relevant documents
+        return retrieved_docs[:max_documents]
+    
+    async def _reuse_previous_documents(
+        self,
+        processed_question: ProcessedQuestion,
+        user_uuid: Any,
+        previous_doc_ids: List[str],
+        max_documents: int
+    ) -> Optional[List[RetrievedDocument]]:
+        """
+        Reload the previous turn's documents for a follow-up question.
+        
+        Args:
+            processed_question: Processed follow-up question
+            user_uuid: Owner of the documents
+            previous_doc_ids: Documents retrieved for the previous turn, in rank order
+            max_documents: Number of documents to return
+            
+        Returns:
+            The previous documents, or None when a full search is needed
+            (low follow-up confidence, documents gone, or required types not covered)
+        """
+        from uuid import UUID
+        
+        if not FOLLOW_UP_REUSE_CONFIG['enabled'] or self.document_repository is None:
+            return None
+        
+        if processed_question.follow_up_confidence < FOLLOW_UP_REUSE_CONFIG['min_confidence']:
+            outcome, documents = "low_confidence", []
+        else:
+            try:
+                doc_ids = [UUID(str(doc_id)) for doc_id in previous_doc_ids]
+                documents = await self.document_repository.get_documents_by_ids(doc_ids, user_uuid)
+            except Exception as e:
+                self.logger.warning(f"Could not reload previous documents for follow-up: {e}")
+                documents = []
+            
+            required = processed_question.requires_specific_docs or []
+            if not documents:
+                outcome = "missing"
+            elif required and not any(doc.doc_type in required for doc in documents):
+                outcome = "uncovered"
+            else:
+                outcome = "reused"
+        
+        await metrics_inc("chat_follow_up_retrieval_total", labels={"result": outcome})
+        if outcome != "reused":
+            self.logger.info(f"Follow-up retrieval falls back to vector search ({outcome})")
+            return None
+        
+        # Keep the previous turn's ranking; it came from a more specific question
+        retrieved_docs = [
+            RetrievedDocument(
+                document=doc,
+                similarity_score=processed_question.follow_up_confidence,
+                relevance_score=self._calculate_relevance_score(
+                    doc, processed_question, processed_question.follow_up_confidence
+                ),
+                content_summary=self._create_content_summary(doc),
+                key_points=self._extract_key_points(doc, processed_question)
+            )
+            for doc in documents[:max_documents]
+        ]
+        self.logger.info(f"Reused {len(retrieved_docs)} documents from the previous turn for follow-up")
+        return retrieved_docs
     
     def _calculate_relevance_score(
         self, 
@@ -569,24 +766,18 @@ class ContextBuilder:
         
         for i, doc in enumerate(retrieved_docs, 1):
             doc_section = f"\n=== 검사 결과 {i}: {doc.document.doc_type} ===\n"
-            doc_section += f"요약: {doc.content_summary}\n"
-            
-            if doc.key_points:
-                doc_section += "주요 내용:\n"
-                for point in doc.key_points:
-                    doc_section += f"- {point}\n"
-            
-            # Add relevant content details
-            try:
-                content = json.loads(doc.document.content) if isinstance(doc.document.content, str) else doc.document.content
-                doc_section += f"\n상세 데이터:\n{json.dumps(content, ensure_ascii=False, indent=2)}\n"
-            except:
-                doc_section += f"\n상세 내용: {doc.document.summary_text}\n"
-            
+            doc_section += "".join(self._section_fields(doc))
             formatted_parts.append(doc_section)
         
         return "\n".join(formatted_parts)
     
+    def _section_fields(self, doc: RetrievedDocument) -> List[str]:
+        """Split a document's prompt section into field-level parts."""
+        return build_section_fields(
+            doc.content_summary, doc.key_points,
+            doc.document.content, doc.document.summary_text
+        )
+    
     def _construct_prompt(
         self, 
         template: PromptTemplate, 
@@ -630,60 +821,70 @@ class ContextBuilder:
         Returns:
             Estimated token count
         """
-        # Rough estimation: 1 token ≈ 4 characters for mixed Korean/English text
-        # This is a conservative estimate
-        return len(text) // 3
+        return self.packer.count_tokens(text)
     
-    def _truncate_context(
-        self, 
-        prompt: str, 
+    def _pack_context(
+        self,
         retrieved_docs: List[RetrievedDocument],
         template: PromptTemplate,
         question: str,
-        previous_context: Optional[str] = None
-    ) -> Tuple[str, List[RetrievedDocument]]:
+        previous_context: Optional[str] = None,
+        reserved_tokens: int = 0
+    ) -> Tuple[str, List[RetrievedDocument], bool]:
         """
-        Truncate context to fit within token limits.
+        Fit retrieved documents into the token budget and construct the prompt.
+        
+        Each document section is measured once; sections are admitted greedily by
+        relevance-per-token and truncated at field boundaries when they do not fit.
         
         Args:
-            prompt: Original prompt
-            retrieved_docs: Retrieved documents
+            retrieved_docs: Retrieved documents in relevance order
             template: Prompt template
             question: User question
             previous_context: Previous context
+            reserved_tokens: Tokens already committed outside the prompt (conversation memory)
             
         Returns:
-            Tuple of (truncated_prompt, truncated_docs)
+            Tuple of (prompt, included_docs, truncated)
         """
-        # Start by reducing number of documents
-        max_docs = len(retrieved_docs)
+        if not retrieved_docs:
+            formatted_docs = self._format_documents_for_prompt([])
+            prompt = self._construct_prompt(template, question, formatted_docs, previous_context)
+            return prompt, [], False
         
-        while max_docs > 1:
-            # Try with fewer documents
-            truncated_docs = retrieved_docs[:max_docs]
-            formatted_docs = self._format_documents_for_prompt(truncated_docs)
-            
-            # Reconstruct prompt
-            truncated_prompt = self._construct_prompt(
-                template, question, formatted_docs, previous_context
+        # Cost of everything except the document block
+        scaffold_cost = self._estimate_token_count(
+            self._construct_prompt(template, question, "", previous_context)
+        )
+        budget = self.max_context_tokens - reserved_tokens - scaffold_cost
+        
+        sections = [
+            self.packer.make_section(
+                doc, doc.document.doc_type, doc.relevance_score,
+                self._section_fields(doc), len(retrieved_docs)
             )
-            
-            # Check if it fits
-            if self._estimate_token_count(truncated_prompt) <= self.max_context_tokens:
-                return truncated_prompt, truncated_docs
-            
-            max_docs -= 1
+            for doc in retrieved_docs
+        ]
+        packed = self.packer.pack(sections, budget) if budget > 0 else None
         
-        # If still too long, truncate document content
-        if retrieved_docs:
-            doc = retrieved_docs[0]
-            # Create minimal document representation
-            minimal_doc = f"검사 결과: {doc.content_summary}"
-            truncated_prompt = self._construct_prompt(
-                template, question, minimal_doc, previous_context
+        if packed and packed.included:
+            prompt = self._construct_prompt(
+                template, question, packed.formatted_documents, previous_context
             )
-            return truncated_prompt, [doc]
+            if packed.truncated:
+                self.logger.info(
+                    f"Packed {len(packed.included)}/{len(retrieved_docs)} documents "
+                    f"into {budget} tokens using {self.packer.tokenizer.name} tokenizer"
+                )
+            return prompt, packed.included, packed.truncated
+        
+        # Not even one summary fits: minimal representation of the best document
+        doc = retrieved_docs[0]
+        minimal_doc = f"검사 결과: {doc.content_summary}"
+        prompt = self._construct_prompt(template, question, minimal_doc, previous_context)
+        if self._estimate_token_count(prompt) + reserved_tokens <= self.max_context_tokens:
+            return prompt, [doc], True
         
         # Fallback: just the question
         fallback_prompt = f"사용자 질문: {question}\n\n검사 결과 데이터를 불러올 수 없습니다. 일반적인 조언을 제공해주세요."
-        return fallback_prompt, []
\ No newline at end of file
+        return fallback_prompt, [], True
@@ -0,0 +1,263 @@
+"""
+Token-budget context packing for the RAG system.
+
+This module measures the token cost of each retrieved document section once,
+using a pluggable tokenizer, and packs sections into the prompt budget greedily
+by relevance-per-token. Sections that do not fit entirely are truncated at
+field boundaries (summary, key points, individual detail fields) instead of
+being dropped as a whole.
+"""
+
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Tokenizer(Protocol):
+    """Minimal tokenizer interface used for prompt budgeting."""
+
+    name: str
+
+    def count_tokens(self, text: str) -> int:
+        ...
+
+
+class HeuristicTokenizer:
+    """
+    Character-based token estimate (1 token ≈ 3 characters).
+
+    Rounds up so that the sum of per-field estimates never undercounts the
+    estimate of the concatenated text.
+    """
+
+    name = "heuristic"
+
+    def __init__(self, chars_per_token: float = 3.0):
+        self.chars_per_token = chars_per_token
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class SentencePieceTokenizer:
+    """
+    Offline SentencePiece tokenizer.
+
+    Gemini models share their vocabulary with the open Gemma tokenizer, so a
+    local Gemma ``tokenizer.model`` gives accurate counts without an API call.
+    """
+
+    name = "sentencepiece"
+
+    def __init__(self, model_path: str):
+        import sentencepiece as spm
+
+        self._processor = spm.SentencePieceProcessor(model_file=model_path)
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._processor.encode(text))
+
+
+_default_tokenizer: Optional[Tokenizer] = None
+
+
+def get_default_tokenizer() -> Tokenizer:
+    """
+    Return the process-wide tokenizer.
+
+    Uses a SentencePiece model when ``RAG_TOKENIZER_MODEL`` points to one and
+    the ``sentencepiece`` package is installed; otherwise falls back to the
+    character heuristic.
+    """
+    global _default_tokenizer
+    if _default_tokenizer is None:
+        model_path = os.getenv("RAG_TOKENIZER_MODEL")
+        if model_path:
+            try:
+                _default_tokenizer = SentencePieceTokenizer(model_path)
+                logger.info(f"Using SentencePiece tokenizer from {model_path}")
+            except Exception as e:
+                logger.warning(f"Failed to load tokenizer model {model_path}: {e}. Using heuristic tokenizer.")
+        if _default_tokenizer is None:
+            _default_tokenizer = HeuristicTokenizer()
+    return _default_tokenizer
+
+
+@dataclass
+class DocumentSection:
+    """Prompt section for one retrieved document, split at field boundaries."""
+    item: Any
+    doc_type: str
+    priority: float
+    fields: List[str]
+    field_costs: List[int]
+    header_cost: int
+    position: int = 0
+
+    @property
+    def cost(self) -> int:
+        return self.header_cost + sum(self.field_costs)
+
+    @property
+    def min_fields(self) -> int:
+        # Header is always emitted; the summary is the smallest useful unit
+        return 1 if self.fields else 0
+
+
+@dataclass
+class PackedContext:
+    """Result of packing document sections into a token budget."""
+    formatted_documents: str
+    included: List[Any]
+    token_count: int
+    truncated: bool
+    dropped: List[Any] = field(default_factory=list)
+
+
+def build_section_fields(
+    content_summary: str,
+    key_points: List[str],
+    content: Any,
+    summary_text: str
+) -> List[str]:
+    """
+    Split a document section into independently droppable fields.
+
+    The first field is the summary, followed by the key point block and then
+    one field per top-level detail entry, in the original order.
+    """
+    fields = [f"요약: {content_summary}\n"]
+
+    if key_points:
+        fields.append("주요 내용:\n" + "".join(f"- {point}\n" for point in key_points))
+
+    try:
+        parsed = json.loads(content) if isinstance(content, str) else content
+        if isinstance(parsed, dict) and parsed:
+            entries = list(parsed.items())
+            for i, (key, value) in enumerate(entries):
+                # Re-indent each entry so the concatenation matches json.dumps(indent=2)
+                rendered = json.dumps({key: value}, ensure_ascii=False, indent=2)
+                body = rendered[2:-2]
+                prefix = "\n상세 데이터:\n{\n" if i == 0 else ",\n"
+                suffix = "\n}\n" if i == len(entries) - 1 else ""
+                fields.append(prefix + body + suffix)
+        else:
+            fields.append(f"\n상세 데이터:\n{json.dumps(parsed, ensure_ascii=False, indent=2)}\n")
+    except Exception:
+        fields.append(f"\n상세 내용: {summary_text}\n")
+
+    return fields
+
+
+def render_header(position: int, doc_type: str) -> str:
+    return f"\n=== 검사 결과 {position}: {doc_type} ===\n"
+
+
+def render_sections(sections: List[Tuple[DocumentSection, int]]) -> str:
+    """Render (section, field_count) pairs in prompt order."""
+    parts = []
+    for position, (section, field_count) in enumerate(sections, 1):
+        text = render_header(position, section.doc_type) + "".join(section.fields[:field_count])
+        # A truncated detail block must still close its JSON braces
+        if 2 <= field_count < len(section.fields) and section.fields[field_count - 1].startswith(("\n상세 데이터:\n{", ",\n")):
+            text += "\n}\n"
+        parts.append(text)
+    return "\n".join(parts)
+
+
+class ContextPacker:
+    """
+    Greedy relevance-per-token packer for prompt document sections.
+
+    Every field is measured exactly once. Sections are admitted in order of
+    ``priority / cost``; a section that does not fit is truncated at field
+    boundaries to use the remaining budget. Admitted sections are rendered in
+    their original (relevance) order.
+    """
+
+    # Reserve for the closing brace of truncated detail blocks and separators
+    _TRUNCATION_OVERHEAD = "\n}\n\n"
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        self.tokenizer = tokenizer or get_default_tokenizer()
+
+    def count_tokens(self, text: str) -> int:
+        return self.tokenizer.count_tokens(text)
+
+    def make_section(self, item: Any, doc_type: str, priority: float, fields: List[str], max_position: int) -> DocumentSection:
+        # Measure the header at the widest position number it can take
+        header_cost = self.count_tokens(render_header(max_position, doc_type)) + self.count_tokens("\n")
+        return DocumentSection(
+            item=item,
+            doc_type=doc_type,
+            priority=priority,
+            fields=fields,
+            field_costs=[self.count_tokens(f) for f in fields],
+            header_cost=header_cost,
+        )
+
+    def pack(self, sections: List[DocumentSection], budget: int) -> PackedContext:
+        """
+        Pack sections into ``budget`` tokens.
+
+        Args:
+            sections: Sections in original relevance order
+            budget: Tokens available for the document block
+
+        Returns:
+            PackedContext with the rendered block and the included items
+        """
+        for position, section in enumerate(sections):
+            section.position = position
+
+        overhead = self.count_tokens(self._TRUNCATION_OVERHEAD)
+        remaining = budget
+        chosen: dict = {}
+        truncated = False
+
+        ranked = sorted(
+            sections,
+            key=lambda s: (s.priority / max(s.cost, 1), s.priority),
+            reverse=True
+        )
+
+        for section in ranked:
+            if section.cost <= remaining:
+                chosen[section.position] = len(section.fields)
+                remaining -= section.cost
+                continue
+
+            # Truncate at field boundaries: keep the longest prefix that fits
+            truncated = True
+            used = section.header_cost + overhead
+            count = 0
+            for cost in section.field_costs:
+                if used + cost > remaining:
+                    break
+                used += cost
+                count += 1
+            if count >= section.min_fields and count > 0:
+                chosen[section.position] = count
+                remaining -= used
+
+        included = [(s, chosen[s.position]) for s in sections if s.position in chosen]
+        dropped = [s.item for s in sections if s.position not in chosen]
+        formatted = render_sections(included)
+
+        return PackedContext(
+            formatted_documents=formatted,
+            included=[s.item for s, _ in included],
+            token_count=budget - remaining,
+            truncated=truncated or bool(dropped),
+            dropped=dropped,
+        )
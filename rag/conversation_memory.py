@@ -0,0 +1,271 @@
+"""
+Bounded conversation memory for the RAG response generator.
+
+Keeps per-user conversation memory in an LRU map with idle TTL, stores a
+fixed-size ring buffer of compact turn records per user, and rehydrates a
+user's recent turns lazily from a pluggable backend (by default the shared
+``chat_conversations`` table) when the user is not in memory. A token-capped
+rolling summary per user replaces raw transcripts in follow-up prompts.
+"""
+
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Iterable, List, Optional
+from uuid import UUID
+
+from rag.context_packer import Tokenizer, get_default_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# Memory configuration
+MEMORY_CONFIG = {
+    'capacity': int(os.getenv('CHAT_MEMORY_CAPACITY', '10000')),
+    'ttl_seconds': int(os.getenv('CHAT_MEMORY_TTL_SECONDS', '1800')),
+    'max_turns': int(os.getenv('CHAT_MEMORY_MAX_TURNS', '6')),
+    # 'summary' injects only the rolling summary; 'summary_with_last_turn' adds the raw last turn
+    'prompt_mode': os.getenv('CHAT_MEMORY_PROMPT_MODE', 'summary'),
+    'summary_max_tokens': int(os.getenv('CHAT_MEMORY_SUMMARY_MAX_TOKENS', '200')),
+    'last_turn_max_tokens': int(os.getenv('CHAT_MEMORY_LAST_TURN_MAX_TOKENS', '300')),
+}
+
+
+class ConversationTurn:
+    """Compact record of a single question/answer turn."""
+
+    __slots__ = ("question", "response", "created_at")
+
+    def __init__(self, question: str, response: str, created_at: Optional[datetime] = None):
+        self.question = question
+        self.response = response
+        self.created_at = created_at or datetime.now()
+
+    def __repr__(self) -> str:
+        return f"<ConversationTurn(question={self.question[:20]!r}, created_at={self.created_at})>"
+
+
+@dataclass
+class ConversationMemory:
+    user_id: str
+    conversation_history: Deque[ConversationTurn]
+    current_context: Optional[str] = None
+    last_topic: Optional[str] = None
+    follow_up_count: int = 0
+    summary: Optional[str] = None
+    last_accessed: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        # Always keep history as a bounded ring buffer
+        if not isinstance(self.conversation_history, deque) or self.conversation_history.maxlen is None:
+            self.conversation_history = deque(
+                self.conversation_history or [], maxlen=MEMORY_CONFIG['max_turns']
+            )
+
+    def recent_turns(self, count: int) -> List[ConversationTurn]:
+        """Return up to ``count`` most recent turns, oldest first."""
+        history = self.conversation_history
+        start = max(len(history) - count, 0)
+        return [history[i] for i in range(start, len(history))]
+
+
+class RollingSummarizer:
+    """
+    Extractive rolling summary with a strict token cap.
+
+    Each turn is folded into one line (question plus the first sentence of the
+    answer); the oldest lines are dropped whenever the cap would be exceeded.
+    """
+
+    _SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+    def __init__(self, max_tokens: Optional[int] = None, tokenizer: Optional[Tokenizer] = None):
+        self.max_tokens = max_tokens or MEMORY_CONFIG['summary_max_tokens']
+        self.tokenizer = tokenizer or get_default_tokenizer()
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most ``max_tokens`` tokens."""
+        text = text or ""
+        if self.tokenizer.count_tokens(text) <= max_tokens:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.tokenizer.count_tokens(text[:mid] + "…") <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low] + "…" if low else ""
+
+    def _turn_line(self, turn: ConversationTurn) -> str:
+        answer = self._SENTENCE_END.split((turn.response or "").strip(), maxsplit=1)[0]
+        return f"- Q: {turn.question.strip()} / A: {answer[:150]}"
+
+    def fold(self, summary: Optional[str], turn: ConversationTurn) -> str:
+        """Return the summary updated with one more turn."""
+        lines = summary.split("\n") if summary else []
+        lines.append(self._turn_line(turn))
+        while len(lines) > 1 and self.tokenizer.count_tokens("\n".join(lines)) > self.max_tokens:
+            lines.pop(0)
+        return self.truncate("\n".join(lines), self.max_tokens)
+
+    def summarize(self, turns: Iterable[ConversationTurn]) -> str:
+        summary = None
+        for turn in turns:
+            summary = self.fold(summary, turn)
+        return summary or ""
+
+
+class ConversationMemoryBackend:
+    """
+    Source of conversation turns for users not held in memory.
+
+    Implementations must be safe to share across workers; the default reads
+    the ``chat_conversations`` table that every worker writes to.
+    """
+
+    async def load_turns(self, user_id: str, limit: int) -> List[ConversationTurn]:
+        return []
+
+    async def save_turn(self, user_id: str, turn: ConversationTurn) -> None:
+        return None
+
+
+class ConversationTableBackend(ConversationMemoryBackend):
+    """Rehydrates recent turns from ``chat_conversations``."""
+
+    async def load_turns(self, user_id: str, limit: int) -> List[ConversationTurn]:
+        try:
+            user_uuid = UUID(str(user_id))
+        except ValueError:
+            return []
+
+        from sqlalchemy import select, desc
+        from database.connection import db_manager
+        from database.models import ChatConversation
+
+        try:
+            async with db_manager.get_async_session() as session:
+                result = await session.execute(
+                    select(
+                        ChatConversation.question,
+                        ChatConversation.response,
+                        ChatConversation.created_at
+                    )
+                    .where(ChatConversation.user_id == user_uuid)
+                    .order_by(desc(ChatConversation.created_at))
+                    .limit(limit)
+                )
+                rows = result.all()
+        except Exception as e:
+            logger.warning(f"Failed to rehydrate conversation memory for user {user_id}: {e}")
+            return []
+
+        return [ConversationTurn(q, r, c) for q, r, c in reversed(rows)]
+
+
+class ConversationMemoryStore:
+    """
+    LRU + TTL map of per-user conversation memory.
+
+    ``entries`` is the underlying ordered mapping (least recently used first).
+    Entries idle for longer than the TTL are treated as missing and reloaded
+    from the backend on next access.
+    """
+
+    _singleton_instance = None
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        max_turns: Optional[int] = None,
+        backend: Optional[ConversationMemoryBackend] = None
+    ):
+        self.capacity = capacity or MEMORY_CONFIG['capacity']
+        self.ttl_seconds = ttl_seconds or MEMORY_CONFIG['ttl_seconds']
+        self.max_turns = max_turns or MEMORY_CONFIG['max_turns']
+        self.backend = backend or ConversationMemoryBackend()
+        self.entries: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self.evictions = 0
+        self.rehydrations = 0
+
+    @classmethod
+    def instance(cls) -> "ConversationMemoryStore":
+        """Return the process-wide store backed by ``chat_conversations``."""
+        if cls._singleton_instance is None:
+            cls._singleton_instance = cls(backend=ConversationTableBackend())
+        return cls._singleton_instance
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.get(user_id) is not None
+
+    def _new_memory(self, user_id: str, turns: Iterable[ConversationTurn] = ()) -> ConversationMemory:
+        return ConversationMemory(
+            user_id=user_id,
+            conversation_history=deque(turns, maxlen=self.max_turns)
+        )
+
+    def get(self, user_id: str) -> Optional[ConversationMemory]:
+        memory = self.entries.get(user_id)
+        if memory is None:
+            return None
+        now = time.monotonic()
+        if now - memory.last_accessed > self.ttl_seconds:
+            del self.entries[user_id]
+            self.evictions += 1
+            return None
+        memory.last_accessed = now
+        self.entries.move_to_end(user_id, last=True)
+        return memory
+
+    def put(self, user_id: str, memory: ConversationMemory) -> None:
+        memory.last_accessed = time.monotonic()
+        self.entries[user_id] = memory
+        self.entries.move_to_end(user_id, last=True)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, user_id: str) -> None:
+        self.entries.pop(user_id, None)
+
+    async def get_or_load(self, user_id: str) -> ConversationMemory:
+        """Return the user's memory, rehydrating it from the backend on a miss."""
+        memory = self.get(user_id)
+        if memory is not None:
+            return memory
+
+        turns = await self.backend.load_turns(user_id, self.max_turns)
+        # Another coroutine may have populated the entry while we were loading
+        memory = self.get(user_id)
+        if memory is not None:
+            return memory
+
+        if turns:
+            self.rehydrations += 1
+        memory = self._new_memory(user_id, turns)
+        self.put(user_id, memory)
+        return memory
+
+    async def append_turn(self, user_id: str, turn: ConversationTurn) -> ConversationMemory:
+        memory = await self.get_or_load(user_id)
+        memory.conversation_history.append(turn)
+        await self.backend.save_turn(user_id, turn)
+        return memory
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl_seconds,
+            "max_turns": self.max_turns,
+            "evictions": self.evictions,
+            "rehydrations": self.rehydrations,
+        }
@@ -0,0 +1,361 @@
+"""
+Async Gemini generation client for the RAG system.
+
+Calls the SDK's native async API (no executor threads), caps the number of
+in-flight generations with a semaphore (unless the caller already limits
+them, as the chat path's admission queue does), and guards the upstream with a
+circuit breaker so that callers fail fast to a fallback answer when the
+recent error rate spikes.
+
+When ``GEMINI_API_BASE_URL`` is set, generation goes over plain REST to that
+base URL instead of the SDK's gRPC transport, so the pipeline can be pointed
+at the local emulator in ``scripts/gemini_emulator.py``.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, Deque, Optional, Tuple
+
+import aiohttp
+
+from monitoring.deadline import Deadline, DeadlineExceeded
+from monitoring.metrics import observe as metrics_observe, inc as metrics_inc
+
+logger = logging.getLogger(__name__)
+
+# LLM client configuration
+LLM_CLIENT_CONFIG = {
+    'max_concurrency': int(os.getenv('GEMINI_MAX_CONCURRENCY', '8')),
+    'timeout_seconds': float(os.getenv('GEMINI_TIMEOUT_SECONDS', '30')),
+    'max_attempts': int(os.getenv('GEMINI_MAX_ATTEMPTS', '3')),
+    'retry_base_delay': float(os.getenv('GEMINI_RETRY_BASE_DELAY', '0.5')),
+    'breaker_window_seconds': float(os.getenv('GEMINI_BREAKER_WINDOW_SECONDS', '30')),
+    'breaker_min_calls': int(os.getenv('GEMINI_BREAKER_MIN_CALLS', '5')),
+    'breaker_error_rate': float(os.getenv('GEMINI_BREAKER_ERROR_RATE', '0.5')),
+    'breaker_cooldown_seconds': float(os.getenv('GEMINI_BREAKER_COOLDOWN_SECONDS', '20')),
+    # e.g. http://localhost:8089/v1beta to use the local emulator
+    'api_base_url': os.getenv('GEMINI_API_BASE_URL'),
+}
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a sliding time window.
+
+    - CLOSED: calls pass; opens when the window holds at least ``min_calls``
+      outcomes and the failure ratio reaches ``error_rate``
+    - OPEN: calls are rejected until ``cooldown_seconds`` have passed
+    - HALF_OPEN: a single probe call is allowed; success closes, failure reopens
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 30.0,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        cooldown_seconds: float = 20.0
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.state = CircuitState.CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def allow_request(self) -> bool:
+        now = time.monotonic()
+        if self.state == CircuitState.OPEN:
+            if now - self._opened_at < self.cooldown_seconds:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        now = time.monotonic()
+        if self.state == CircuitState.HALF_OPEN:
+            self.state = CircuitState.CLOSED
+            self._outcomes.clear()
+            self._probe_in_flight = False
+        self._outcomes.append((now, True))
+        self._trim(now)
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        if self.state == CircuitState.HALF_OPEN:
+            self._open(now)
+            return
+        self._outcomes.append((now, False))
+        self._trim(now)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+            self._open(now)
+
+    def release_probe(self) -> None:
+        """End a probe whose outcome says nothing about the upstream (cancelled, out of budget)."""
+        if self.state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _open(self, now: float) -> None:
+        self.state = CircuitState.OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        logger.warning(f"Gemini circuit opened for {self.cooldown_seconds:.0f}s")
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        self._trim(now)
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        return {
+            "state": self.state.value,
+            "window_calls": len(self._outcomes),
+            "window_failures": failures,
+        }
+
+
+class GeminiAPIError(Exception):
+    """Non-200 response from the REST generation endpoint"""
+    def __init__(self, status: int, message: str):
+        self.status = status
+        super().__init__(f"Gemini API error {status}: {message}")
+
+
+class RestGenerativeModel:
+    """
+    Minimal REST stand-in for ``GenerativeModel.generate_content_async``.
+
+    Returns an object with the same ``candidates[0].content.parts[0].text``
+    shape as the SDK response.
+    """
+
+    def __init__(self, model_name: str, api_key: str, base_url: str):
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers={'Content-Type': 'application/json', 'x-goog-api-key': self.api_key}
+            )
+        return self.session
+
+    @staticmethod
+    def _generation_config_payload(generation_config: Any) -> dict:
+        if generation_config is None:
+            return {}
+        config = asdict(generation_config) if is_dataclass(generation_config) else dict(generation_config)
+        keys = {
+            'temperature': 'temperature',
+            'top_p': 'topP',
+            'top_k': 'topK',
+            'max_output_tokens': 'maxOutputTokens',
+            'candidate_count': 'candidateCount',
+        }
+        return {keys[k]: v for k, v in config.items() if k in keys and v is not None}
+
+    async def generate_content_async(self, prompt: str, generation_config: Any = None) -> Any:
+        session = await self._ensure_session()
+        payload = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": self._generation_config_payload(generation_config),
+        }
+        url = f"{self.base_url}/{self.model_name}:generateContent"
+        async with session.post(url, json=payload) as response:
+            if response.status != 200:
+                raise GeminiAPIError(response.status, await response.text())
+            data = await response.json()
+
+        candidates = []
+        for candidate in data.get("candidates", []):
+            parts = [SimpleNamespace(text=p.get("text", "")) for p in candidate.get("content", {}).get("parts", [])]
+            candidates.append(SimpleNamespace(
+                content=SimpleNamespace(parts=parts),
+                finish_reason=candidate.get("finishReason")
+            ))
+        return SimpleNamespace(candidates=candidates)
+
+    async def aclose(self) -> None:
+        """Close the HTTP session (reopened on the next call)."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+
+class GeminiGenerationClient:
+    """
+    Bounded-concurrency async wrapper around ``GenerativeModel.generate_content_async``.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        max_concurrency: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        limit_concurrency: bool = True
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency or LLM_CLIENT_CONFIG['max_concurrency']
+        self.timeout_seconds = timeout_seconds or LLM_CLIENT_CONFIG['timeout_seconds']
+        self.max_attempts = max_attempts or LLM_CLIENT_CONFIG['max_attempts']
+        self.base_delay = LLM_CLIENT_CONFIG['retry_base_delay']
+        self.breaker = breaker or CircuitBreaker(
+            window_seconds=LLM_CLIENT_CONFIG['breaker_window_seconds'],
+            min_calls=LLM_CLIENT_CONFIG['breaker_min_calls'],
+            error_rate=LLM_CLIENT_CONFIG['breaker_error_rate'],
+            cooldown_seconds=LLM_CLIENT_CONFIG['breaker_cooldown_seconds'],
+        )
+        # Callers with their own admission control pass limit_concurrency=False
+        self._semaphore = asyncio.Semaphore(self.max_concurrency) if limit_concurrency else None
+        self.in_flight = 0
+
+    async def generate(
+        self, prompt: str, generation_config: Any = None, deadline: Optional[Deadline] = None
+    ) -> Any:
+        """
+        Generate content with retries, bounded concurrency and circuit breaking.
+
+        With a deadline, each attempt's timeout is capped to the remaining
+        budget and a retry is skipped when its backoff no longer fits.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (no upstream call is made)
+            DeadlineExceeded: If the request budget runs out
+        """
+        for attempt in range(self.max_attempts):
+            if deadline is not None:
+                deadline.check("generation")
+            if not self.breaker.allow_request():
+                await metrics_inc("llm_circuit_rejections_total")
+                raise CircuitOpenError("Gemini circuit is open")
+            # Only the call admitted as the half-open probe may hand the probe back
+            probe = self.breaker.state == CircuitState.HALF_OPEN
+            timeout = self.timeout_seconds if deadline is None else deadline.timeout(self.timeout_seconds)
+            try:
+                return await self._generate_once(prompt, generation_config, timeout)
+            except asyncio.CancelledError:
+                if probe:
+                    self.breaker.release_probe()
+                raise
+            except asyncio.TimeoutError:
+                # A timeout cut short by the request budget says nothing about the upstream
+                if deadline is not None and deadline.expired():
+                    if probe:
+                        self.breaker.release_probe()
+                    deadline.mark_exhausted("generation")
+                    raise DeadlineExceeded("generation")
+                self.breaker.record_failure()
+                if not await self._backoff(attempt, "timed out", deadline):
+                    raise
+            except Exception as e:
+                self.breaker.record_failure()
+                if not await self._backoff(attempt, e, deadline):
+                    raise
+
+    async def _backoff(self, attempt: int, error: Any, deadline: Optional[Deadline]) -> bool:
+        """Sleep before the next attempt; False when no retry should be made."""
+        if attempt >= self.max_attempts - 1 or self.breaker.state != CircuitState.CLOSED:
+            return False
+        delay = self.base_delay * (2 ** attempt) + 0.1 * attempt
+        if deadline is not None and not deadline.allows_retry(delay):
+            logger.warning(f"Gemini API call failed ({error}) with no budget left for a retry")
+            deadline.mark_exhausted("generation")
+            raise DeadlineExceeded("generation")
+        logger.warning(
+            f"Gemini API call failed (attempt {attempt+1}/{self.max_attempts}): {error}. Retrying in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
+        return True
+
+    async def _generate_once(self, prompt: str, generation_config: Any, timeout: float) -> Any:
+        if self._semaphore is None:
+            response = await self._call_model(prompt, generation_config, timeout)
+        else:
+            wait_start = time.time()
+            async with self._semaphore:
+                await metrics_observe("llm_pool_wait_seconds", time.time() - wait_start)
+                response = await self._call_model(prompt, generation_config, timeout)
+        self.breaker.record_success()
+        return response
+
+    async def _call_model(self, prompt: str, generation_config: Any, timeout: float) -> Any:
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(
+                self.model.generate_content_async(prompt, generation_config=generation_config),
+                timeout=timeout
+            )
+        finally:
+            self.in_flight -= 1
+
+    async def aclose(self) -> None:
+        """Release the backend's connections; the SDK model holds none of its own."""
+        aclose = getattr(self.model, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency if self._semaphore is not None else None,
+            "in_flight": self.in_flight,
+            "circuit": self.breaker.snapshot(),
+        }
+
+
+def create_generation_client(model_name: str, api_key: Optional[str] = None, **kwargs) -> GeminiGenerationClient:
+    """
+    Build a generation client outside the chat path (e.g. for ETL jobs).
+
+    Uses the REST backend when ``GEMINI_API_BASE_URL`` is set, otherwise the SDK.
+    """
+    api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("Missing API key: set GEMINI_API_KEY or GOOGLE_API_KEY")
+    if LLM_CLIENT_CONFIG['api_base_url']:
+        backend = RestGenerativeModel(model_name, api_key, LLM_CLIENT_CONFIG['api_base_url'])
+    else:
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        backend = genai.GenerativeModel(model_name=model_name)
+    return GeminiGenerationClient(backend, **kwargs)
+
+
+def response_text(response: Any) -> Optional[str]:
+    """Text of the first candidate, or None if the response has none."""
+    candidates = getattr(response, "candidates", None)
+    if candidates:
+        content = candidates[0].content
+        if content and content.parts:
+            return content.parts[0].text
+    return None
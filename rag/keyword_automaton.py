@@ -0,0 +1,123 @@
+"""
+Multi-pattern keyword matching for the RAG engine.
+
+Compiles several keyword tables (categories, intents, follow-up indicators,
+topics, ...) into one Aho–Corasick automaton, so a question is scanned once
+and every table's hits come back together. Matching is case-insensitive
+substring matching, the same semantics as the ``keyword in question``
+checks it replaces.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# Response topics, in priority order: the first topic with a hit wins
+TOPIC_KEYWORDS: Dict[str, List[str]] = {
+    "personality": ["성격", "personality"],
+    "career": ["직업", "진로", "career"],
+    "thinking": ["사고", "능력", "thinking"],
+    "learning": ["학습", "공부", "learning"],
+}
+
+
+@dataclass
+class KeywordHits:
+    """Keywords found in one scan, as ``{group: {label: {keyword, ...}}}``"""
+    groups: Dict[str, Dict[Any, Set[str]]] = field(default_factory=dict)
+
+    def labels(self, group: str) -> Dict[Any, Set[str]]:
+        """Matched keywords per label within a group."""
+        return self.groups.get(group, {})
+
+    def has(self, group: str, label: Any = None) -> bool:
+        """Whether a group (or one label of it) had any hit."""
+        hits = self.labels(group)
+        return bool(hits.get(label)) if label is not None else bool(hits)
+
+    def weighted_scores(self, group: str, labels: Iterable[Any], divisor: float = 10) -> Dict[Any, float]:
+        """
+        Per-label score weighting longer keywords more heavily (``len(keyword) / divisor``).
+
+        Scores are returned in the order of ``labels`` (unmatched labels score 0),
+        so ties resolve the same way as iterating the keyword table.
+        """
+        hits = self.labels(group)
+        return {
+            label: sum(len(keyword) for keyword in hits.get(label, ())) / divisor
+            for label in labels
+        }
+
+    def topic(self, default: str = "general") -> str:
+        """First topic from ``TOPIC_KEYWORDS`` with a hit."""
+        hits = self.labels("topic")
+        for topic in TOPIC_KEYWORDS:
+            if hits.get(topic):
+                return topic
+        return default
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick automaton over grouped keyword tables.
+
+    ``tables`` maps a group name to ``{label: [keywords]}``. The same keyword
+    may appear under several labels and groups; each occurrence is reported.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[Any, Iterable[str]]]):
+        # Trie as parallel lists indexed by state; state 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Any, str]]] = [[]]
+
+        for group, labels in tables.items():
+            for label, keywords in labels.items():
+                for keyword in keywords:
+                    keyword = keyword.lower()
+                    if keyword:
+                        self._add(keyword, (group, label, keyword))
+        self._build_failure_links()
+
+    def _add(self, keyword: str, payload: Tuple[str, Any, str]) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(payload)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                # Inherit the outputs of the longest proper suffix that is a keyword
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def scan(self, text: str) -> KeywordHits:
+        """Find every keyword of every table in ``text`` in a single pass."""
+        goto, fail, output = self._goto, self._fail, self._output
+        groups: Dict[str, Dict[Any, Set[str]]] = {}
+        state = 0
+        for char in (text or "").lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for group, label, keyword in output[state]:
+                groups.setdefault(group, {}).setdefault(label, set()).add(keyword)
+        return KeywordHits(groups)
+
+
+# Shared topic-only automaton for callers without a full keyword scan (e.g. ResponseGenerator)
+TOPIC_AUTOMATON = KeywordAutomaton({"topic": TOPIC_KEYWORDS})
@@ -0,0 +1,205 @@
+"""
+Deterministic lookup routing for the RAG system.
+
+Recognizes questions that are plain lookups of values already stored in the
+user's documents (a thinking-skill score, the N-th ranked tendency, the top
+competencies, the recommended job list) and answers them from typed
+extractors through Korean response templates, without calling the LLM.
+Anything the router cannot resolve falls through to the normal pipeline.
+"""
+
+import re
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LookupKind(Enum):
+    """Lookup questions the router can answer"""
+    SKILL_SCORE = "skill_score"            # "내 언어 사고력 점수는?"
+    TENDENCY_RANK = "tendency_rank"        # "1순위 성향이 뭐야?"
+    TOP_COMPETENCIES = "top_competencies"  # "상위 역량 3개"
+    RECOMMENDED_JOBS = "recommended_jobs"  # "추천 직업 목록 알려줘"
+
+
+@dataclass
+class LookupIntent:
+    """Detected lookup with its parameters"""
+    kind: LookupKind
+    question: str
+    rank: Optional[int] = None
+    count: Optional[int] = None
+
+
+@dataclass
+class LookupAnswer:
+    """Templated answer for a lookup question"""
+    kind: LookupKind
+    text: str
+    doc_types: List[str] = field(default_factory=list)
+
+
+class LookupRouter:
+    """
+    Rule-based detector plus typed extractors over document ``content``.
+
+    Documents are plain dicts with ``doc_type`` and ``content`` keys (see
+    ``DocumentRepository.get_user_document_snapshots``).
+    """
+
+    # Questions asking for reasons or explanations need the LLM
+    EXPLANATION_MARKERS = (
+        "왜", "설명", "의미", "어떻게", "자세히", "비교", "차이", "이유", "특징", "장점", "단점", "해석"
+    )
+
+    KOREAN_NUMBERS = {
+        "한": 1, "하나": 1, "첫": 1, "두": 2, "둘": 2, "세": 3, "셋": 3,
+        "네": 4, "넷": 4, "다섯": 5,
+    }
+
+    _RANK = re.compile(r'(\d|첫|두|세|네|다섯)(?:순위|번째)(?:성향|성격)')
+    _SKILL_SCORE = re.compile(r'사고력?.*(?:점수|몇점)|(?:점수|몇점).*사고력?')
+    _TOP_COMPETENCIES = re.compile(r'(?:상위|top)(?:\d|한|두|세|네|다섯)?개?(?:의)?역량|역량.*상위')
+    _COUNT = re.compile(r'(\d|한|두|세|네|다섯)개')
+    _JOBS = re.compile(r'추천(?:직업|하는직업)|직업추천')
+    _LIST_MARKER = re.compile(r'목록|리스트|뭐뭐|(?:\d|한|두|세|네|다섯)개')
+
+    MAX_COUNT = 5
+
+    def __init__(self):
+        self.extractors: Dict[LookupKind, Callable[[LookupIntent, List[Dict[str, Any]]], Optional[LookupAnswer]]] = {
+            LookupKind.SKILL_SCORE: self._answer_skill_score,
+            LookupKind.TENDENCY_RANK: self._answer_tendency_rank,
+            LookupKind.TOP_COMPETENCIES: self._answer_top_competencies,
+            LookupKind.RECOMMENDED_JOBS: self._answer_recommended_jobs,
+        }
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r'[\s?.!,]', '', (text or "").lower())
+
+    def _to_number(self, token: Optional[str]) -> Optional[int]:
+        if not token:
+            return None
+        if token.isdigit():
+            return int(token)
+        return self.KOREAN_NUMBERS.get(token)
+
+    def detect(self, question: str) -> Optional[LookupIntent]:
+        """Return the lookup intent for a question, or None if it is not a pure lookup."""
+        normalized = self._normalize(question)
+        if not normalized or any(marker in normalized for marker in self.EXPLANATION_MARKERS):
+            return None
+
+        match = self._RANK.search(normalized)
+        if match:
+            return LookupIntent(LookupKind.TENDENCY_RANK, question, rank=self._to_number(match.group(1)))
+
+        if self._SKILL_SCORE.search(normalized):
+            return LookupIntent(LookupKind.SKILL_SCORE, question)
+
+        if self._TOP_COMPETENCIES.search(normalized):
+            count_match = self._COUNT.search(normalized)
+            count = self._to_number(count_match.group(1) if count_match else None) or 3
+            return LookupIntent(LookupKind.TOP_COMPETENCIES, question, count=min(count, self.MAX_COUNT))
+
+        if self._JOBS.search(normalized):
+            if self._LIST_MARKER.search(normalized):
+                count_match = self._COUNT.search(normalized)
+                count = self._to_number(count_match.group(1) if count_match else None) or self.MAX_COUNT
+                return LookupIntent(LookupKind.RECOMMENDED_JOBS, question, count=min(count, self.MAX_COUNT))
+
+        return None
+
+    def answer(self, intent: LookupIntent, documents: List[Dict[str, Any]]) -> Optional[LookupAnswer]:
+        """Answer a detected lookup, or return None to fall through to the LLM pipeline."""
+        try:
+            return self.extractors[intent.kind](intent, documents)
+        except Exception as e:
+            logger.warning(f"Lookup extractor {intent.kind.value} failed: {e}")
+            return None
+
+    # ==================== EXTRACTORS ====================
+
+    @staticmethod
+    def _contents(documents: List[Dict[str, Any]], doc_type: str) -> List[Dict[str, Any]]:
+        return [d.get("content") or {} for d in documents if d.get("doc_type") == doc_type]
+
+    @staticmethod
+    def _skill_core(skill_name: str) -> str:
+        core = re.sub(r'\s', '', skill_name or "")
+        return re.sub(r'(사고력|사고|능력)$', '', core)
+
+    def _answer_skill_score(self, intent: LookupIntent, documents: List[Dict[str, Any]]) -> Optional[LookupAnswer]:
+        normalized = self._normalize(intent.question)
+        candidates = [
+            c for c in self._contents(documents, "THINKING_SKILLS")
+            if c.get("skill_name") and c.get("my_score") is not None
+        ]
+        matches = [c for c in candidates if self._skill_core(c["skill_name"]) and self._skill_core(c["skill_name"]) in normalized]
+        if len(matches) != 1:
+            # Unknown or ambiguous skill: let the LLM handle it
+            return None
+
+        skill = matches[0]
+        score = skill["my_score"]
+        text = f"{skill['skill_name']} 점수는 {score}점입니다."
+        average = skill.get("average_score")
+        if average is not None:
+            diff = round(score - average, 1)
+            if diff > 0:
+                text += f" 전체 평균 {average}점보다 {diff}점 높습니다."
+            elif diff < 0:
+                text += f" 전체 평균 {average}점보다 {-diff}점 낮습니다."
+            else:
+                text += f" 전체 평균 {average}점과 같은 수준입니다."
+        return LookupAnswer(intent.kind, text, ["THINKING_SKILLS"])
+
+    def _answer_tendency_rank(self, intent: LookupIntent, documents: List[Dict[str, Any]]) -> Optional[LookupAnswer]:
+        keys = {1: "primary_tendency", 2: "secondary_tendency", 3: "tertiary_tendency"}
+        key = keys.get(intent.rank)
+        if key is None:
+            return None
+        for content in self._contents(documents, "PERSONALITY_PROFILE"):
+            tendency = content.get(key)
+            if isinstance(tendency, dict) and tendency.get("name"):
+                text = f"{intent.rank}순위 성향은 '{tendency['name']}'입니다."
+                if tendency.get("percentage"):
+                    text += f" 전체 검사자 중 {tendency['percentage']}%가 같은 성향으로 나타났습니다."
+                return LookupAnswer(intent.kind, text, ["PERSONALITY_PROFILE"])
+        return None
+
+    def _answer_top_competencies(self, intent: LookupIntent, documents: List[Dict[str, Any]]) -> Optional[LookupAnswer]:
+        competencies = [
+            c["competency"] for c in self._contents(documents, "COMPETENCY_ANALYSIS")
+            if isinstance(c.get("competency"), dict) and c["competency"].get("competency_name")
+        ]
+        if not competencies:
+            return None
+        competencies.sort(key=lambda c: (c.get("rank") is None, c.get("rank") or 0, -(c.get("score") or 0)))
+        top = competencies[:intent.count]
+
+        lines = [f"상위 역량 {len(top)}개는 다음과 같습니다."]
+        for i, comp in enumerate(top, 1):
+            line = f"{i}. {comp['competency_name']}"
+            if comp.get("score") is not None:
+                line += f" - {comp['score']}점"
+            if comp.get("percentile") is not None:
+                line += f" (상위 {comp['percentile']}%)"
+            lines.append(line)
+        return LookupAnswer(intent.kind, "\n".join(lines), ["COMPETENCY_ANALYSIS"])
+
+    def _answer_recommended_jobs(self, intent: LookupIntent, documents: List[Dict[str, Any]]) -> Optional[LookupAnswer]:
+        for content in self._contents(documents, "CAREER_RECOMMENDATIONS"):
+            if content.get("recommendation_type") != "tendency":
+                continue
+            names = [job.get("job_name") for job in content.get("jobs") or [] if job.get("job_name")]
+            if names:
+                names = names[:intent.count]
+                lines = [f"성향 기반 추천 직업 {len(names)}개는 다음과 같습니다."]
+                lines.extend(f"{i}. {name}" for i, name in enumerate(names, 1))
+                return LookupAnswer(intent.kind, "\n".join(lines), ["CAREER_RECOMMENDATIONS"])
+        return None
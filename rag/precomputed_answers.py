@@ -0,0 +1,91 @@
+"""
+Precomputed answer lookup for the RAG system.
+
+Matches an incoming question embedding against the answers generated during
+ETL for the user's hypothetical questions. A close enough match is served
+directly, skipping retrieval and LLM generation.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import ChatPrecomputedAnswer
+from etl.config import PRECOMPUTED_ANSWER_CONFIG
+from monitoring.metrics import inc as metrics_inc
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrecomputedMatch:
+    """Stored answer matched to an incoming question"""
+    question: str
+    answer: str
+    doc_type: str
+    similarity: float
+
+
+class PrecomputedAnswerLookup:
+    """Nearest stored question for a user, accepted above a similarity threshold"""
+
+    def __init__(self, session: AsyncSession, threshold: Optional[float] = None):
+        self.session = session
+        self.threshold = threshold if threshold is not None else PRECOMPUTED_ANSWER_CONFIG['match_threshold']
+
+    async def find(self, user_id: str, question_embedding: List[float]) -> Optional[PrecomputedMatch]:
+        """
+        Return the stored answer whose question is most similar, if similar enough.
+
+        Lookup errors are logged and treated as a miss.
+        """
+        if hasattr(question_embedding, 'embedding'):
+            # EmbeddingResult from VectorEmbedder
+            question_embedding = question_embedding.embedding
+        if not question_embedding or not any(question_embedding):
+            return None
+        try:
+            user_uuid = UUID(str(user_id))
+        except ValueError:
+            return None
+
+        distance = ChatPrecomputedAnswer.question_embedding.cosine_distance(question_embedding)
+        try:
+            # In a savepoint: a failed lookup must not abort the request's transaction
+            async with self.session.begin_nested():
+                result = await self.session.execute(
+                    select(
+                        ChatPrecomputedAnswer.question,
+                        ChatPrecomputedAnswer.answer,
+                        ChatPrecomputedAnswer.doc_type,
+                        distance.label("distance")
+                    )
+                    .where(ChatPrecomputedAnswer.user_id == user_uuid)
+                    .order_by(distance)
+                    .limit(1)
+                )
+                row = result.first()
+            similarity = 1.0 - float(row.distance) if row is not None else None
+        except Exception as e:
+            logger.warning(f"Precomputed answer lookup failed for user {user_id}: {e}")
+            return None
+
+        if row is None:
+            await metrics_inc("chat_precomputed_lookups_total", labels={"result": "empty"})
+            return None
+
+        if similarity < self.threshold:
+            await metrics_inc("chat_precomputed_lookups_total", labels={"result": "miss"})
+            return None
+
+        await metrics_inc("chat_precomputed_lookups_total", labels={"result": "hit"})
+        return PrecomputedMatch(
+            question=row.question,
+            answer=row.answer,
+            doc_type=row.doc_type,
+            similarity=similarity
+        )
@@ -0,0 +1,185 @@
+"""
+Query embedding cache for the chat path.
+
+Chat questions are canonicalized before the cache lookup, so spacing,
+punctuation and sentence-final ending variants of the same question
+("내성향알려줘", "내 성향 알려줘", "내 성향 알려주세요?") share one embedding
+instead of each costing an embedding API call. The cache is separate from
+the embedder's own text cache, has its own capacity and TTL, and can be
+prewarmed with the fixed hypothetical-question templates at startup.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import os
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+from database.cache import LRUCache
+from monitoring.deadline import Deadline
+from monitoring.metrics import inc as metrics_inc
+
+logger = logging.getLogger(__name__)
+
+# Query embedding cache configuration
+QUERY_EMBEDDING_CACHE_CONFIG = {
+    'capacity': int(os.getenv('CHAT_QUERY_EMBEDDING_CACHE_SIZE', '5000')),
+    'ttl_seconds': int(os.getenv('CHAT_QUERY_EMBEDDING_CACHE_TTL_SECONDS', '86400')),
+    'prewarm': os.getenv('CHAT_QUERY_EMBEDDING_PREWARM', 'true').lower() == 'true',
+}
+
+# Sentence-final endings that do not change what is being asked, longest first
+SENTENCE_FINAL_ENDINGS = (
+    "해주시겠어요", "해주실래요", "해주세요", "해줄래요", "해줄래", "해줘요", "해줘",
+    "주시겠어요", "주실래요", "주세요", "줄래요", "줄래", "줘요", "줘",
+    "인가요", "일까요", "이에요", "예요", "인가", "이야", "나요", "까요", "요",
+)
+
+# Minimum canonical length left after stripping an ending
+_MIN_CANONICAL_LENGTH = 2
+
+_PUNCTUATION = re.compile(r'[^\w]', re.UNICODE)
+
+
+def display_form(question: str) -> str:
+    """Lightly normalized question used as the text that actually gets embedded."""
+    text = unicodedata.normalize('NFC', question or "")
+    text = ' '.join(text.split())
+    return text.rstrip(' ?!.~,').strip()
+
+
+def canonicalize_question(question: str) -> str:
+    """
+    Cache key for a question: NFC, lowercase, no whitespace or punctuation,
+    and one sentence-final ending stripped.
+
+    Korean spacing is applied inconsistently by users, so all whitespace is
+    dropped rather than collapsed.
+    """
+    text = unicodedata.normalize('NFC', question or "").lower()
+    text = _PUNCTUATION.sub('', text).replace('_', '')
+    for ending in SENTENCE_FINAL_ENDINGS:
+        if text.endswith(ending) and len(text) - len(ending) >= _MIN_CANONICAL_LENGTH:
+            return text[:-len(ending)]
+    return text
+
+
+class QueryEmbeddingCache:
+    """
+    Canonicalizing cache in front of ``VectorEmbedder.generate_embedding``.
+
+    Concurrent misses for the same canonical question share one embedding call.
+    """
+
+    _singleton_instance = None
+
+    def __init__(self, capacity: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.capacity = capacity or QUERY_EMBEDDING_CACHE_CONFIG['capacity']
+        self.ttl_seconds = ttl_seconds or QUERY_EMBEDDING_CACHE_CONFIG['ttl_seconds']
+        self._cache = LRUCache(capacity=self.capacity, ttl_seconds=self.ttl_seconds)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def instance(cls):
+        """Return the process-wide cache shared by all chat requests."""
+        if cls._singleton_instance is None:
+            cls._singleton_instance = cls()
+        return cls._singleton_instance
+
+    async def get_embedding(self, embedder: Any, question: str, deadline: Optional[Deadline] = None):
+        """
+        Return the ``EmbeddingResult`` for a question, embedding it on a miss.
+
+        Results served from this cache are marked ``cached=True``. With a
+        deadline, waiting on another request's in-flight call is bounded by
+        the remaining budget too.
+        """
+        # Only pass the deadline when there is one, keeping the plain embedder signature working
+        embed_kwargs = {'deadline': deadline} if deadline is not None else {}
+        key = canonicalize_question(question)
+        if not key:
+            return await embedder.generate_embedding(question, **embed_kwargs)
+
+        cached = await self._cache.get(key)
+        if cached is not None:
+            await metrics_inc("chat_query_embedding_cache_total", labels={"result": "hit"})
+            return dataclasses.replace(cached, cached=True)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            await metrics_inc("chat_query_embedding_cache_total", labels={"result": "coalesced"})
+            if deadline is None:
+                return dataclasses.replace(await asyncio.shield(inflight), cached=True)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(inflight), deadline.remaining())
+            except asyncio.TimeoutError:
+                deadline.check("embedding")
+                raise
+            return dataclasses.replace(result, cached=True)
+
+        await metrics_inc("chat_query_embedding_cache_total", labels={"result": "miss"})
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await embedder.generate_embedding(display_form(question), **embed_kwargs)
+            if any(result.embedding):
+                await self._cache.set(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark it retrieved so an unawaited future does not warn
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def prewarm(self, embedder: Any, questions: Iterable[str]) -> int:
+        """
+        Embed and cache questions ahead of traffic; returns how many were added.
+
+        Questions already cached (or sharing a canonical form) are embedded once.
+        """
+        pending: Dict[str, str] = {}
+        for question in questions:
+            key = canonicalize_question(question)
+            if key and key not in pending and await self._cache.get(key) is None:
+                pending[key] = display_form(question)
+        if not pending:
+            return 0
+
+        results = await embedder.generate_embeddings_batch(list(pending.values()))
+        added = 0
+        for key, result in zip(pending, results):
+            # Failed batch entries come back as zero vectors
+            if result.embedding and any(result.embedding):
+                await self._cache.set(key, result)
+                added += 1
+        logger.info(f"Prewarmed query embedding cache with {added}/{len(pending)} questions")
+        return added
+
+    async def stats(self) -> Dict[str, Any]:
+        stats = await self._cache.stats()
+        return {
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "size": stats.size,
+            "capacity": stats.capacity,
+            "evictions": stats.evictions,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+async def prewarm_query_embeddings(questions: Optional[List[str]] = None) -> int:
+    """Startup hook: prewarm the shared cache with the fixed hypothetical-question templates."""
+    from etl.document_transformer import template_questions
+    from etl.vector_embedder import VectorEmbedder
+
+    return await QueryEmbeddingCache.instance().prewarm(
+        VectorEmbedder.instance(), questions if questions is not None else template_questions()
+    )
@@ -7,12 +7,17 @@ validation, preprocessing, and follow-up question context management.
 
 import re
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Awaitable, Callable
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import asyncio
 
 from etl.vector_embedder import VectorEmbedder
+from rag.lookup_router import LookupRouter, LookupAnswer
+from rag.keyword_automaton import KeywordAutomaton, KeywordHits, TOPIC_KEYWORDS
+from rag.query_embedding_cache import QueryEmbeddingCache
+from monitoring.metrics import inc as metrics_inc
+from monitoring.deadline import Deadline
 
 
 class QuestionCategory(Enum):
@@ -51,6 +56,8 @@ class ProcessedQuestion:
     confidence_score: float
     context_from_previous: Optional[str] = None
     requires_specific_docs: List[str] = None
+    topic: str = "general"
+    follow_up_confidence: float = 0.0
 
 
 @dataclass
@@ -61,6 +68,7 @@ class ConversationContext:
     previous_categories: List[QuestionCategory]
     current_topic: Optional[QuestionCategory] = None
     conversation_depth: int = 0
+    previous_doc_ids: List[str] = field(default_factory=list)  # documents retrieved for the last turn
 
 
 class QuestionProcessor:
@@ -71,11 +79,21 @@ class QuestionProcessor:
     validation, preprocessing, and follow-up question context management.
     """
     
-    def __init__(self, vector_embedder: VectorEmbedder):
-        """Initialize the question processor with vector embedder."""
+    def __init__(self, vector_embedder: VectorEmbedder, query_cache: Optional[QueryEmbeddingCache] = None):
+        """
+        Initialize the question processor with vector embedder.
+        
+        Args:
+            vector_embedder: Embedding service
+            query_cache: Optional canonicalizing query embedding cache (shared on the chat path)
+        """
         self.vector_embedder = vector_embedder
+        self.query_cache = query_cache
         self.logger = logging.getLogger(__name__)
         
+        # Deterministic router for pure lookup questions
+        self.lookup_router = LookupRouter()
+        
         # Category keywords for classification
         self.category_keywords = {
             QuestionCategory.PERSONALITY: [
@@ -144,12 +162,76 @@ class QuestionProcessor:
             "then", "also", "additionally", "furthermore", "moreover",
             "what about", "how about", "그것", "이것", "that", "this"
         ]
+        
+        # Pronouns that refer back to the previous topic
+        self.pronoun_references = ['그것', '이것', '저것', 'that', 'this', 'it']
+        
+        # All keyword tables compiled into one automaton: a question is scanned once
+        self.keyword_automaton = KeywordAutomaton({
+            "category": self.category_keywords,
+            "intent": self.intent_keywords,
+            "follow_up": {"indicator": self.follow_up_indicators},
+            "pronoun": {"pronoun": self.pronoun_references},
+            "topic": TOPIC_KEYWORDS,
+        })
+    
+    async def try_lookup_fast_path(
+        self,
+        question: str,
+        load_documents: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> Optional[LookupAnswer]:
+        """
+        Answer a pure lookup question from the user's documents without the LLM.
+        
+        Args:
+            question: Raw user question text
+            load_documents: Loads the user's document snapshots; only called
+                when the question is a lookup
+            
+        Returns:
+            LookupAnswer, or None if the question should go through the full pipeline
+        """
+        intent = self.lookup_router.detect(self._preprocess_question(question))
+        if intent is None:
+            await metrics_inc("chat_fast_path_total", labels={"outcome": "not_lookup"})
+            return None
+        
+        try:
+            documents = await load_documents()
+        except Exception as e:
+            self.logger.warning(f"Failed to load documents for lookup fast path: {e}")
+            documents = []
+        
+        answer = self.lookup_router.answer(intent, documents)
+        outcome = "answered" if answer is not None else "unresolved"
+        await metrics_inc("chat_fast_path_total", labels={"outcome": outcome, "kind": intent.kind.value})
+        self.logger.info(f"Lookup fast path {outcome}: kind={intent.kind.value}")
+        return answer
+    
+    async def _embed(self, cleaned_question: str, deadline: Optional[Deadline] = None) -> List[float]:
+        if self.query_cache is not None:
+            return await self.query_cache.get_embedding(self.vector_embedder, cleaned_question, deadline)
+        if deadline is not None:
+            return await self.vector_embedder.generate_embedding(cleaned_question, deadline=deadline)
+        return await self.vector_embedder.generate_embedding(cleaned_question)
+    
+    async def embed_question(
+        self,
+        processed_question: ProcessedQuestion,
+        deadline: Optional[Deadline] = None
+    ) -> List[float]:
+        """Embedding of a question processed without one (a deferred follow-up), stored on it."""
+        if processed_question.embedding_vector is None:
+            processed_question.embedding_vector = await self._embed(processed_question.cleaned_text, deadline)
+        return processed_question.embedding_vector
     
     async def process_question(
         self, 
         question: str, 
         user_id: str,
-        conversation_context: Optional[ConversationContext] = None
+        conversation_context: Optional[ConversationContext] = None,
+        embed: bool = True,
+        deadline: Optional[Deadline] = None
     ) -> ProcessedQuestion:
         """
         Process a user question with full analysis and embedding generation.
@@ -158,6 +240,11 @@ class QuestionProcessor:
             question: Raw user question text
             user_id: User identifier
             conversation_context: Previous conversation context
+            embed: Generate the query embedding; False when retrieval will not
+                use it (small-corpus mode), leaving ``embedding_vector`` None.
+                Follow-ups with previous documents are never embedded here
+                (see ``embed_question``)
+            deadline: Request deadline bounding the embedding call
             
         Returns:
             ProcessedQuestion with all analysis results
@@ -170,21 +257,35 @@ class QuestionProcessor:
             if not self._validate_question(cleaned_question):
                 raise ValueError(f"Invalid question format: {question}")
             
+            # Match every keyword table in one pass
+            hits = self.keyword_automaton.scan(cleaned_question)
+            
             # Categorize the question
-            category, category_confidence = self._categorize_question(cleaned_question)
+            category, category_confidence = self._categorize_question(cleaned_question, hits)
             
             # Detect intent
-            intent, intent_confidence = self._detect_intent(cleaned_question, conversation_context)
+            intent, intent_confidence = self._detect_intent(cleaned_question, conversation_context, hits)
             
             # Extract keywords
             keywords = self._extract_keywords(cleaned_question)
             
-            # Generate embedding vector
-            embedding_vector = await self.vector_embedder.generate_embedding(cleaned_question)
-            
             # Handle follow-up context
             context_from_previous = self._extract_follow_up_context(
-                cleaned_question, conversation_context
+                cleaned_question, conversation_context, hits
+            )
+            
+            follow_up_confidence = (
+                self._follow_up_confidence(category, conversation_context, hits)
+                if context_from_previous else 0.0
+            )
+            
+            # Generate embedding vector; a follow-up may be served by the previous
+            # turn's documents, so ContextBuilder embeds it only if it has to search
+            deferred = bool(
+                context_from_previous and conversation_context and conversation_context.previous_doc_ids
+            )
+            embedding_vector = (
+                await self._embed(cleaned_question, deadline) if embed and not deferred else None
             )
             
             # Determine required document types
@@ -202,7 +303,9 @@ class QuestionProcessor:
                 keywords=keywords,
                 confidence_score=confidence_score,
                 context_from_previous=context_from_previous,
-                requires_specific_docs=required_docs
+                requires_specific_docs=required_docs,
+                topic=hits.topic(),
+                follow_up_confidence=follow_up_confidence
             )
             
             self.logger.info(
@@ -267,27 +370,26 @@ class QuestionProcessor:
         
         return True
     
-    def _categorize_question(self, question: str) -> Tuple[QuestionCategory, float]:
+    def _categorize_question(
+        self, 
+        question: str, 
+        hits: Optional[KeywordHits] = None
+    ) -> Tuple[QuestionCategory, float]:
         """
         Categorize the question based on keywords and patterns.
         
         Args:
             question: Cleaned question text
+            hits: Keyword hits for the question, scanned here if not given
             
         Returns:
             Tuple of (category, confidence_score)
         """
-        question_lower = question.lower()
-        category_scores = {}
-        
-        # Score each category based on keyword matches
-        for category, keywords in self.category_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword.lower() in question_lower:
-                    # Weight longer keywords more heavily
-                    score += len(keyword) / 10
-            category_scores[category] = score
+        if hits is None:
+            hits = self.keyword_automaton.scan(question)
+        
+        # Score each category based on keyword matches, weighting longer keywords more heavily
+        category_scores = hits.weighted_scores("category", self.category_keywords)
         
         # Find the category with highest score
         if not category_scores or max(category_scores.values()) == 0:
@@ -304,7 +406,8 @@ class QuestionProcessor:
     def _detect_intent(
         self, 
         question: str, 
-        context: Optional[ConversationContext] = None
+        context: Optional[ConversationContext] = None,
+        hits: Optional[KeywordHits] = None
     ) -> Tuple[QuestionIntent, float]:
         """
         Detect the intent of the question.
@@ -312,26 +415,20 @@ class QuestionProcessor:
         Args:
             question: Cleaned question text
             context: Conversation context
+            hits: Keyword hits for the question, scanned here if not given
             
         Returns:
             Tuple of (intent, confidence_score)
         """
-        question_lower = question.lower()
+        if hits is None:
+            hits = self.keyword_automaton.scan(question)
         
         # Check for follow-up indicators first
-        if context and context.conversation_depth > 0:
-            for indicator in self.follow_up_indicators:
-                if indicator in question_lower:
-                    return QuestionIntent.FOLLOW_UP, 0.8
+        if context and context.conversation_depth > 0 and hits.has("follow_up"):
+            return QuestionIntent.FOLLOW_UP, 0.8
         
         # Score each intent based on keyword matches
-        intent_scores = {}
-        for intent, keywords in self.intent_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword.lower() in question_lower:
-                    score += len(keyword) / 10
-            intent_scores[intent] = score
+        intent_scores = hits.weighted_scores("intent", self.intent_keywords)
         
         # Find the intent with highest score
         if not intent_scores or max(intent_scores.values()) == 0:
@@ -389,7 +486,8 @@ class QuestionProcessor:
     def _extract_follow_up_context(
         self, 
         question: str, 
-        context: Optional[ConversationContext]
+        context: Optional[ConversationContext],
+        hits: Optional[KeywordHits] = None
     ) -> Optional[str]:
         """
         Extract context from previous conversation for follow-up questions.
@@ -397,6 +495,7 @@ class QuestionProcessor:
         Args:
             question: Current question text
             context: Previous conversation context
+            hits: Keyword hits for the question, scanned here if not given
             
         Returns:
             Context string if this is a follow-up, None otherwise
@@ -404,27 +503,52 @@ class QuestionProcessor:
         if not context or context.conversation_depth == 0:
             return None
         
-        question_lower = question.lower()
+        if hits is None:
+            hits = self.keyword_automaton.scan(question)
         
         # Check for follow-up indicators
-        has_follow_up_indicator = any(
-            indicator in question_lower 
-            for indicator in self.follow_up_indicators
-        )
-        
-        if has_follow_up_indicator and context.previous_questions:
+        if hits.has("follow_up") and context.previous_questions:
             # Return the most recent question as context
             return context.previous_questions[-1]
         
         # Check for pronoun references that might indicate follow-up
-        pronouns = ['그것', '이것', '저것', 'that', 'this', 'it']
-        has_pronoun = any(pronoun in question_lower for pronoun in pronouns)
-        
-        if has_pronoun and context.current_topic:
+        if hits.has("pronoun") and context.current_topic:
             return f"Previous topic: {context.current_topic.value}"
         
         return None
     
+    def _follow_up_confidence(
+        self, 
+        category: QuestionCategory, 
+        context: ConversationContext,
+        hits: KeywordHits
+    ) -> float:
+        """
+        Estimate how likely a follow-up stays on the previous turn's documents.
+        
+        Args:
+            category: Category of the current question
+            context: Previous conversation context
+            hits: Keyword hits for the question
+            
+        Returns:
+            Confidence score (0-1); low when the question moves to another category
+        """
+        confidence = 0.8 if hits.has("follow_up") else 0.6
+        
+        previous_category = context.current_topic or (
+            context.previous_categories[-1] if context.previous_categories else None
+        )
+        if (
+            category != QuestionCategory.UNKNOWN
+            and previous_category is not None
+            and category != previous_category
+        ):
+            # "그럼 추천 직업은?" after a personality question needs new documents
+            confidence *= 0.5
+        
+        return confidence
+    
     def _determine_required_documents(
         self, 
         category: QuestionCategory, 
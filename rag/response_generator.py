@@ -7,19 +7,27 @@ import re
 import json
 import os
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
-from datetime import datetime
+import dataclasses
 
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 from rag.context_builder import ConstructedContext
+from rag.gemini_client import GeminiGenerationClient, CircuitOpenError, RestGenerativeModel, LLM_CLIENT_CONFIG
+from rag.admission import (
+    AdmissionScheduler, AdmissionRejected, AdmissionTicket, DEGRADATION_PROFILES
+)
 from rag.question_processor import ConversationContext
-from database.models import ChatConversation
+from rag.keyword_automaton import TOPIC_AUTOMATON
+from rag.conversation_memory import (
+    MEMORY_CONFIG, ConversationMemory, ConversationMemoryStore, ConversationTurn, RollingSummarizer
+)
 from monitoring.metrics import observe as metrics_observe, inc as metrics_inc
+from monitoring.deadline import Deadline, DeadlineExceeded
 
 # 최상단 import 근처
 from dotenv import load_dotenv, find_dotenv
@@ -42,17 +50,15 @@ class GeneratedResponse:
     conversation_context: Optional[str] = None
 
 
-@dataclass
-class ConversationMemory:
-    user_id: str
-    conversation_history: List[ChatConversation]
-    current_context: Optional[str] = None
-    last_topic: Optional[str] = None
-    follow_up_count: int = 0
-
-
 class ResponseGenerator:
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-2.0-flash"):
+    _singleton_instance = None
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: str = "gemini-2.0-flash",
+        memory_store: Optional[ConversationMemoryStore] = None
+    ):
         self.logger = logging.getLogger(__name__)
         
         api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
@@ -79,7 +85,27 @@ class ResponseGenerator:
             candidate_count=1
         )
         
-        self.conversation_memories: Dict[str, ConversationMemory] = {}
+        # Degraded modes shorten answers under load
+        self.generation_configs = {
+            level: dataclasses.replace(self.generation_config, max_output_tokens=profile.max_output_tokens)
+            for level, profile in DEGRADATION_PROFILES.items()
+        }
+        
+        # Native async client with a concurrency cap and circuit breaker
+        backend = self.model
+        if LLM_CLIENT_CONFIG['api_base_url']:
+            # Local emulator / alternate endpoint over REST
+            backend = RestGenerativeModel(model_name, api_key, LLM_CLIENT_CONFIG['api_base_url'])
+        # The fair admission queue in front of generation is the only cap on concurrent calls
+        self.admission = AdmissionScheduler(max_active=LLM_CLIENT_CONFIG['max_concurrency'])
+        self.llm_client = GeminiGenerationClient(backend, limit_concurrency=False)
+        
+        # Bounded LRU/TTL memory; conversation_memories is its underlying mapping
+        self.memory_store = memory_store or ConversationMemoryStore()
+        self.conversation_memories: Dict[str, ConversationMemory] = self.memory_store.entries
+        self.summarizer = RollingSummarizer()
+        self.memory_prompt_mode = MEMORY_CONFIG['prompt_mode']
+        self._background_tasks: Set[asyncio.Task] = set()
         
         self.validation_patterns = {
             "korean_content": re.compile(r'[가-힣]'),
@@ -88,28 +114,89 @@ class ResponseGenerator:
             "statistical_info": re.compile(r'(\d+%|\d+위|\d+점|백분위|순위)', re.IGNORECASE)
         }
     
+    @classmethod
+    def instance(cls) -> "ResponseGenerator":
+        """Return a process-wide generator sharing the global conversation memory store."""
+        if cls._singleton_instance is None:
+            cls._singleton_instance = cls(memory_store=ConversationMemoryStore.instance())
+        return cls._singleton_instance
+    
+    @classmethod
+    async def close_instance(cls) -> None:
+        """Close the process-wide generator's LLM connections, if it was created."""
+        if cls._singleton_instance is not None:
+            await cls._singleton_instance.llm_client.aclose()
+    
     # =======================
     # Conversation memory API
     # =======================
     def get_conversation_memory(self, user_id: str) -> Optional[ConversationMemory]:
-        return self.conversation_memories.get(user_id)
+        return self.memory_store.get(user_id)
     
     def clear_conversation_memory(self, user_id: str) -> None:
-        if user_id in self.conversation_memories:
-            del self.conversation_memories[user_id]
+        self.memory_store.discard(user_id)
+    
+    async def prepare_memory_block(self, user_id: str) -> str:
+        """
+        Render the memory block that will precede the next prompt for this user.
+        
+        Callers pass it to ContextBuilder.build_context so the block is counted
+        against the context token budget.
+        """
+        memory = await self.memory_store.get_or_load(user_id)
+        return self._render_memory_block(memory, (memory.follow_up_count or 0) + 1)
     
-    async def generate_response(self, constructed_context, user_id, conversation_context=None):
+    async def generate_response(
+        self, constructed_context, user_id, conversation_context=None, deadline: Optional[Deadline] = None
+    ):
+        """
+        Generate a response behind the admission queue.
+
+        ``deadline`` bounds the admission wait and the Gemini call, and
+        ``DeadlineExceeded`` is raised once it is used up. Without one, the
+        admission queue applies its own wait limit.
+        """
         start_time = time.time()
         
+        try:
+            ticket = await self.admission.acquire(user_id, deadline.expires_at if deadline else None)
+        except AdmissionRejected as e:
+            self.logger.warning(f"Generation shed for user {user_id}: {e.reason}")
+            if deadline is not None and e.reason == "deadline":
+                deadline.mark_exhausted("admission")
+                raise DeadlineExceeded("admission")
+            return await self._fallback_generated_response(constructed_context, start_time)
+        
+        try:
+            return await self._generate_admitted_response(
+                constructed_context, user_id, ticket, start_time, deadline
+            )
+        finally:
+            self.admission.release(ticket)
+    
+    async def _generate_admitted_response(
+        self,
+        constructed_context: ConstructedContext,
+        user_id: str,
+        ticket: AdmissionTicket,
+        start_time: float,
+        deadline: Optional[Deadline] = None
+    ) -> GeneratedResponse:
         try:
             memory = await self._update_conversation_memory(user_id, constructed_context)
             enhanced_prompt = await self._enhance_prompt_with_memory(
-                constructed_context.formatted_prompt, memory
+                constructed_context.formatted_prompt, memory,
+                constructed_context.memory_block
             )
             
-            self.logger.info(f"Generating response for user {user_id} using model {self.model_name}")
+            self.logger.info(
+                f"Generating response for user {user_id} using model {self.model_name} "
+                f"(level={ticket.level.value}, queued={ticket.wait_seconds:.2f}s)"
+            )
             
-            response = await self._call_gemini_api(enhanced_prompt)
+            response = await self._call_gemini_api(
+                enhanced_prompt, self.generation_configs[ticket.level], deadline
+            )
             processed_response = await self._post_process_response(response, constructed_context, memory)
             quality_score = self._assess_response_quality(processed_response, constructed_context)
             confidence_score = self._calculate_confidence_score(processed_response, constructed_context, quality_score)
@@ -137,80 +224,90 @@ class ResponseGenerator:
             await metrics_observe("rag_response_seconds", processing_time)
             return generated_response
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            self.logger.error(f"Error generating response for user {user_id}: {e}")
-            
-            fallback_response = await self._generate_fallback_response(constructed_context)
-            processing_time = time.time() - start_time
-            
-            await metrics_inc("rag_response_errors_total")
-            await metrics_observe("rag_response_seconds", processing_time)
-            return GeneratedResponse(
-                content=fallback_response,
-                quality_score=ResponseQuality.POOR,
-                confidence_score=0.1,
-                processing_time=processing_time,
-                retrieved_doc_ids=[],
-                conversation_context=None
-            )
+            if isinstance(e, CircuitOpenError):
+                self.logger.warning(f"Gemini circuit open, serving fallback response for user {user_id}")
+            else:
+                self.logger.error(f"Error generating response for user {user_id}: {e}")
+            return await self._fallback_generated_response(constructed_context, start_time)
     
-    async def _call_gemini_api(self, prompt: str) -> str:
-        max_attempts = 3
-        base_delay = 0.5
-        for attempt in range(max_attempts):
-            try:
-                response = await asyncio.to_thread(
-                    self.model.generate_content,
-                    prompt,
-                    generation_config=self.generation_config
-                )
-                
-                if response.candidates and len(response.candidates) > 0:
-                    candidate = response.candidates[0]
-                    if candidate.content and candidate.content.parts:
-                        return candidate.content.parts[0].text
-                
-                self.logger.warning("No valid response generated by Gemini API")
-                return "죄송합니다. 현재 답변을 생성할 수 없습니다. 다시 시도해 주세요."
-                
-            except Exception as e:
-                if attempt < max_attempts - 1:
-                    delay = base_delay * (2 ** attempt) + 0.1 * attempt
-                    self.logger.warning(
-                        f"Gemini API call failed (attempt {attempt+1}/{max_attempts}): {e}. Retrying in {delay:.2f}s"
-                    )
-                    await asyncio.sleep(delay)
-                    continue
-                self.logger.error(f"Error calling Gemini API after retries: {e}")
-                await metrics_inc("llm_api_errors_total")
-                raise
+    async def _fallback_generated_response(self, constructed_context: ConstructedContext, start_time: float) -> GeneratedResponse:
+        fallback_response = await self._generate_fallback_response(constructed_context)
+        processing_time = time.time() - start_time
+        
+        await metrics_inc("rag_response_errors_total")
+        await metrics_observe("rag_response_seconds", processing_time)
+        return GeneratedResponse(
+            content=fallback_response,
+            quality_score=ResponseQuality.POOR,
+            confidence_score=0.1,
+            processing_time=processing_time,
+            retrieved_doc_ids=[],
+            conversation_context=None
+        )
+    
+    async def _call_gemini_api(
+        self, prompt: str, generation_config: Any = None, deadline: Optional[Deadline] = None
+    ) -> str:
+        # Only pass the deadline when there is one
+        generate_kwargs = {'deadline': deadline} if deadline is not None else {}
+        try:
+            response = await self.llm_client.generate(
+                prompt, generation_config or self.generation_config, **generate_kwargs
+            )
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
+        except Exception as e:
+            self.logger.error(f"Error calling Gemini API after retries: {e}")
+            await metrics_inc("llm_api_errors_total")
+            raise
+        
+        if response.candidates and len(response.candidates) > 0:
+            candidate = response.candidates[0]
+            if candidate.content and candidate.content.parts:
+                return candidate.content.parts[0].text
+        
+        self.logger.warning("No valid response generated by Gemini API")
+        return "죄송합니다. 현재 답변을 생성할 수 없습니다. 다시 시도해 주세요."
 
     # =======================
     # Internal helpers
     # =======================
     async def _update_conversation_memory(self, user_id: str, constructed_context: ConstructedContext) -> ConversationMemory:
-        memory = self.conversation_memories.get(user_id)
-        if not memory:
-            memory = ConversationMemory(user_id=user_id, conversation_history=[], current_context=None, last_topic=None, follow_up_count=0)
-            self.conversation_memories[user_id] = memory
+        memory = await self.memory_store.get_or_load(user_id)
         # Update basic context
-        memory.current_context = self._extract_topic_from_question(constructed_context.user_question)
+        memory.current_context = self._question_topic(constructed_context)
         memory.last_topic = memory.current_context
         memory.follow_up_count = (memory.follow_up_count or 0) + 1
         return memory
 
-    async def _enhance_prompt_with_memory(self, prompt: str, memory: ConversationMemory) -> str:
-        if not memory or not memory.conversation_history:
+    async def _enhance_prompt_with_memory(
+        self, prompt: str, memory: ConversationMemory, memory_block: Optional[str] = None
+    ) -> str:
+        if memory_block is None:
+            memory_block = self._render_memory_block(memory, memory.follow_up_count if memory else 0)
+        if not memory_block:
             return prompt
-        last_items = memory.conversation_history[-3:]
-        previous_context = "\n".join([
-            f"Q: {c.question}\nA: {c.response}" for c in last_items
-        ])
-        enhanced = (
+        return f"{memory_block}{prompt}"
+
+    def _render_memory_block(self, memory: Optional[ConversationMemory], follow_up_count: int) -> str:
+        if not memory or not memory.conversation_history:
+            return ""
+        if memory.summary is None:
+            # Rehydrated or legacy memory: build the summary from the stored turns
+            memory.summary = self.summarizer.summarize(memory.conversation_history)
+        parts = [f"대화 요약:\n{memory.summary}"]
+        if self.memory_prompt_mode == "summary_with_last_turn":
+            last = memory.conversation_history[-1]
+            answer = self.summarizer.truncate(last.response, MEMORY_CONFIG['last_turn_max_tokens'])
+            parts.append(f"직전 대화:\nQ: {last.question}\nA: {answer}")
+        previous_context = "\n\n".join(parts)
+        return (
             f"이전 대화 맥락:\n{previous_context}\n\n"
-            f"후속 질문 횟수: {memory.follow_up_count}\n\n{prompt}"
+            f"후속 질문 횟수: {follow_up_count}\n\n"
         )
-        return enhanced
 
     async def _post_process_response(self, raw_response: str, constructed_context: ConstructedContext, memory: ConversationMemory) -> str:
         if not raw_response:
@@ -260,29 +357,33 @@ class ResponseGenerator:
         return max(0.0, min(1.0, base + boost))
 
     async def _store_conversation_turn(self, user_id: str, constructed_context: ConstructedContext, generated_response: GeneratedResponse) -> None:
-        memory = self.conversation_memories.get(user_id)
-        if not memory:
-            memory = ConversationMemory(user_id=user_id, conversation_history=[])
-            self.conversation_memories[user_id] = memory
-        # Use a lightweight object to store Q/A
-        conversation_entry = type('Conv', (), {
-            'question': constructed_context.user_question,
-            'response': generated_response.content,
-            'created_at': datetime.now()
-        })()
-        memory.conversation_history.append(conversation_entry)
+        await self.remember_turn(user_id, constructed_context.user_question, generated_response.content)
+
+    async def remember_turn(self, user_id: str, question: str, response: str) -> None:
+        """Record a turn answered outside generate_response (e.g. a precomputed answer)."""
+        turn = ConversationTurn(question=question, response=response)
+        memory = await self.memory_store.append_turn(user_id, turn)
+        # Fold the turn into the rolling summary off the response path
+        task = asyncio.create_task(self._update_rolling_summary(memory, turn))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _update_rolling_summary(self, memory: ConversationMemory, turn: ConversationTurn) -> None:
+        try:
+            if memory.summary is None:
+                memory.summary = self.summarizer.summarize(memory.conversation_history)
+            else:
+                memory.summary = self.summarizer.fold(memory.summary, turn)
+        except Exception as e:
+            self.logger.warning(f"Failed to update conversation summary for user {memory.user_id}: {e}")
 
     def _extract_topic_from_question(self, question: str) -> str:
-        q = (question or "").lower()
-        if any(k in q for k in ["성격", "personality"]):
-            return "personality"
-        if any(k in q for k in ["직업", "진로", "career"]):
-            return "career"
-        if any(k in q for k in ["사고", "능력", "thinking"]):
-            return "thinking"
-        if any(k in q for k in ["학습", "공부", "learning"]):
-            return "learning"
-        return "general"
+        return TOPIC_AUTOMATON.scan(question).topic()
+
+    def _question_topic(self, constructed_context: ConstructedContext) -> str:
+        # Detected once by the question processor; contexts built without one are scanned here
+        topic = (constructed_context.context_metadata or {}).get("question_topic")
+        return topic or self._extract_topic_from_question(constructed_context.user_question or "")
 
     async def _enhance_with_statistical_context(self, response: str, constructed_context: ConstructedContext) -> str:
         # If context suggests stats are relevant, add a gentle note
@@ -306,8 +407,7 @@ class ResponseGenerator:
         return text.strip()
 
     async def _generate_fallback_response(self, constructed_context: ConstructedContext) -> str:
-        question = (constructed_context.user_question or "").lower()
-        topic = self._extract_topic_from_question(question)
+        topic = self._question_topic(constructed_context)
         if topic == "personality":
             return "현재 상세 데이터를 불러오는 데 문제가 있어요. 성격 분석의 핵심 포인트를 먼저 안내드릴게요: 강점, 보완점, 추천 활동을 중심으로 스스로의 패턴을 관찰해보세요."
         if topic == "career":
@@ -323,5 +423,8 @@ class ResponseGenerator:
                 "top_k": self.generation_config.top_k,
                 "max_output_tokens": self.generation_config.max_output_tokens
             },
-            "active_conversations": len(self.conversation_memories)
+            "active_conversations": len(self.memory_store),
+            "llm_client": self.llm_client.stats(),
+            "admission": self.admission.stats(),
+            "memory_store": self.memory_store.stats()
         }
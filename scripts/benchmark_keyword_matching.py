@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for question keyword matching
+
+Compares per-question CPU time of the previous per-keyword substring loops
+(category, intent, follow-up, pronoun and topic tables scanned one after
+another) against a single scan of ``QuestionProcessor.keyword_automaton``.
+Both variants are checked to produce the same category, intent, follow-up and
+topic results before timing.
+
+Usage:
+    python scripts/benchmark_keyword_matching.py --iterations 20000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from rag.keyword_automaton import TOPIC_KEYWORDS
+from rag.question_processor import QuestionProcessor
+
+QUESTIONS = [
+    "제 성격 유형에 대해 설명해 주세요",
+    "저에게 맞는 직업을 추천해 주세요",
+    "제 사고력 검사 결과는 어떤가요?",
+    "제 강점과 약점은 무엇인가요?",
+    "다른 사람들과 비교하면 제 점수는 어느 정도인가요?",
+    "그럼 그 직업을 갖기 위해 어떤 공부를 해야 하나요?",
+    "What careers are suitable for my personality type and thinking skills?",
+    "더 자세히 설명해 주세요",
+]
+
+
+def legacy_scan(processor: QuestionProcessor, question: str):
+    """The per-keyword loops the automaton replaced."""
+    q = question.lower()
+    categories = {
+        category: sum(len(k) / 10 for k in keywords if k.lower() in q)
+        for category, keywords in processor.category_keywords.items()
+    }
+    intents = {
+        intent: sum(len(k) / 10 for k in keywords if k.lower() in q)
+        for intent, keywords in processor.intent_keywords.items()
+    }
+    follow_up = any(indicator in q for indicator in processor.follow_up_indicators)
+    pronoun = any(pronoun in q for pronoun in processor.pronoun_references)
+    topic = next(
+        (topic for topic, keywords in TOPIC_KEYWORDS.items() if any(k in q for k in keywords)),
+        "general"
+    )
+    return categories, intents, follow_up, pronoun, topic
+
+
+def automaton_scan(processor: QuestionProcessor, question: str):
+    hits = processor.keyword_automaton.scan(question)
+    return (
+        hits.weighted_scores("category", processor.category_keywords),
+        hits.weighted_scores("intent", processor.intent_keywords),
+        hits.has("follow_up"),
+        hits.has("pronoun"),
+        hits.topic(),
+    )
+
+
+def time_per_question(fn, processor: QuestionProcessor, iterations: int) -> float:
+    """Mean CPU microseconds per question."""
+    start = time.process_time()
+    for _ in range(iterations):
+        for question in QUESTIONS:
+            fn(processor, question)
+    return (time.process_time() - start) / (iterations * len(QUESTIONS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword matching microbenchmark")
+    parser.add_argument("--iterations", type=int, default=20000, help="Passes over the question set")
+    args = parser.parse_args()
+
+    processor = QuestionProcessor(vector_embedder=Mock())
+
+    for question in QUESTIONS:
+        legacy, new = legacy_scan(processor, question), automaton_scan(processor, question)
+        legacy_scores = tuple({k: round(v, 6) for k, v in d.items()} for d in legacy[:2])
+        new_scores = tuple({k: round(v, 6) for k, v in d.items()} for d in new[:2])
+        if legacy_scores != new_scores or legacy[2:] != new[2:]:
+            raise SystemExit(f"Mismatch for question: {question}")
+
+    before = time_per_question(legacy_scan, processor, args.iterations)
+    after = time_per_question(automaton_scan, processor, args.iterations)
+
+    print(f"questions: {len(QUESTIONS)}, iterations: {args.iterations}")
+    print(f"substring loops: {before:8.2f} us/question")
+    print(f"automaton scan:  {after:8.2f} us/question")
+    print(f"speedup:         {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
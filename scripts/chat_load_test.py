@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+End-to-end load generator for the chat pipeline
+
+Drives ``POST /api/chat/question`` and ``/api/chat/ws/{user_id}`` with a mix of
+realistic questions and reports throughput, latency percentiles (overall and
+per pipeline stage) and DB pool saturation sampled from ``/metrics``.
+
+Access tokens are minted locally with the server's ``JWT_SECRET_KEY``, so the
+login endpoint is not part of the measured load. Run the API against the local
+emulator (``scripts/gemini_emulator.py``) to avoid spending real quota.
+
+Usage:
+    python scripts/chat_load_test.py --users users.txt --concurrency 20 --duration 60 --ws-ratio 0.3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.auth_endpoints import create_access_token
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# (weight, question) pairs roughly matching production traffic
+QUESTION_MIX = [
+    (0.25, "제 성격 유형에 대해 설명해 주세요"),
+    (0.15, "저에게 맞는 직업을 추천해 주세요"),
+    (0.15, "제 사고력 검사 결과는 어떤가요?"),
+    (0.10, "제 강점과 약점은 무엇인가요?"),
+    (0.10, "다른 사람들과 비교하면 제 점수는 어느 정도인가요?"),
+    (0.10, "추천 학과는 무엇인가요?"),
+    (0.10, "더 자세히 설명해 주세요"),
+    (0.05, "제 학습 스타일에 맞는 공부 방법을 알려주세요"),
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+@dataclass
+class LoadTestResults:
+    latencies: List[float] = field(default_factory=list)
+    stage_latencies: Dict[str, List[float]] = field(default_factory=dict)
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    pool_samples: List[dict] = field(default_factory=list)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    def record(self, status: str, latency: float, stage_timings: Optional[Dict[str, float]] = None) -> None:
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if status == "ok":
+            self.latencies.append(latency)
+            for stage, seconds in (stage_timings or {}).items():
+                self.stage_latencies.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> dict:
+        elapsed = max(self.finished_at - self.started_at, 1e-9)
+        total = sum(self.status_counts.values())
+
+        def dist(values: List[float]) -> dict:
+            return {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 3),
+                "p90": round(percentile(values, 90), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(max(values), 3) if values else 0.0,
+            }
+
+        utilizations = [s.get("utilization", 0.0) for s in self.pool_samples if s]
+        return {
+            "duration_seconds": round(elapsed, 1),
+            "requests": total,
+            "throughput_rps": round(self.status_counts.get("ok", 0) / elapsed, 2),
+            "status_counts": self.status_counts,
+            "latency": dist(self.latencies),
+            "stages": {stage: dist(values) for stage, values in sorted(self.stage_latencies.items())},
+            "db_pool": {
+                "samples": len(utilizations),
+                "peak_checked_out": max((s.get("checked_out", 0) for s in self.pool_samples if s), default=0),
+                "capacity": next((s.get("capacity") for s in self.pool_samples if s), None),
+                "peak_utilization": round(max(utilizations), 3) if utilizations else None,
+                "saturated_fraction": round(
+                    sum(1 for u in utilizations if u >= 1.0) / len(utilizations), 3
+                ) if utilizations else None,
+            },
+        }
+
+
+class ChatLoadGenerator:
+    """Closed-loop load generator: each worker sends its next request when the previous one completes"""
+
+    def __init__(self, base_url: str, user_ids: List[str], ws_ratio: float, timeout: float, seed: int):
+        self.base_url = base_url.rstrip("/")
+        self.ws_base_url = self.base_url.replace("http://", "ws://").replace("https://", "wss://")
+        self.user_ids = user_ids
+        self.ws_ratio = ws_ratio
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.tokens = {
+            user_id: create_access_token({"id": user_id, "type": "personal", "ac_id": user_id})
+            for user_id in user_ids
+        }
+        self.results = LoadTestResults()
+
+    def _pick_question(self) -> str:
+        weights, questions = zip(*QUESTION_MIX)
+        return self.rng.choices(questions, weights=weights, k=1)[0]
+
+    async def _ask_http(self, session: aiohttp.ClientSession, user_id: str) -> None:
+        payload = {"user_id": user_id, "question": self._pick_question()}
+        headers = {"Authorization": f"Bearer {self.tokens[user_id]}"}
+        start = time.perf_counter()
+        try:
+            async with session.post(f"{self.base_url}/api/chat/question", json=payload, headers=headers) as response:
+                body = await response.json(content_type=None)
+                latency = time.perf_counter() - start
+                if response.status == 200:
+                    self.results.record("ok", latency, body.get("stage_timings"))
+                else:
+                    self.results.record(f"http_{response.status}", latency)
+        except asyncio.TimeoutError:
+            self.results.record("timeout", time.perf_counter() - start)
+        except aiohttp.ClientError as e:
+            logger.debug(f"HTTP request failed: {e}")
+            self.results.record("client_error", time.perf_counter() - start)
+
+    async def _ask_ws(self, session: aiohttp.ClientSession, user_id: str, questions: int) -> None:
+        try:
+            async with session.ws_connect(f"{self.ws_base_url}/api/chat/ws/{user_id}") as ws:
+                await ws.receive_json(timeout=self.timeout)  # welcome message
+                for _ in range(questions):
+                    start = time.perf_counter()
+                    await ws.send_str(json.dumps({"type": "question", "question": self._pick_question()}))
+                    while True:
+                        message = await ws.receive_json(timeout=self.timeout)
+                        if message.get("type") == "response":
+                            data = message.get("data", {})
+                            self.results.record("ok", time.perf_counter() - start, data.get("stage_timings"))
+                            break
+                        if message.get("type") == "error":
+                            self.results.record("ws_error", time.perf_counter() - start)
+                            break
+        except asyncio.TimeoutError:
+            self.results.record("timeout", self.timeout)
+        except (aiohttp.ClientError, TypeError, ValueError) as e:
+            logger.debug(f"WebSocket session failed: {e}")
+            self.results.record("client_error", 0.0)
+
+    async def _worker(self, session: aiohttp.ClientSession, stop_at: float) -> None:
+        while time.monotonic() < stop_at:
+            user_id = self.rng.choice(self.user_ids)
+            if self.rng.random() < self.ws_ratio:
+                await self._ask_ws(session, user_id, questions=self.rng.randint(1, 3))
+            else:
+                await self._ask_http(session, user_id)
+
+    async def _sample_pool(self, session: aiohttp.ClientSession, stop_at: float, interval: float) -> None:
+        while time.monotonic() < stop_at:
+            try:
+                async with session.get(f"{self.base_url}/metrics") as response:
+                    snapshot = await response.json()
+                    self.results.pool_samples.append(snapshot.get("db_pool") or {})
+            except Exception as e:
+                logger.debug(f"Metrics sampling failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def run(self, concurrency: int, duration: float, sample_interval: float = 1.0) -> LoadTestResults:
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=concurrency + 2)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            self.results.started_at = time.monotonic()
+            stop_at = self.results.started_at + duration
+            sampler = asyncio.create_task(self._sample_pool(session, stop_at, sample_interval))
+            await asyncio.gather(*[self._worker(session, stop_at) for _ in range(concurrency)])
+            self.results.finished_at = time.monotonic()
+            await sampler
+        return self.results
+
+
+def load_user_ids(path: Optional[str], inline: List[str]) -> List[str]:
+    user_ids = list(inline)
+    if path:
+        user_ids.extend(line.strip() for line in Path(path).read_text().splitlines() if line.strip())
+    return user_ids
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Chat pipeline load generator")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", help="File with one user_id (UUID) per line")
+    parser.add_argument("--user-id", action="append", default=[], help="User id (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent virtual clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Test duration in seconds")
+    parser.add_argument("--ws-ratio", type=float, default=0.2, help="Fraction of sessions using the WebSocket")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON summary to this file")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    user_ids = load_user_ids(args.users, args.user_id)
+    if not user_ids:
+        logger.error("No users given; pass --users or --user-id")
+        return 1
+
+    logger.info(
+        f"Running load test: {args.concurrency} clients, {args.duration:.0f}s, "
+        f"{len(user_ids)} users, ws_ratio={args.ws_ratio}"
+    )
+    generator = ChatLoadGenerator(args.base_url, user_ids, args.ws_ratio, args.timeout, args.seed)
+    results = await generator.run(args.concurrency, args.duration)
+
+    summary = results.summary()
+    report = json.dumps(summary, indent=2, ensure_ascii=False)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Local Gemini API emulator for load testing
+
+Serves the subset of the Generative Language REST API used by the chatbot:
+
+    POST /v1beta/models/{model}:embedContent
+    POST /v1beta/models/{model}:batchEmbedContents
+    POST /v1beta/models/{model}:generateContent
+
+Embeddings are deterministic (seeded by the input text) and unit-normalized,
+so repeated questions hit the same vectors. Latency is drawn from a
+configurable distribution and errors/429s are injected at configurable rates.
+
+Usage:
+    python scripts/gemini_emulator.py --port 8089 --latency lognormal:0.8:0.4 --error-rate 0.01 --rate-limit-rate 0.02
+
+Then start the API with:
+    GEMINI_API_BASE_URL=http://localhost:8089/v1beta
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from aiohttp import web
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class LatencyDistribution:
+    """
+    Latency sampler parsed from a spec string (seconds):
+
+        fixed:0.2           constant
+        uniform:0.1:0.5     uniform between bounds
+        lognormal:0.8:0.4   lognormal with the given median and sigma
+    """
+
+    def __init__(self, spec: str, rng: random.Random):
+        self.spec = spec
+        self.rng = rng
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        if kind == "fixed" and len(self.params) == 1:
+            return
+        if kind in ("uniform", "lognormal") and len(self.params) == 2:
+            return
+        raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return self.rng.lognormvariate(math.log(max(median, 1e-6)), sigma)
+
+
+@dataclass
+class EmulatorConfig:
+    embed_latency: str = "fixed:0.05"
+    generate_latency: str = "lognormal:0.8:0.4"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    dimensions: int = 768
+    response_chars: int = 600
+    seed: int = 42
+
+
+@dataclass
+class EmulatorStats:
+    requests: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    rate_limited: int = 0
+
+
+def deterministic_embedding(text: str, dimensions: int) -> List[float]:
+    """Unit-length vector derived only from the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _content_text(content: dict) -> str:
+    return "".join(part.get("text", "") for part in (content or {}).get("parts", []))
+
+
+class GeminiEmulator:
+    """aiohttp application emulating the Gemini REST endpoints"""
+
+    _SENTENCES = [
+        "검사 결과를 보면 분석적 사고 능력이 특히 두드러집니다.",
+        "대인관계 성향 점수는 또래 평균보다 약간 높은 편입니다.",
+        "이러한 성향은 체계적인 계획이 필요한 직무에서 강점이 됩니다.",
+        "다만 변화가 잦은 환경에서는 충분한 준비 시간을 확보하는 것이 좋습니다.",
+        "추천 직업군과 학습 방향을 함께 참고해 보시기 바랍니다.",
+    ]
+
+    def __init__(self, config: EmulatorConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.embed_latency = LatencyDistribution(config.embed_latency, self.rng)
+        self.generate_latency = LatencyDistribution(config.generate_latency, self.rng)
+        self.stats = EmulatorStats()
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1beta/models/{target}", self.handle)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": self.stats.requests,
+            "errors": self.stats.errors,
+            "rate_limited": self.stats.rate_limited,
+        })
+
+    def _injected_failure(self):
+        roll = self.rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {"error": {"code": 429, "message": "Resource has been exhausted", "status": "RESOURCE_EXHAUSTED"}},
+                status=429
+            )
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.stats.errors += 1
+            return web.json_response(
+                {"error": {"code": 503, "message": "The model is overloaded", "status": "UNAVAILABLE"}},
+                status=503
+            )
+        return None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        target = request.match_info["target"]
+        model, _, method = target.partition(":")
+        self.stats.requests[method] = self.stats.requests.get(method, 0) + 1
+
+        try:
+            body = await request.json()
+        except Exception:
+            return web.json_response({"error": {"code": 400, "message": "Invalid JSON"}}, status=400)
+
+        if method in ("embedContent", "batchEmbedContents"):
+            await asyncio.sleep(self.embed_latency.sample())
+        elif method == "generateContent":
+            await asyncio.sleep(self.generate_latency.sample())
+        else:
+            return web.json_response({"error": {"code": 404, "message": f"Unknown method {method}"}}, status=404)
+
+        failure = self._injected_failure()
+        if failure is not None:
+            return failure
+
+        if method == "embedContent":
+            text = _content_text(body.get("content"))
+            return web.json_response({"embedding": {"values": deterministic_embedding(text, self.config.dimensions)}})
+
+        if method == "batchEmbedContents":
+            embeddings = [
+                {"values": deterministic_embedding(_content_text(item.get("content")), self.config.dimensions)}
+                for item in body.get("requests", [])
+            ]
+            return web.json_response({"embeddings": embeddings})
+
+        prompt = "".join(_content_text(c) for c in body.get("contents", []))
+        return web.json_response(self._generate(model, prompt, body.get("generationConfig") or {}))
+
+    def _generate(self, model: str, prompt: str, generation_config: dict) -> dict:
+        # Deterministic per prompt, capped by maxOutputTokens (≈3 chars per token)
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        max_chars = self.config.response_chars
+        if generation_config.get("maxOutputTokens"):
+            max_chars = min(max_chars, int(generation_config["maxOutputTokens"]) * 3)
+        parts = []
+        while sum(len(p) + 1 for p in parts) < max_chars:
+            parts.append(rng.choice(self._SENTENCES))
+        text = " ".join(parts)[:max_chars]
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 3,
+                "candidatesTokenCount": len(text) // 3,
+            },
+            "modelVersion": model,
+        }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local Gemini API emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--embed-latency", default="fixed:0.05", help="fixed:S | uniform:LO:HI | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--latency", dest="generate_latency", default="lognormal:0.8:0.4",
+                        help="generateContent latency (same format)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--response-chars", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    config = EmulatorConfig(
+        embed_latency=args.embed_latency,
+        generate_latency=args.generate_latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        dimensions=args.dimensions,
+        response_chars=args.response_chars,
+        seed=args.seed,
+    )
+    emulator = GeminiEmulator(config)
+    logger.info(
+        f"Gemini emulator on http://{args.host}:{args.port}/v1beta "
+        f"(generate={config.generate_latency}, errors={config.error_rate}, 429s={config.rate_limit_rate})"
+    )
+    web.run_app(emulator.build_app(), host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from rag.admission import AdmissionRejected, AdmissionScheduler, DegradationLevel
+
+
+@pytest.mark.asyncio
+async def test_active_generations_are_capped():
+    scheduler = AdmissionScheduler(max_active=2, max_queue=16, per_user_active=4, per_user_queued=8)
+    peak = 0
+
+    async def run(user_id):
+        nonlocal peak
+        ticket = await scheduler.acquire(user_id)
+        try:
+            peak = max(peak, scheduler.active)
+            await asyncio.sleep(0.01)
+        finally:
+            scheduler.release(ticket)
+
+    await asyncio.gather(*[run(f"user{i % 3}") for i in range(9)])
+
+    assert peak == 2
+    assert scheduler.active == 0
+    assert scheduler.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_users_are_served_round_robin():
+    scheduler = AdmissionScheduler(max_active=1, max_queue=16, per_user_active=1, per_user_queued=4)
+    order = []
+
+    blocker = await scheduler.acquire("blocker")
+
+    async def run(user_id):
+        ticket = await scheduler.acquire(user_id)
+        order.append(user_id)
+        scheduler.release(ticket)
+
+    # A heavy user queues three requests before a light user queues one
+    tasks = [asyncio.create_task(run("heavy")) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(run("light")))
+    await asyncio.sleep(0)
+
+    scheduler.release(blocker)
+    await asyncio.gather(*tasks)
+
+    assert order.index("light") <= 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_is_shed_at_deadline():
+    scheduler = AdmissionScheduler(max_active=1, max_queue=4)
+    ticket = await scheduler.acquire("a")
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await scheduler.acquire("b", deadline=time.monotonic() + 0.02)
+
+    assert exc_info.value.reason == "deadline"
+    assert scheduler.queue_depth == 0
+    scheduler.release(ticket)
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_immediately_and_degrades():
+    scheduler = AdmissionScheduler(max_active=1, max_queue=2, per_user_queued=4)
+    ticket = await scheduler.acquire("a")
+    waiters = [asyncio.create_task(scheduler.acquire(f"w{i}")) for i in range(2)]
+    await asyncio.sleep(0)
+
+    assert scheduler.degradation_level() == DegradationLevel.MINIMAL
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await scheduler.acquire("late")
+    assert exc_info.value.reason == "queue_full"
+
+    scheduler.release(ticket)
+    for waiter in waiters:
+        scheduler.release(await waiter)
+    assert scheduler.degradation_level() == DegradationLevel.NORMAL
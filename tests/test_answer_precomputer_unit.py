@@ -0,0 +1,174 @@
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+import api.chat_endpoints as chat_endpoints
+from api.chat_endpoints import ChatQuestionRequest, ask_question
+from database.write_behind import WriteBehindBuffer
+from etl.answer_precomputer import AnswerPrecomputer
+from rag.context_builder import ContextBuilder
+from rag.precomputed_answers import PrecomputedAnswerLookup, PrecomputedMatch
+
+
+def _doc(doc_type, questions, summary="요약"):
+    return {
+        "doc_type": doc_type,
+        "content": {"name": doc_type},
+        "summary_text": summary,
+        "metadata": {"hypothetical_questions": questions},
+    }
+
+
+def _llm_response(entries):
+    part = SimpleNamespace(text="```json\n" + json.dumps(entries, ensure_ascii=False) + "\n```")
+    return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+def _embedder():
+    embedder = Mock()
+
+    async def embed(texts):
+        return [SimpleNamespace(embedding=[0.0] * 768 if t == "실패" else [0.1] * 768) for t in texts]
+
+    embedder.generate_embeddings_batch = AsyncMock(side_effect=embed)
+    return embedder
+
+
+@pytest.mark.asyncio
+async def test_answers_are_batched_and_mapped_back_to_questions():
+    llm = Mock()
+    llm.generate = AsyncMock(side_effect=[
+        _llm_response([
+            {"id": "1.1", "answer": "성격 답변"},
+            {"id": "2.1", "answer": "직업 답변"},
+        ]),
+        _llm_response([{"id": "1.1", "answer": "사고력 답변"}]),
+    ])
+    precomputer = AnswerPrecomputer(llm_client=llm, embedder=_embedder(), documents_per_call=2)
+    documents = [
+        _doc("PERSONALITY_PROFILE", ["내 성격 유형 알려줘"]),
+        _doc("CAREER_RECOMMENDATIONS", ["추천 직업 알려줘"]),
+        _doc("THINKING_SKILLS", ["내 사고력은 어때?"]),
+    ]
+
+    answers = await precomputer.precompute(documents)
+
+    assert llm.generate.await_count == 2
+    assert [(a.doc_type, a.question, a.answer) for a in answers] == [
+        ("PERSONALITY_PROFILE", "내 성격 유형 알려줘", "성격 답변"),
+        ("CAREER_RECOMMENDATIONS", "추천 직업 알려줘", "직업 답변"),
+        ("THINKING_SKILLS", "내 사고력은 어때?", "사고력 답변"),
+    ]
+    assert all(a.question_embedding for a in answers)
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_unknown_ids_and_failed_embeddings_are_skipped():
+    llm = Mock()
+    llm.generate = AsyncMock(side_effect=[
+        _llm_response([{"id": "1.1", "answer": "답변"}, {"id": "1.2", "answer": "실패 답변"}, {"id": "9.9", "answer": "x"}]),
+        RuntimeError("503"),
+    ])
+    precomputer = AnswerPrecomputer(llm_client=llm, embedder=_embedder(), documents_per_call=1)
+    documents = [
+        _doc("PERSONALITY_PROFILE", ["내 성격 유형 알려줘", "실패", "요약"]),
+        _doc("CAREER_RECOMMENDATIONS", ["추천 직업 알려줘"]),
+    ]
+
+    answers = await precomputer.precompute(documents)
+
+    # Summary fallback question is not sent; zero-vector embedding is dropped
+    assert [a.question for a in answers] == ["내 성격 유형 알려줘"]
+
+
+class SavepointSession:
+    """Postgres-like session: a failed statement aborts the transaction unless its savepoint is rolled back."""
+
+    def __init__(self):
+        self.aborted = False
+        self.fail_next = True
+
+    def begin_nested(self):
+        session = self
+
+        class Savepoint:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, exc_type, exc, tb):
+                if exc_type is not None:
+                    session.aborted = False  # ROLLBACK TO SAVEPOINT
+                return False
+
+        return Savepoint()
+
+    async def execute(self, statement):
+        if self.aborted:
+            raise RuntimeError("current transaction is aborted")
+        if self.fail_next:
+            self.fail_next = False
+            self.aborted = True
+            raise RuntimeError("operator does not exist: vector <=> vector")
+        return SimpleNamespace(first=lambda: None)
+
+
+@pytest.mark.asyncio
+async def test_a_failed_lookup_is_a_miss_and_leaves_the_session_usable():
+    session = SavepointSession()
+
+    match = await PrecomputedAnswerLookup(session).find("00000000-0000-0000-0000-000000000001", [0.1] * 768)
+
+    assert match is None
+    assert not session.aborted
+    await session.execute("INSERT INTO chat_conversations ...")
+
+
+class RecordingSessions:
+    def __init__(self):
+        self.inserted = []
+
+    @asynccontextmanager
+    async def __call__(self):
+        yield self
+
+    async def execute(self, stmt, params=None):
+        if params is not None:
+            self.inserted.extend(params)
+        return SimpleNamespace(scalar=lambda: 3)
+
+
+@pytest.mark.asyncio
+async def test_http_question_is_served_from_a_precomputed_answer(monkeypatch):
+    user = SimpleNamespace(user_id=uuid4())
+    user_id = user.user_id.hex
+    sessions = RecordingSessions()
+    monkeypatch.setattr(chat_endpoints.db_manager, "get_async_session", sessions)
+    monkeypatch.setattr(chat_endpoints, "get_user_by_id", AsyncMock(return_value=user))
+    monkeypatch.setattr(WriteBehindBuffer, "_singleton_instance", WriteBehindBuffer(session_factory=sessions))
+    monkeypatch.setattr(ContextBuilder, "load_small_corpus", AsyncMock(return_value=None))
+    match = PrecomputedMatch(question="내 성격은?", answer="저장된 답변", doc_type="PERSONALITY_PROFILE", similarity=0.95)
+    monkeypatch.setattr(PrecomputedAnswerLookup, "find", AsyncMock(return_value=match))
+
+    question_processor = Mock()
+    question_processor.try_lookup_fast_path = AsyncMock(return_value=None)
+    question_processor.process_question = AsyncMock(
+        return_value=SimpleNamespace(context_from_previous=None, embedding_vector=[0.1] * 768)
+    )
+    response_generator = Mock()
+    response_generator.remember_turn = AsyncMock()
+    response_generator.generate_response = AsyncMock()
+
+    response = await ask_question(
+        ChatQuestionRequest(user_id=user_id, question="내 성격은 어때?"),
+        current_user={"user_id": user_id},
+        rag_components=(question_processor, response_generator)
+    )
+
+    assert response.response == "저장된 답변" and response.confidence_score == 0.95
+    response_generator.generate_response.assert_not_awaited()
+    (row,) = sessions.inserted
+    assert row["prompt_template"] == "precomputed" and str(row["conversation_id"]) == response.conversation_id
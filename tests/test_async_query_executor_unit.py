@@ -0,0 +1,87 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from etl.async_query_executor import AsyncLegacyQueryExecutor
+from etl.legacy_query_executor import AptitudeTestQueries, QUERY_REGISTRY
+
+
+class SlowSessions:
+    """Async session factory whose statements each take ``delay`` seconds."""
+
+    def __init__(self, delay=0.05, slow_sql=None, slow_delay=None):
+        self.delay = delay
+        self.slow_sql = slow_sql
+        self.slow_delay = slow_delay
+        self.active = self.peak = 0
+        self.statements = []
+
+    @asynccontextmanager
+    async def __call__(self):
+        outer = self
+
+        class Result:
+            def mappings(self):
+                return self
+
+            def all(self):
+                return []
+
+        class Session:
+            async def execute(self, stmt, params):
+                outer.active += 1
+                outer.peak = max(outer.peak, outer.active)
+                outer.statements.append((str(stmt), params))
+                try:
+                    slow = outer.slow_sql is not None and str(stmt) == outer.slow_sql
+                    await asyncio.sleep(outer.slow_delay if slow else outer.delay)
+                finally:
+                    outer.active -= 1
+                return Result()
+
+        yield Session()
+
+
+def test_statement_returns_the_registered_sql_without_a_database():
+    sql, params = AptitudeTestQueries.statement("pdKindQuery", 42)
+    assert "mwd_choice_result" in sql
+    assert params == {"anp_seq": 42}
+
+
+@pytest.mark.asyncio
+async def test_queries_run_concurrently_up_to_the_limit():
+    sessions = SlowSessions(delay=0.05)
+    executor = AsyncLegacyQueryExecutor(max_retries=0, concurrency=len(QUERY_REGISTRY), session_factory=sessions)
+
+    started = time.monotonic()
+    results = await executor.execute_all_queries_async(None, 7)
+    elapsed = time.monotonic() - started
+    await executor.close()
+
+    assert all(result.success for result in results.values())
+    assert len(sessions.statements) == len(QUERY_REGISTRY)
+    assert sessions.peak == len(QUERY_REGISTRY)
+    # About one query's time, not the 31 queries' sum
+    assert elapsed < 0.05 * len(QUERY_REGISTRY) / 3
+    stats = executor.last_run_stats
+    assert stats["wall_seconds"] < stats["sum_seconds"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_per_query_timeout():
+    slow_sql, _ = AptitudeTestQueries.statement("dutiesQuery", 7)
+    sessions = SlowSessions(delay=0.01, slow_sql=slow_sql, slow_delay=1.0)
+    executor = AsyncLegacyQueryExecutor(
+        max_retries=0, concurrency=4, query_timeout=0.1, session_factory=sessions
+    )
+
+    results = await executor.execute_all_queries_async(None, 7)
+    await executor.close()
+
+    assert sessions.peak == 4
+    assert not results["dutiesQuery"].success
+    assert "timeout" in results["dutiesQuery"].error
+    assert sum(result.success for result in results.values()) == len(QUERY_REGISTRY) - 1
+    assert executor.last_run_stats["critical_path_query"] == "dutiesQuery"
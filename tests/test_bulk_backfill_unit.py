@@ -0,0 +1,166 @@
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+from aiohttp import web
+
+from etl.bulk_backfill import BulkBackfill
+from etl.document_transformer import TransformedDocument
+from etl.legacy_query_executor import AptitudeTestQueries, QUERY_REGISTRY, UNIMPLEMENTED_QUERIES
+from etl.vector_embedder import VectorEmbedder
+from scripts.gemini_emulator import EmulatorConfig, GeminiEmulator
+
+
+class BatchSessions:
+    """Session factory answering batch statements and the chat_users lookup."""
+
+    def __init__(self, rows_by_query, users):
+        self.rows_by_query = rows_by_query
+        self.users = users
+        self.statements = []
+
+    @asynccontextmanager
+    async def __call__(self):
+        outer = self
+
+        class Result:
+            def __init__(self, rows):
+                self.rows = rows
+
+            def mappings(self):
+                return self
+
+            def all(self):
+                return self.rows
+
+        class Session:
+            async def execute(self, stmt, params=None):
+                sql = str(stmt)
+                outer.statements.append(sql)
+                if "chat_users" in sql:
+                    return Result(list(outer.users.items()))
+                for name, rows in outer.rows_by_query.items():
+                    if sql == AptitudeTestQueries.batch_statement(name, [])[0]:
+                        return Result([dict(row) for row in rows])
+                return Result([])
+
+        yield Session()
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_embeddings_multi(self, texts, texts_per_request=100):
+        self.calls.append(list(texts))
+
+        class Result:
+            embedding = [0.1] * 768
+
+        return [Result() for _ in texts]
+
+
+def test_batch_statement_tags_rows_with_their_anp_seq():
+    sql, params = AptitudeTestQueries.batch_statement("pdKindQuery", [3, 1])
+    assert "CROSS JOIN LATERAL" in sql
+    assert "anp.anp_seq = batch_target.anp_seq" in sql
+    assert ":anp_seq\n" not in sql and "= :anp_seq" not in sql
+    assert params == {"anp_seqs": [3, 1]}
+
+
+@pytest.mark.asyncio
+async def test_legacy_data_is_fetched_once_per_query_and_split_per_user():
+    sessions = BatchSessions(
+        {"pdKindQuery": [{"batch_anp_seq": 1, "pd_kind": "basic"}, {"batch_anp_seq": 2, "pd_kind": "premium"}]},
+        users={}
+    )
+    backfill = BulkBackfill(sessions, embedder=FakeEmbedder(), transform_processes=0)
+
+    data = await backfill._fetch_legacy_data([1, 2])
+
+    assert len(sessions.statements) == len(QUERY_REGISTRY)
+    assert data[1]["pdKindQuery"] == [{"pd_kind": "basic"}]
+    assert data[2]["pdKindQuery"] == [{"pd_kind": "premium"}]
+    assert all(data[1][name] == [] for name in UNIMPLEMENTED_QUERIES)
+
+
+@pytest.mark.asyncio
+async def test_batch_embeds_all_chunks_together_and_reports_unknown_users(monkeypatch):
+    users = {1: uuid4(), 2: uuid4()}
+    sessions = BatchSessions({}, users=users)
+    embedder = FakeEmbedder()
+    backfill = BulkBackfill(sessions, embedder=embedder, transform_processes=0)
+
+    async def fake_fetch(anp_seqs):
+        return {anp_seq: {} for anp_seq in anp_seqs}
+
+    async def fake_transform(self, query_data):
+        return [TransformedDocument("PERSONALITY_PROFILE", {}, f"요약 {i}", {}) for i in range(3)]
+
+    saved = {}
+
+    async def fake_save(session, documents_by_user):
+        saved.update(documents_by_user)
+        return sum(len(docs) for docs in documents_by_user.values())
+
+    monkeypatch.setattr(backfill, "_fetch_legacy_data", fake_fetch)
+    monkeypatch.setattr("etl.bulk_backfill.DocumentTransformer.transform_all_documents", fake_transform)
+    monkeypatch.setattr("database.repositories.save_chunked_documents_bulk", fake_save)
+
+    ok, failures, written = await backfill._process_batch([1, 2, 3], None, embedder)
+
+    assert (ok, written) == (2, 6)
+    assert failures == {"3": "no chat user"}
+    assert len(embedder.calls) == 1 and len(embedder.calls[0]) == 6
+    assert set(saved) == {str(users[1]), str(users[2])}
+    assert all(doc.embedding_vector == [0.1] * 768 for docs in saved.values() for doc in docs)
+
+
+@pytest.mark.asyncio
+async def test_multi_text_embedding_uses_batch_requests(monkeypatch):
+    emulator = GeminiEmulator(EmulatorConfig(embed_latency="fixed:0"))
+    runner = web.AppRunner(emulator.build_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    monkeypatch.setenv("GEMINI_API_BASE_URL", f"http://127.0.0.1:{port}/v1beta")
+
+    embedder = VectorEmbedder(api_key="test-key", rate_limit_per_minute=1000)
+    try:
+        results = await embedder.generate_embeddings_multi([f"문서 {i}" for i in range(25)], texts_per_request=10)
+        again = await embedder.generate_embeddings_multi(["문서 0"])
+    finally:
+        await embedder.close()
+        await runner.cleanup()
+
+    assert len(results) == 25 and all(len(r.embedding) == 768 for r in results)
+    assert emulator.stats.requests == {"batchEmbedContents": 3}
+    assert again[0].cached
+
+
+@pytest.mark.asyncio
+async def test_bulk_save_drops_the_users_precomputed_answers_in_the_same_transaction():
+    from database.repositories import save_chunked_documents_bulk
+
+    class RecordingSession:
+        def __init__(self):
+            self.statements = []
+            self.commits = 0
+
+        async def execute(self, stmt, params=None):
+            self.statements.append(str(stmt))
+
+        async def commit(self):
+            self.commits += 1
+
+    session = RecordingSession()
+    doc = TransformedDocument(doc_type="PERSONALITY_PROFILE", content={}, summary_text="요약", metadata={})
+    written = await save_chunked_documents_bulk(session, {str(uuid4()): [doc]})
+
+    assert written == 1 and session.commits == 1
+    assert [s.split()[0:3] for s in session.statements] == [
+        ["DELETE", "FROM", "chat_documents"],
+        ["DELETE", "FROM", "chat_precomputed_answers"],
+        ["INSERT", "INTO", "chat_documents"],
+    ]
@@ -313,6 +313,23 @@ def test_estimate_token_count(context_builder):
     assert isinstance(long_tokens, int)
 
 
+@pytest.mark.asyncio
+async def test_memory_block_is_reserved_from_budget(mock_vector_search, sample_processed_question):
+    """Conversation memory counts against the context token budget."""
+    context_builder = ContextBuilder(mock_vector_search, max_context_tokens=400)
+    memory_block = "이전 대화 맥락:\n" + "요약 " * 300
+    
+    without_memory = await context_builder.build_context(sample_processed_question, "user1")
+    with_memory = await context_builder.build_context(
+        sample_processed_question, "user1", memory_block=memory_block
+    )
+    
+    assert with_memory.memory_block == memory_block
+    assert with_memory.context_metadata["memory_tokens"] > 0
+    assert with_memory.token_count_estimate <= 400
+    assert len(with_memory.formatted_prompt) < len(without_memory.formatted_prompt)
+
+
 @pytest.mark.asyncio
 async def test_context_truncation(mock_vector_search):
     """Test context truncation when exceeding token limits."""
@@ -0,0 +1,75 @@
+import json
+
+from rag.context_packer import ContextPacker, HeuristicTokenizer, build_section_fields
+
+
+class CountingTokenizer(HeuristicTokenizer):
+    name = "counting"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def count_tokens(self, text):
+        self.calls += 1
+        return super().count_tokens(text)
+
+
+def _section(packer, name, priority, detail_size, total):
+    content = {f"field_{i}": "값" * 30 for i in range(detail_size)}
+    fields = build_section_fields(f"{name} 요약", [f"{name} 포인트"], json.dumps(content), "")
+    return packer.make_section(name, "PERSONALITY_PROFILE", priority, fields, total)
+
+
+def test_pack_fits_everything_without_truncation():
+    packer = ContextPacker(HeuristicTokenizer())
+    sections = [_section(packer, "a", 0.9, 2, 2), _section(packer, "b", 0.5, 2, 2)]
+
+    packed = packer.pack(sections, budget=10_000)
+
+    assert packed.included == ["a", "b"]
+    assert packed.truncated is False
+    assert "검사 결과 1" in packed.formatted_documents
+    assert "검사 결과 2" in packed.formatted_documents
+
+
+def test_pack_truncates_at_field_boundaries_within_budget():
+    tokenizer = HeuristicTokenizer()
+    packer = ContextPacker(tokenizer)
+    big = _section(packer, "big", 0.9, 20, 1)
+    budget = big.cost // 2
+
+    packed = packer.pack([big], budget=budget)
+
+    assert packed.included == ["big"]
+    assert packed.truncated is True
+    assert tokenizer.count_tokens(packed.formatted_documents) <= budget
+    # Truncated detail block is still closed
+    assert packed.formatted_documents.rstrip().endswith("}")
+    assert "field_0" in packed.formatted_documents
+    assert "field_19" not in packed.formatted_documents
+
+
+def test_pack_prefers_relevance_per_token_and_keeps_prompt_order():
+    packer = ContextPacker(HeuristicTokenizer())
+    expensive = _section(packer, "expensive", 0.9, 30, 3)
+    cheap_a = _section(packer, "cheap_a", 0.6, 1, 3)
+    cheap_b = _section(packer, "cheap_b", 0.5, 1, 3)
+    budget = cheap_a.cost + cheap_b.cost + 5
+
+    packed = packer.pack([expensive, cheap_a, cheap_b], budget=budget)
+
+    assert packed.included[-2:] == ["cheap_a", "cheap_b"]
+    assert packed.formatted_documents.index("cheap_a") < packed.formatted_documents.index("cheap_b")
+
+
+def test_each_field_is_measured_once():
+    tokenizer = CountingTokenizer()
+    packer = ContextPacker(tokenizer)
+    sections = [_section(packer, str(i), 0.5, 5, 5) for i in range(5)]
+    calls_after_measure = tokenizer.calls
+
+    packer.pack(sections, budget=sections[0].cost * 2)
+
+    # Packing only adds a constant overhead measurement, never re-measures sections
+    assert tokenizer.calls - calls_after_measure <= 1
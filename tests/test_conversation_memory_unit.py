@@ -0,0 +1,82 @@
+import pytest
+
+from rag.conversation_memory import (
+    ConversationMemoryBackend, ConversationMemoryStore, ConversationTurn
+)
+
+
+class StubBackend(ConversationMemoryBackend):
+    def __init__(self, turns):
+        self.turns = turns
+        self.loads = 0
+
+    async def load_turns(self, user_id, limit):
+        self.loads += 1
+        return self.turns[-limit:]
+
+
+@pytest.mark.asyncio
+async def test_history_is_a_bounded_ring_buffer():
+    store = ConversationMemoryStore(capacity=10, ttl_seconds=60, max_turns=3)
+
+    for i in range(5):
+        await store.append_turn("u1", ConversationTurn(f"q{i}", f"a{i}"))
+
+    memory = store.get("u1")
+    assert [t.question for t in memory.conversation_history] == ["q2", "q3", "q4"]
+    assert [t.question for t in memory.recent_turns(2)] == ["q3", "q4"]
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_over_users():
+    store = ConversationMemoryStore(capacity=2, ttl_seconds=60, max_turns=3)
+    await store.get_or_load("a")
+    await store.get_or_load("b")
+    store.get("a")  # touch a so b is least recently used
+    await store.get_or_load("c")
+
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_and_lazy_rehydration(monkeypatch):
+    backend = StubBackend([ConversationTurn("이전 질문", "이전 답변")])
+    store = ConversationMemoryStore(capacity=10, ttl_seconds=1, max_turns=3, backend=backend)
+
+    memory = await store.get_or_load("u1")
+    assert backend.loads == 1
+    assert memory.conversation_history[0].question == "이전 질문"
+
+    # Hit: no backend call
+    await store.get_or_load("u1")
+    assert backend.loads == 1
+
+    # Expire and reload
+    memory.last_accessed -= 5
+    await store.get_or_load("u1")
+    assert backend.loads == 2
+
+
+def test_turn_record_uses_slots():
+    turn = ConversationTurn("q", "a")
+    assert not hasattr(turn, "__dict__")
+
+
+def test_rolling_summary_respects_token_cap():
+    from rag.context_packer import HeuristicTokenizer
+    from rag.conversation_memory import RollingSummarizer
+
+    tokenizer = HeuristicTokenizer()
+    summarizer = RollingSummarizer(max_tokens=40, tokenizer=tokenizer)
+    summary = None
+    for i in range(20):
+        long_answer = f"답변 {i}입니다. " + "자세한 설명 " * 200
+        summary = summarizer.fold(summary, ConversationTurn(f"질문 {i}", long_answer))
+        assert tokenizer.count_tokens(summary) <= 40
+
+    # Newest turn is kept, oldest turns are dropped
+    assert "질문 19" in summary
+    assert "질문 0" not in summary
+    assert "자세한 설명 자세한 설명" not in summary
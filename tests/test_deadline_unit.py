@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.vector_search import SearchQuery, VectorSearchService
+from etl.vector_embedder import MIN_REQUEST_TIMEOUT_SECONDS, VectorEmbedder
+from monitoring.deadline import Deadline, DeadlineExceeded
+from rag.gemini_client import CircuitState, GeminiGenerationClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_deadline_caps_timeouts_and_remembers_first_stage():
+    clock = FakeClock()
+    deadline = Deadline(5, clock=clock)
+
+    assert deadline.timeout(30) == 5
+    assert deadline.timeout(2) == 2
+    assert deadline.allows_retry(1.0)
+
+    clock.now += 4.5
+    assert not deadline.allows_retry(0.5)
+    deadline.check("embedding")
+
+    clock.now += 1
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("vector_search")
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("generation")
+    assert deadline.exhausted_by == "vector_search"
+    assert deadline.snapshot()["remaining_seconds"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generation_skips_retry_that_does_not_fit():
+    model = Mock()
+    model.generate_content_async = AsyncMock(side_effect=RuntimeError("503"))
+    client = GeminiGenerationClient(model, max_attempts=3)
+    client.base_delay = 0.5
+
+    deadline = Deadline(1.2)
+    with pytest.raises(DeadlineExceeded):
+        await client.generate("p", deadline=deadline)
+
+    assert model.generate_content_async.await_count == 1
+    assert deadline.exhausted_by == "generation"
+
+
+@pytest.mark.asyncio
+async def test_generation_timeout_is_capped_to_remaining_budget():
+    async def slow_generate(prompt, generation_config=None):
+        await asyncio.sleep(10)
+
+    model = Mock()
+    model.generate_content_async = slow_generate
+    client = GeminiGenerationClient(model, timeout_seconds=30, max_attempts=3)
+
+    with pytest.raises(DeadlineExceeded):
+        await asyncio.wait_for(client.generate("p", deadline=Deadline(0.05)), timeout=2)
+    # Running out of request budget is not an upstream failure
+    assert client.breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_vector_search_stops_retrying_at_deadline():
+    session = Mock(spec=AsyncSession)
+    session.execute = AsyncMock(side_effect=OperationalError("select", {}, Exception("db down")))
+    service = VectorSearchService(session)
+    query = SearchQuery(user_id=uuid4(), query_vector=[0.01] * 768)
+
+    deadline = Deadline(0.5)
+    with pytest.raises(DeadlineExceeded):
+        await service.similarity_search(query, deadline=deadline)
+
+    assert session.execute.await_count == 1
+    assert deadline.exhausted_by == "vector_search"
+
+
+@pytest.mark.asyncio
+async def test_embedding_request_timeout_stays_positive_when_the_budget_runs_out_mid_call():
+    # Every clock read advances time: budget is left at each check, none when the timeout is computed
+    clock = FakeClock()
+
+    def ticking():
+        clock.now += 0.25
+        return clock.now
+
+    deadline = Deadline(0.6, clock=ticking)
+    timeouts = []
+
+    class FakeSession:
+        closed = False
+
+        def post(self, url, json=None, timeout=None):
+            timeouts.append(timeout)
+            raise ConnectionError("stop here")
+
+    embedder = VectorEmbedder(api_key="test-key", enable_cache=False)
+    embedder.session = FakeSession()
+
+    with pytest.raises(DeadlineExceeded):
+        await embedder.generate_embedding(f"질문 {uuid4()}", deadline=deadline)
+
+    assert timeouts[0].total == MIN_REQUEST_TIMEOUT_SECONDS
@@ -1,5 +1,5 @@
 import pytest
-from etl.document_transformer import DocumentTransformer, TransformedDocument, DocumentTransformationError
+from etl.document_transformer import DocumentTransformer, TransformedDocument, DocumentTransformationError, assign_chunk_keys
 from database.models import DocumentType
 
 
@@ -52,3 +52,29 @@ def test_thinking_skills_summary_and_levels():
     assert len(doc.summary_text) > 10
 
 
+
+
+def test_population_stats_refresh_time_does_not_change_the_content_hash():
+    dt = DocumentTransformer()
+
+    def documents(as_of):
+        query_results = {
+            "tendencyQuery": [{"Tnd1": "창의형", "Tnd2": "분석형"}],
+            "tendencyStatsQuery": [
+                {"tendency_name": "창의형", "percentage": 15.2, "stats_as_of": as_of},
+                {"tendency_name": "분석형", "percentage": 12.1, "stats_as_of": as_of},
+            ],
+            "thinkingSkillComparisonQuery": [
+                {"skill_name": "분석력", "my_score": 80, "average_score": 70, "stats_as_of": as_of},
+            ],
+        }
+        docs = dt._chunk_personality_analysis(query_results)[:1] + dt._chunk_thinking_skills(query_results)
+        assign_chunk_keys(docs)
+        return docs
+
+    before, after = documents("2026-10-01 03:00"), documents("2026-10-02 03:00")
+
+    assert [d.content_hash for d in before] == [d.content_hash for d in after]
+    assert [d.metadata["stats_as_of"] for d in after] == ["2026-10-02 03:00"] * 2
+    assert all("stats_as_of" not in d.content and "2026" not in d.summary_text for d in after)
+    assert "평균 70점 (전체 응답자 평균 기준)" in after[1].summary_text
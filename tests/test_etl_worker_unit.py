@@ -0,0 +1,136 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from etl.job_queue import ClaimedJob, ETLJobQueue
+from etl.worker import ETLWorker
+
+
+class FakeQueue:
+    """In-memory stand-in for ETLJobQueue."""
+
+    def __init__(self, job_count):
+        self.pending = [ClaimedJob(job_id=f"job-{i}", user_id="u", anp_seq=i, attempts=1) for i in range(job_count)]
+        self.cancel_requested = set()
+        self.released, self.cancelled, self.requeued, self.errors = [], [], [], []
+
+    async def recover_stale_leases(self):
+        return 0
+
+    async def claim(self, worker_id, limit):
+        claimed, self.pending = self.pending[:max(limit, 0)], self.pending[max(limit, 0):]
+        return claimed
+
+    async def heartbeat(self, job_id, worker_id):
+        return job_id in self.cancel_requested
+
+    async def release(self, job_id, worker_id, error=None):
+        self.released.append(job_id)
+        self.errors.append(error)
+
+    async def mark_cancelled(self, job_id, worker_id=None):
+        self.cancelled.append(job_id)
+
+    async def requeue(self, job_id, worker_id):
+        self.requeued.append(job_id)
+
+
+def _worker(queue, process, parallelism=2):
+    worker = ETLWorker(
+        queue=queue, parallelism=parallelism, worker_id="w1", process=process,
+        heartbeat_seconds=0.01, poll_interval_seconds=0.01
+    )
+    worker.shutdown_grace = 0.05
+    return worker
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_every_job_with_bounded_parallelism():
+    queue = FakeQueue(6)
+    active = peak = 0
+
+    async def process(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+
+    worker = _worker(queue, process)
+    run = asyncio.create_task(worker.run())
+    for _ in range(100):
+        if len(queue.released) == 6:
+            break
+        await asyncio.sleep(0.01)
+    worker.stop()
+    await run
+
+    assert sorted(queue.released) == [f"job-{i}" for i in range(6)]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_cancel_request_stops_running_job_and_shutdown_requeues_the_rest():
+    queue = FakeQueue(2)
+    queue.cancel_requested.add("job-0")
+
+    async def process(**kwargs):
+        await asyncio.sleep(10)
+
+    worker = _worker(queue, process)
+    run = asyncio.create_task(worker.run())
+    for _ in range(100):
+        if queue.cancelled:
+            break
+        await asyncio.sleep(0.01)
+    worker.stop()
+    await asyncio.wait_for(run, timeout=1)
+
+    assert queue.cancelled == ["job-0"]
+    assert queue.requeued == ["job-1"]
+    assert queue.released == []
+
+
+@pytest.mark.asyncio
+async def test_a_crashed_run_hands_its_error_to_release():
+    queue = FakeQueue(1)
+
+    async def process(**kwargs):
+        raise RuntimeError("transformer exploded")
+
+    worker = _worker(queue, process)
+    run = asyncio.create_task(worker.run())
+    for _ in range(100):
+        if queue.released:
+            break
+        await asyncio.sleep(0.01)
+    worker.stop()
+    await run
+
+    assert queue.released == ["job-0"] and queue.errors == ["transformer exploded"]
+
+
+@pytest.mark.asyncio
+async def test_release_requeues_or_fails_a_job_left_without_a_final_status():
+    statements = []
+
+    class Sessions:
+        @asynccontextmanager
+        async def __call__(self):
+            yield self
+
+        async def execute(self, stmt):
+            statements.append(stmt.compile())
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    queue = ETLJobQueue(session_factory=Sessions(), max_attempts=3)
+    await queue.release("00000000-0000-0000-0000-000000000001", "w1", error="boom")
+
+    settled, requeued, failed = statements
+    assert "status IN" in str(settled) and "status" not in settled.params
+    assert "status NOT IN" in str(requeued) and "attempts <" in str(requeued)
+    assert requeued.params["status"] == "pending"
+    assert failed.params["status"] == "failure" and failed.params["error_message"] == "boom"
+    assert all(s.params["locked_by_1"] == "w1" for s in statements)
@@ -0,0 +1,144 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+from rag.context_builder import ContextBuilder
+from rag.question_processor import (
+    ConversationContext, ProcessedQuestion, QuestionCategory, QuestionIntent, QuestionProcessor
+)
+
+
+USER_ID = str(uuid4())
+
+
+def _doc(doc_type):
+    return SimpleNamespace(
+        doc_id=uuid4(), user_id=USER_ID, doc_type=doc_type,
+        content={"name": doc_type}, summary_text=f"{doc_type} 요약"
+    )
+
+
+def _follow_up(confidence, required=("PERSONALITY_PROFILE",)):
+    return ProcessedQuestion(
+        original_text="그럼 그것의 장점은?",
+        cleaned_text="그럼 그것의 장점은?",
+        category=QuestionCategory.PERSONALITY,
+        intent=QuestionIntent.FOLLOW_UP,
+        embedding_vector=[0.1] * 768,
+        keywords=["장점"],
+        confidence_score=0.8,
+        context_from_previous="내 성격은 어때?",
+        requires_specific_docs=list(required),
+        follow_up_confidence=confidence
+    )
+
+
+def _builder(previous_docs):
+    vector_search = Mock()
+    vector_search.similarity_search = AsyncMock(return_value=[])
+    repository = Mock()
+    repository.get_documents_by_ids = AsyncMock(return_value=previous_docs)
+    return ContextBuilder(vector_search, document_repository=repository), vector_search
+
+
+@pytest.mark.asyncio
+async def test_confident_follow_up_reuses_previous_documents_without_search():
+    docs = [_doc("PERSONALITY_PROFILE"), _doc("PERSONALITY_DETAIL")]
+    builder, vector_search = _builder(docs)
+
+    retrieved = await builder._retrieve_and_rank_documents(
+        _follow_up(0.8), USER_ID, previous_doc_ids=[str(d.doc_id) for d in docs]
+    )
+
+    assert [r.document for r in retrieved] == docs
+    vector_search.similarity_search.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("confidence, required", [
+    (0.3, ("PERSONALITY_PROFILE",)),      # low follow-up confidence
+    (0.8, ("CAREER_RECOMMENDATIONS",)),   # previous documents do not cover the question
+])
+async def test_follow_up_falls_back_to_vector_search(confidence, required):
+    docs = [_doc("PERSONALITY_PROFILE")]
+    builder, vector_search = _builder(docs)
+
+    await builder._retrieve_and_rank_documents(
+        _follow_up(confidence, required), USER_ID, previous_doc_ids=[str(docs[0].doc_id)]
+    )
+
+    vector_search.similarity_search.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_follow_up_confidence_drops_on_category_change():
+    embedder = Mock()
+    embedder.generate_embedding = AsyncMock(return_value=[0.1] * 768)
+    processor = QuestionProcessor(embedder)
+    context = ConversationContext(
+        user_id=USER_ID,
+        previous_questions=["내 성격 유형 알려줘"],
+        previous_categories=[QuestionCategory.PERSONALITY],
+        current_topic=QuestionCategory.PERSONALITY,
+        conversation_depth=1
+    )
+
+    same_topic = await processor.process_question("그럼 내 성향의 특징은?", USER_ID, context)
+    new_topic = await processor.process_question("그럼 추천 직업은?", USER_ID, context)
+
+    assert same_topic.follow_up_confidence == pytest.approx(0.8)
+    assert new_topic.follow_up_confidence == pytest.approx(0.4)
+
+
+@pytest.mark.asyncio
+async def test_http_history_carries_the_last_category_into_the_shift_check():
+    from api.chat_endpoints import _conversation_context_from_history
+
+    embedder = Mock()
+    embedder.generate_embedding = AsyncMock(return_value=[0.1] * 768)
+    processor = QuestionProcessor(embedder)
+    history = [  # newest first, as loaded by the endpoint
+        SimpleNamespace(question="내 성격 유형 알려줘", question_category="personality", retrieved_doc_ids=[uuid4()]),
+        SimpleNamespace(question="안녕", question_category=None, retrieved_doc_ids=[]),
+    ]
+
+    context = _conversation_context_from_history(USER_ID, history)
+    new_topic = await processor.process_question("그럼 추천 직업은?", USER_ID, context)
+
+    assert context.current_topic == QuestionCategory.PERSONALITY
+    assert context.previous_categories == [QuestionCategory.PERSONALITY]
+    # Same oldest-to-newest order as the WebSocket context
+    assert context.previous_questions == ["안녕", "내 성격 유형 알려줘"]
+    assert new_topic.context_from_previous == "내 성격 유형 알려줘"
+    assert new_topic.follow_up_confidence == pytest.approx(0.4)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("question, searched", [
+    ("그럼 그것의 장점은?", False),   # served by the previous documents
+    ("그럼 추천 직업은?", True),      # topic changed, falls back to a search
+])
+async def test_follow_up_is_only_embedded_when_it_needs_a_search(question, searched):
+    embedder = Mock()
+    embedder.generate_embedding = AsyncMock(return_value=[0.1] * 768)
+    processor = QuestionProcessor(embedder)
+    docs = [_doc("PERSONALITY_PROFILE"), _doc("PERSONALITY_DETAIL")]
+    context = ConversationContext(
+        user_id=USER_ID,
+        previous_questions=["내 성격 유형 알려줘"],
+        previous_categories=[QuestionCategory.PERSONALITY],
+        current_topic=QuestionCategory.PERSONALITY,
+        conversation_depth=1,
+        previous_doc_ids=[str(d.doc_id) for d in docs]
+    )
+    builder, vector_search = _builder(docs)
+    builder.question_processor = processor
+
+    processed = await processor.process_question(question, USER_ID, context)
+    assert processed.embedding_vector is None
+    await builder._retrieve_and_rank_documents(processed, USER_ID, previous_doc_ids=context.previous_doc_ids)
+
+    assert embedder.generate_embedding.await_count == int(searched)
+    assert vector_search.similarity_search.await_count == (3 if searched else 0)
+    assert (processed.embedding_vector is not None) == searched
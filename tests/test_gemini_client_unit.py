@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from monitoring.deadline import Deadline, DeadlineExceeded
+from rag.gemini_client import (
+    CircuitBreaker, CircuitOpenError, CircuitState, GeminiGenerationClient
+)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    peak = 0
+    active = 0
+
+    async def fake_generate(prompt, generation_config=None):
+        nonlocal peak, active
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return "ok"
+
+    model = Mock()
+    model.generate_content_async = fake_generate
+    client = GeminiGenerationClient(model, max_concurrency=2, timeout_seconds=1, max_attempts=1)
+
+    results = await asyncio.gather(*[client.generate("p") for _ in range(8)])
+
+    assert results == ["ok"] * 8
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_rejects_without_calling_upstream():
+    model = Mock()
+    model.generate_content_async = AsyncMock(side_effect=RuntimeError("503"))
+    breaker = CircuitBreaker(window_seconds=60, min_calls=2, error_rate=0.5, cooldown_seconds=60)
+    client = GeminiGenerationClient(model, max_attempts=3, breaker=breaker)
+    client.base_delay = 0
+
+    with pytest.raises(RuntimeError):
+        await client.generate("p")
+    assert breaker.state == CircuitState.OPEN
+    calls = model.generate_content_async.await_count
+    # Retries stop as soon as the circuit opens
+    assert calls == 2
+
+    with pytest.raises(CircuitOpenError):
+        await client.generate("p")
+    assert model.generate_content_async.await_count == calls
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker(window_seconds=60, min_calls=1, error_rate=0.5, cooldown_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    assert breaker.allow_request() is True  # probe
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is False  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [asyncio.TimeoutError, asyncio.CancelledError])
+async def test_a_probe_ended_by_the_deadline_or_cancellation_frees_the_next_probe(error):
+    now = [0.0]
+    breaker = CircuitBreaker(window_seconds=60, min_calls=1, error_rate=0.5, cooldown_seconds=0)
+    breaker.record_failure()
+    client = GeminiGenerationClient(Mock(), max_attempts=1, breaker=breaker)
+
+    async def interrupted(prompt, generation_config, timeout):
+        now[0] = 10.0  # the request budget runs out while the probe waits
+        raise error()
+
+    client._generate_once = interrupted
+    expected = DeadlineExceeded if error is asyncio.TimeoutError else asyncio.CancelledError
+    with pytest.raises(expected):
+        await client.generate("p", deadline=Deadline(5, clock=lambda: now[0]))
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    async def healthy(prompt, generation_config, timeout):
+        breaker.record_success()
+        return "ok"
+
+    client._generate_once = healthy
+    assert await client.generate("p") == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_only_the_probe_call_hands_the_probe_back_when_cancelled():
+    breaker = CircuitBreaker(window_seconds=60, min_calls=1, error_rate=0.5, cooldown_seconds=0)
+    client = GeminiGenerationClient(Mock(), max_attempts=1, breaker=breaker)
+    started = asyncio.Event()
+
+    async def slow(prompt, generation_config, timeout):
+        started.set()
+        await asyncio.sleep(10)
+
+    client._generate_once = slow
+    # Admitted while the circuit was closed
+    earlier = asyncio.create_task(client.generate("p"))
+    await started.wait()
+
+    breaker.record_failure()
+    started.clear()
+    probe = asyncio.create_task(client.generate("p"))
+    await started.wait()
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    earlier.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await earlier
+    # The probe is still in flight, so no second probe is let through
+    with pytest.raises(CircuitOpenError):
+        await client.generate("p")
+
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert breaker.allow_request()
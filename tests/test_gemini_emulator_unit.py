@@ -0,0 +1,59 @@
+import pytest
+from aiohttp import web
+
+from rag.gemini_client import GeminiAPIError, GeminiGenerationClient, RestGenerativeModel
+from scripts.gemini_emulator import EmulatorConfig, GeminiEmulator, deterministic_embedding
+
+
+async def _start(emulator):
+    runner = web.AppRunner(emulator.build_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1beta"
+
+
+def test_embeddings_are_deterministic_and_normalized():
+    first = deterministic_embedding("제 성격 유형은?", 768)
+    second = deterministic_embedding("제 성격 유형은?", 768)
+    other = deterministic_embedding("추천 직업은?", 768)
+
+    assert first == second
+    assert first != other
+    assert abs(sum(v * v for v in first) - 1.0) < 1e-9
+
+
+@pytest.mark.asyncio
+async def test_rest_model_round_trip_and_error_injection():
+    emulator = GeminiEmulator(EmulatorConfig(generate_latency="fixed:0", response_chars=120))
+    runner, base_url = await _start(emulator)
+    model = RestGenerativeModel("gemini-2.0-flash", "test-key", base_url)
+    try:
+        response = await model.generate_content_async("질문", generation_config={"max_output_tokens": 10})
+        text = response.candidates[0].content.parts[0].text
+        assert 0 < len(text) <= 30
+
+        emulator.config.rate_limit_rate = 1.0
+        with pytest.raises(GeminiAPIError) as exc_info:
+            await model.generate_content_async("질문")
+        assert exc_info.value.status == 429
+    finally:
+        await model.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_closing_the_generation_client_closes_the_rest_session():
+    emulator = GeminiEmulator(EmulatorConfig(generate_latency="fixed:0", response_chars=20))
+    runner, base_url = await _start(emulator)
+    model = RestGenerativeModel("gemini-2.0-flash", "test-key", base_url)
+    client = GeminiGenerationClient(model, max_attempts=1)
+    try:
+        await client.generate("질문")
+        assert not model.session.closed
+
+        await client.aclose()
+        assert model.session.closed
+    finally:
+        await runner.cleanup()
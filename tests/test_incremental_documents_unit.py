@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.sql import Delete, Insert, Select, Update
+
+from database.repositories import upsert_chunked_documents
+from etl.document_transformer import TransformedDocument, assign_chunk_keys
+from etl.etl_orchestrator import ETLOrchestrator
+
+
+def _doc(sub_type, summary, created_at="2026-10-18T10:00:00"):
+    return TransformedDocument(
+        doc_type="THINKING_SKILLS",
+        content={"skill": sub_type},
+        summary_text=summary,
+        metadata={"sub_type": sub_type, "created_at": created_at},
+    )
+
+
+class DiffSession:
+    """Records the write statements upsert_chunked_documents issues."""
+
+    def __init__(self, existing_rows):
+        self.existing_rows = existing_rows
+        self.deleted = self.updated = self.inserted = None
+
+    async def execute(self, stmt, params=None):
+        if isinstance(stmt, Select):
+            return SimpleNamespace(all=lambda: self.existing_rows)
+        if isinstance(stmt, Delete):
+            self.deleted = stmt
+        elif isinstance(stmt, Update):
+            self.updated = params
+        elif isinstance(stmt, Insert):
+            self.inserted = params
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def test_chunk_keys_are_stable_and_hash_ignores_the_creation_time():
+    first = [_doc("skill_1", "a"), _doc("skill_1", "b"), _doc("summary", "c")]
+    second = [_doc("skill_1", "a", "later"), _doc("skill_1", "b", "later"), _doc("summary", "c", "later")]
+    assign_chunk_keys(first)
+    assign_chunk_keys(second)
+
+    assert [d.chunk_key for d in first] == ["THINKING_SKILLS:skill_1", "THINKING_SKILLS:skill_1#2", "THINKING_SKILLS:summary"]
+    assert [d.content_hash for d in first] == [d.content_hash for d in second]
+    assert first[0].content_hash != first[1].content_hash
+
+
+@pytest.mark.asyncio
+async def test_upsert_only_touches_changed_new_and_removed_chunks():
+    previous = [_doc("a", "same"), _doc("b", "old text"), _doc("gone", "removed")]
+    current = [_doc("a", "same"), _doc("b", "new text"), _doc("new", "added")]
+    assign_chunk_keys(previous)
+    assign_chunk_keys(current)
+    ids = {d.chunk_key: uuid4() for d in previous}
+    legacy_id = uuid4()
+    rows = [SimpleNamespace(doc_id=ids[d.chunk_key], chunk_key=d.chunk_key, content_hash=d.content_hash) for d in previous]
+    rows.append(SimpleNamespace(doc_id=legacy_id, chunk_key=None, content_hash=None))
+    session = DiffSession(rows)
+
+    counts = await upsert_chunked_documents(session, str(uuid4()), current)
+
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 1, "deleted": 2}
+    assert [row["doc_id"] for row in session.updated] == [ids["THINKING_SKILLS:b"]]
+    assert [row["chunk_key"] for row in session.inserted] == ["THINKING_SKILLS:new"]
+    deleted_ids = set(session.deleted.whereclause.right.value)
+    assert deleted_ids == {ids["THINKING_SKILLS:gone"], legacy_id}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_chunks_reuse_their_stored_embedding(monkeypatch):
+    docs = [_doc("a", "same"), _doc("b", "changed"), _doc("c", "dummy before")]
+    assign_chunk_keys(docs)
+    stored = {
+        "THINKING_SKILLS:a": {"doc_id": uuid4(), "content_hash": docs[0].content_hash, "embedding_vector": [0.5] * 768},
+        "THINKING_SKILLS:b": {"doc_id": uuid4(), "content_hash": "outdated", "embedding_vector": [0.5] * 768},
+        "THINKING_SKILLS:c": {"doc_id": uuid4(), "content_hash": docs[2].content_hash, "embedding_vector": [0.0] * 768},
+    }
+
+    async def fake_existing(session, user_id):
+        return stored
+
+    monkeypatch.setattr("database.repositories.get_existing_chunks", fake_existing)
+    context = SimpleNamespace(session=None, user_id=str(uuid4()), job_id="job")
+    documents = [{"metadata": d.metadata, "summary_text": d.summary_text} for d in docs]
+
+    reused, to_embed = await ETLOrchestrator()._reuse_stored_embeddings(context, documents)
+
+    assert [d["metadata"]["sub_type"] for d in reused] == ["a"]
+    assert reused[0]["embedding_vector"] == [0.5] * 768
+    assert [d["metadata"]["sub_type"] for d in to_embed] == ["b", "c"]
@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+import pytest
+
+from api.etl_endpoints import get_job_progress_stream
+from database.cache import DocumentCache
+from etl.job_events import JobEventBus, RESYNC_EVENT
+
+
+def _event(job_id="job-1", user_id="user-1", status="processing_queries", progress=10, step="Running queries"):
+    return {
+        "job_id": job_id, "user_id": user_id, "status": status,
+        "progress_percentage": progress, "current_step": step, "completed_steps": 1,
+    }
+
+
+class FakeHandler:
+    """Counts status reads; the stream must not poll between events."""
+
+    def __init__(self, status):
+        self.status = status
+        self.reads = 0
+
+    async def get_job_status(self, job_id):
+        self.reads += 1
+        return dict(self.status)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_subscribers_get_their_jobs_events_once():
+    bus = JobEventBus(subscriber_queue_size=2)
+
+    async with bus.subscribe(job_id="job-1") as job_events, bus.subscribe(user_id="user-2") as user_events:
+        bus.publish(_event())
+        bus.publish({**_event(), "progress_percentage": 10.0})
+        bus.publish(_event(job_id="job-2", user_id="user-2"))
+        bus.publish(_event(progress=40, step="Transforming documents"))
+        bus.publish(_event(progress=100, status="success", step="Completed"))
+
+        assert [e["progress_percentage"] for e in [job_events.get_nowait(), job_events.get_nowait()]] == [40, 100]
+        assert user_events.get_nowait()["job_id"] == "job-2"
+        assert job_events.empty() and user_events.empty()
+
+    assert bus.duplicates == 1
+    assert not bus._subscriptions and "job-1" not in bus._last_seen
+
+
+@pytest.mark.asyncio
+async def test_progress_stream_is_pushed_without_polling(monkeypatch):
+    bus = JobEventBus()
+    monkeypatch.setattr(JobEventBus, "_instance", bus)
+    handler = FakeHandler({**_event(status="started", progress=0, step="Starting"), "documents_created": None})
+
+    response = await get_job_progress_stream("job-1", handler)
+    received = []
+
+    async def read_stream():
+        async for chunk in response.body_iterator:
+            received.append(json.loads(chunk[len("data: "):]))
+
+    reader = asyncio.create_task(read_stream())
+    while not bus._subscriptions or not received:
+        await asyncio.sleep(0)
+    for progress in (15, 30, 45):
+        bus.publish(_event(progress=progress))
+        await asyncio.sleep(0)
+    handler.status = {**_event(status="success", progress=100, step="Completed"), "documents_created": ["d1"]}
+    bus.publish(_event(status="success", progress=100, step="Completed"))
+    await asyncio.wait_for(reader, timeout=1)
+
+    assert [e["progress_percentage"] for e in received] == [0, 15, 30, 45, 100]
+    assert received[-1]["documents_created"] == ["d1"]
+    # One read when the stream opens and one for the final result
+    assert handler.reads == 2
+
+
+@pytest.mark.asyncio
+async def test_notifications_from_other_processes_are_republished_and_reconnects_resync():
+    connections = []
+
+    async def connect():
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    bus = JobEventBus(connect=connect)
+    async with bus.subscribe(job_id="job-1") as events:
+        bus.start()
+        while not connections:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        notify = connections[0].listeners["etl_job_events"]
+        notify(connections[0], 1234, "etl_job_events", json.dumps(_event(progress=55)))
+        assert (await events.get())["progress_percentage"] == 55
+
+        connections[0].closed = True
+        # Wake the listener's idle wait so it notices the dropped connection
+        bus._stopping.set()
+        bus._stopping.clear()
+        event = await asyncio.wait_for(events.get(), timeout=10)
+        assert event == {"type": RESYNC_EVENT}
+        await bus.stop()
+
+    assert not bus.running
+
+
+@pytest.mark.asyncio
+async def test_document_change_notifications_drop_the_users_cached_documents():
+    connections = []
+
+    async def connect():
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    user_id, other_user_id = "6f1c2c1e-0000-4000-8000-000000000001", "6f1c2c1e-0000-4000-8000-000000000002"
+    cache = DocumentCache()
+    for uid in (user_id, other_user_id):
+        await cache.set_user_documents(uid, ["snapshot"])
+        await cache.set_user_corpus(uid, (10, ["doc"]))
+
+    bus = JobEventBus(connect=connect, document_cache=cache)
+    bus.start()
+    while not connections or "chat_document_changes" not in connections[0].listeners:
+        await asyncio.sleep(0)
+    notify = connections[0].listeners["chat_document_changes"]
+    notify(connections[0], 1234, "chat_document_changes", user_id)
+    while bus._invalidations:
+        await asyncio.sleep(0)
+
+    assert await cache.get_user_documents(user_id) is None
+    assert await cache.get_user_corpus(user_id) is None
+    assert await cache.get_user_documents(other_user_id) == ["snapshot"]
+    await bus.stop()
@@ -0,0 +1,99 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from etl.job_events import JobEventBus
+from etl.test_completion_handler import JobProgress, JobProgressBuffer, JobStatus, JobTracker
+
+
+class RecordingSessions:
+    def __init__(self):
+        self.executions = []
+        self.transactions = 0
+
+    @asynccontextmanager
+    async def __call__(self):
+        self.transactions += 1
+        yield self
+
+    async def execute(self, stmt, params):
+        self.executions.append((str(stmt), params))
+
+
+def _job(job_id):
+    now = datetime.now()
+    return JobProgress(
+        job_id=job_id, user_id=str(uuid4()), anp_seq=1, status=JobStatus.STARTED,
+        progress_percentage=0.0, current_step="Claimed", total_steps=7, completed_steps=0,
+        started_at=now, updated_at=now
+    )
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    sessions = RecordingSessions()
+    buffer = JobProgressBuffer(session_factory=sessions, flush_interval_ms=20)
+    bus = JobEventBus()
+    monkeypatch.setattr(JobEventBus, "_instance", bus)
+
+    async def load_job(self, job_id):
+        return _job(job_id)
+
+    monkeypatch.setattr(JobTracker, "_load_job", load_job)
+    return JobTracker(buffer), buffer, sessions, bus
+
+
+@pytest.mark.asyncio
+async def test_progress_updates_are_coalesced_into_one_batched_write(tracker):
+    job_tracker, buffer, sessions, bus = tracker
+    first, second = str(uuid4()), str(uuid4())
+
+    async with bus.subscribe(job_id=first) as events:
+        for step in range(1, 6):
+            await job_tracker.update_job(first, status="processing_queries", progress_percentage=step * 10.0, completed_steps=step)
+            await job_tracker.update_job(second, status="processing_queries", progress_percentage=step * 10.0, completed_steps=step)
+        assert events.qsize() == 5
+        assert sessions.executions == []
+        assert (await job_tracker.get_job(first)).progress_percentage == 50.0
+
+        await asyncio.sleep(0.05)
+
+    assert sessions.transactions == 1
+    (sql, params), = sessions.executions
+    assert sql.startswith("UPDATE chat_etl_jobs SET")
+    assert sorted(p["b_job_id"].hex for p in params) == sorted(job.replace("-", "") for job in (first, second))
+    assert all(p["b_progress_percentage"] == 50 and p["b_completed_steps"] == 5 for p in params)
+    assert buffer.coalesced_updates == 8
+
+
+@pytest.mark.asyncio
+async def test_terminal_statuses_are_written_at_once_with_the_pending_progress(tracker):
+    job_tracker, buffer, sessions, _ = tracker
+    job_id = str(uuid4())
+
+    await job_tracker.update_job(job_id, status="storing_documents", progress_percentage=85.0, current_step="Storing documents")
+    await job_tracker.update_job(job_id, status="failure", error_message="disk full", completed_at=datetime.now().isoformat())
+
+    (sql, params), = sessions.executions
+    assert params[0]["b_status"] == "failure"
+    assert params[0]["b_progress_percentage"] == 85 and params[0]["b_error_message"] == "disk full"
+    assert isinstance(params[0]["b_completed_at"], datetime)
+    assert job_id not in buffer.jobs and job_id not in buffer.pending
+
+    await asyncio.sleep(0.05)
+    assert len(sessions.executions) == 1
+
+
+@pytest.mark.asyncio
+async def test_discarded_progress_is_never_written(tracker):
+    job_tracker, buffer, sessions, _ = tracker
+    job_id = str(uuid4())
+
+    await job_tracker.update_job(job_id, status="generating_embeddings", progress_percentage=60.0)
+    await buffer.discard(job_id)
+    await asyncio.sleep(0.05)
+
+    assert sessions.executions == []
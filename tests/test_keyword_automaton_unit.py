@@ -0,0 +1,31 @@
+import random
+
+from rag.keyword_automaton import KeywordAutomaton, TOPIC_AUTOMATON
+
+
+def test_overlapping_keywords_match_like_substring_checks():
+    tables = {
+        "a": {"x": ["사고", "사고력", "고력"], "y": ["what", "what about", "hat"]},
+        "b": {"z": ["력", "about", "고"]},
+    }
+    automaton = KeywordAutomaton(tables)
+    rng = random.Random(7)
+    alphabet = list("사고력 whatbou") + ["What"]
+
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        hits = automaton.scan(text)
+        for group, labels in tables.items():
+            for label, keywords in labels.items():
+                expected = {k for k in keywords if k in text.lower()}
+                assert hits.labels(group).get(label, set()) == expected
+
+
+def test_scores_keep_table_order_and_topic_priority():
+    automaton = KeywordAutomaton({"category": {"first": ["능력"], "second": ["능력"], "third": ["직업"]}})
+    scores = automaton.scan("내 능력").weighted_scores("category", ["first", "second", "third"])
+
+    assert list(scores) == ["first", "second", "third"]
+    assert scores == {"first": 0.2, "second": 0.2, "third": 0.0}
+    assert TOPIC_AUTOMATON.scan("성격에 맞는 직업").topic() == "personality"
+    assert TOPIC_AUTOMATON.scan("안녕하세요").topic() == "general"
@@ -0,0 +1,59 @@
+import pytest
+from collections import Counter
+from unittest.mock import MagicMock
+
+from database.connection import db_manager
+from etl.legacy_query_executor import (
+    AptitudeTestQueries, LegacyQueryExecutor, QUERY_REGISTRY, UNIMPLEMENTED_QUERIES
+)
+
+
+@pytest.fixture
+def sql_calls(monkeypatch):
+    """Replace every registered SQL method with a stub that counts its calls."""
+    calls = Counter()
+    monkeypatch.setattr(db_manager, "get_sync_session", lambda: MagicMock())
+    for query_name, method in QUERY_REGISTRY.items():
+        def stub(self, anp_seq, _name=query_name):
+            calls[_name] += 1
+            return []
+        monkeypatch.setattr(AptitudeTestQueries, method, stub)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_each_registered_query_runs_exactly_once(sql_calls):
+    executor = LegacyQueryExecutor(max_retries=0, max_workers=4)
+    try:
+        results = await executor.execute_all_queries_async(None, 12345)
+    finally:
+        await executor.close()
+
+    assert set(results) == set(QUERY_REGISTRY)
+    assert all(result.success for result in results.values())
+    assert sql_calls == Counter({name: 1 for name in QUERY_REGISTRY})
+
+    transformer_input = await executor.get_successful_results(results)
+    assert set(transformer_input) == set(QUERY_REGISTRY) | set(UNIMPLEMENTED_QUERIES)
+
+
+@pytest.mark.asyncio
+async def test_retry_reruns_only_the_failing_query(sql_calls, monkeypatch):
+    attempts = Counter()
+
+    def flaky_duties(self, anp_seq):
+        attempts["dutiesQuery"] += 1
+        if attempts["dutiesQuery"] == 1:
+            raise RuntimeError("connection reset")
+        return [{"du_name": "설계", "du_content": "요구사항 분석", "majors": "컴퓨터공학", "jf_name": "개발", "match_rate": 90}]
+
+    monkeypatch.setattr(AptitudeTestQueries, QUERY_REGISTRY["dutiesQuery"], flaky_duties)
+    executor = LegacyQueryExecutor(max_retries=1, retry_delay=0, max_workers=4)
+    try:
+        result = await executor._execute_single_query_with_retry(None, 12345, "dutiesQuery")
+    finally:
+        await executor.close()
+
+    assert result.success and result.row_count == 1
+    assert attempts["dutiesQuery"] == 2
+    assert sum(sql_calls.values()) == 0
@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from rag.lookup_router import LookupKind, LookupRouter
+from rag.question_processor import QuestionProcessor
+
+
+DOCUMENTS = [
+    {"doc_type": "THINKING_SKILLS", "content": {"skill_name": "언어 사고력", "my_score": 82, "average_score": 70}},
+    {"doc_type": "THINKING_SKILLS", "content": {"skill_name": "수리 사고력", "my_score": 64, "average_score": 64}},
+    {"doc_type": "PERSONALITY_PROFILE", "content": {
+        "primary_tendency": {"name": "창조형", "percentage": 12.5},
+        "secondary_tendency": {"name": "분석형"},
+    }},
+    {"doc_type": "COMPETENCY_ANALYSIS", "content": {"competency": {"competency_name": "문제해결", "rank": 2, "score": 88}}},
+    {"doc_type": "COMPETENCY_ANALYSIS", "content": {"competency": {"competency_name": "창의성", "rank": 1, "score": 91}}},
+    {"doc_type": "COMPETENCY_ANALYSIS", "content": {"competency": {"competency_name": "리더십", "rank": 3, "score": 75}}},
+    {"doc_type": "CAREER_RECOMMENDATIONS", "content": {
+        "recommendation_type": "tendency",
+        "jobs": [{"job_name": "디자이너"}, {"job_name": "기획자"}, {"job_name": "연구원"}],
+    }},
+]
+
+
+@pytest.mark.parametrize("question, kind", [
+    ("내 언어 사고력 점수는?", LookupKind.SKILL_SCORE),
+    ("1순위 성향이 뭐야?", LookupKind.TENDENCY_RANK),
+    ("상위 역량 3개 알려줘", LookupKind.TOP_COMPETENCIES),
+    ("추천 직업 목록 보여줘", LookupKind.RECOMMENDED_JOBS),
+])
+def test_detects_lookup_questions(question, kind):
+    assert LookupRouter().detect(question).kind == kind
+
+
+@pytest.mark.parametrize("question", [
+    "1순위 성향이 왜 그렇게 나왔는지 설명해줘",
+    "추천 직업이 나랑 맞는 이유가 뭐야?",
+    "나는 어떤 사람이야?",
+])
+def test_explanatory_and_open_questions_fall_through(question):
+    assert LookupRouter().detect(question) is None
+
+
+def test_extractors_answer_from_document_content():
+    router = LookupRouter()
+
+    skill = router.answer(router.detect("언어 사고력 점수 알려줘"), DOCUMENTS)
+    assert "언어 사고력 점수는 82점" in skill.text and "12점 높습니다" in skill.text
+
+    rank = router.answer(router.detect("두번째 성향은?"), DOCUMENTS)
+    assert "'분석형'" in rank.text
+
+    top = router.answer(router.detect("상위 역량 두개"), DOCUMENTS)
+    assert top.text.splitlines()[1:] == ["1. 창의성 - 91점", "2. 문제해결 - 88점"]
+
+    jobs = router.answer(router.detect("추천 직업 목록"), DOCUMENTS)
+    assert jobs.doc_types == ["CAREER_RECOMMENDATIONS"] and "3. 연구원" in jobs.text
+
+
+def test_unresolved_lookups_return_none():
+    router = LookupRouter()
+
+    # Ambiguous skill and missing data both fall through to the LLM pipeline
+    assert router.answer(router.detect("사고력 점수 몇점이야"), DOCUMENTS) is None
+    assert router.answer(router.detect("3순위 성향이 뭐야"), DOCUMENTS) is None
+    assert router.answer(router.detect("추천 직업 목록"), []) is None
+
+
+@pytest.mark.asyncio
+async def test_fast_path_loads_documents_only_for_lookups():
+    processor = QuestionProcessor(vector_embedder=Mock())
+    load_documents = AsyncMock(return_value=DOCUMENTS)
+
+    assert await processor.try_lookup_fast_path("나는 어떤 사람이야?", load_documents) is None
+    load_documents.assert_not_awaited()
+
+    answer = await processor.try_lookup_fast_path("1순위 성향이 뭐야?", load_documents)
+    assert answer.kind == LookupKind.TENDENCY_RANK
+    load_documents.assert_awaited_once()
@@ -0,0 +1,92 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+
+from etl.population_stats import POPULATION_VIEWS, PopulationStats
+
+
+class FakeStatsDB:
+    """Session factory backed by an in-memory chat_population_stats_refresh table."""
+
+    def __init__(self, age_seconds, lock_free=True):
+        self.rows = {
+            view: {"view_name": view, "refreshed_at": datetime(2026, 10, 1), "row_count": 8,
+                   "duration_ms": 40, "age_seconds": age_seconds}
+            for view in POPULATION_VIEWS
+        }
+        self.lock_free = lock_free
+        self.freshness_reads = 0
+        self.refreshed = []
+
+    @asynccontextmanager
+    async def __call__(self):
+        db = self
+
+        class Result:
+            def __init__(self, rows):
+                self.rows = rows
+
+            def mappings(self):
+                return self
+
+            def all(self):
+                return self.rows
+
+        class Session:
+            async def execute(self, stmt, params=None):
+                sql = str(stmt)
+                if sql.startswith("SELECT view_name"):
+                    db.freshness_reads += 1
+                    return Result(list(db.rows.values()))
+                if sql.startswith("REFRESH MATERIALIZED VIEW CONCURRENTLY"):
+                    db.refreshed.append(sql.split()[-1])
+                elif sql.startswith("INSERT INTO chat_population_stats_refresh"):
+                    db.rows[params["view"]].update(refreshed_at=datetime(2026, 10, 18), age_seconds=0.0)
+                return Result([])
+
+            async def scalar(self, stmt):
+                sql = str(stmt)
+                if "pg_try_advisory_xact_lock" in sql:
+                    return db.lock_free
+                return 8
+
+        yield Session()
+
+
+@pytest.mark.asyncio
+async def test_freshness_is_cached_within_the_ttl():
+    db = FakeStatsDB(age_seconds=60)
+    stats = PopulationStats(db, max_staleness_seconds=3600, cache_ttl_seconds=300)
+
+    first = await stats.freshness()
+    second = await stats.freshness()
+
+    assert db.freshness_reads == 1
+    assert first["as_of"] == "2026-10-01T00:00:00"
+    assert not first["stale"]
+    assert second["age_seconds"] >= first["age_seconds"]
+
+
+@pytest.mark.asyncio
+async def test_stale_views_are_refreshed_in_the_background():
+    db = FakeStatsDB(age_seconds=7200)
+    stats = PopulationStats(db, max_staleness_seconds=3600, cache_ttl_seconds=300)
+
+    freshness = await stats.ensure_fresh()
+    assert freshness["stale"]
+    await stats._refresh_task
+
+    assert db.refreshed == list(POPULATION_VIEWS)
+    after = await stats.freshness()
+    assert not after["stale"]
+    assert after["as_of"] == "2026-10-18T00:00:00"
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_skipped_while_another_process_holds_the_lock():
+    db = FakeStatsDB(age_seconds=7200, lock_free=False)
+    stats = PopulationStats(db, max_staleness_seconds=3600, cache_ttl_seconds=300)
+
+    assert await stats.refresh() == {"skipped": True}
+    assert db.refreshed == []
@@ -0,0 +1,63 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from etl.document_transformer import template_questions
+from etl.vector_embedder import EmbeddingResult
+from rag.query_embedding_cache import QueryEmbeddingCache, canonicalize_question
+
+
+def _result(text, value=0.1):
+    return EmbeddingResult(text=text, embedding=[value] * 4, model="m", dimensions=4, processing_time=0.0)
+
+
+def _embedder(delay=0.0):
+    embedder = Mock()
+
+    async def embed(text):
+        await asyncio.sleep(delay)
+        return _result(text)
+
+    embedder.generate_embedding = AsyncMock(side_effect=embed)
+    embedder.generate_embeddings_batch = AsyncMock(side_effect=lambda texts: [_result(t) for t in texts])
+    return embedder
+
+
+def test_spacing_punctuation_and_endings_share_a_key():
+    variants = ["내성향알려줘", "내 성향 알려줘", "내 성향 알려줘?", "내  성향 알려주세요!", "내 성향 알려줘요."]
+    assert len({canonicalize_question(v) for v in variants}) == 1
+    assert canonicalize_question("내 성향 알려줘") != canonicalize_question("내 직업 알려줘")
+    # An ending is not stripped when almost nothing would be left
+    assert canonicalize_question("뭐요") == "뭐요"
+
+
+@pytest.mark.asyncio
+async def test_variants_and_concurrent_misses_use_one_embedding_call():
+    cache = QueryEmbeddingCache(capacity=10, ttl_seconds=60)
+    embedder = _embedder(delay=0.01)
+
+    first, second = await asyncio.gather(
+        cache.get_embedding(embedder, "내 성향 알려줘"),
+        cache.get_embedding(embedder, "내성향알려줘?"),
+    )
+    third = await cache.get_embedding(embedder, "내 성향 알려주세요")
+
+    assert embedder.generate_embedding.await_count == 1
+    assert not first.cached and second.cached and third.cached
+    assert third.embedding == first.embedding
+
+
+@pytest.mark.asyncio
+async def test_prewarm_embeds_each_template_once():
+    cache = QueryEmbeddingCache(capacity=100, ttl_seconds=60)
+    embedder = _embedder()
+    questions = template_questions()
+
+    added = await cache.prewarm(embedder, questions + questions)
+    assert added == len({canonicalize_question(q) for q in questions})
+    assert await cache.prewarm(embedder, questions) == 0
+
+    result = await cache.get_embedding(embedder, "내 성격 유형 알려주세요")
+    assert result.cached
+    embedder.generate_embedding.assert_not_awaited()
@@ -19,6 +19,8 @@ from rag.response_generator import (
 from rag.context_builder import ConstructedContext, RetrievedDocument, PromptTemplate
 from rag.question_processor import ProcessedQuestion, QuestionCategory, QuestionIntent, ConversationContext
 from database.models import ChatDocument
+from monitoring.deadline import Deadline, DeadlineExceeded
+from rag.admission import DegradationLevel
 
 
 class TestResponseGenerator:
@@ -183,7 +185,7 @@ class TestResponseGenerator:
         mock_candidate.content = mock_content
         mock_response.candidates = [mock_candidate]
         
-        with patch.object(response_generator.model, 'generate_content', return_value=mock_response):
+        with patch.object(response_generator.model, 'generate_content_async', AsyncMock(return_value=mock_response)):
             result = await response_generator._call_gemini_api("테스트 프롬프트")
             assert result == "테스트 응답입니다."
     
@@ -193,7 +195,7 @@ class TestResponseGenerator:
         mock_response = Mock()
         mock_response.candidates = []
         
-        with patch.object(response_generator.model, 'generate_content', return_value=mock_response):
+        with patch.object(response_generator.model, 'generate_content_async', AsyncMock(return_value=mock_response)):
             result = await response_generator._call_gemini_api("테스트 프롬프트")
             assert "죄송합니다" in result
     
@@ -338,6 +340,13 @@ class TestResponseGenerator:
         # General topic
         assert response_generator._extract_topic_from_question("안녕하세요") == "general"
     
+    def test_topic_detected_by_the_question_processor_is_reused(self, response_generator, sample_constructed_context):
+        """The processor's topic wins over a second keyword scan of the question."""
+        assert response_generator._question_topic(sample_constructed_context) == "personality"
+        
+        sample_constructed_context.context_metadata["question_topic"] = "career"
+        assert response_generator._question_topic(sample_constructed_context) == "career"
+    
     @pytest.mark.asyncio
     async def test_enhance_prompt_with_memory(self, response_generator):
         """Test prompt enhancement with conversation memory."""
@@ -426,6 +435,21 @@ class TestResponseGenerator:
             assert response.confidence_score == 0.1
             assert "문제가 있습니다" in response.content
     
+    @pytest.mark.asyncio
+    async def test_admission_queue_is_the_only_generation_limiter(self, response_generator, sample_constructed_context):
+        """The Gemini client adds no semaphore of its own behind the admission queue."""
+        assert response_generator.llm_client._semaphore is None
+        assert response_generator.llm_client.stats()["max_concurrency"] is None
+        
+        # A request deadline that runs out in the admission queue is reported as such
+        scheduler = response_generator.admission
+        for i in range(scheduler.max_active):
+            scheduler._grant(f"other-{i}", DegradationLevel.NORMAL)
+        deadline = Deadline(0.02)
+        with pytest.raises(DeadlineExceeded):
+            await response_generator.generate_response(sample_constructed_context, "user123", deadline=deadline)
+        assert deadline.exhausted_by == "admission"
+    
     @pytest.mark.asyncio
     async def test_store_conversation_turn(self, response_generator, sample_constructed_context):
         """Test storing conversation turns."""
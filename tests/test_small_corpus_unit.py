@@ -0,0 +1,59 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+from rag.context_builder import ContextBuilder, SMALL_CORPUS_CONFIG
+from rag.question_processor import QuestionProcessor
+
+
+USER_ID = uuid4()
+
+
+def _doc(doc_type, summary="요약", content=None):
+    return SimpleNamespace(
+        doc_id=uuid4(), user_id=USER_ID, doc_type=doc_type,
+        content=content or {"name": doc_type}, summary_text=summary
+    )
+
+
+def _builder(corpus):
+    vector_search = Mock()
+    vector_search.similarity_search = AsyncMock(return_value=[])
+    repository = Mock()
+    repository.get_user_corpus = AsyncMock(return_value=corpus)
+    return ContextBuilder(vector_search, document_repository=repository), vector_search, repository
+
+
+@pytest.mark.asyncio
+async def test_small_corpus_is_sent_whole_without_embedding_or_search():
+    corpus = [_doc("PERSONALITY_PROFILE", "성격 요약"), _doc("CAREER_RECOMMENDATIONS", "추천 직업 요약")]
+    builder, vector_search, _ = _builder(corpus)
+    embedder = Mock()
+    embedder.generate_embedding = AsyncMock()
+    processor = QuestionProcessor(embedder)
+
+    documents = await builder.load_small_corpus(USER_ID, document_count=2)
+    processed = await processor.process_question("추천 직업 알려줘", str(USER_ID), embed=documents is None)
+    context = await builder.build_context(processed, str(USER_ID), corpus_documents=documents)
+
+    assert documents == corpus
+    embedder.generate_embedding.assert_not_awaited()
+    vector_search.similarity_search.assert_not_awaited()
+    assert context.retrieved_documents[0].document.doc_type == "CAREER_RECOMMENDATIONS"
+    assert context.context_metadata["small_corpus"] is True
+
+
+@pytest.mark.asyncio
+async def test_large_corpora_use_vector_retrieval():
+    max_documents = SMALL_CORPUS_CONFIG['max_documents']
+
+    builder, _, repository = _builder([])
+    assert await builder.load_small_corpus(USER_ID, document_count=max_documents + 1) is None
+    repository.get_user_corpus.assert_not_awaited()
+
+    builder, _, _ = _builder([_doc("PERSONALITY_PROFILE") for _ in range(max_documents + 1)])
+    assert await builder.load_small_corpus(USER_ID) is None
+
+    builder, _, _ = _builder([_doc("PERSONALITY_PROFILE", content={"text": "가" * 20000})])
+    assert await builder.load_small_corpus(USER_ID) is None
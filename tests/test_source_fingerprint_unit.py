@@ -0,0 +1,103 @@
+from uuid import uuid4
+
+import pytest
+
+from etl import source_fingerprint
+from etl.etl_orchestrator import ETLOrchestrator
+from etl.source_fingerprint import SOURCE_TABLES, combine, fingerprint_statement
+
+
+def _rows(**overrides):
+    rows = [{"source": table, "row_count": 3, "rows_md5": "abc"} for table in SOURCE_TABLES]
+    for row in rows:
+        row.update(overrides.get(row["source"], {}))
+    return rows
+
+
+class FakeTracker:
+    def __init__(self):
+        self.updates = []
+
+    async def update_job(self, job_id, **fields):
+        self.updates.append(fields)
+
+
+class FakeSession:
+    async def rollback(self):
+        pass
+
+
+def test_fingerprint_covers_every_source_table_and_the_pipeline_version():
+    sql = fingerprint_statement()
+    assert all(f"FROM {table} t" in sql for table in SOURCE_TABLES)
+
+    base = combine(_rows(), pipeline_version="1")
+    assert combine(list(reversed(_rows())), pipeline_version="1") == base
+    assert combine(_rows(), pipeline_version="2").digest != base.digest
+    assert combine(_rows(mwd_resjob={"rows_md5": "changed"}), pipeline_version="1").digest != base.digest
+    # The test taker's name, education and job feed the documents too
+    assert {"mwd_account", "mwd_person"} <= set(SOURCE_TABLES)
+    assert combine(_rows(mwd_person={"rows_md5": "renamed"}), pipeline_version="1").digest != base.digest
+    assert not combine(_rows(mwd_score1={"row_count": 0}), pipeline_version="1").has_results
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("force", [False, True])
+async def test_unchanged_source_data_skips_the_pipeline_unless_forced(monkeypatch, force):
+    fingerprint = combine(_rows(), pipeline_version="1")
+    recorded = []
+    stages = []
+
+    async def fake_compute(session, anp_seq):
+        return fingerprint
+
+    async def fake_unchanged(session, user_id, anp_seq, fp):
+        return True
+
+    async def fake_record(session, user_id, anp_seq, fp, job_id=None):
+        recorded.append(fp)
+
+    async def fake_stage(self, context, stage, stage_func, message):
+        stages.append(stage)
+        return []
+
+    monkeypatch.setattr(source_fingerprint, "compute_fingerprint", fake_compute)
+    monkeypatch.setattr(source_fingerprint, "is_unchanged", fake_unchanged)
+    monkeypatch.setattr(source_fingerprint, "record_fingerprint", fake_record)
+    monkeypatch.setattr(ETLOrchestrator, "_execute_stage", fake_stage)
+    tracker = FakeTracker()
+
+    result = await ETLOrchestrator(precompute_answers=False).process_test_completion(
+        user_id=str(uuid4()), anp_seq=7, job_id=str(uuid4()),
+        session=FakeSession(), job_tracker=tracker, force=force
+    )
+
+    if force:
+        assert len(stages) == 7
+        assert recorded == [fingerprint]
+    else:
+        assert result["skipped"] and result["status"] == "success"
+        assert stages == [] and recorded == []
+        assert tracker.updates[-1]["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_a_failing_fingerprint_check_runs_the_full_pipeline(monkeypatch):
+    stages = []
+
+    async def broken_compute(session, anp_seq):
+        raise RuntimeError("relation mwd_resduty does not exist")
+
+    async def fake_stage(self, context, stage, stage_func, message):
+        stages.append(stage)
+        return []
+
+    monkeypatch.setattr(source_fingerprint, "compute_fingerprint", broken_compute)
+    monkeypatch.setattr(ETLOrchestrator, "_execute_stage", fake_stage)
+
+    await ETLOrchestrator(precompute_answers=False).process_test_completion(
+        user_id=str(uuid4()), anp_seq=7, job_id=str(uuid4()),
+        session=FakeSession(), job_tracker=FakeTracker()
+    )
+
+    assert len(stages) == 7
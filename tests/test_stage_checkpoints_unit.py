@@ -0,0 +1,163 @@
+import json
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from etl import source_fingerprint
+from etl.document_transformer import TransformedDocument
+from etl.etl_orchestrator import ETLContext, ETLOrchestrator, ETLStage
+from etl.stage_checkpoints import StageCheckpointStore, decode_output, encode_output
+
+
+class FakeStore:
+    def __init__(self, resume=None):
+        self.resume = resume
+        self.saved = []
+        self.cleared = False
+
+    async def save(self, user_id, anp_seq, stage, output, job_id=None, source_fingerprint=None, invalidates=()):
+        self.saved.append((stage, list(invalidates)))
+        return 1
+
+    async def load_latest(self, user_id, anp_seq, stages, source_fingerprint=None):
+        return self.resume
+
+    async def clear(self, user_id, anp_seq):
+        self.cleared = True
+
+
+class FakeTracker:
+    async def update_job(self, job_id, **fields):
+        pass
+
+
+class FakeSession:
+    async def rollback(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_fingerprint(monkeypatch):
+    monkeypatch.setitem(source_fingerprint.SOURCE_FINGERPRINT_CONFIG, "enabled", False)
+
+
+def _run(orchestrator):
+    return orchestrator.process_test_completion(
+        user_id=str(uuid4()), anp_seq=3, job_id=str(uuid4()), session=FakeSession(), job_tracker=FakeTracker()
+    )
+
+
+def test_stage_outputs_round_trip_compactly_with_their_types():
+    rows = {"tendencyQuery": [
+        {"score": Decimal("87.50"), "tested_on": date(2026, 10, 1), "at": datetime(2026, 10, 1, 9, 30), "name": "창의형"}
+    ] * 50}
+
+    payload = encode_output(rows)
+
+    assert decode_output(payload) == rows
+    assert len(payload) < len(json.dumps(rows, default=str).encode()) / 5
+
+
+@pytest.mark.asyncio
+async def test_each_expensive_stage_is_persisted_and_cleared_on_success(monkeypatch):
+    async def fake_stage(self, context, stage, stage_func, message):
+        return []
+
+    monkeypatch.setattr(ETLOrchestrator, "_execute_stage", fake_stage)
+    store = FakeStore()
+
+    await _run(ETLOrchestrator(streaming=False, precompute_answers=False, checkpoint_store=store))
+
+    assert store.saved == [
+        ("data_validation", ["document_transformation", "embedding_generation"]),
+        ("document_transformation", ["embedding_generation"]),
+        ("embedding_generation", []),
+    ]
+    assert store.cleared
+
+
+@pytest.mark.asyncio
+async def test_a_retried_job_resumes_after_the_last_persisted_stage(monkeypatch):
+    docs = [TransformedDocument("LEARNING_STYLE", {"a": 1}, "학습 스타일 요약입니다", {"chunk_key": "LEARNING_STYLE:main"})]
+    store = FakeStore(resume=("document_transformation", [asdict(doc) for doc in docs], "earlier-job"))
+    executed = []
+
+    async def fake_stage(self, context, stage, stage_func, message):
+        executed.append(stage)
+        return []
+
+    async def fake_embeddings(self, context, transformed_documents):
+        assert transformed_documents == docs
+        return []
+
+    monkeypatch.setattr(ETLOrchestrator, "_execute_stage", fake_stage)
+    monkeypatch.setattr(ETLOrchestrator, "_generate_embeddings", fake_embeddings)
+
+    await _run(ETLOrchestrator(streaming=True, precompute_answers=False, checkpoint_store=store))
+
+    assert ETLStage.QUERY_EXECUTION not in executed
+    assert ETLStage.DATA_VALIDATION not in executed
+    assert ETLStage.DOCUMENT_TRANSFORMATION not in executed
+    assert ETLStage.STREAMING not in executed
+    assert executed[1:4] == [ETLStage.EMBEDDING_GENERATION, ETLStage.DOCUMENT_STORAGE, ETLStage.COMPLETION]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error, attempts", [(RuntimeError("connection reset by peer"), 3), (KeyError("pd_kind"), 1)])
+async def test_only_transient_stage_errors_are_retried_with_the_stage_backoff(monkeypatch, error, attempts):
+    sleeps = []
+    calls = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    async def failing(context):
+        calls.append(1)
+        raise error
+
+    monkeypatch.setattr("etl.etl_orchestrator.asyncio.sleep", fake_sleep)
+    monkeypatch.setattr("etl.etl_orchestrator.random.uniform", lambda low, high: 1.0)
+    orchestrator = ETLOrchestrator(max_retries_per_stage=2, checkpoint_store=FakeStore())
+    context = ETLContext(
+        job_id="job", user_id=str(uuid4()), anp_seq=3, session=FakeSession(), job_tracker=FakeTracker(),
+        started_at=datetime.now(), checkpoints=[], rollback_data={}
+    )
+
+    with pytest.raises(type(error)):
+        await orchestrator._execute_stage(context, ETLStage.EMBEDDING_GENERATION, failing, "Generating embeddings")
+
+    assert len(calls) == attempts
+    assert sleeps == ([15.0, 30.0] if attempts == 3 else [])
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_are_not_resumed_without_a_source_fingerprint():
+    job_id = uuid4()
+    rows = [SimpleNamespace(stage="embed", payload=encode_output([1, 2]), job_id=job_id, source_fingerprint=None)]
+
+    class Sessions:
+        queries = 0
+
+        @asynccontextmanager
+        async def __call__(self):
+            yield self
+
+        async def execute(self, stmt):
+            self.queries += 1
+            return SimpleNamespace(all=lambda: rows)
+
+    sessions = Sessions()
+    store = StageCheckpointStore(session_factory=sessions)
+    user_id = str(uuid4())
+
+    assert await store.load_latest(user_id, 3, ["transform", "embed"]) is None
+    assert sessions.queries == 0
+    assert await store.load_latest(user_id, 3, ["transform", "embed"], source_fingerprint="abc") is None
+
+    rows[0].source_fingerprint = "abc"
+    assert await store.load_latest(user_id, 3, ["transform", "embed"], source_fingerprint="abc") == ("embed", [1, 2], str(job_id))
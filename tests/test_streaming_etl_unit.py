@@ -0,0 +1,126 @@
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+
+from etl.config import ETL_CONFIG
+from etl.document_transformer import TransformedDocument, assign_chunk_keys
+from etl.etl_orchestrator import ETLContext, ETLOrchestrator, ETLStage
+
+
+def _group(name, size):
+    docs = [
+        TransformedDocument("LEARNING_STYLE", {"group": name, "i": i}, f"{name} 학습 스타일 요약 {i}", {"sub_type": f"{name}_{i}"})
+        for i in range(size)
+    ]
+    assign_chunk_keys(docs)
+    return name, docs
+
+
+class SlowEmbedder:
+    calls = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def generate_document_embeddings(self, documents):
+        SlowEmbedder.calls.append(time.monotonic())
+        await asyncio.sleep(0.05)
+        return [{**doc, "embedding_vector": [0.1] * 768} for doc in documents]
+
+    async def close(self):
+        pass
+
+
+class RecordingUpsert:
+    instances = []
+
+    def __init__(self, session, user_id):
+        self.writes = []
+        self.finished_at = None
+        self.fail_on_write = False
+        RecordingUpsert.instances.append(self)
+
+    async def begin(self):
+        pass
+
+    async def write(self, documents):
+        if self.fail_on_write:
+            raise RuntimeError("disk full")
+        self.writes.append((time.monotonic(), [doc.chunk_key for doc in documents]))
+
+    async def finish(self):
+        self.finished_at = time.monotonic()
+        return {"inserted": sum(len(keys) for _, keys in self.writes), "updated": 0, "unchanged": 0, "deleted": 0}
+
+
+class FakeSession:
+    def __init__(self):
+        self.rolled_back = False
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    SlowEmbedder.calls = []
+    RecordingUpsert.instances = []
+    groups = [_group("visual", 4), _group("verbal", 4), _group("active", 4)]
+
+    async def no_stored_chunks(self, context):
+        return {}
+
+    monkeypatch.setattr(
+        "etl.etl_orchestrator.DocumentTransformer.iter_document_groups", lambda self, query_data: iter(groups)
+    )
+    monkeypatch.setattr("etl.etl_orchestrator.VectorEmbedder", SlowEmbedder)
+    monkeypatch.setattr("database.repositories.ChunkedDocumentUpsert", RecordingUpsert)
+    monkeypatch.setattr(ETLOrchestrator, "_load_stored_chunks", no_stored_chunks)
+    monkeypatch.setitem(ETL_CONFIG, "stream_store_batch_size", 2)
+    session = FakeSession()
+    context = ETLContext(
+        job_id="job", user_id=str(uuid4()), anp_seq=1, session=session, job_tracker=None,
+        started_at=None, checkpoints=[], rollback_data={}
+    )
+    return ETLOrchestrator(streaming=True, precompute_answers=True), context, session
+
+
+@pytest.mark.asyncio
+async def test_groups_are_stored_while_later_groups_are_still_embedding(streaming):
+    orchestrator, context, session = streaming
+
+    precompute_inputs, stored = await orchestrator._stream_documents(context, {})
+
+    upsert = RecordingUpsert.instances[0]
+    assert len(stored) == 12 and len(precompute_inputs) == 12
+    assert all("embedding_vector" not in doc for doc in precompute_inputs)
+    assert all(len(keys) == 2 for _, keys in upsert.writes)
+    first_write = upsert.writes[0][0]
+    assert first_write < SlowEmbedder.calls[-1]
+    assert upsert.finished_at >= upsert.writes[-1][0]
+    assert [c.stage for c in context.checkpoints] == [
+        ETLStage.DOCUMENT_TRANSFORMATION, ETLStage.EMBEDDING_GENERATION, ETLStage.DOCUMENT_STORAGE
+    ]
+    assert context.rollback_data["document_changes"]["inserted"] == 12
+    assert not session.rolled_back
+
+
+@pytest.mark.asyncio
+async def test_a_failed_batch_rolls_back_without_committing(streaming, monkeypatch):
+    orchestrator, context, session = streaming
+    original_init = RecordingUpsert.__init__
+
+    def failing_init(self, session, user_id):
+        original_init(self, session, user_id)
+        self.fail_on_write = True
+
+    monkeypatch.setattr(RecordingUpsert, "__init__", failing_init)
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        await orchestrator._stream_documents(context, {})
+
+    assert session.rolled_back
+    assert RecordingUpsert.instances[0].finished_at is None
+    assert ETLStage.DOCUMENT_STORAGE not in [c.stage for c in context.checkpoints]
@@ -48,3 +48,21 @@ async def test_vector_search_result_cache_hit(monkeypatch):
     assert mock_session.execute.await_count == 1
 
 
+
+
+@pytest.mark.asyncio
+async def test_a_driver_timeout_without_a_deadline_is_retried_like_a_db_error(monkeypatch):
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr("database.vector_search.asyncio.sleep", no_sleep)
+    mock_session = Mock(spec=AsyncSession)
+    result_obj = Mock()
+    result_obj.fetchall.return_value = []
+    mock_session.execute = AsyncMock(side_effect=[asyncio.TimeoutError(), result_obj])
+    service = VectorSearchService(mock_session)
+
+    q = SearchQuery(user_id=uuid4(), query_vector=[0.02] * 768, limit=3, similarity_threshold=0.1)
+
+    assert await service.similarity_search(q) == []
+    assert mock_session.execute.await_count == 2
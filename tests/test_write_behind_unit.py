@@ -0,0 +1,128 @@
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+import api.chat_endpoints as chat_endpoints
+from api.chat_endpoints import FeedbackRequest, submit_feedback
+from database.models import ChatConversation, ChatFeedback
+from database.write_behind import WriteBehindBuffer
+
+
+class RecordingSessions:
+    """Session factory that records (table, rows) per execute."""
+
+    def __init__(self, fail_tables=()):
+        self.executes = []
+        self.fail_tables = set(fail_tables)
+
+    @asynccontextmanager
+    async def __call__(self):
+        outer = self
+
+        class Session:
+            async def execute(self, stmt, rows):
+                if stmt.table.name in outer.fail_tables and len(rows) > 1:
+                    raise RuntimeError("batch rejected")
+                outer.executes.append((stmt.table.name, list(rows)))
+
+        yield Session()
+
+
+def _conversation(question="q"):
+    return ChatConversation(user_id=uuid4(), question=question, response="a")
+
+
+@pytest.mark.asyncio
+async def test_rows_get_ids_immediately_and_flush_as_one_insert_per_table():
+    sessions = RecordingSessions()
+    buffer = WriteBehindBuffer(sessions, flush_interval_ms=20, batch_size=50)
+    buffer.start()
+
+    conversation = await buffer.add(_conversation())
+    assert conversation.conversation_id is not None
+    assert conversation.created_at is not None
+    assert conversation.retrieved_doc_ids == []
+    for i in range(4):
+        await buffer.add(_conversation(f"q{i}"))
+    await buffer.add(ChatFeedback(conversation_id=conversation.conversation_id, user_id=conversation.user_id, rating=5))
+    assert sessions.executes == []
+
+    await asyncio.sleep(0.1)
+    assert [(table, len(rows)) for table, rows in sessions.executes] == [
+        ("chat_conversations", 5), ("chat_feedback", 1)
+    ]
+    await buffer.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_the_bounded_queue():
+    sessions = RecordingSessions()
+    buffer = WriteBehindBuffer(sessions, flush_interval_ms=10_000, batch_size=3, max_pending=3)
+    buffer.start()
+
+    # More rows than the queue holds: add waits for the writer instead of growing the queue
+    await asyncio.wait_for(asyncio.gather(*[buffer.add(_conversation()) for _ in range(10)]), timeout=1)
+    assert buffer.stats()["pending"] <= 3
+    await buffer.stop()
+
+    assert sum(len(rows) for _, rows in sessions.executes) == 10
+    assert buffer.stats()["flushed_rows"] == 10
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_row_by_row():
+    sessions = RecordingSessions(fail_tables={"chat_conversations"})
+    buffer = WriteBehindBuffer(sessions, flush_interval_ms=5, batch_size=10)
+    buffer.start()
+
+    for _ in range(3):
+        await buffer.add(_conversation())
+    await buffer.stop()
+
+    assert [len(rows) for _, rows in sessions.executes] == [1, 1, 1]
+    assert buffer.failed_rows == 0
+
+
+@pytest.mark.asyncio
+async def test_feedback_is_only_queued_for_the_users_own_conversation(monkeypatch):
+    class UnknownConversations:
+        @asynccontextmanager
+        async def __call__(self):
+            yield self
+
+        async def scalar(self, stmt):
+            return None
+
+    sessions = RecordingSessions()
+    buffer = WriteBehindBuffer(sessions, flush_interval_ms=10_000, batch_size=50)
+    buffer.start()
+    monkeypatch.setattr(WriteBehindBuffer, "_singleton_instance", buffer)
+    monkeypatch.setattr(chat_endpoints.db_manager, "get_async_session", UnknownConversations())
+
+    conversation = await buffer.add(_conversation())
+    owner, stranger = str(conversation.user_id), str(uuid4())
+
+    def feedback(user_id, conversation_id=str(conversation.conversation_id)):
+        return submit_feedback(
+            FeedbackRequest(conversation_id=conversation_id, user_id=user_id, rating=4),
+            current_user={"user_id": user_id}
+        )
+
+    # Still queued, not yet in the database
+    assert await feedback(owner) == {"status": "ok"}
+    for user_id, conversation_id in ((stranger, str(conversation.conversation_id)), (owner, str(uuid4()))):
+        with pytest.raises(HTTPException) as error:
+            await feedback(user_id, conversation_id)
+        assert error.value.status_code == 404
+    with pytest.raises(HTTPException) as error:
+        await feedback(owner, "not-a-uuid")
+    assert error.value.status_code == 400
+
+    await buffer.stop()
+    assert [(table, len(rows)) for table, rows in sessions.executes] == [
+        ("chat_conversations", 1), ("chat_feedback", 1)
+    ]
+    assert buffer.get_pending(ChatConversation.__table__, conversation.conversation_id) is None